@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+HiDock Desktop - Transport and Parsing Benchmarks
+Times the Jensen protocol hot paths (packet building, response framing, file list
+and filename parsing, end-to-end file streaming) and HTA conversion, writes the
+results as JSON and compares them against a stored baseline.
+
+Response framing is measured by replaying a USB trace: a JSON file holding the
+sequence of IN-endpoint reads ({"reads": ["<hex>", ...]}). By default the trace is
+generated with the software Jensen simulator; pass --trace to replay a capture.
+
+Usage:
+    python benchmarks/run_benchmarks.py                      # run, compare with baseline.json
+    python benchmarks/run_benchmarks.py --only file_list     # run matching benchmarks
+    python benchmarks/run_benchmarks.py --update-baseline    # store this run as the baseline
+    python benchmarks/run_benchmarks.py --fail-on-regression --tolerance 0.3
+"""
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+import usb.core  # noqa: E402
+
+from constants import CMD_TRANSFER_FILE  # noqa: E402
+from hidock_device import FileListStreamParser, HiDockJensen  # noqa: E402
+from hta_converter import HTAConverter  # noqa: E402
+from jensen_simulator import SimulatedJensenDevice, SimulatorConfig, encode_file_list  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "latest.json")
+
+BENCHMARKS = {}
+
+
+def benchmark(name, rounds=7):
+    """Register `setup() -> (run, units, unit_name)`; `run()` is timed once per round."""
+
+    def register(setup):
+        BENCHMARKS[name] = (setup, rounds)
+        return setup
+
+    return register
+
+
+def _jensen(device=None):
+    jensen = HiDockJensen(object())
+    if device is not None:
+        device.attach(jensen)
+        jensen._last_health_check = float("inf")  # no health-check round trips inside timings
+    return jensen
+
+
+# --- USB traces --------------------------------------------------------------
+
+
+class TraceReplayDevice:
+    """Replays recorded IN-endpoint reads; raises a timeout once the trace is exhausted."""
+
+    def __init__(self, reads):
+        self.reads = reads
+        self.position = 0
+
+    def read(self, endpoint, size, timeout=None):
+        if self.position >= len(self.reads):
+            raise usb.core.USBTimeoutError("Trace exhausted", errno=110)
+        data = self.reads[self.position]
+        self.position += 1
+        return data
+
+    def rewind(self):
+        self.position = 0
+
+
+def record_trace(file_size=4 * 1024 * 1024, chunk_size=16 * 1024):
+    """Capture the IN reads of one simulated file transfer."""
+    device = SimulatedJensenDevice(
+        SimulatorConfig(file_count=1, min_file_size=file_size, max_file_size=file_size, transfer_chunk_size=chunk_size)
+    )
+    recording = device.recordings[0]
+    device.write(device.ep_out.bEndpointAddress, _jensen()._build_packet(CMD_TRANSFER_FILE, recording.name.encode()))
+    reads = []
+    while True:
+        try:
+            reads.append(bytes(device.read(device.ep_in.bEndpointAddress, device.ep_in.wMaxPacketSize * 64, 0)))
+        except usb.core.USBTimeoutError:
+            return reads
+
+
+def count_packets(reads):
+    """Number of complete Jensen packets in a trace."""
+    data = b"".join(reads)
+    offset = packets = 0
+    while offset + 12 <= len(data):
+        body_len = int.from_bytes(data[offset + 8 : offset + 12], "big")
+        offset += 12 + (body_len & 0x00FFFFFF) + (body_len >> 24)
+        packets += offset <= len(data)
+    return packets
+
+
+def load_trace(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [bytes.fromhex(chunk) for chunk in json.load(f)["reads"]]
+
+
+def save_trace(path, reads):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"reads": [chunk.hex() for chunk in reads]}, f)
+
+
+TRACE_PATH = None  # set from --trace
+
+
+# --- Benchmarks --------------------------------------------------------------
+
+
+@benchmark("build_packet")
+def bench_build_packet():
+    jensen = _jensen()
+    body = b"2025May13-160405-Rec59.hda"
+    count = 20000
+
+    def run():
+        for _ in range(count):
+            jensen._build_packet(CMD_TRANSFER_FILE, body)
+
+    return run, count, "packets"
+
+
+@benchmark("receive_response_framing")
+def bench_receive_response():
+    reads = load_trace(TRACE_PATH) if TRACE_PATH else record_trace()
+    replay = TraceReplayDevice(reads)
+    jensen = _jensen()
+    jensen.device = replay
+    jensen.ep_in = SimulatedJensenDevice(SimulatorConfig(file_count=0)).ep_in
+    jensen.ep_out = jensen.ep_in
+    jensen.is_connected_flag = True
+    total = sum(len(chunk) for chunk in reads)
+    packets = count_packets(reads)
+
+    def run():
+        replay.rewind()
+        jensen.receive_buffer.clear()
+        for _ in range(packets):
+            if jensen._receive_response(0, timeout_ms=1000, streaming_cmd_id=CMD_TRANSFER_FILE) is None:
+                raise RuntimeError("trace replay lost framing")
+
+    return run, total, "bytes"
+
+
+def _file_list_chunks(file_count=5000, chunk_size=4096):
+    device = SimulatedJensenDevice(SimulatorConfig(file_count=file_count))
+    payload = encode_file_list(device.recordings)
+    return [payload[i : i + chunk_size] for i in range(0, len(payload), chunk_size)]
+
+
+@benchmark("parse_file_list_chunks")
+def bench_parse_file_list_chunks():
+    jensen = _jensen()
+    chunks = _file_list_chunks()
+    return lambda: jensen._parse_file_list_chunks(chunks), 5000, "entries"
+
+
+@benchmark("file_list_stream_parser")
+def bench_file_list_stream_parser():
+    jensen = _jensen()
+    chunks = _file_list_chunks()
+
+    def run():
+        parser = FileListStreamParser(jensen._build_file_list_entry)
+        for chunk in chunks:
+            parser.feed(chunk)
+
+    return run, 5000, "entries"
+
+
+@benchmark("parse_filename_datetime")
+def bench_parse_filename_datetime():
+    jensen = _jensen()
+    names = [r.name for r in SimulatedJensenDevice(SimulatorConfig(file_count=5000)).recordings]
+    names += [f"20250513{i % 24:02d}{i % 60:02d}00REC{i:03d}.wav" for i in range(1000)]
+
+    def run():
+        for name in names:
+            jensen._parse_filename_datetime(name)
+
+    return run, len(names), "names"
+
+
+@benchmark("stream_file_end_to_end", rounds=5)
+def bench_stream_file():
+    size = 16 * 1024 * 1024
+    device = SimulatedJensenDevice(SimulatorConfig(file_count=1, min_file_size=size, max_file_size=size))
+    jensen = _jensen(device)
+    name = device.recordings[0].name
+
+    def run():
+        status = jensen.stream_file(name, size, lambda chunk: None)
+        if status != "OK":
+            raise RuntimeError(f"stream_file returned {status}")
+
+    return run, size, "bytes"
+
+
+@benchmark("hta_conversion", rounds=5)
+def bench_hta_conversion():
+    workdir = tempfile.mkdtemp(prefix="hidock_bench_")
+    atexit.register(shutil.rmtree, workdir, True)
+    source = os.path.join(workdir, "bench.hda")
+    target = os.path.join(workdir, "bench.wav")
+    size = 8 * 1024 * 1024
+    with open(source, "wb") as f:
+        f.write(SimulatedJensenDevice(SimulatorConfig(file_count=1)).recordings[0].read(0, 64 * 1024) * (size // 65536))
+    converter = HTAConverter()
+
+    def run():
+        if converter.convert_hta_to_wav(source, target) is None:
+            raise RuntimeError("conversion failed")
+
+    return run, size, "bytes"
+
+
+# --- Runner ------------------------------------------------------------------
+
+
+def run_benchmark(name, quick=False):
+    setup, rounds = BENCHMARKS[name]
+    run, units, unit_name = setup()
+    run()  # warm-up
+    timings = []
+    for _ in range(1 if quick else rounds):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {
+        "median_s": median,
+        "min_s": min(timings),
+        "rounds": len(timings),
+        "units": units,
+        "unit": unit_name,
+        "units_per_s": units / median if median else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return {name: ratio} and the names slower than baseline by more than `tolerance`."""
+    ratios, regressions = {}, []
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference or not reference.get("median_s"):
+            continue
+        ratio = result["median_s"] / reference["median_s"]
+        ratios[name] = ratio
+        if ratio > 1.0 + tolerance:
+            regressions.append(name)
+    return ratios, regressions
+
+
+def main():
+    global TRACE_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="One timed round per benchmark")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run to the baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    parser.add_argument("--trace", help="Replay this recorded trace for receive_response_framing")
+    parser.add_argument("--save-trace", help="Write the generated transfer trace to this path and exit")
+    args = parser.parse_args()
+
+    if args.save_trace:
+        save_trace(args.save_trace, record_trace())
+        print(f"Trace written to {args.save_trace}")
+        return 0
+    TRACE_PATH = args.trace
+
+    names = [n for n in BENCHMARKS if not args.only or args.only in n]
+    results = {}
+    for name in names:
+        results[name] = run_benchmark(name, quick=args.quick)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    ratios, regressions = compare(results, baseline, args.tolerance)
+
+    print(f"{'benchmark':<28} {'median':>10} {'throughput':>22} {'vs baseline':>12}")
+    for name, result in results.items():
+        rate = f"{result['units_per_s']:,.0f} {result['unit']}/s" if result["units_per_s"] else "-"
+        ratio = f"{ratios[name]:.2f}x" if name in ratios else "-"
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<28} {result['median_s'] * 1000:8.2f}ms {rate:>22} {ratio:>12}{flag}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "trace": args.trace,
+        },
+        "results": results,
+        "baseline_ratio": ratios,
+        "regressions": regressions,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": report["meta"], "results": results}, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+
+    if regressions:
+        print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
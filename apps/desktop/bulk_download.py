@@ -2,20 +2,35 @@
 """
 HiDock Bulk Download Utility
 
-Downloads ALL recordings from a HiDock device to the specified folder.
+Downloads ALL recordings from every connected HiDock device to the specified folder.
 Designed for reliability - retries failed downloads and tracks progress.
 
+- Each output folder keeps a manifest of completed files (name, length and
+  the device's signature), so files already offloaded are skipped without
+  asking the device for them again. Downloads in progress are recorded too:
+  an incomplete file whose record still matches the device's listing is
+  resumed with partial reads, anything else is downloaded again from the start.
+- Every device is offloaded into its own subfolder named after its serial
+  number, so the layout does not depend on how many devices are connected.
+  Several connected devices are offloaded in parallel, one worker per device.
+- The run ends with a per-device and aggregate throughput and failure report.
+
 Usage:
     python bulk_download.py [--output-dir PATH] [--retry-count N]
 """
 
 import argparse
+import json
 import os
 import platform
 import sys
+import threading
 import time
+import zlib
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Dict, List, Optional
 
 # Add src directory to path for imports
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,8 +38,10 @@ src_dir = os.path.join(script_dir, "src")
 sys.path.insert(0, src_dir)
 
 import usb.backend.libusb1
-from constants import DEFAULT_VENDOR_ID, HIDOCK_PRODUCT_IDS
+import usb.core
+from constants import ALL_VENDOR_IDS, HIDOCK_PRODUCT_IDS
 from hidock_device import HiDockJensen
+from transfer_policy import stream_with_retry
 
 
 def init_usb_backend():
@@ -72,7 +89,25 @@ def init_usb_backend():
 
 
 # Default download directory (same as Electron app)
-DEFAULT_DOWNLOAD_DIR = r"C:\Users\Sebastian\HiDock\recordings"
+DEFAULT_DOWNLOAD_DIR = Path.home() / "HiDock" / "recordings"
+
+MANIFEST_NAME = ".hidock_manifest.json"
+MANIFEST_VERSION = 1
+AUDIO_EXTENSIONS = (".wav", ".hda")
+CRC_READ_SIZE = 1024 * 1024
+
+Log = Callable[[str], None]
+_print_lock = threading.Lock()
+
+
+def make_log(prefix: str = "") -> Log:
+    """Return a print function that is safe to call from several device workers."""
+
+    def log(message: str):
+        with _print_lock:
+            print(f"{prefix}{message}", flush=True)
+
+    return log
 
 
 def format_size(bytes_val: int) -> str:
@@ -94,283 +129,522 @@ def format_duration(seconds: float) -> str:
     return f"{minutes}:{secs:02d}"
 
 
-def download_file(device: HiDockJensen, file_info: dict, output_dir: Path, retry_count: int = 3) -> tuple[bool, str]:
+class DownloadManifest:
+    """
+    Completed downloads of one output folder, kept as JSON next to the recordings.
+
+    Each entry records the file length and the signature the device reported
+    for it, so a later run can tell a file it already has from a different
+    recording that reuses the name. Downloads in progress are kept apart in
+    `partial` with the same fields, so an interrupted file can be resumed.
+    """
+
+    def __init__(self, output_dir: Path, log: Log = print):
+        self.path = Path(output_dir) / MANIFEST_NAME
+        self.entries: Dict[str, dict] = {}
+        self.partial: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._log = log
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = dict(data["files"])
+            self.partial = dict(data.get("partial", {}))
+        except FileNotFoundError:
+            self.entries, self.partial = {}, {}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            self._log(f"  Warning: ignoring unreadable manifest {self.path}: {e}")
+            self.entries, self.partial = {}, {}
+
+    def save(self):
+        """Write the manifest atomically, so an interrupted run never leaves it truncated."""
+        with self._lock:
+            data = {
+                "version": MANIFEST_VERSION,
+                "updated_at": datetime.now().isoformat(),
+                "files": self.entries,
+                "partial": self.partial,
+            }
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def record(self, file_info: dict, device_serial: str):
+        with self._lock:
+            self.partial.pop(file_info["name"], None)
+            self.entries[file_info["name"]] = {
+                "length": file_info["length"],
+                "signature": file_info.get("signature", ""),
+                "device": device_serial,
+                "completed_at": datetime.now().isoformat(timespec="seconds"),
+            }
+
+    def record_partial(self, file_info: dict, device_serial: str):
+        """Note that `file_info` is being downloaded, so an interrupted download can be resumed."""
+        with self._lock:
+            self.partial[file_info["name"]] = {
+                "length": file_info["length"],
+                "signature": file_info.get("signature", ""),
+                "device": device_serial,
+                "started_at": datetime.now().isoformat(timespec="seconds"),
+            }
+
+    def forget(self, name: str):
+        with self._lock:
+            self.entries.pop(name, None)
+            self.partial.pop(name, None)
+
+    def can_resume(self, file_info: dict, local_size: int) -> bool:
+        """True if an incomplete local file was started for this very recording (same length and signature)."""
+        entry = self.partial.get(file_info["name"])
+        return (
+            entry is not None
+            and 0 < local_size < file_info["length"]
+            and entry.get("length") == file_info["length"]
+            and entry.get("signature") == file_info.get("signature", "")
+        )
+
+    def classify(self, file_info: dict, local_path: Path) -> str:
+        """
+        Decide what to do with one file listed by the device, without asking the device for it.
+
+        Returns:
+            "complete" - recorded in the manifest and present with the right size
+            "adopt" - present with the right size but not recorded (e.g. from an older run)
+            "stale" - recorded for a different recording of the same name
+            "download" - missing or incomplete
+        """
+        local_size = local_path.stat().st_size if local_path.exists() else None
+        entry = self.entries.get(file_info["name"])
+        if entry is None:
+            return "adopt" if local_size == file_info["length"] else "download"
+        signature = file_info.get("signature", "")
+        if entry.get("length") != file_info["length"] or (
+            signature and entry.get("signature") and entry["signature"] != signature
+        ):
+            return "stale"
+        return "complete" if local_size == file_info["length"] else "download"
+
+
+def plan_downloads(
+    files: List[dict], output_dir: Path, manifest: DownloadManifest, device_serial: str, log: Log = print
+) -> tuple[List[dict], int]:
     """
-    Download a single file with retry logic.
+    Split the device's files into those still to download and those already offloaded.
+
+    Files present with the right size but missing from the manifest are adopted
+    into it; local copies of a different recording with the same name are removed.
 
-    Returns: (success: bool, error_message: str or None)
+    Returns: (files to download, number of files skipped)
+    """
+    to_download = []
+    skipped = 0
+    changed = False
+    for file_info in files:
+        local_path = output_dir / file_info["name"]
+        state = manifest.classify(file_info, local_path)
+        if state in ("complete", "adopt"):
+            if state == "adopt":
+                manifest.record(file_info, device_serial)
+                changed = True
+            skipped += 1
+            continue
+        if state == "stale":
+            log(f"  {file_info['name']} changed on the device since it was downloaded; downloading it again")
+            manifest.forget(file_info["name"])
+            changed = True
+            if local_path.exists():
+                local_path.unlink()
+        to_download.append(file_info)
+    if changed:
+        manifest.save()
+    return to_download, skipped
+
+
+def _file_crc32(path: Path) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CRC_READ_SIZE), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def download_file(
+    device: HiDockJensen,
+    file_info: dict,
+    output_dir: Path,
+    retry_count: int = 3,
+    log: Log = print,
+    manifest: Optional[DownloadManifest] = None,
+    device_serial: str = "unknown",
+) -> tuple[bool, Optional[str], int]:
+    """
+    Download a single file, retrying after link failures.
+
+    With a manifest, the download is recorded as in progress before it starts.
+    An incomplete file whose in-progress record matches the listed length and
+    signature is resumed from its current size with partial reads. Any other
+    incomplete file may belong to a different recording with the same name,
+    so it is removed and the file is downloaded from the start. A failed
+    download keeps its partial file for the next run only if the manifest
+    records it and the received bytes were not found to differ.
+
+    Returns: (success: bool, error_message: str or None, bytes transferred: int)
     """
     filename = file_info["name"]
     file_size = file_info["length"]
     output_path = output_dir / filename
 
     # Skip if already downloaded and correct size
+    offset = 0
     if output_path.exists():
         existing_size = output_path.stat().st_size
         if existing_size == file_size:
-            return True, "already_exists"
+            return True, "already_exists", 0
+        if manifest is not None and manifest.can_resume(file_info, existing_size):
+            offset = existing_size
+            log(f"    Resuming incomplete file at {format_size(offset)} of {format_size(file_size)}")
         else:
-            print(f"    Removing incomplete file ({format_size(existing_size)} vs {format_size(file_size)})")
+            log(f"    Removing incomplete file ({format_size(existing_size)} vs {format_size(file_size)})")
             output_path.unlink()
 
-    for attempt in range(1, retry_count + 1):
-        try:
-            bytes_received = [0]
-            last_progress = [0]
-
-            # Open file for writing
-            with open(output_path, "wb") as f:
-
-                def data_callback(chunk: bytes):
-                    f.write(chunk)
-                    bytes_received[0] += len(chunk)
-
-                def progress_callback(received: int, total: int):
-                    progress = int((received / total) * 100) if total > 0 else 0
-                    if progress >= last_progress[0] + 10:  # Update every 10%
-                        print(f"    Progress: {progress}% ({format_size(received)} / {format_size(total)})")
-                        last_progress[0] = progress
-
-                status = device.stream_file(
-                    filename=filename,
-                    file_length=file_size,
-                    data_callback=data_callback,
-                    progress_callback=progress_callback,
-                    timeout_s=300,  # 5 minutes per file max
-                )
-
-            if status == "OK":
-                # Verify file size
-                actual_size = output_path.stat().st_size
-                if actual_size == file_size:
-                    return True, None
-                else:
-                    print(f"    Size mismatch: expected {file_size}, got {actual_size}")
-                    output_path.unlink()
-                    if attempt < retry_count:
-                        print(f"    Retrying... (attempt {attempt + 1}/{retry_count})")
-                        time.sleep(2)
-                        continue
-                    return False, f"Size mismatch after {retry_count} attempts"
-            else:
-                print(f"    Transfer failed with status: {status}")
-                if output_path.exists():
-                    output_path.unlink()
-                if attempt < retry_count:
-                    print(f"    Retrying... (attempt {attempt + 1}/{retry_count})")
-                    time.sleep(2)
-                    continue
-                return False, f"Transfer failed: {status}"
-
-        except Exception as e:
-            print(f"    Error: {e}")
-            if output_path.exists():
-                try:
-                    output_path.unlink()
-                except:
-                    pass
-            if attempt < retry_count:
-                print(f"    Retrying... (attempt {attempt + 1}/{retry_count})")
-                time.sleep(2)
-                continue
-            return False, str(e)
+    if manifest is not None and offset == 0:
+        manifest.record_partial(file_info, device_serial)
+        manifest.save()
 
-    return False, "Max retries exceeded"
+    def discard():
+        output_path.unlink(missing_ok=True)
+        if manifest is not None:
+            manifest.forget(filename)
+            manifest.save()
 
+    last_progress = [0]
+    transferred = [0]
 
-def main():
-    parser = argparse.ArgumentParser(description="Download all recordings from HiDock device")
-    parser.add_argument(
-        "--output-dir", "-o", default=DEFAULT_DOWNLOAD_DIR, help=f"Output directory (default: {DEFAULT_DOWNLOAD_DIR})"
-    )
-    parser.add_argument("--retry-count", "-r", type=int, default=3, help="Number of retries per file (default: 3)")
-    parser.add_argument(
-        "--skip-existing", "-s", action="store_true", help="Skip files that already exist with correct size"
-    )
-    args = parser.parse_args()
-
-    output_dir = Path(args.output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    print("=" * 60)
-    print("HiDock Bulk Download Utility")
-    print("=" * 60)
-    print(f"Output directory: {output_dir}")
-    print(f"Retry count: {args.retry_count}")
-    print()
-
-    # Initialize USB backend
-    print("Initializing USB backend...")
     try:
-        backend = init_usb_backend()
+        # The CRC of the bytes already on disk lets a restarted stream be checked against them
+        offset_crc = _file_crc32(output_path) if offset else 0
+        with open(output_path, "ab" if offset else "wb") as f:
+
+            def write(chunk: bytes):
+                f.write(chunk)
+                transferred[0] += len(chunk)
+
+            def progress_callback(received: int, total: int):
+                progress = int((received / total) * 100) if total > 0 else 0
+                if progress >= last_progress[0] + 10:  # Update every 10%
+                    log(f"    Progress: {progress}% ({format_size(received)} / {format_size(total)})")
+                    last_progress[0] = progress
+
+            # Timeouts and stall detection scale with the file size and the measured link speed
+            status = stream_with_retry(
+                device,
+                filename,
+                file_size,
+                write,
+                progress_callback=progress_callback,
+                policy=device.transfer_policy,
+                max_retries=max(0, retry_count - 1),
+                offset=offset,
+                offset_crc=offset_crc,
+            )
     except Exception as e:
-        print(f"ERROR: {e}")
-        return 1
-
-    # Initialize device
-    print("Initializing device connection...")
-    device = HiDockJensen(backend)
-
-    # Try to connect with different product IDs
-    connected = False
-    for pid in HIDOCK_PRODUCT_IDS:
-        print(f"  Trying PID 0x{pid:04X}...")
-        success, error = device.connect(
-            target_interface_number=0, vid=DEFAULT_VENDOR_ID, pid=pid, auto_retry=True, force_reset=False
-        )
-        if success:
-            print(f"  Connected! (PID: 0x{pid:04X})")
-            connected = True
-            break
-        else:
-            if error and "not found" not in error.lower():
-                print(f"    Error: {error}")
+        log(f"    Error: {e}")
+        discard()
+        return False, str(e), transferred[0]
+
+    if status != "OK":
+        log(f"    Transfer failed with status: {status}")
+        if manifest is None or status == "fail_data_mismatch":
+            discard()
+        return False, f"Transfer failed: {status}", transferred[0]
+
+    # Verify file size
+    actual_size = output_path.stat().st_size
+    if actual_size != file_size:
+        log(f"    Size mismatch: expected {file_size}, got {actual_size}")
+        discard()
+        return False, f"Size mismatch: expected {file_size}, got {actual_size}", transferred[0]
+    return True, None, transferred[0]
+
+
+@dataclass
+class DeviceReport:
+    """Outcome of offloading one device."""
+
+    label: str
+    serial: str = "unknown"
+    output_dir: Optional[Path] = None
+    files_on_device: int = 0
+    downloaded: int = 0
+    skipped: int = 0
+    verified: int = 0
+    bytes_downloaded: int = 0
+    transfer_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+    failed: List[tuple] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_downloaded / self.transfer_seconds if self.transfer_seconds > 0 else 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None and not self.failed and self.verified == self.files_on_device
+
+
+def offload_device(
+    device: HiDockJensen,
+    output_dir: Path,
+    device_serial: str,
+    retry_count: int = 3,
+    log: Log = print,
+    label: Optional[str] = None,
+) -> DeviceReport:
+    """Download every recording of a connected device that `output_dir` does not have yet."""
+    report = DeviceReport(label=label or device_serial, serial=device_serial, output_dir=output_dir)
+    start_time = time.monotonic()
+    output_dir.mkdir(parents=True, exist_ok=True)
 
-    if not connected:
-        print("\nERROR: Could not connect to HiDock device.")
-        print("Make sure:")
-        print("  1. The device is connected via USB")
-        print("  2. No other application is using it (close Electron app)")
-        print("  3. libusb drivers are installed")
-        return 1
+    log("Fetching file list...")
+    result = device.list_files_with_retry(timeout_s=60)  # Longer timeout for many files
+    files = result.get("files", [])
+    if not files and result.get("error"):
+        report.error = f"Failed to list files: {result['error']}"
+        log(f"ERROR: {report.error}")
+        report.elapsed_seconds = time.monotonic() - start_time
+        return report
+    if result.get("incomplete"):
+        log(f"WARNING: file list incomplete ({len(files)}/{result.get('expected', '?')} files); run again for the rest")
+
+    total_size = sum(f.get("length", 0) for f in files)
+    total_duration = sum(f.get("duration", 0) for f in files)
+    log(f"Found {len(files)} files ({format_size(total_size)} total, {format_duration(total_duration)} of audio)")
 
-    # Get device info
-    try:
-        info = device.get_device_info()
-        if info:
-            print(f"\nDevice: {info.get('model', 'Unknown')}")
-            print(f"Serial: {info.get('serial_number', 'Unknown')}")
-            print(f"Firmware: {info.get('firmware_version', 'Unknown')}")
-    except Exception as e:
-        print(f"Could not get device info: {e}")
+    audio_files = [f for f in files if f["name"].lower().endswith(AUDIO_EXTENSIONS)]
+    report.files_on_device = len(audio_files)
 
-    # List files
-    print("\nFetching file list...")
-    try:
-        result = device.list_files(timeout_s=60)  # Longer timeout for many files
-        files = result.get("files", [])
-        total_files = result.get("totalFiles", len(files))
-        total_size = result.get("totalSize", sum(f.get("length", 0) for f in files))
-    except Exception as e:
-        print(f"ERROR: Failed to list files: {e}")
-        device.disconnect()
-        return 1
+    manifest = DownloadManifest(output_dir, log)
+    to_download, report.skipped = plan_downloads(audio_files, output_dir, manifest, device_serial, log)
+    log(f"Already downloaded: {report.skipped}")
+    log(f"To download: {len(to_download)}")
 
-    if not files:
-        print("No files found on device.")
-        device.disconnect()
-        return 0
-
-    print(f"\nFound {total_files} files ({format_size(total_size)} total)")
-
-    # Calculate total duration
-    total_duration = sum(f.get("duration", 0) for f in files)
-    print(f"Total recording time: {format_duration(total_duration)}")
+    for i, file_info in enumerate(to_download):
+        filename = file_info["name"]
+        log(f"[{i+1}/{len(to_download)}] {filename}")
+        log(
+            f"    Size: {format_size(file_info['length'])}, "
+            f"Duration: {format_duration(file_info.get('duration', 0))}"
+        )
 
-    # Filter to .wav and .hda files
-    wav_files = [f for f in files if f["name"].lower().endswith((".wav", ".hda"))]
-    print(f"Audio files to download: {len(wav_files)}")
+        started = time.monotonic()
+        success, error, transferred = download_file(
+            device, file_info, output_dir, retry_count, log, manifest=manifest, device_serial=device_serial
+        )
+        report.transfer_seconds += time.monotonic() - started
+        report.bytes_downloaded += transferred
 
-    # Check what already exists
-    existing_count = 0
-    to_download = []
-    for f in wav_files:
-        output_path = output_dir / f["name"]
-        if output_path.exists() and output_path.stat().st_size == f["length"]:
-            existing_count += 1
+        if success:
+            manifest.record(file_info, device_serial)
+            manifest.save()
+            if error == "already_exists":
+                log("    SKIPPED (already exists)")
+                report.skipped += 1
+            else:
+                log("    DONE")
+                report.downloaded += 1
         else:
-            to_download.append(f)
-
-    print(f"Already downloaded: {existing_count}")
-    print(f"To download: {len(to_download)}")
+            log(f"    FAILED: {error}")
+            report.failed.append((filename, error))
+            if not device.is_connected():
+                report.error = "Device disconnected"
+                log("ERROR: device disconnected; stopping")
+                break
+
+    # Verify against the listing: recorded in the manifest and present with the right size
+    for file_info in audio_files:
+        output_path = output_dir / file_info["name"]
+        if manifest.classify(file_info, output_path) == "complete":
+            report.verified += 1
+        elif output_path.exists():
+            log(f"  Not verified: {file_info['name']}")
+
+    report.elapsed_seconds = time.monotonic() - start_time
+    log(
+        f"Finished: {report.downloaded} downloaded, {report.skipped} skipped, {len(report.failed)} failed, "
+        f"verified {report.verified}/{report.files_on_device}"
+    )
+    return report
 
-    if not to_download:
-        print("\nAll files already downloaded!")
-        device.disconnect()
-        return 0
 
-    # Download files
-    print("\n" + "=" * 60)
-    print("Starting downloads...")
-    print("=" * 60)
+def find_devices(backend) -> List[dict]:
+    """List the attached HiDock devices as dicts with vid, pid, bus and address."""
+    devices = usb.core.find(
+        find_all=True,
+        backend=backend,
+        custom_match=lambda dev: dev.idVendor in ALL_VENDOR_IDS and dev.idProduct in HIDOCK_PRODUCT_IDS,
+    )
+    return [
+        {"vid": dev.idVendor, "pid": dev.idProduct, "bus": dev.bus, "address": dev.address} for dev in devices or []
+    ]
 
-    downloaded = 0
-    failed = []
-    skipped = 0
-    start_time = time.time()
 
-    for i, file_info in enumerate(to_download):
-        filename = file_info["name"]
-        file_size = file_info["length"]
-        duration = file_info.get("duration", 0)
+def offload_attached_device(
+    backend, usb_device: dict, output_root: Path, retry_count: int, log: Log = print
+) -> DeviceReport:
+    """
+    Connect to one attached device, offload it into `output_root/<serial>` and disconnect.
 
-        print(f"\n[{i+1}/{len(to_download)}] {filename}")
-        print(f"    Size: {format_size(file_size)}, Duration: {format_duration(duration)}")
+    This is the worker run for each device.
+    """
+    label = f"bus {usb_device['bus']} address {usb_device['address']}"
+    device = HiDockJensen(backend)
+    success, error = device.connect(
+        target_interface_number=0,
+        vid=usb_device["vid"],
+        pid=usb_device["pid"],
+        auto_retry=True,
+        force_reset=False,
+        usb_address=(usb_device["bus"], usb_device["address"]),
+    )
+    if not success:
+        log(f"ERROR: Could not connect: {error}")
+        return DeviceReport(label=label, error=f"Could not connect: {error}")
 
-        success, error = download_file(device, file_info, output_dir, args.retry_count)
+    try:
+        info = device.get_device_info() or {}
+        serial = info.get("sn") or f"{usb_device['bus']}-{usb_device['address']}"
+        log(f"Connected: {device.model}, serial {serial}, firmware {info.get('versionCode', 'unknown')}")
+        return offload_device(device, output_root / serial, serial, retry_count, log, label=label)
+    except Exception as e:
+        log(f"ERROR: {e}")
+        return DeviceReport(label=label, error=str(e))
+    finally:
+        device.disconnect()
 
-        if success:
-            if error == "already_exists":
-                print("    SKIPPED (already exists)")
-                skipped += 1
-            else:
-                print("    DONE")
-                downloaded += 1
-        else:
-            print(f"    FAILED: {error}")
-            failed.append((filename, error))
 
-    # Summary
-    elapsed = time.time() - start_time
+def print_report(reports: List[DeviceReport], wall_seconds: float, output_root: Path) -> int:
+    """Print the per-device and aggregate summary; returns the process exit code."""
     print("\n" + "=" * 60)
     print("Download Summary")
     print("=" * 60)
-    print(f"Downloaded: {downloaded} files")
-    print(f"Skipped (existing): {skipped} files")
-    print(f"Failed: {len(failed)} files")
-    print(f"Time elapsed: {format_duration(elapsed)}")
+    for report in reports:
+        print(f"{report.serial} ({report.label})")
+        if report.output_dir is not None:
+            print(f"  Folder: {report.output_dir}")
+        print(
+            f"  Downloaded: {report.downloaded}, Skipped: {report.skipped}, Failed: {len(report.failed)}, "
+            f"Verified: {report.verified}/{report.files_on_device}"
+        )
+        print(
+            f"  Transferred {format_size(report.bytes_downloaded)} in {format_duration(report.elapsed_seconds)} "
+            f"({format_size(report.bytes_per_second)}/s while transferring)"
+        )
+        if report.error:
+            print(f"  ERROR: {report.error}")
+
+    total_bytes = sum(r.bytes_downloaded for r in reports)
+    failed = [(r.serial, filename, error) for r in reports for filename, error in r.failed]
+    failed += [(r.serial, "-", r.error) for r in reports if r.error]
+    print("-" * 60)
+    print(f"Devices: {len(reports)}")
+    print(f"Downloaded: {sum(r.downloaded for r in reports)} files")
+    print(f"Skipped (existing): {sum(r.skipped for r in reports)} files")
+    print(f"Failed: {sum(len(r.failed) for r in reports)} files")
+    print(f"Transferred: {format_size(total_bytes)} in {format_duration(wall_seconds)}")
+    aggregate_rate = total_bytes / wall_seconds if wall_seconds > 0 else 0.0
+    print(f"Aggregate throughput: {format_size(aggregate_rate)}/s")
 
     if failed:
-        print("\nFailed files:")
-        for filename, error in failed:
-            print(f"  - {filename}: {error}")
+        print("\nFailures:")
+        for serial, filename, error in failed:
+            print(f"  - {serial} {filename}: {error}")
 
         # Write failed files to a log
-        failed_log = output_dir / "failed_downloads.txt"
+        failed_log = output_root / "failed_downloads.txt"
         with open(failed_log, "w") as f:
             f.write(f"Failed downloads - {datetime.now().isoformat()}\n")
             f.write("-" * 40 + "\n")
-            for filename, error in failed:
-                f.write(f"{filename}: {error}\n")
+            for serial, filename, error in failed:
+                f.write(f"{serial} {filename}: {error}\n")
         print(f"\nFailed files list saved to: {failed_log}")
 
-    # Disconnect
-    device.disconnect()
-    print("\nDevice disconnected.")
+    if all(r.succeeded for r in reports):
+        print("\nSUCCESS: All files downloaded and verified!")
+        return 0
+    print(f"\nWARNING: {sum(r.files_on_device - r.verified for r in reports)} files not verified")
+    return 1
 
-    # Final verification
-    print("\n" + "=" * 60)
-    print("Verification")
-    print("=" * 60)
 
-    verified_count = 0
-    for f in wav_files:
-        output_path = output_dir / f["name"]
-        if output_path.exists():
-            if output_path.stat().st_size == f["length"]:
-                verified_count += 1
-            else:
-                print(f"  Size mismatch: {f['name']}")
+def main():
+    parser = argparse.ArgumentParser(description="Download all recordings from connected HiDock devices")
+    parser.add_argument(
+        "--output-dir",
+        "-o",
+        default=DEFAULT_DOWNLOAD_DIR,
+        help=f"Output directory; each device gets a subfolder named after its serial (default: {DEFAULT_DOWNLOAD_DIR})",
+    )
+    parser.add_argument("--retry-count", "-r", type=int, default=3, help="Number of retries per file (default: 3)")
+    parser.add_argument(
+        "--skip-existing",
+        "-s",
+        action="store_true",
+        help="Skip files that already exist with correct size (always on; kept for compatibility)",
+    )
+    args = parser.parse_args()
 
-    print(f"Verified: {verified_count}/{len(wav_files)} files")
+    output_root = Path(args.output_dir)
+    output_root.mkdir(parents=True, exist_ok=True)
 
-    if verified_count == len(wav_files):
-        print("\nSUCCESS: All files downloaded and verified!")
-        return 0
-    else:
-        print(f"\nWARNING: {len(wav_files) - verified_count} files not verified")
+    print("=" * 60)
+    print("HiDock Bulk Download Utility")
+    print("=" * 60)
+    print(f"Output directory: {output_root}")
+    print(f"Retry count: {args.retry_count}")
+    print()
+
+    # Initialize USB backend
+    print("Initializing USB backend...")
+    try:
+        backend = init_usb_backend()
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    usb_devices = find_devices(backend)
+    if not usb_devices:
+        print("\nERROR: Could not find a HiDock device.")
+        print("Make sure:")
+        print("  1. The device is connected via USB")
+        print("  2. No other application is using it (close Electron app)")
+        print("  3. libusb drivers are installed")
         return 1
 
+    # One worker per device, each offloading into the subfolder named after its serial number
+    print(f"Found {len(usb_devices)} HiDock device(s)\n")
+    reports: List[Optional[DeviceReport]] = [None] * len(usb_devices)
+
+    def worker(index: int, usb_device: dict):
+        prefix = f"[{usb_device['bus']}:{usb_device['address']}] " if len(usb_devices) > 1 else ""
+        reports[index] = offload_attached_device(backend, usb_device, output_root, args.retry_count, make_log(prefix))
+
+    start_time = time.monotonic()
+    threads = [
+        threading.Thread(target=worker, args=(i, usb_device), name=f"BulkDownload-{i}", daemon=True)
+        for i, usb_device in enumerate(usb_devices)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return print_report([r for r in reports if r is not None], time.monotonic() - start_time, output_root)
+
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -19,33 +19,75 @@ Part of the HiDock Next ecosystem - see ../../CLAUDE.md for complete architectur
 
 # main.py
 
+import argparse
 import os
 import sys
+import time
 import tkinter  # For tkinter.Menu and messagebox
 import traceback
 
+_STARTUP_T0 = time.perf_counter()
+
 # Suppress pygame welcome message before any imports that might use pygame
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
 
 # Add the src directory to Python path so all existing imports work
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
 
+from lazy_imports import ImportTimer, LazyImport  # noqa: E402
+
+# Installed before any heavy import so --profile-startup sees the whole import graph
+_IMPORT_TIMER = ImportTimer().install() if "--profile-startup" in sys.argv else None
+
 import customtkinter as ctk  # For CTkInputDialog in settings, and CTk itself
 from config_and_logger import logger  # For the top-level exception handler
 
-# Import the main GUI class and the logger
-from gui_main_window import HiDockToolGUI
-
 from scripts.runtime_deps_check import check_and_handle_runtime_deps  # Runtime dependency checker
 
+# The main GUI class, imported in main() so the import can be timed as its own startup phase
+HiDockToolGUI = LazyImport("gui_main_window", "HiDockToolGUI")
+
+
+def parse_args(argv=None):
+    """Parses command line options. Unknown options are left for Tk."""
+    parser = argparse.ArgumentParser(description="HiDock Desktop")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print an import-time and startup phase breakdown once the first window is shown",
+    )
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+def _print_startup_profile(phases) -> None:
+    """Prints startup phase durations and the slowest imports."""
+    _IMPORT_TIMER.uninstall()
+    print("\n=== HiDock Desktop startup profile ===")
+    for name, seconds in phases:
+        print(f"{name:<40} {seconds * 1000:10.1f}ms")
+    print(f"{'time to first window':<40} {(time.perf_counter() - _STARTUP_T0) * 1000:10.1f}ms\n")
+    print(_IMPORT_TIMER.report())
+
 
 def main() -> None:
     """Initializes and runs the HiDock Tool application."""
+    args = parse_args()
+    phases = [("interpreter imports before main()", time.perf_counter() - _STARTUP_T0)]
+
     # Check runtime dependencies before starting the GUI
     print("HiDock Desktop - Checking runtime dependencies...")
+    phase_start = time.perf_counter()
     if not check_and_handle_runtime_deps():
         print("Runtime dependencies check failed or was cancelled.")
         sys.exit(1)
+    phases.append(("runtime dependency check", time.perf_counter() - phase_start))
+
+    # Import the main GUI module; heavy subsystems inside it are loaded on first use
+    phase_start = time.perf_counter()
+    if isinstance(HiDockToolGUI, LazyImport):
+        HiDockToolGUI.load()
+    phases.append(("import gui_main_window", time.perf_counter() - phase_start))
 
     # It's good practice to set the appearance mode and theme early,
     # though HiDockToolGUI also does this. This ensures CTk is initialized
@@ -56,7 +98,11 @@ def main() -> None:
 
     app = None  # pylint: disable=invalid-name # Initialize app to None for the except block
     try:
+        phase_start = time.perf_counter()
         app = HiDockToolGUI()
+        phases.append(("construct main window", time.perf_counter() - phase_start))
+        if args.profile_startup and _IMPORT_TIMER is not None:
+            app.after_idle(_print_startup_profile, phases)
         app.mainloop()
     except Exception as e:  # pylint: disable=broad-except
         # Log the critical error using the logger
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+HiDock Desktop - Local LLM Client Benchmark
+Measures pooled keep-alive sessions and concurrent batch analysis against a local
+stand-in for an Ollama server that adds a fixed per-request latency.
+
+Usage: python scripts/benchmark_local_llm.py [--requests 40] [--latency-ms 50] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import requests  # noqa: E402
+
+from ai_service import AIServiceManager, OllamaProvider, close_shared_clients  # noqa: E402
+
+
+class StandInOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate with a canned analysis after `server.latency` seconds."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.connections.add(self.client_address)
+        time.sleep(self.server.latency)
+        data = json.dumps({"response": json.dumps({"summary": "ok"}), "done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_server(latency_s):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInOllamaHandler)
+    server.latency = latency_s
+    server.connections = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def timed(label, server, func):
+    server.connections.clear()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.3f} s   connections: {len(server.connections)}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    server, url = start_server(args.latency_ms / 1000)
+    texts = [f"transcript {i}" for i in range(args.requests)]
+    body = {"model": "llama3.2", "prompt": "x", "stream": False}
+
+    def bare_posts():
+        for _ in texts:
+            requests.post(f"{url}/api/generate", json=body, timeout=30).json()
+
+    manager = AIServiceManager()
+    manager.cache_enabled = False
+    manager.providers["ollama"] = OllamaProvider("", {"base_url": url})
+
+    def pooled_sequential():
+        for text in texts:
+            manager.analyze_text("ollama", text)
+
+    print(f"{args.requests} requests, {args.latency_ms:.0f} ms simulated model latency\n")
+    baseline = timed("bare requests.post (sequential)", server, bare_posts)
+    pooled = timed("pooled session (sequential)", server, pooled_sequential)
+    batch = timed(
+        f"pooled batch ({args.workers} workers)",
+        server,
+        lambda: manager.analyze_texts_batch("ollama", texts, max_workers=args.workers),
+    )
+    print(f"\nspeedup: pooled {baseline / pooled:.2f}x, batch {baseline / batch:.2f}x")
+
+    close_shared_clients()
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
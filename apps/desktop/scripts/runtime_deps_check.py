@@ -4,10 +4,17 @@ HiDock Desktop - Runtime Dependencies Check
 Detects missing dependencies when the application starts and offers solutions.
 """
 
+import json
 import os
 import platform
 import subprocess
 import sys
+import time
+
+# Positive FFmpeg probe results are cached so normal launches skip the shell-out;
+# a missing FFmpeg is always re-probed so a fresh install is picked up immediately.
+FFMPEG_PROBE_CACHE = os.path.join(os.path.expanduser("~"), ".hidock", "runtime_deps_cache.json")
+FFMPEG_PROBE_TTL_SECONDS = 24 * 60 * 60
 
 
 def run_command(command, check=False):
@@ -19,12 +26,47 @@ def run_command(command, check=False):
         return e
 
 
-def check_ffmpeg():
-    """Check if FFmpeg is available."""
+def _load_cached_ffmpeg_path(cache_path=None, ttl_seconds=FFMPEG_PROBE_TTL_SECONDS):
+    """Return the cached FFmpeg path if the cache is fresh, PATH is unchanged and the binary still exists."""
+    try:
+        with open(cache_path or FFMPEG_PROBE_CACHE, "r", encoding="utf-8") as f:
+            cached = json.load(f).get("ffmpeg", {})
+        path = cached.get("path")
+        if (
+            path
+            and time.time() - cached.get("checked_at", 0) < ttl_seconds
+            and cached.get("env_path") == os.environ.get("PATH", "")
+            and os.path.exists(path)
+        ):
+            return path
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+
+def _store_ffmpeg_path(path, cache_path=None):
+    cache_path = cache_path or FFMPEG_PROBE_CACHE
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump({"ffmpeg": {"path": path, "checked_at": time.time(), "env_path": os.environ.get("PATH", "")}}, f)
+    except OSError:
+        pass
+
+
+def check_ffmpeg(use_cache=True):
+    """Check if FFmpeg is available, reusing a recent positive probe when `use_cache` is set."""
+    if use_cache:
+        cached_path = _load_cached_ffmpeg_path()
+        if cached_path:
+            return True, cached_path
     try:
         result = run_command("which ffmpeg", check=False)
         if result.returncode == 0:
-            return True, result.stdout.strip()
+            path = result.stdout.strip()
+            if use_cache:
+                _store_ffmpeg_path(path)
+            return True, path
         else:
             return False, None
     except Exception:
@@ -151,7 +193,7 @@ def handle_missing_dependencies(missing_deps):
             success = try_install_ffmpeg_without_sudo()
             if success:
                 # Re-check FFmpeg
-                ffmpeg_available, _ = check_ffmpeg()
+                ffmpeg_available, _ = check_ffmpeg(use_cache=False)
                 if ffmpeg_available:
                     print("✅ FFmpeg is now available!")
                     return True
@@ -0,0 +1,228 @@
+"""
+Content-Addressed AI Result Cache for HiDock Desktop Application.
+
+Transcription and analysis results are stored in SQLite keyed by a hash of the
+input content (audio bytes or transcript text) together with the provider,
+model, prompt version and language that produced them. Re-running processing
+on an unchanged recording therefore returns instantly instead of re-uploading
+the audio. The cache is bounded by total size with least-recently-used eviction
+and supports explicit invalidation.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from config_and_logger import logger
+
+DEFAULT_MAX_CACHE_BYTES = 100 * 1024 * 1024  # 100 MB of JSON results
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_text(text: str) -> str:
+    """Return the SHA-256 hex digest of a text payload."""
+    return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+
+
+class AIResultCache:
+    """SQLite-backed, size-bounded LRU cache of AI provider results."""
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "ai_results.db"
+        self.max_size_bytes = max_size_bytes
+
+        self._lock = threading.Lock()
+        # (path, size, mtime_ns) -> sha256, so unchanged files are hashed once per session
+        self._file_hash_memo: Dict[Tuple[str, int, int], str] = {}
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize the SQLite database for result caching."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ai_results (
+                    cache_key TEXT PRIMARY KEY,
+                    content_hash TEXT,
+                    kind TEXT,
+                    provider TEXT,
+                    model TEXT,
+                    result TEXT,
+                    size INTEGER,
+                    created_at REAL,
+                    last_accessed REAL
+                )
+            """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_results_hash ON ai_results (content_hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_results_access ON ai_results (last_accessed)")
+            conn.commit()
+
+    def hash_file(self, file_path: str) -> Optional[str]:
+        """
+        Return the SHA-256 hex digest of a file's content.
+
+        Returns None if the file cannot be read, in which case callers should
+        bypass the cache.
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+
+        memo_key = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            cached = self._file_hash_memo.get(memo_key)
+        if cached:
+            return cached
+
+        digest = hashlib.sha256()
+        try:
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        except OSError as e:
+            logger.warning("AIResultCache", "hash_file", f"Could not hash {file_path}: {e}")
+            return None
+
+        content_hash = digest.hexdigest()
+        with self._lock:
+            self._file_hash_memo[memo_key] = content_hash
+        return content_hash
+
+    @staticmethod
+    def make_key(
+        kind: str,
+        content_hash: str,
+        provider: str,
+        model: str = "",
+        prompt_version: str = "",
+        language: str = "",
+        variant: str = "",
+    ) -> str:
+        """Build the cache key for a result."""
+        return "|".join(
+            [kind, content_hash, provider, model or "", prompt_version or "", language or "", variant or ""]
+        )
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for `cache_key`, or None on a miss."""
+        with self._lock:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute("SELECT result FROM ai_results WHERE cache_key = ?", (cache_key,)).fetchone()
+                if row is None:
+                    self.stats["misses"] += 1
+                    return None
+                conn.execute("UPDATE ai_results SET last_accessed = ? WHERE cache_key = ?", (time.time(), cache_key))
+                conn.commit()
+            self.stats["hits"] += 1
+
+        try:
+            return json.loads(row[0])
+        except (TypeError, ValueError):
+            self.invalidate_key(cache_key)
+            return None
+
+    def set(
+        self, cache_key: str, content_hash: str, kind: str, provider: str, model: str, result: Dict[str, Any]
+    ) -> bool:
+        """Store a result. Returns False if the result could not be serialised."""
+        try:
+            payload = json.dumps(result)
+        except (TypeError, ValueError) as e:
+            logger.debug("AIResultCache", "set", f"Result not cacheable: {e}")
+            return False
+
+        size = len(payload.encode("utf-8"))
+        if size > self.max_size_bytes:
+            return False
+
+        now = time.time()
+        with self._lock:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO ai_results
+                    (cache_key, content_hash, kind, provider, model, result, size, created_at, last_accessed)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    (cache_key, content_hash, kind, provider, model, payload, size, now, now),
+                )
+                self._evict_locked(conn)
+                conn.commit()
+            self.stats["stores"] += 1
+        return True
+
+    def _evict_locked(self, conn: sqlite3.Connection):
+        """Evict least-recently-used entries until the cache fits its size budget."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_results").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+        rows = conn.execute("SELECT cache_key, size FROM ai_results ORDER BY last_accessed ASC").fetchall()
+        for cache_key, size in rows:
+            if total <= self.max_size_bytes:
+                break
+            conn.execute("DELETE FROM ai_results WHERE cache_key = ?", (cache_key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    def invalidate_key(self, cache_key: str) -> int:
+        """Remove a single entry. Returns the number of entries removed."""
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            count = conn.execute("DELETE FROM ai_results WHERE cache_key = ?", (cache_key,)).rowcount
+            conn.commit()
+        return count
+
+    def invalidate(self, content_hash: Optional[str] = None, provider: Optional[str] = None) -> int:
+        """
+        Remove entries matching a content hash and/or provider.
+
+        With no arguments every entry is removed. Returns the number of entries removed.
+        """
+        clauses, params = [], []
+        if content_hash:
+            clauses.append("content_hash = ?")
+            params.append(content_hash)
+        if provider:
+            clauses.append("provider = ?")
+            params.append(provider)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            count = conn.execute(f"DELETE FROM ai_results{where}", params).rowcount
+            conn.commit()
+        logger.info("AIResultCache", "invalidate", f"Invalidated {count} cached AI result(s)")
+        return count
+
+    def invalidate_file(self, file_path: str) -> int:
+        """Remove all cached results for the current content of an audio file."""
+        content_hash = self.hash_file(file_path)
+        return self.invalidate(content_hash=content_hash) if content_hash else 0
+
+    def clear(self) -> int:
+        """Remove every cached result."""
+        return self.invalidate()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache size."""
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ai_results").fetchone()
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update(
+            {
+                "entries": entries,
+                "size_bytes": total,
+                "max_size_bytes": self.max_size_bytes,
+                "hit_rate": (stats["hits"] / lookups * 100) if lookups else 0.0,
+            }
+        )
+        return stats
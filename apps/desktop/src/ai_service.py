@@ -15,9 +15,13 @@ Each provider supports audio transcription and text analysis capabilities.
 """
 
 import json
+import os
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
 
+from ai_result_cache import AIResultCache, hash_text
 from config_and_logger import logger
 from gemini_models import is_valid_model_name, normalize_model_name, validate_model_for_transcription
 
@@ -46,6 +50,10 @@ except ImportError:
     anthropic = None
     ANTHROPIC_AVAILABLE = False
 
+# Version of the transcription/analysis prompts. Bump this whenever a prompt changes
+# so that cached results produced by the old prompt are no longer returned.
+PROMPT_VERSION = "1"
+
 # Amazon Bedrock support placeholder
 AMAZON_AVAILABLE = False
 
@@ -58,9 +66,105 @@ except ImportError:
     REQUESTS_AVAILABLE = False
 
 
+# --- Shared HTTP / SDK clients ---
+# Connections to local model servers (Ollama, LM Studio) and OpenRouter are pooled and
+# kept alive across calls instead of opening a new TCP connection per request.
+HTTP_POOL_MAXSIZE = 8
+HTTP_CONNECT_TIMEOUT = 5
+DEFAULT_HTTP_READ_TIMEOUT = 120  # local models can take minutes on long transcripts
+
+_http_sessions: Dict[str, Any] = {}
+_gemini_clients: Dict[str, Any] = {}
+_client_lock = threading.Lock()
+
+
+def get_http_session(base_url: str):
+    """Return a keep-alive `requests.Session` shared by every caller of `base_url`."""
+    with _client_lock:
+        session = _http_sessions.get(base_url)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_sessions[base_url] = session
+        return session
+
+
+def get_gemini_client(api_key: str):
+    """
+    Return a shared `genai.Client` for an API key instead of constructing one per call.
+
+    Raises:
+        ImportError: If the google-genai SDK is not installed
+    """
+    if genai is None:
+        raise ImportError("google-genai not available. Install with: pip install google-genai")
+    with _client_lock:
+        entry = _gemini_clients.get(api_key)
+        # Re-create if the SDK module was swapped (e.g. reloaded) since the client was built
+        if entry is None or entry[0] is not genai:
+            entry = (genai, genai.Client(api_key=api_key))
+            _gemini_clients[api_key] = entry
+        return entry[1]
+
+
+def close_shared_clients() -> None:
+    """Close pooled HTTP sessions and drop cached SDK clients."""
+    with _client_lock:
+        for session in _http_sessions.values():
+            try:
+                session.close()
+            except Exception:
+                pass
+        _http_sessions.clear()
+        _gemini_clients.clear()
+
+
+def _http_timeout(config: Dict[str, Any]):
+    """(connect, read) timeout for provider HTTP calls; the read timeout is configurable."""
+    return (HTTP_CONNECT_TIMEOUT, config.get("timeout", DEFAULT_HTTP_READ_TIMEOUT))
+
+
+def _read_ollama_stream(response, stream_callback: Callable[[str], None]) -> str:
+    """Consume an Ollama NDJSON token stream, forwarding each token to `stream_callback`."""
+    parts = []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            continue
+        chunk = json.loads(line)
+        token = chunk.get("response", "")
+        if token:
+            parts.append(token)
+            stream_callback(token)
+        if chunk.get("done"):
+            break
+    return "".join(parts)
+
+
+def _read_openai_stream(response, stream_callback: Callable[[str], None]) -> str:
+    """Consume an OpenAI-compatible server-sent-events stream, forwarding each token."""
+    parts = []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            break
+        choices = json.loads(payload).get("choices") or [{}]
+        token = (choices[0].get("delta") or {}).get("content")
+        if token:
+            parts.append(token)
+            stream_callback(token)
+    return "".join(parts)
+
+
 class AIProvider(ABC):
     """Abstract base class for AI providers"""
 
+    # Providers that accept `stream_callback` in analyze_text set this to True
+    supports_streaming = False
+
     def __init__(self, api_key: str, config: Dict[str, Any] = None):
         self.api_key = api_key
         self.config = config or {}
@@ -93,7 +197,7 @@ class GeminiProvider(AIProvider):
         super().__init__(api_key, config)
         self.client = None
         if GEMINI_AVAILABLE and api_key and genai is not None:
-            self.client = genai.Client(api_key=api_key)
+            self.client = get_gemini_client(api_key)
 
     def is_available(self) -> bool:
         return GEMINI_AVAILABLE and bool(self.api_key)
@@ -403,6 +507,7 @@ Return ONLY valid JSON, no markdown formatting or explanatory text.
         if response_type == "transcription":
             return {
                 "success": True,
+                "mock": True,
                 "transcription": "[Mock] This is a sample transcription for testing purposes.",
                 "language": "en",
                 "confidence": 0.95,
@@ -411,6 +516,7 @@ Return ONLY valid JSON, no markdown formatting or explanatory text.
         elif response_type == "combined":
             return {
                 "success": True,
+                "mock": True,
                 "transcription": "[00:00] Speaker 1: This is a mock transcription.\n[00:30] Speaker 2: This demonstrates the combined approach.",
                 "language": "en",
                 "confidence": 0.95,
@@ -427,6 +533,7 @@ Return ONLY valid JSON, no markdown formatting or explanatory text.
         else:
             return {
                 "success": True,
+                "mock": True,
                 "analysis": {
                     "summary": "[Mock] This is a sample analysis summary.",
                     "key_points": ["Mock point 1", "Mock point 2"],
@@ -543,6 +650,7 @@ class OpenAIProvider(AIProvider):
         if response_type == "transcription":
             return {
                 "success": True,
+                "mock": True,
                 "transcription": "[Mock OpenAI] This is a sample transcription for testing purposes.",
                 "language": "en",
                 "confidence": 0.95,
@@ -551,6 +659,7 @@ class OpenAIProvider(AIProvider):
         else:
             return {
                 "success": True,
+                "mock": True,
                 "analysis": {
                     "summary": "[Mock OpenAI] This is a sample analysis summary.",
                     "key_points": ["Mock OpenAI point 1", "Mock OpenAI point 2"],
@@ -649,6 +758,7 @@ class AnthropicProvider(AIProvider):
         """Return mock response for testing"""
         return {
             "success": True,
+            "mock": True,
             "analysis": {
                 "summary": "[Mock Claude] This is a sample analysis summary.",
                 "key_points": ["Mock Claude point 1", "Mock Claude point 2"],
@@ -663,6 +773,8 @@ class AnthropicProvider(AIProvider):
 class OpenRouterProvider(AIProvider):
     """OpenRouter universal API provider"""
 
+    supports_streaming = True
+
     def __init__(self, api_key: str, config: Dict[str, Any] = None):
         super().__init__(api_key, config)
         self.base_url = (
@@ -714,8 +826,13 @@ class OpenRouterProvider(AIProvider):
             "provider": "openrouter",
         }
 
-    def analyze_text(self, text: str, analysis_type: str = "insights") -> Dict[str, Any]:
-        """Analyze text using OpenRouter"""
+    def analyze_text(
+        self,
+        text: str,
+        analysis_type: str = "insights",
+        stream_callback: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """Analyze text using OpenRouter, optionally streaming tokens to `stream_callback`"""
         if not self.is_available():
             return self._mock_response("analysis")
 
@@ -747,13 +864,22 @@ class OpenRouterProvider(AIProvider):
                 ],
                 "temperature": self.config.get("temperature", 0.3),
                 "max_tokens": self.config.get("max_tokens", 4000),
+                "stream": stream_callback is not None,
             }
 
-            response = requests.post(f"{self.base_url}/chat/completions", headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-
-            result = response.json()
-            response_text = result["choices"][0]["message"]["content"].strip()
+            session = get_http_session(self.base_url)
+            with session.post(
+                f"{self.base_url}/chat/completions",
+                headers=headers,
+                json=data,
+                timeout=_http_timeout(self.config),
+                stream=stream_callback is not None,
+            ) as response:
+                response.raise_for_status()
+                if stream_callback is not None:
+                    response_text = _read_openai_stream(response, stream_callback).strip()
+                else:
+                    response_text = response.json()["choices"][0]["message"]["content"].strip()
 
             if response_text.startswith("```json"):
                 response_text = response_text[7:-3].strip()
@@ -769,6 +895,7 @@ class OpenRouterProvider(AIProvider):
         """Return mock response for testing"""
         return {
             "success": True,
+            "mock": True,
             "analysis": {
                 "summary": "[Mock OpenRouter] This is a sample analysis summary.",
                 "key_points": ["Mock OpenRouter point 1", "Mock OpenRouter point 2"],
@@ -786,6 +913,8 @@ class OpenRouterProvider(AIProvider):
 class OllamaProvider(AIProvider):
     """Ollama local model provider"""
 
+    supports_streaming = True
+
     def __init__(self, api_key: str, config: Dict[str, Any] = None):
         super().__init__(api_key, config)
         self.base_url = config.get("base_url", "http://localhost:11434") if config else "http://localhost:11434"
@@ -828,8 +957,13 @@ class OllamaProvider(AIProvider):
             "provider": "ollama",
         }
 
-    def analyze_text(self, text: str, analysis_type: str = "insights") -> Dict[str, Any]:
-        """Analyze text using Ollama"""
+    def analyze_text(
+        self,
+        text: str,
+        analysis_type: str = "insights",
+        stream_callback: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """Analyze text using Ollama, optionally streaming tokens to `stream_callback`"""
         if not self.is_available():
             return self._mock_response("analysis")
 
@@ -851,18 +985,26 @@ class OllamaProvider(AIProvider):
 
                 Text: {text}
                 """,
-                "stream": False,
+                "stream": stream_callback is not None,
                 "options": {
                     "temperature": self.config.get("temperature", 0.3),
                     "num_predict": self.config.get("max_tokens", 4000),
                 },
             }
 
-            response = requests.post(f"{self.base_url}/api/generate", headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-
-            result = response.json()
-            response_text = result.get("response", "").strip()
+            session = get_http_session(self.base_url)
+            with session.post(
+                f"{self.base_url}/api/generate",
+                headers=headers,
+                json=data,
+                timeout=_http_timeout(self.config),
+                stream=stream_callback is not None,
+            ) as response:
+                response.raise_for_status()
+                if stream_callback is not None:
+                    response_text = _read_ollama_stream(response, stream_callback).strip()
+                else:
+                    response_text = response.json().get("response", "").strip()
 
             if response_text.startswith("```json"):
                 response_text = response_text[7:-3].strip()
@@ -878,6 +1020,7 @@ class OllamaProvider(AIProvider):
         """Return mock response for testing"""
         return {
             "success": True,
+            "mock": True,
             "analysis": {
                 "summary": "[Mock Ollama] This is a sample analysis summary using local models.",
                 "key_points": ["Mock Ollama point 1", "Mock Ollama point 2"],
@@ -892,6 +1035,8 @@ class OllamaProvider(AIProvider):
 class LMStudioProvider(AIProvider):
     """LM Studio local model provider"""
 
+    supports_streaming = True
+
     def __init__(self, api_key: str, config: Dict[str, Any] = None):
         super().__init__(api_key, config)
         self.base_url = config.get("base_url", "http://localhost:1234/v1") if config else "http://localhost:1234/v1"
@@ -934,8 +1079,13 @@ class LMStudioProvider(AIProvider):
             "provider": "lmstudio",
         }
 
-    def analyze_text(self, text: str, analysis_type: str = "insights") -> Dict[str, Any]:
-        """Analyze text using LM Studio"""
+    def analyze_text(
+        self,
+        text: str,
+        analysis_type: str = "insights",
+        stream_callback: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """Analyze text using LM Studio, optionally streaming tokens to `stream_callback`"""
         if not self.is_available():
             return self._mock_response("analysis")
 
@@ -964,13 +1114,22 @@ class LMStudioProvider(AIProvider):
                 ],
                 "temperature": self.config.get("temperature", 0.3),
                 "max_tokens": self.config.get("max_tokens", 4000),
+                "stream": stream_callback is not None,
             }
 
-            response = requests.post(f"{self.base_url}/chat/completions", headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-
-            result = response.json()
-            response_text = result["choices"][0]["message"]["content"].strip()
+            session = get_http_session(self.base_url)
+            with session.post(
+                f"{self.base_url}/chat/completions",
+                headers=headers,
+                json=data,
+                timeout=_http_timeout(self.config),
+                stream=stream_callback is not None,
+            ) as response:
+                response.raise_for_status()
+                if stream_callback is not None:
+                    response_text = _read_openai_stream(response, stream_callback).strip()
+                else:
+                    response_text = response.json()["choices"][0]["message"]["content"].strip()
 
             if response_text.startswith("```json"):
                 response_text = response_text[7:-3].strip()
@@ -986,6 +1145,7 @@ class LMStudioProvider(AIProvider):
         """Return mock response for testing"""
         return {
             "success": True,
+            "mock": True,
             "analysis": {
                 "summary": "[Mock LM Studio] This is a sample analysis summary using local models.",
                 "key_points": ["Mock LM Studio point 1", "Mock LM Studio point 2"],
@@ -1004,8 +1164,11 @@ class AIServiceManager:
     including Gemini, OpenAI, Anthropic, OpenRouter, Ollama, and LM Studio.
     """
 
-    def __init__(self):
+    def __init__(self, result_cache: Optional[AIResultCache] = None):
         self.providers = {}
+        self.cache_enabled = True
+        self._result_cache = result_cache
+        self._owns_result_cache = result_cache is None
 
     def configure_provider(self, provider_name: str, api_key: str, config: Dict[str, Any] = None) -> bool:
         """Configure an AI provider"""
@@ -1092,7 +1255,67 @@ class AIServiceManager:
             )
             return False
 
-    def transcribe_audio(self, provider_name: str, audio_file_path: str, language: str = "auto") -> Dict[str, Any]:
+    def get_result_cache(self) -> Optional[AIResultCache]:
+        """Get the result cache, creating the default one under ~/.hidock/cache on first use."""
+        if not self.cache_enabled:
+            return None
+        if self._owns_result_cache:
+            cache_dir = os.path.join(os.path.expanduser("~"), ".hidock", "cache")
+            if self._result_cache is None or str(self._result_cache.cache_dir) != cache_dir:
+                try:
+                    self._result_cache = AIResultCache(cache_dir)
+                except Exception as e:
+                    logger.warning("AIServiceManager", "get_result_cache", f"Result cache unavailable: {e}")
+                    self._result_cache = None
+        return self._result_cache
+
+    def invalidate_cached_results(
+        self, audio_file_path: Optional[str] = None, provider_name: Optional[str] = None
+    ) -> int:
+        """Drop cached results for an audio file and/or provider (everything if both are None)."""
+        cache = self.get_result_cache()
+        if not cache:
+            return 0
+        if audio_file_path:
+            content_hash = cache.hash_file(audio_file_path)
+            if not content_hash:
+                return 0
+            return cache.invalidate(content_hash=content_hash, provider=provider_name)
+        return cache.invalidate(provider=provider_name)
+
+    def _cached_call(
+        self,
+        kind: str,
+        provider_name: str,
+        provider: AIProvider,
+        content_hash: Optional[str],
+        language: str,
+        variant: str,
+        use_cache: bool,
+        call: Callable[[], Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Return a cached provider result if available, otherwise call the provider and cache success."""
+        cache = self.get_result_cache() if use_cache else None
+        if not cache or not content_hash:
+            return call()
+
+        model = str((provider.config or {}).get("model", ""))
+        cache_key = cache.make_key(kind, content_hash, provider_name, model, PROMPT_VERSION, language, variant)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.info("AIServiceManager", kind, f"Using cached {kind} result from {provider_name}")
+            cached["cached"] = True
+            return cached
+
+        result = call()
+        # Only cache genuine successful results; mock responses and errors must be retried
+        if isinstance(result, dict) and result.get("success") and not result.get("mock"):
+            cache.set(cache_key, content_hash, kind, provider_name, model, result)
+        return result
+
+    def transcribe_audio(
+        self, provider_name: str, audio_file_path: str, language: str = "auto", use_cache: bool = True
+    ) -> Dict[str, Any]:
         """Transcribe audio using specified provider"""
         provider = self.get_provider(provider_name)
         if not provider:
@@ -1102,10 +1325,57 @@ class AIServiceManager:
                 "provider": provider_name,
             }
 
-        return provider.transcribe_audio(audio_file_path, language)
+        cache = self.get_result_cache() if use_cache else None
+        content_hash = cache.hash_file(audio_file_path) if cache else None
+        return self._cached_call(
+            "transcription",
+            provider_name,
+            provider,
+            content_hash,
+            language,
+            "",
+            use_cache,
+            lambda: provider.transcribe_audio(audio_file_path, language),
+        )
+
+    def transcribe_and_analyze_audio(
+        self, provider_name: str, audio_file_path: str, language: str = "auto", use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Transcribe and analyze audio in a single call, for providers that support it"""
+        provider = self.get_provider(provider_name)
+        if not provider or not hasattr(provider, "transcribe_and_analyze_audio"):
+            return {
+                "success": False,
+                "error": f"Provider {provider_name} does not support combined transcription and analysis",
+                "provider": provider_name,
+            }
+
+        cache = self.get_result_cache() if use_cache else None
+        content_hash = cache.hash_file(audio_file_path) if cache else None
+        return self._cached_call(
+            "combined",
+            provider_name,
+            provider,
+            content_hash,
+            language,
+            "",
+            use_cache,
+            lambda: provider.transcribe_and_analyze_audio(audio_file_path, language),
+        )
 
-    def analyze_text(self, provider_name: str, text: str, analysis_type: str = "insights") -> Dict[str, Any]:
-        """Analyze text using specified provider"""
+    def analyze_text(
+        self,
+        provider_name: str,
+        text: str,
+        analysis_type: str = "insights",
+        use_cache: bool = True,
+        stream_callback: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """Analyze text using specified provider.
+
+        If `stream_callback` is given and the provider supports streaming, generated
+        tokens are passed to it as they arrive (cache hits return without streaming).
+        """
         provider = self.get_provider(provider_name)
         if not provider:
             return {
@@ -1114,7 +1384,34 @@ class AIServiceManager:
                 "provider": provider_name,
             }
 
-        return provider.analyze_text(text, analysis_type)
+        def call():
+            if stream_callback is not None and getattr(provider, "supports_streaming", False):
+                return provider.analyze_text(text, analysis_type, stream_callback=stream_callback)
+            return provider.analyze_text(text, analysis_type)
+
+        content_hash = hash_text(text) if isinstance(text, str) and text else None
+        return self._cached_call("analysis", provider_name, provider, content_hash, "", analysis_type, use_cache, call)
+
+    def analyze_texts_batch(
+        self,
+        provider_name: str,
+        texts: List[str],
+        analysis_type: str = "insights",
+        max_workers: int = 4,
+        use_cache: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Analyze many texts concurrently with one provider. Results keep the input order.
+
+        Requests share the provider's pooled keep-alive connections, so a local
+        Ollama-compatible server can work on several transcripts at once.
+        """
+        if not texts:
+            return []
+        workers = max(1, min(max_workers, len(texts), HTTP_POOL_MAXSIZE))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="AIBatch") as pool:
+            return list(
+                pool.map(lambda text: self.analyze_text(provider_name, text, analysis_type, use_cache=use_cache), texts)
+            )
 
     def _create_mock_provider(self, provider_name: str, api_key: str, config: Dict[str, Any] = None) -> AIProvider:
         """Create a mock provider for providers not yet fully implemented"""
@@ -1134,6 +1431,7 @@ class AIServiceManager:
             def transcribe_audio(self, audio_file_path: str, language: str = "auto") -> Dict[str, Any]:
                 return {
                     "success": True,
+                    "mock": True,
                     "transcription": f"[Mock {self.name.title()}] This is a sample transcription for testing purposes.",
                     "language": "en",
                     "confidence": 0.95,
@@ -1143,6 +1441,7 @@ class AIServiceManager:
             def analyze_text(self, text: str, analysis_type: str = "insights") -> Dict[str, Any]:
                 return {
                     "success": True,
+                    "mock": True,
                     "analysis": {
                         "summary": f"[Mock {self.name.title()}] This is a sample analysis summary.",
                         "key_points": [
@@ -16,6 +16,7 @@ from typing import Any, Callable, Dict, List, Optional
 
 from calendar_cache_manager import CalendarCacheManager
 from config_and_logger import load_config, logger
+from perf_trace import traced
 
 try:
     from simple_outlook_integration import create_simple_outlook_integration
@@ -478,6 +479,7 @@ class AsyncCalendarMixin:
             )
             return timedelta(weeks=1)
 
+    @traced("calendar.enrich_batch", "calendar")
     def _enhance_files_with_batch_calendar_data(self, files_dict: List[Dict]) -> List[Dict]:
         """Enhance files with calendar data using batch processing and chunking optimization."""
         if not self._calendar_integration or not self._calendar_integration.is_available():
@@ -1052,6 +1054,7 @@ class AsyncCalendarMixin:
         """Compatibility wrapper for existing GUI code - returns immediately with async processing."""
         return self.enhance_files_with_meeting_data_async(files_dict)
 
+    @traced("calendar.enrich_sync", "calendar")
     def enhance_files_with_meeting_data_sync(self, files_dict: List[Dict]) -> List[Dict]:
         """Synchronous calendar enhancement for cached files - applies cached data immediately.
 
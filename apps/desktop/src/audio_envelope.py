@@ -0,0 +1,241 @@
+"""
+Scale-Factor Waveform Envelopes for MPEG Layer I/II Recordings.
+
+HiDock recordings (.hda) are MPEG Audio Layer II. For every subband and
+channel a Layer I/II frame stores a bit allocation and up to three 6-bit
+scale factors, each giving the peak amplitude of 12 subband samples. Reading
+only that side information yields a per-frame loudness envelope without
+dequantising samples or running the synthesis filterbank.
+
+Frames are grouped by header layout and their side information is decoded
+with NumPy across all frames of a group at once, so an hour-long recording
+is processed in a few dozen array operations.
+"""
+
+import mmap
+import os
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from audio_probe import constant_frame_count, find_first_frame, iter_mpeg_frames, parse_mpeg_header, stream_bounds
+from config_and_logger import logger
+
+FRAMES_PER_CHUNK = 1024  # keeps the per-chunk field arrays cache-resident
+
+# Allocation field width per subband for the ISO 11172-3 Layer II tables B.2a-d and the ISO 13818-3 LSF table
+LAYER2_ALLOCATION_BITS = {
+    "a": (4,) * 11 + (3,) * 12 + (2,) * 4,
+    "b": (4,) * 11 + (3,) * 12 + (2,) * 7,
+    "c": (4,) * 2 + (3,) * 6,
+    "d": (4,) * 2 + (3,) * 10,
+    "lsf": (4,) * 4 + (3,) * 7 + (2,) * 19,
+}
+# Number of scale factors transmitted for each Layer II scale factor selection code
+SCALE_FACTORS_PER_SCFSI = np.array([3, 2, 1, 2], dtype=np.int32)
+# Amplitude of each 6-bit scale factor index; 63 is not a valid index
+SCALE_FACTOR_AMPLITUDES = np.append(2.0 ** (1 - np.arange(63) / 3.0), 0.0)
+
+
+class SideInfoLayout(NamedTuple):
+    """Position and width of the bit allocation fields of one frame header layout."""
+
+    layer: int
+    channels: int
+    subbands: int
+    allocation_positions: np.ndarray  # bit offset of each allocation field
+    allocation_widths: np.ndarray
+    slot_fields: np.ndarray  # allocation field index for each (subband, channel) slot, in bitstream order
+    max_bytes: int  # upper bound on header plus side information size
+
+
+def _layer2_table(version_id: int, bitrate: int, sample_rate: int, channels: int) -> str:
+    """Select the Layer II bit allocation table (ISO 11172-3 Annex B.2) for a stream."""
+    if version_id != 0b11:
+        return "lsf"
+    per_channel = bitrate // 1000 // channels
+    if (sample_rate == 48000 and per_channel >= 56) or 56 <= per_channel <= 80:
+        return "a"
+    if sample_rate != 48000 and per_channel >= 96:
+        return "b"
+    if sample_rate != 32000 and per_channel <= 48:
+        return "c"
+    return "d"
+
+
+def side_info_layout(header_bytes: bytes) -> Optional[SideInfoLayout]:
+    """Describe the side information that follows a Layer I or Layer II frame header."""
+    header = parse_mpeg_header(header_bytes)
+    if header is None or header.layer == 3:
+        return None
+
+    mode = header_bytes[3] >> 6
+    mode_extension = (header_bytes[3] >> 4) & 0x3
+    if header.layer == 1:
+        widths = (4,) * 32
+    else:
+        widths = LAYER2_ALLOCATION_BITS[
+            _layer2_table(header.version_id, header.bitrate, header.sample_rate, header.channels)
+        ]
+    subbands = len(widths)
+    # Joint stereo shares one allocation between both channels above the bound
+    bound = min(4 * (mode_extension + 1), subbands) if mode == 0b01 else subbands
+
+    positions, field_widths, slot_fields = [], [], []
+    position = 32 if header_bytes[1] & 0x1 else 48  # a cleared protection bit means a 16-bit CRC follows
+    for subband, width in enumerate(widths):
+        shared = subband >= bound
+        for channel in range(header.channels):
+            if not (shared and channel):
+                positions.append(position)
+                field_widths.append(width)
+                position += width
+            slot_fields.append(len(positions) - 1)
+
+    slots = len(slot_fields)
+    selection_bits = 2 * slots if header.layer == 2 else 0
+    max_bits = position + selection_bits + 6 * slots * (3 if header.layer == 2 else 1)
+    return SideInfoLayout(
+        header.layer,
+        header.channels,
+        subbands,
+        np.array(positions, dtype=np.int32),
+        np.array(field_widths, dtype=np.uint16),
+        np.array(slot_fields),
+        (max_bits + 7) // 8,
+    )
+
+
+def _read_bits(words: np.ndarray, positions: np.ndarray, widths) -> np.ndarray:
+    """
+    Read unsigned fields of up to 9 bits at bit `positions` (shape (fields, frames)) of each frame.
+
+    `words` holds, per frame, the big-endian 16-bit word starting at every byte.
+    """
+    positions = np.minimum(positions, (words.shape[1] - 1) * 8)
+    flat = (positions >> 3) + np.arange(0, words.size, words.shape[1], dtype=np.int32)
+    word = words.ravel().take(flat)
+    return (word >> (16 - widths - (positions & 7))) & ((1 << widths) - 1)
+
+
+def frame_peaks(rows: np.ndarray, layout: SideInfoLayout) -> np.ndarray:
+    """
+    Peak amplitude of each frame from its scale factors.
+
+    `rows` holds the first bytes of one frame per row, at least
+    `layout.max_bytes + 1` wide where the frames are long enough.
+    """
+    words = (rows[:, :-1].astype(np.uint16) << 8) | rows[:, 1:]
+    # Fields run along the first axis, so the running sums below add whole rows of frames at a time
+    allocation_fields = _read_bits(words, layout.allocation_positions[:, None], layout.allocation_widths[:, None])[
+        layout.slot_fields
+    ]
+    allocated = allocation_fields > 0
+    if layout.layer == 1:
+        allocated &= allocation_fields < 15  # 15 is a forbidden Layer I allocation
+
+    side_start = int(layout.allocation_positions[-1] + layout.allocation_widths[-1])
+    if layout.layer == 2:
+        preceding = np.cumsum(allocated, axis=0, dtype=np.int32) - allocated
+        selection = _read_bits(words, side_start + 2 * preceding, 2)
+        counts = np.where(allocated, SCALE_FACTORS_PER_SCFSI[selection], 0)
+        scale_start = side_start + 2 * allocated.sum(axis=0, dtype=np.int32)
+    else:
+        counts = allocated.astype(np.int32)
+        scale_start = side_start
+    positions = scale_start + 6 * (np.cumsum(counts, axis=0, dtype=np.int32) - counts)
+
+    # The smallest scale factor index is the largest amplitude
+    smallest = np.full(allocated.shape, 63, dtype=np.uint16)
+    for k in range(3 if layout.layer == 2 else 1):
+        index = _read_bits(words, positions + 6 * k, 6)
+        smallest = np.where(k < counts, np.minimum(smallest, index), smallest)
+    return np.minimum(SCALE_FACTOR_AMPLITUDES[smallest.min(axis=0, initial=63)], 1.0)
+
+
+def _frame_rows(buffer: np.ndarray, offsets: np.ndarray, width: int) -> np.ndarray:
+    """The first `width` bytes of the frame at each offset (zero past the end of the buffer)."""
+    steps = np.diff(offsets)
+    if len(steps) and offsets[-1] + width <= len(buffer) and (steps == steps[0]).all():
+        # Evenly spaced frames are a strided view of the buffer
+        return np.lib.stride_tricks.as_strided(
+            buffer[offsets[0] :], shape=(len(offsets), width), strides=(int(steps[0]), 1), writeable=False
+        )
+    index = offsets[:, None] + np.arange(width)
+    rows = buffer[np.minimum(index, len(buffer) - 1)]
+    rows[index >= len(buffer)] = 0
+    return rows
+
+
+def mpeg_envelope(data) -> Optional[Tuple[np.ndarray, int, int]]:
+    """
+    Per-frame peak amplitudes of a Layer I/II stream.
+
+    Returns (peaks, sample_rate, samples_per_frame), or None if `data` is not a
+    Layer I/II stream.
+    """
+    start, end = stream_bounds(data)
+    found = find_first_frame(data, start, end)
+    if found is None or found[1].layer == 3:
+        return None
+    offset, header = found
+
+    count = constant_frame_count(data, offset, header, end)
+    if count is not None:
+        offsets = offset + header.frame_length * np.arange(count)
+    else:
+        offsets = np.fromiter((frame_offset for frame_offset, _ in iter_mpeg_frames(data, offset, end)), dtype=np.int64)
+    if len(offsets) == 0:
+        return None
+
+    buffer = np.frombuffer(data, dtype=np.uint8, count=end, offset=0)
+    heads = _frame_rows(buffer, offsets, 4).astype(np.int64)
+    # Frames with the same version, layer, protection, bitrate, sample rate and mode share a side info layout
+    keys = (heads[:, 1] << 16) | ((heads[:, 2] & 0xFD) << 8) | (heads[:, 3] & 0xF0)
+
+    peaks = np.zeros(len(offsets))
+    layouts: Dict[int, Optional[SideInfoLayout]] = {}
+    for key in np.unique(keys):
+        key = int(key)
+        if key not in layouts:
+            layouts[key] = side_info_layout(bytes([0xFF, key >> 16, (key >> 8) & 0xFF, key & 0xFF]))
+        layout = layouts[key]
+        if layout is None:
+            continue
+        members = np.flatnonzero(keys == key)
+        for chunk in range(0, len(members), FRAMES_PER_CHUNK):
+            selected = members[chunk : chunk + FRAMES_PER_CHUNK]
+            rows = _frame_rows(buffer, offsets[selected], layout.max_bytes + 1)
+            peaks[selected] = frame_peaks(rows, layout)
+    del buffer
+    return peaks, header.sample_rate, header.samples_per_frame
+
+
+def extract_mpeg_waveform(filepath: str, max_points: int = 1000) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Waveform display data for a Layer I/II file from its scale factors.
+
+    Returns (data, sample_rate) in the form of AudioProcessor.extract_waveform_data:
+    at most `max_points` values in [-1, 1], here alternating between the positive
+    and negative peak of consecutive stretches of the recording so a line plot
+    fills the envelope. Returns None if the file is not Layer I/II audio.
+    """
+    try:
+        if not os.path.getsize(filepath):
+            return None
+        with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            envelope = mpeg_envelope(data)
+    except (OSError, ValueError) as e:
+        logger.debug("AudioEnvelope", "extract_mpeg_waveform", f"Could not read {filepath}: {e}")
+        return None
+    if envelope is None:
+        return None
+
+    peaks, sample_rate, _samples_per_frame = envelope
+    buckets = max(1, max_points // 2)
+    if len(peaks) > buckets:
+        peaks = np.maximum.reduceat(peaks, np.linspace(0, len(peaks), buckets, endpoint=False).astype(np.int64))
+    data = np.empty(2 * len(peaks), dtype=np.float32)
+    data[0::2] = peaks
+    data[1::2] = -peaks
+    return data, sample_rate
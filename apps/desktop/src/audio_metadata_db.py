@@ -11,12 +11,14 @@ import json
 import os
 import sqlite3
 import threading
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from config_and_logger import logger
+from perf_trace import traced
 
 
 class ProcessingStatus(Enum):
@@ -31,6 +33,39 @@ class ProcessingStatus(Enum):
     ERROR = "error"
 
 
+class JobStage(Enum):
+    """Stages of the background processing pipeline, in execution order."""
+
+    CONVERSION = "conversion"
+    TRANSCRIPTION = "transcription"
+    ANALYSIS = "analysis"
+
+
+class JobStatus(Enum):
+    """State of a queued processing job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class ProcessingJob:
+    """A single stage of work for one audio file in the persistent processing queue."""
+
+    id: int
+    filename: str
+    stage: JobStage
+    status: JobStatus
+    payload: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    error: Optional[str] = None
+    enqueued_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
 @dataclass
 class AudioMetadata:
     """Complete metadata for an audio recording."""
@@ -165,12 +200,31 @@ class AudioMetadataDB:
                     )
                 """)
 
+                # Create processing_jobs table for the persistent background processing queue
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS processing_jobs (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        filename TEXT NOT NULL,
+                        stage TEXT NOT NULL,
+                        status TEXT NOT NULL DEFAULT 'queued',
+                        payload TEXT,  -- JSON handed over from the previous stage
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        error TEXT,
+                        enqueued_at REAL NOT NULL,
+                        started_at REAL,
+                        finished_at REAL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_stage_status ON processing_jobs(stage, status, id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_filename ON processing_jobs(filename)")
+
                 conn.commit()
                 logger.debug("AudioMetadataDB", "_init_database", "Database schema initialized")
 
             finally:
                 conn.close()
 
+    @traced("db.get_metadata", "db")
     def get_metadata(self, filename: str) -> Optional[AudioMetadata]:
         """Get metadata for a specific audio file."""
         with self.db_lock:
@@ -224,6 +278,7 @@ class AudioMetadataDB:
             updated_at=datetime.fromisoformat(row["updated_at"]),
         )
 
+    @traced("db.save_metadata", "db")
     def save_metadata(self, metadata: AudioMetadata) -> bool:
         """Save or update metadata for an audio file."""
         with self.db_lock:
@@ -319,6 +374,7 @@ class AudioMetadataDB:
         else:
             return ""
 
+    @traced("db.update_processing_status", "db")
     def update_processing_status(
         self, filename: str, status: ProcessingStatus, error_message: Optional[str] = None
     ) -> bool:
@@ -563,6 +619,7 @@ class AudioMetadataDB:
             finally:
                 conn.close()
 
+    @traced("db.create_file_entry", "db")
     def create_file_entry(
         self, filename: str, file_path: str, file_size: int, duration_seconds: float, date_created: datetime
     ) -> bool:
@@ -613,6 +670,7 @@ class AudioMetadataDB:
             finally:
                 conn.close()
 
+    @traced("db.get_files_by_status", "db")
     def get_files_by_status(self, status: ProcessingStatus) -> List[AudioMetadata]:
         """Get all files with a specific processing status."""
         with self.db_lock:
@@ -629,6 +687,7 @@ class AudioMetadataDB:
             finally:
                 conn.close()
 
+    @traced("db.get_all_metadata", "db")
     def get_all_metadata(self) -> List[AudioMetadata]:
         """Get metadata for all audio files."""
         with self.db_lock:
@@ -662,6 +721,7 @@ class AudioMetadataDB:
             finally:
                 conn.close()
 
+    @traced("db.search_metadata", "db")
     def search_metadata(self, query: str) -> List[AudioMetadata]:
         """Search metadata by text content."""
         with self.db_lock:
@@ -695,6 +755,7 @@ class AudioMetadataDB:
             try:
                 # Delete from processing log first (foreign key constraint)
                 conn.execute("DELETE FROM processing_log WHERE filename = ?", (filename,))
+                conn.execute("DELETE FROM processing_jobs WHERE filename = ?", (filename,))
 
                 # Delete main metadata
                 cursor = conn.execute("DELETE FROM audio_metadata WHERE filename = ?", (filename,))
@@ -746,6 +807,213 @@ class AudioMetadataDB:
             finally:
                 conn.close()
 
+    # --- Persistent processing job queue ---
+
+    def _row_to_job(self, row: sqlite3.Row) -> ProcessingJob:
+        """Convert database row to ProcessingJob object."""
+        return ProcessingJob(
+            id=row["id"],
+            filename=row["filename"],
+            stage=JobStage(row["stage"]),
+            status=JobStatus(row["status"]),
+            payload=json.loads(row["payload"]) if row["payload"] else {},
+            attempts=row["attempts"],
+            error=row["error"],
+            enqueued_at=row["enqueued_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+        )
+
+    @traced("db.enqueue_job", "db")
+    def enqueue_job(self, filename: str, stage: JobStage, payload: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """
+        Queue a processing stage for a file.
+
+        If the same stage is already queued or running for the file, the existing
+        job id is returned instead of adding a duplicate.
+        """
+        with self.db_lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                row = conn.execute(
+                    "SELECT id FROM processing_jobs WHERE filename = ? AND stage = ? AND status IN (?, ?)",
+                    (filename, stage.value, JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+                ).fetchone()
+                if row:
+                    return row[0]
+
+                cursor = conn.execute(
+                    """
+                    INSERT INTO processing_jobs (filename, stage, status, payload, enqueued_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """,
+                    (filename, stage.value, JobStatus.QUEUED.value, json.dumps(payload or {}), time.time()),
+                )
+                conn.commit()
+                return cursor.lastrowid
+
+            except Exception as e:
+                logger.error("AudioMetadataDB", "enqueue_job", f"Error queueing {stage.value} for {filename}: {e}")
+                return None
+            finally:
+                conn.close()
+
+    @traced("db.claim_next_job", "db")
+    def claim_next_job(self, stage: JobStage) -> Optional[ProcessingJob]:
+        """Atomically take the oldest queued job of a stage and mark it running."""
+        with self.db_lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.row_factory = sqlite3.Row
+                row = conn.execute(
+                    "SELECT * FROM processing_jobs WHERE stage = ? AND status = ? ORDER BY id LIMIT 1",
+                    (stage.value, JobStatus.QUEUED.value),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                now = time.time()
+                conn.execute(
+                    "UPDATE processing_jobs SET status = ?, attempts = attempts + 1, started_at = ? WHERE id = ?",
+                    (JobStatus.RUNNING.value, now, row["id"]),
+                )
+                conn.commit()
+
+                job = self._row_to_job(row)
+                job.status = JobStatus.RUNNING
+                job.attempts += 1
+                job.started_at = now
+                return job
+
+            finally:
+                conn.close()
+
+    def complete_job(self, job_id: int) -> bool:
+        """Mark a running job as done."""
+        return self._finish_job(job_id, JobStatus.DONE, None)
+
+    def fail_job(self, job_id: int, error: str, retry: bool = False) -> bool:
+        """Mark a running job as failed, or put it back in the queue if `retry` is set."""
+        return self._finish_job(job_id, JobStatus.QUEUED if retry else JobStatus.FAILED, error)
+
+    def _finish_job(self, job_id: int, status: JobStatus, error: Optional[str]) -> bool:
+        with self.db_lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute(
+                    "UPDATE processing_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                    (status.value, error, time.time(), job_id),
+                )
+                conn.commit()
+                return True
+
+            except Exception as e:
+                logger.error("AudioMetadataDB", "_finish_job", f"Error updating job {job_id}: {e}")
+                return False
+            finally:
+                conn.close()
+
+    def requeue_interrupted_jobs(self) -> int:
+        """Return jobs left running by a previous session to the queue. Returns the number requeued."""
+        with self.db_lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                count = conn.execute(
+                    "UPDATE processing_jobs SET status = ?, started_at = NULL WHERE status = ?",
+                    (JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+                ).rowcount
+                conn.commit()
+                if count:
+                    logger.info("AudioMetadataDB", "requeue_interrupted_jobs", f"Requeued {count} interrupted job(s)")
+                return count
+
+            finally:
+                conn.close()
+
+    def get_active_jobs(self, filename: Optional[str] = None) -> List[ProcessingJob]:
+        """Get queued and running jobs, optionally for a single file."""
+        query = "SELECT * FROM processing_jobs WHERE status IN (?, ?)"
+        params: List[Any] = [JobStatus.QUEUED.value, JobStatus.RUNNING.value]
+        if filename:
+            query += " AND filename = ?"
+            params.append(filename)
+
+        with self.db_lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(query + " ORDER BY id", params)
+                return [self._row_to_job(row) for row in cursor.fetchall()]
+
+            finally:
+                conn.close()
+
+    def get_job_stage_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-stage queue counts and timings.
+
+        Durations cover finished jobs (started to finished); wait time is from
+        enqueue to start.
+        """
+        metrics = {
+            stage.value: {
+                **{status.value: 0 for status in JobStatus},
+                "avg_seconds": 0.0,
+                "max_seconds": 0.0,
+                "avg_wait_seconds": 0.0,
+            }
+            for stage in JobStage
+        }
+
+        with self.db_lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                for stage, status, count in conn.execute(
+                    "SELECT stage, status, COUNT(*) FROM processing_jobs GROUP BY stage, status"
+                ):
+                    if stage in metrics:
+                        metrics[stage][status] = count
+
+                cursor = conn.execute(
+                    """
+                    SELECT stage, AVG(finished_at - started_at), MAX(finished_at - started_at),
+                           AVG(started_at - enqueued_at)
+                    FROM processing_jobs
+                    WHERE status = ? AND started_at IS NOT NULL AND finished_at IS NOT NULL
+                    GROUP BY stage
+                """,
+                    (JobStatus.DONE.value,),
+                )
+                for stage, avg_seconds, max_seconds, avg_wait in cursor.fetchall():
+                    if stage in metrics:
+                        metrics[stage].update(
+                            {
+                                "avg_seconds": avg_seconds or 0.0,
+                                "max_seconds": max_seconds or 0.0,
+                                "avg_wait_seconds": max(avg_wait or 0.0, 0.0),
+                            }
+                        )
+
+                return metrics
+
+            finally:
+                conn.close()
+
+    def purge_finished_jobs(self, older_than_seconds: float = 0) -> int:
+        """Delete done and failed jobs that finished more than `older_than_seconds` ago."""
+        with self.db_lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                count = conn.execute(
+                    "DELETE FROM processing_jobs WHERE status IN (?, ?) AND finished_at <= ?",
+                    (JobStatus.DONE.value, JobStatus.FAILED.value, time.time() - older_than_seconds),
+                ).rowcount
+                conn.commit()
+                return count
+
+            finally:
+                conn.close()
+
     def get_status_display_text(self, metadata: AudioMetadata) -> str:
         """Get display text for TreeView meeting column based on processing status."""
         if metadata.processing_status == ProcessingStatus.NOT_PROCESSED:
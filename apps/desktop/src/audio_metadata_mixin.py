@@ -9,11 +9,10 @@ Integrates audio metadata database with the GUI display, handling:
 """
 
 import os
-import threading
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from audio_metadata_db import AudioMetadata, ProcessingStatus, get_audio_metadata_db
+from audio_metadata_db import AudioMetadata, JobStage, JobStatus, ProcessingJob, ProcessingStatus, get_audio_metadata_db
 from config_and_logger import logger
 
 
@@ -41,6 +40,41 @@ class AudioMetadataMixin:
 
             logger.info("AudioMetadata", "init", "Audio metadata system initialized")
 
+            # Resume a processing backlog left over from a previous session
+            try:
+                if self._audio_metadata_db.get_active_jobs():
+                    self._ensure_processing_queue()
+            except Exception as e:
+                logger.warning("AudioMetadata", "init", f"Could not resume processing queue: {e}")
+
+    def _ensure_processing_queue(self):
+        """Create and start the persistent processing queue (lazy initialization)."""
+        queue = getattr(self, "_processing_queue", None)
+        if queue is None:
+            from audio_processing_queue import AudioProcessingQueue
+
+            config = getattr(self.gui, "config", None) or {}
+            workers = {
+                JobStage.CONVERSION: config.get("audio_processing_conversion_workers", 1),
+                JobStage.TRANSCRIPTION: config.get("audio_processing_transcription_workers", 2),
+                JobStage.ANALYSIS: config.get("audio_processing_analysis_workers", 2),
+            }
+            queue = AudioProcessingQueue(
+                self._audio_metadata_db,
+                handlers={
+                    JobStage.CONVERSION: self._run_conversion_stage,
+                    JobStage.TRANSCRIPTION: self._run_transcription_stage,
+                    JobStage.ANALYSIS: self._run_analysis_stage,
+                },
+                workers=workers,
+                on_job_event=self._on_processing_job_event,
+            )
+            self._processing_queue = queue
+
+        if not queue.is_running:
+            queue.start()
+        return queue
+
     def enhance_files_with_audio_metadata(self, files_dict: List[Dict]) -> List[Dict]:
         """Enhance file list with audio metadata and processing status."""
         self._ensure_audio_metadata_initialized()
@@ -193,7 +227,7 @@ class AudioMetadataMixin:
             return None
 
     def start_audio_processing(self, filename: str) -> bool:
-        """Start processing an audio file (transcription + AI analysis)."""
+        """Queue an audio file for processing (conversion, transcription and AI analysis)."""
         self._ensure_audio_metadata_initialized()
 
         try:
@@ -204,15 +238,14 @@ class AudioMetadataMixin:
                 # Trigger GUI update
                 self.gui.after(0, self._refresh_file_display_for_metadata_change, filename)
 
-                # Start background processing
-                threading.Thread(
-                    target=self._process_audio_file_background,
-                    args=(filename,),
-                    daemon=True,
-                    name=f"AudioProcessor-{filename}",
-                ).start()
+                # Hand the file to the persistent processing queue
+                if self._ensure_processing_queue().submit(filename) is None:
+                    self._audio_metadata_db.update_processing_status(
+                        filename, ProcessingStatus.ERROR, "Could not queue file for processing"
+                    )
+                    return False
 
-                logger.info("AudioMetadata", "start_processing", f"Started processing for {filename}")
+                logger.info("AudioMetadata", "start_processing", f"Queued processing for {filename}")
                 return True
 
             return False
@@ -221,78 +254,100 @@ class AudioMetadataMixin:
             logger.error("AudioMetadata", "start_processing", f"Error starting processing for {filename}: {e}")
             return False
 
-    def _process_audio_file_background(self, filename: str):
-        """Background processing of audio file (transcription + AI analysis)."""
-        try:
-            # Step 1: Transcription
-            self._audio_metadata_db.update_processing_status(filename, ProcessingStatus.TRANSCRIBING)
-            self.gui.after(0, self._refresh_file_display_for_metadata_change, filename)
+    def _run_conversion_stage(self, filename: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Queue stage 1: locate the downloaded file and convert device formats to WAV."""
+        local_path = self._find_local_file_path(filename)
+        if not local_path:
+            raise FileNotFoundError("Local file not found")
 
-            # Get file path for transcription
-            metadata = self._audio_metadata_db.get_metadata(filename)
-            if not metadata:
-                logger.error("AudioMetadata", "_process_background", f"No metadata found for {filename}")
-                return
-
-            # Find local file path
-            local_path = self._find_local_file_path(filename)
-            if not local_path:
-                logger.error("AudioMetadata", "_process_background", f"No local file found for {filename}")
-                self._audio_metadata_db.update_processing_status(
-                    filename, ProcessingStatus.ERROR, "Local file not found"
-                )
-                return
-
-            # Transcribe audio
-            transcription_result = self._transcribe_audio_file(local_path)
-            if transcription_result:
-                # Save transcription
-                self._audio_metadata_db.save_transcription(
-                    filename=filename,
-                    transcription_text=transcription_result["text"],
-                    confidence=transcription_result.get("confidence"),
-                    language=transcription_result.get("language"),
-                )
+        if os.path.splitext(local_path)[1].lower() in (".hta", ".hda"):
+            try:
+                from hta_converter import get_hta_converter
 
-                self.gui.after(0, self._refresh_file_display_for_metadata_change, filename)
+                # Cached by content, so re-processing a recording does not convert it again
+                converted = get_hta_converter().get_or_convert(local_path, "wav")
+                if converted and os.path.exists(converted):
+                    return {"audio_path": converted, "converted": True}
+            except Exception as e:
+                # The transcription module can still handle the original file
+                logger.warning("AudioMetadata", "_run_conversion_stage", f"Conversion of {filename} failed: {e}")
 
-                # Step 2: AI Analysis
-                self._audio_metadata_db.update_processing_status(filename, ProcessingStatus.AI_ANALYZING)
-                self.gui.after(0, self._refresh_file_display_for_metadata_change, filename)
+        return {"audio_path": local_path, "converted": False}
 
-                ai_result = self._analyze_transcription_with_ai(transcription_result["text"])
-                if ai_result:
-                    # Save AI analysis
-                    self._audio_metadata_db.save_ai_analysis(
-                        filename=filename,
-                        summary=ai_result.get("summary"),
-                        participants=ai_result.get("participants"),
-                        action_items=ai_result.get("action_items"),
-                        topics=ai_result.get("topics"),
-                        sentiment=ai_result.get("sentiment"),
-                        key_quotes=ai_result.get("key_quotes"),
-                    )
+    def _run_transcription_stage(self, filename: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Queue stage 2: transcribe the (converted) audio and store the text."""
+        audio_path = payload.get("audio_path")
+        if not audio_path or not os.path.exists(audio_path):
+            # The converted file may be gone after a restart; fall back to the original
+            audio_path = self._find_local_file_path(filename)
+            if not audio_path:
+                raise FileNotFoundError("Local file not found")
 
-                    # Mark as completed
-                    self._audio_metadata_db.update_processing_status(filename, ProcessingStatus.COMPLETED)
+        self._audio_metadata_db.update_processing_status(filename, ProcessingStatus.TRANSCRIBING)
+        self.gui.after(0, self._refresh_file_display_for_metadata_change, filename)
 
-                    logger.info("AudioMetadata", "_process_background", f"Completed processing for {filename}")
-                else:
-                    self._audio_metadata_db.update_processing_status(
-                        filename, ProcessingStatus.ERROR, "AI analysis failed"
-                    )
-            else:
-                self._audio_metadata_db.update_processing_status(
-                    filename, ProcessingStatus.ERROR, "Transcription failed"
-                )
+        # A converted file belongs to the conversion cache, so it is kept for playback and re-processing
+        transcription_result = self._transcribe_audio_file(audio_path)
 
-            # Final GUI update
-            self.gui.after(0, self._refresh_file_display_for_metadata_change, filename)
+        if not transcription_result:
+            return None
 
+        self._audio_metadata_db.save_transcription(
+            filename=filename,
+            transcription_text=transcription_result["text"],
+            confidence=transcription_result.get("confidence"),
+            language=transcription_result.get("language"),
+        )
+        return {}
+
+    def _run_analysis_stage(self, filename: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Queue stage 3: run AI analysis on the stored transcription."""
+        metadata = self._audio_metadata_db.get_metadata(filename)
+        if not metadata or not metadata.transcription_text:
+            raise ValueError("No transcription available for analysis")
+
+        self._audio_metadata_db.update_processing_status(filename, ProcessingStatus.AI_ANALYZING)
+        self.gui.after(0, self._refresh_file_display_for_metadata_change, filename)
+
+        ai_result = self._analyze_transcription_with_ai(metadata.transcription_text)
+        if not ai_result:
+            return None
+
+        self._audio_metadata_db.save_ai_analysis(
+            filename=filename,
+            summary=ai_result.get("summary"),
+            participants=ai_result.get("participants"),
+            action_items=ai_result.get("action_items"),
+            topics=ai_result.get("topics"),
+            sentiment=ai_result.get("sentiment"),
+            key_quotes=ai_result.get("key_quotes"),
+        )
+        self._audio_metadata_db.update_processing_status(filename, ProcessingStatus.COMPLETED)
+        return {}
+
+    def _on_processing_job_event(self, job: ProcessingJob, status: JobStatus):
+        """Reflect queue job state changes in the metadata status and the file list."""
+        if status == JobStatus.FAILED:
+            self._audio_metadata_db.update_processing_status(job.filename, ProcessingStatus.ERROR, job.error)
+        elif status != JobStatus.DONE or job.stage != JobStage.ANALYSIS:
+            # Intermediate transitions are refreshed by the stage handlers themselves
+            return
+
+        try:
+            self.gui.after(0, self._refresh_file_display_for_metadata_change, job.filename)
         except Exception as e:
-            logger.error("AudioMetadata", "_process_background", f"Error processing {filename}: {e}")
-            self._audio_metadata_db.update_processing_status(filename, ProcessingStatus.ERROR, str(e))
-            self.gui.after(0, self._refresh_file_display_for_metadata_change, filename)
+            logger.debug("AudioMetadata", "_on_job_event", f"Could not schedule refresh: {e}")
+
+    def get_audio_processing_queue_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-stage job counts and timings of the processing queue."""
+        self._ensure_audio_metadata_initialized()
+        return self._audio_metadata_db.get_job_stage_metrics()
+
+    def shutdown_audio_processing_queue(self):
+        """Stop queue workers. Unfinished jobs resume on the next start."""
+        queue = getattr(self, "_processing_queue", None)
+        if queue is not None:
+            queue.stop(timeout=1.0)
 
     def _find_local_file_path(self, filename: str) -> Optional[str]:
         """Find local path for an audio file."""
@@ -573,9 +628,11 @@ class AudioMetadataMixin:
 
         return ready_files
 
-    def batch_process_ready_files(self, max_files: int = 5) -> int:
-        """Start batch processing of ready files."""
-        ready_files = self.get_files_ready_for_processing()[:max_files]
+    def batch_process_ready_files(self, max_files: Optional[int] = 5) -> int:
+        """Queue ready files for processing. Pass max_files=None to queue the whole backlog."""
+        ready_files = self.get_files_ready_for_processing()
+        if max_files is not None:
+            ready_files = ready_files[:max_files]
 
         started_count = 0
         for filename in ready_files:
@@ -583,7 +640,7 @@ class AudioMetadataMixin:
                 started_count += 1
 
         if started_count > 0:
-            logger.info("AudioMetadata", "batch_process", f"Started processing {started_count} files")
+            logger.info("AudioMetadata", "batch_process", f"Queued {started_count} files for processing")
 
         return started_count
 
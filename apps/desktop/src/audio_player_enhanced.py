@@ -39,7 +39,11 @@ except ImportError:
     pydub = None
     PYDUB_AVAILABLE = False
 
+from audio_envelope import extract_mpeg_waveform
+from audio_probe import probe_audio_file
+from audio_stream import MixerOutput, PcmSource, StreamingPlayback
 from config_and_logger import logger
+from hta_converter import get_or_convert
 
 
 class PlaybackState(Enum):
@@ -102,6 +106,12 @@ class AudioProcessor:
                 "bitrate": 0,
             }
 
+            # Read WAV and MPEG (.hda) properties from the file headers, without decoding
+            probed = probe_audio_file(filepath)
+            if probed:
+                info.update(probed)
+                return info
+
             # Try to get detailed info using pydub if available
             if PYDUB_AVAILABLE:
                 try:
@@ -210,6 +220,16 @@ class AudioProcessor:
     def extract_waveform_data(filepath: str, max_points: int = 1000) -> Tuple[np.ndarray, int]:
         """Extract waveform data for visualization"""
         try:
+            if filepath.lower().endswith((".hda", ".hta", ".mp2")):
+                # MPEG Layer I/II: the envelope comes from the frame scale factors, without decoding
+                envelope = extract_mpeg_waveform(filepath, max_points)
+                if envelope is not None:
+                    return envelope
+
+            if filepath.lower().endswith((".hda", ".hta")):
+                # Read the cached WAV conversion shared with playback and transcription
+                filepath = get_or_convert(filepath, "wav") or filepath
+
             if filepath.lower().endswith(".wav"):
                 try:
                     # Use wave module first (more reliable)
@@ -469,6 +489,12 @@ class EnhancedAudioPlayer:
         self.on_track_changed: Optional[Callable[[Optional[AudioTrack]], None]] = None
         self.on_playlist_changed: Optional[Callable[[], None]] = None
 
+        # Streaming engine, created on first play. While _stream_filepath is None
+        # (track not loaded, or it cannot be streamed) pygame.mixer.music is used.
+        self._stream: Optional[StreamingPlayback] = None
+        self._stream_output: Optional[MixerOutput] = None
+        self._stream_filepath: Optional[str] = None
+
         # Initialize pygame mixer if available
         self._initialize_audio_backend()
 
@@ -559,7 +585,10 @@ class EnhancedAudioPlayer:
                 return False
 
             if self.state == PlaybackState.PAUSED:
-                pygame.mixer.music.unpause()
+                if self._streaming:
+                    self._stream_output.resume()
+                else:
+                    pygame.mixer.music.unpause()
                 self._set_state(PlaybackState.PLAYING)
                 self._start_position_thread()
                 return True
@@ -567,6 +596,15 @@ class EnhancedAudioPlayer:
             elif self.state == PlaybackState.STOPPED:
                 self._set_state(PlaybackState.LOADING)
 
+                if self._open_stream(current_track):
+                    self._stream.volume = 0.0 if self.is_muted else self.volume
+                    self._stream.set_speed(self.playback_speed)
+                    self._stream.seek(self.current_position)
+                    self._stream_output.start()
+                    self._set_state(PlaybackState.PLAYING)
+                    self._start_position_thread()
+                    return True
+
                 # Always load the original file for simplicity
                 # Speed adjustment will be handled by creating pre-processed files
                 file_to_load = current_track.filepath
@@ -611,7 +649,10 @@ class EnhancedAudioPlayer:
         """Pause playback"""
         try:
             if self.state == PlaybackState.PLAYING and PYGAME_AVAILABLE:
-                pygame.mixer.music.pause()
+                if self._streaming:
+                    self._stream_output.pause()
+                else:
+                    pygame.mixer.music.pause()
                 self._set_state(PlaybackState.PAUSED)
                 self._stop_position_thread()
                 return True
@@ -623,6 +664,8 @@ class EnhancedAudioPlayer:
     def stop(self) -> bool:
         """Stop playback and release file handles"""
         try:
+            self._close_stream()
+
             if PYGAME_AVAILABLE and pygame.mixer.get_init():
                 pygame.mixer.music.stop()
                 # Unload the current music to release file handle
@@ -675,7 +718,10 @@ class EnhancedAudioPlayer:
 
             was_playing = self.state == PlaybackState.PLAYING
 
-            if PYGAME_AVAILABLE:
+            if self._streaming:
+                # Moves the engine's read cursor; nothing is reloaded and the play/pause state is kept
+                self._stream.seek(position)
+            elif PYGAME_AVAILABLE:
                 pygame.mixer.music.stop()
 
                 # Load appropriate file (speed-adjusted or original)
@@ -751,6 +797,8 @@ class EnhancedAudioPlayer:
         try:
             volume = max(0.0, min(1.0, volume))
             self.volume = volume
+            if self._stream:
+                self._stream.volume = 0.0 if self.is_muted else volume
 
             if PYGAME_AVAILABLE and pygame.mixer.get_init():
                 pygame.mixer.music.set_volume(volume if not self.is_muted else 0.0)
@@ -769,6 +817,8 @@ class EnhancedAudioPlayer:
             else:
                 self.previous_volume = self.volume
                 self.is_muted = True
+                if self._stream:
+                    self._stream.volume = 0.0
                 if PYGAME_AVAILABLE and pygame.mixer.get_init():
                     pygame.mixer.music.set_volume(0.0)
 
@@ -799,8 +849,12 @@ class EnhancedAudioPlayer:
                 f"Playback speed changed from {old_speed}x to {speed}x",
             )
 
-            # If we're currently playing, we need to restart with the new speed
-            if self.state == PlaybackState.PLAYING:
+            if self._streaming:
+                # Applied by the engine from the current position onwards
+                self._stream.set_speed(speed)
+
+            # Without the streaming engine, playback restarts from a speed-adjusted file
+            elif self.state == PlaybackState.PLAYING:
                 current_position = self.current_position
                 logger.info(
                     "EnhancedAudioPlayer",
@@ -872,6 +926,8 @@ class EnhancedAudioPlayer:
     def get_position(self) -> PlaybackPosition:
         """Get current playback position"""
         current_track = self.playlist.get_current_track()
+        if self._streaming and self.state == PlaybackState.PLAYING:
+            self.current_position = self._stream.position
         total_time = current_track.duration if current_track else 0.0
         percentage = (self.current_position / total_time * 100) if total_time > 0 else 0.0
 
@@ -885,7 +941,8 @@ class EnhancedAudioPlayer:
         """Start the position update thread"""
         self._stop_position_thread()
         self.stop_position_thread.clear()
-        self.position_update_thread = threading.Thread(target=self._position_update_worker)
+        worker = self._stream_position_worker if self._streaming else self._position_update_worker
+        self.position_update_thread = threading.Thread(target=worker)
         self.position_update_thread.daemon = True
         self.position_update_thread.start()
 
@@ -897,6 +954,76 @@ class EnhancedAudioPlayer:
             if self.position_update_thread != threading.current_thread():
                 self.position_update_thread.join(timeout=1.0)
 
+    def _stream_position_worker(self):
+        """Worker thread publishing the streaming engine's position, which counts played frames"""
+        while not self.stop_position_thread.wait(0.05):
+            try:
+                if self.state != PlaybackState.PLAYING or not self._streaming:
+                    continue
+                if self._stream_output.finished:
+                    if self.playlist.repeat_mode == RepeatMode.ONE:
+                        self._stream.seek(0.0)
+                        self._stream_output.start()
+                        continue
+                    next_track = self.playlist.next_track()
+                    self.stop()
+                    if next_track:
+                        self._notify_track_changed()
+                        self.play()  # starts a new position thread
+                    return
+
+                self.current_position = self._stream.position
+                self._notify_position_changed()
+
+            except Exception as e:
+                logger.error(
+                    "EnhancedAudioPlayer",
+                    "_stream_position_worker",
+                    f"Error in position thread: {e}",
+                )
+                break
+
+    @property
+    def _streaming(self) -> bool:
+        """True while the current track is played by the streaming engine"""
+        return self._stream_filepath is not None
+
+    def _open_stream(self, track: AudioTrack) -> bool:
+        """Load a track into the streaming engine; False if it has to be played with pygame.mixer.music"""
+        if not PYGAME_AVAILABLE or not pygame.mixer.get_init():
+            return False
+        if self._stream_filepath == track.filepath:
+            return True
+
+        frequency, size, channels = pygame.mixer.get_init()
+        if abs(size) != 16:
+            return False
+        source = PcmSource.open(track.filepath)
+        if source is None:
+            return False
+
+        if self._stream is None:
+            self._stream = StreamingPlayback(output_rate=frequency, output_channels=channels)
+            self._stream_output = MixerOutput(self._stream)
+        self._stream.load(source)
+        self._stream_filepath = track.filepath
+        if source.duration > 0:
+            track.duration = source.duration
+        logger.info(
+            "EnhancedAudioPlayer",
+            "_open_stream",
+            f"Streaming {track.filepath} ({source.sample_rate} Hz, {source.channels} ch, {source.duration:.1f}s)",
+        )
+        return True
+
+    def _close_stream(self):
+        """Stop the streaming engine and release the track it holds"""
+        if self._stream_output:
+            self._stream_output.stop()
+        if self._stream:
+            self._stream.unload()
+        self._stream_filepath = None
+
     def _position_update_worker(self):
         """Worker thread for updating playback position"""
         logger.debug(
@@ -1152,6 +1279,10 @@ class EnhancedAudioPlayer:
         try:
             self.stop()
             self._stop_position_thread()
+            if self._stream_output:
+                self._stream_output.close()
+            if self._stream:
+                self._stream.close()
 
             # Clean up temporary files
             self._cleanup_temp_files()
@@ -0,0 +1,280 @@
+"""
+Header-only Audio Metadata Probing for HiDock Desktop Application.
+
+Reads duration, sample rate, channels and bitrate without decoding audio:
+- WAV files: the RIFF `fmt ` and `data` chunk headers
+- HiDock recordings (.hda/.hta, MPEG Audio Layer 1/2) and MP2/MP3 files: the
+  MPEG frame headers, duration = frame count x samples per frame
+
+For constant bitrate streams every frame header is checked with one strided
+NumPy comparison; variable bitrate streams, or streams with junk between
+frames, are walked frame by frame. Results are cached by (path, size, mtime).
+"""
+
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config_and_logger import logger
+
+PROBE_CACHE_SIZE = 2048
+
+# Bitrates in kb/s indexed by the 4-bit bitrate index, keyed by (MPEG-1?, layer)
+MPEG_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates indexed by the 2-bit sample rate index, keyed by the 2-bit version ID
+MPEG_SAMPLE_RATES = {
+    0b11: (44100, 48000, 32000),  # MPEG-1
+    0b10: (22050, 24000, 16000),  # MPEG-2
+    0b00: (11025, 12000, 8000),  # MPEG-2.5
+}
+
+
+class MpegFrameHeader(NamedTuple):
+    """Decoded 4-byte MPEG audio frame header."""
+
+    version_id: int
+    layer: int
+    bitrate: int
+    sample_rate: int
+    channels: int
+    padding: int
+    frame_length: int
+    samples_per_frame: int
+
+
+def parse_mpeg_header(data, offset: int = 0) -> Optional[MpegFrameHeader]:
+    """Decode the frame header at `offset`, or None if there is no valid header there."""
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset : offset + 4]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version_id = (b1 >> 3) & 0x3
+    layer = 4 - ((b1 >> 1) & 0x3)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x3
+    if version_id == 0b01 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None  # reserved values, or free-format bitrate (frame length unknown)
+
+    mpeg1 = version_id == 0b11
+    bitrate = MPEG_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = MPEG_SAMPLE_RATES[version_id][sample_rate_index]
+    padding = (b2 >> 1) & 0x1
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples_per_frame = 1152
+        frame_length = 144 * bitrate // sample_rate + padding
+    else:
+        samples_per_frame = 576  # MPEG-2/2.5 Layer 3
+        frame_length = 72 * bitrate // sample_rate + padding
+
+    channels = 1 if (b3 >> 6) == 0b11 else 2
+    return MpegFrameHeader(version_id, layer, bitrate, sample_rate, channels, padding, frame_length, samples_per_frame)
+
+
+def stream_bounds(data) -> Tuple[int, int]:
+    """Byte range of the audio frames, skipping an ID3v2 tag at the start and an ID3v1 tag at the end."""
+    start, end = 0, len(data)
+    if data[:3] == b"ID3" and end >= 10:
+        size = data[6] << 21 | data[7] << 14 | data[8] << 7 | data[9]
+        start = 10 + size + (10 if data[5] & 0x10 else 0)
+    if end - start >= 128 and data[end - 128 : end - 125] == b"TAG":
+        end -= 128
+    return start, end
+
+
+def find_first_frame(data, start: int, end: int, max_search: int = 64 * 1024) -> Optional[Tuple[int, MpegFrameHeader]]:
+    """First frame header within `max_search` bytes of `start` that is followed by another valid header."""
+    offset = start
+    limit = min(end, start + max_search)
+    while offset < limit:
+        offset = data.find(b"\xff", offset, limit)
+        if offset < 0:
+            return None
+        header = parse_mpeg_header(data, offset)
+        if header:
+            following = offset + header.frame_length
+            if following >= end or parse_mpeg_header(data, following):
+                return offset, header
+        offset += 1
+    return None
+
+
+def iter_mpeg_frames(data, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, MpegFrameHeader]]:
+    """Yield (offset, header) for every complete frame, resynchronising after corrupt data."""
+    end = len(data) if end is None else end
+    offset = start
+    while offset < end:
+        header = parse_mpeg_header(data, offset)
+        if header is None:
+            found = find_first_frame(data, offset + 1, end)
+            if found is None:
+                return
+            offset, header = found
+        if offset + header.frame_length > end:
+            return
+        yield offset, header
+        offset += header.frame_length
+
+
+def constant_frame_count(data, offset: int, header: MpegFrameHeader, end: int) -> Optional[int]:
+    """Number of frames if every frame from `offset` repeats the first header without padding, else None."""
+    frame_length = header.frame_length
+    if header.padding or frame_length < 4:
+        return None
+    count = (end - offset) // frame_length
+    if count == 0:
+        return None
+    frames = np.frombuffer(data, dtype=np.uint8, count=count * frame_length, offset=offset)
+    heads = frames.reshape(count, frame_length)[:, :4]
+    first = heads[0].copy()
+    # The last header byte holds the channel mode extension, copyright and emphasis bits, which may vary
+    matches = bool((heads[:, :3] == first[:3]).all() and ((heads[:, 3] & 0xC0) == (first[3] & 0xC0)).all())
+    del frames, heads
+    return count if matches else None
+
+
+def probe_mpeg(data) -> Optional[Dict]:
+    """Duration, sample rate, channels and average bitrate of an MPEG audio stream."""
+    start, end = stream_bounds(data)
+    found = find_first_frame(data, start, end)
+    if found is None:
+        return None
+    offset, header = found
+
+    count = constant_frame_count(data, offset, header, end)
+    if count is not None:
+        samples = count * header.samples_per_frame
+        stream_bytes = count * header.frame_length
+    else:
+        count = samples = stream_bytes = 0
+        for _, frame in iter_mpeg_frames(data, offset, end):
+            count += 1
+            samples += frame.samples_per_frame
+            stream_bytes += frame.frame_length
+    if count == 0:
+        return None
+
+    duration = samples / header.sample_rate
+    return {
+        "duration": duration,
+        "sample_rate": header.sample_rate,
+        "channels": header.channels,
+        "bitrate": int(round(stream_bytes * 8 / duration)) if duration else header.bitrate,
+        "codec": f"mpeg-layer{header.layer}",
+    }
+
+
+class WavLayout(NamedTuple):
+    """Format and data chunk position of a RIFF/WAVE file."""
+
+    format_tag: int
+    channels: int
+    sample_rate: int
+    block_align: int
+    bits_per_sample: int
+    data_offset: int
+    data_size: int
+
+
+def wav_layout(data) -> Optional[WavLayout]:
+    """Parse the `fmt ` and `data` chunk headers of a RIFF/WAVE file."""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+
+    fmt = None
+    data_chunk = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset : offset + 4]
+        (chunk_size,) = struct.unpack_from("<I", data, offset + 4)
+        body = offset + 8
+        if chunk_id == b"fmt " and chunk_size >= 16:
+            fmt = struct.unpack_from("<HHIIHH", data, body)
+        elif chunk_id == b"data":
+            # Writers that were interrupted (or stream) leave the size unset or too large
+            data_chunk = (body, min(chunk_size, len(data) - body))
+            if fmt is not None:
+                break
+        offset = body + chunk_size + (chunk_size & 1)
+
+    if fmt is None or data_chunk is None:
+        return None
+    format_tag, channels, sample_rate, _byte_rate, block_align, bits_per_sample = fmt
+    if not sample_rate or not block_align:
+        return None
+    return WavLayout(format_tag, channels, sample_rate, block_align, bits_per_sample, *data_chunk)
+
+
+def probe_wav(data) -> Optional[Dict]:
+    """Duration, sample rate, channels and bitrate from the chunk headers of a RIFF/WAVE file."""
+    layout = wav_layout(data)
+    if layout is None:
+        return None
+    return {
+        "duration": (layout.data_size // layout.block_align) / layout.sample_rate,
+        "sample_rate": layout.sample_rate,
+        "channels": layout.channels,
+        "bitrate": layout.sample_rate * layout.bits_per_sample * layout.channels,
+        "codec": "pcm",
+    }
+
+
+_cache: "OrderedDict[Tuple[str, int, int], Dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def probe_audio_file(filepath: str) -> Optional[Dict]:
+    """
+    Audio properties of a WAV or MPEG audio file read from its headers only.
+
+    Returns a dict with duration (seconds), sample_rate, channels, bitrate (bits
+    per second) and codec, or None if the file is missing or not recognised.
+    """
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return dict(_cache[key])
+
+    result = None
+    if stat.st_size:
+        try:
+            with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                result = probe_wav(data) if data[:4] == b"RIFF" else probe_mpeg(data)
+        except (OSError, ValueError, struct.error) as e:
+            logger.debug("AudioProbe", "probe_audio_file", f"Could not probe {filepath}: {e}")
+            return None
+
+    if result is None:
+        return None
+    with _cache_lock:
+        _cache[key] = result
+        if len(_cache) > PROBE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return dict(result)
+
+
+def clear_probe_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,189 @@
+"""
+Persistent, Stage-Pipelined Audio Processing Queue for HiDock Desktop Application.
+
+Recordings are processed in three stages - conversion, transcription and AI
+analysis - each served by its own pool of worker threads. A file finishing one
+stage is queued for the next, so while one recording is being analysed the next
+can already be transcribing and a third converting. Jobs live in the
+`processing_jobs` table of `AudioMetadataDB`, so a backlog interrupted by a
+restart resumes where it left off.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from audio_metadata_db import AudioMetadataDB, JobStage, JobStatus, ProcessingJob
+from config_and_logger import logger
+
+STAGE_ORDER = [JobStage.CONVERSION, JobStage.TRANSCRIPTION, JobStage.ANALYSIS]
+
+DEFAULT_STAGE_WORKERS = {
+    JobStage.CONVERSION: 1,  # local CPU work
+    JobStage.TRANSCRIPTION: 2,  # network bound, limited by provider quotas
+    JobStage.ANALYSIS: 2,
+}
+
+# handler(filename, payload) -> payload for the next stage, or None on failure
+StageHandler = Callable[[str, Dict[str, Any]], Optional[Dict[str, Any]]]
+# on_job_event(job, status) is called after every state change of a job
+JobEventCallback = Callable[[ProcessingJob, JobStatus], None]
+
+
+class AudioProcessingQueue:
+    """Runs queued processing jobs from `AudioMetadataDB` with per-stage worker pools."""
+
+    def __init__(
+        self,
+        db: AudioMetadataDB,
+        handlers: Dict[JobStage, StageHandler],
+        workers: Optional[Dict[JobStage, int]] = None,
+        on_job_event: Optional[JobEventCallback] = None,
+        max_attempts: int = 2,
+        poll_interval: float = 5.0,
+    ):
+        self.db = db
+        self.handlers = handlers
+        self.workers = {**DEFAULT_STAGE_WORKERS, **(workers or {})}
+        self.on_job_event = on_job_event
+        self.max_attempts = max(1, max_attempts)
+        self.poll_interval = poll_interval
+
+        self._wakeup = threading.Condition()
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def is_running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self) -> int:
+        """
+        Start the stage workers, first requeueing jobs interrupted by a previous session.
+
+        Returns the number of jobs waiting to be processed.
+        """
+        if self.is_running:
+            return len(self.db.get_active_jobs())
+
+        self.db.requeue_interrupted_jobs()
+        self._stop_event.clear()
+        self._threads = []
+        for stage in STAGE_ORDER:
+            for index in range(max(1, self.workers.get(stage, 1))):
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    args=(stage,),
+                    daemon=True,
+                    name=f"AudioProcessing-{stage.value}-{index}",
+                )
+                thread.start()
+                self._threads.append(thread)
+
+        pending = len(self.db.get_active_jobs())
+        logger.info(
+            "AudioProcessingQueue",
+            "start",
+            f"Started {len(self._threads)} workers, {pending} job(s) pending",
+        )
+        return pending
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers. Jobs still running are requeued on the next start."""
+        self._stop_event.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, filename: str, first_stage: JobStage = JobStage.CONVERSION) -> Optional[int]:
+        """Queue a file for processing. Returns the job id, or None if it could not be queued."""
+        job_id = self.db.enqueue_job(filename, first_stage)
+        if job_id is not None:
+            self._notify()
+        return job_id
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage queue counts and timings (see AudioMetadataDB.get_job_stage_metrics)."""
+        return self.db.get_job_stage_metrics()
+
+    def _notify(self):
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _worker_loop(self, stage: JobStage):
+        while not self._stop_event.is_set():
+            try:
+                job = self.db.claim_next_job(stage)
+            except Exception as e:
+                logger.error("AudioProcessingQueue", "_worker_loop", f"Error claiming {stage.value} job: {e}")
+                job = None
+
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+
+            self._run_job(job)
+
+    def _run_job(self, job: ProcessingJob):
+        self._emit(job, JobStatus.RUNNING)
+        handler = self.handlers.get(job.stage)
+        started = time.monotonic()
+        error = None
+        result = None
+
+        try:
+            if handler is None:
+                error = f"No handler for stage {job.stage.value}"
+            else:
+                result = handler(job.filename, job.payload)
+                if result is None:
+                    error = f"{job.stage.value.capitalize()} failed"
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            logger.error("AudioProcessingQueue", "_run_job", f"{job.stage.value} of {job.filename} raised: {e}")
+
+        elapsed = time.monotonic() - started
+
+        if error is None:
+            self.db.complete_job(job.id)
+            next_stage = self._next_stage(job.stage)
+            if next_stage is not None:
+                self.db.enqueue_job(job.filename, next_stage, result)
+                self._notify()
+            logger.info(
+                "AudioProcessingQueue",
+                "_run_job",
+                f"{job.stage.value} of {job.filename} finished in {elapsed:.1f}s",
+            )
+            self._emit(job, JobStatus.DONE)
+            return
+
+        job.error = error
+        retry = job.attempts < self.max_attempts
+        self.db.fail_job(job.id, error, retry=retry)
+        logger.warning(
+            "AudioProcessingQueue",
+            "_run_job",
+            f"{job.stage.value} of {job.filename} failed (attempt {job.attempts}/{self.max_attempts}): {error}",
+        )
+        if retry:
+            self._notify()
+            self._emit(job, JobStatus.QUEUED)
+        else:
+            self._emit(job, JobStatus.FAILED)
+
+    @staticmethod
+    def _next_stage(stage: JobStage) -> Optional[JobStage]:
+        index = STAGE_ORDER.index(stage)
+        return STAGE_ORDER[index + 1] if index + 1 < len(STAGE_ORDER) else None
+
+    def _emit(self, job: ProcessingJob, status: JobStatus):
+        if self.on_job_event is None:
+            return
+        try:
+            self.on_job_event(job, status)
+        except Exception as e:
+            logger.warning("AudioProcessingQueue", "_emit", f"Job event callback failed: {e}")
@@ -0,0 +1,433 @@
+"""
+Streaming Audio Playback Engine for HiDock Desktop Application.
+
+Playback is pull-based instead of handing whole files to pygame.mixer.music:
+- A recording is opened once as random-access PCM: WAV data chunks are
+  memory-mapped, HiDock recordings (.hda/.hta) are memory-mapped from their
+  cached WAV conversion, other formats (.mp3) are decoded once with pydub.
+- A producer thread renders blocks of float32 NumPy samples at the output
+  rate from a read cursor into a small ring buffer, resampling for the
+  playback speed.
+- The output pulls blocks from the ring buffer, applies the volume and
+  reports how many source frames have been played, which is the playback
+  position.
+- Seeking moves the read cursor to a frame offset and flushes the ring
+  buffer, so it costs the same anywhere in a long recording and never
+  reloads or re-decodes the file.
+"""
+
+import mmap
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, NamedTuple, Optional
+
+import numpy as np
+
+from audio_probe import wav_layout
+from config_and_logger import logger
+from hta_converter import get_or_convert
+
+try:
+    import pygame
+    import pygame.mixer
+
+    PYGAME_AVAILABLE = True
+except ImportError:
+    pygame = None
+    PYGAME_AVAILABLE = False
+
+DEFAULT_BLOCK_FRAMES = 2048
+DEFAULT_BUFFER_BLOCKS = 8
+
+# WAV format tags that can be memory-mapped as-is
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class PcmSource:
+    """Random-access PCM audio: `samples` has shape (frames, channels)."""
+
+    def __init__(self, samples: np.ndarray, sample_rate: int, scale: float = 1.0, offset: float = 0.0, handle=None):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.channels = samples.shape[1]
+        self.frames = samples.shape[0]
+        self._scale = scale
+        self._offset = offset
+        self._handle = handle
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    def read(self, start: int, count: int) -> np.ndarray:
+        """Frames [start, start + count) as float32 in [-1, 1]."""
+        block = self.samples[max(0, start) : max(0, start + count)].astype(np.float32)
+        if self._offset:
+            block -= self._offset
+        if self._scale != 1.0:
+            block *= self._scale
+        return block
+
+    def close(self):
+        self.samples = np.zeros((0, self.channels), dtype=self.samples.dtype)
+        self.frames = 0
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except BufferError:
+                pass  # a block is still being rendered from the mapping; it is released with it
+            self._handle = None
+
+    @classmethod
+    def from_wav(cls, filepath: str) -> Optional["PcmSource"]:
+        """Memory-map the data chunk of an integer or float WAV file."""
+        with open(filepath, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        layout = wav_layout(mapped)
+        dtype = None
+        if layout and layout.format_tag in (WAVE_FORMAT_PCM, WAVE_FORMAT_EXTENSIBLE):
+            dtype = {8: np.uint8, 16: np.int16, 32: np.int32}.get(layout.bits_per_sample)
+        elif layout and layout.format_tag == WAVE_FORMAT_IEEE_FLOAT and layout.bits_per_sample == 32:
+            dtype = np.float32
+        if dtype is None or layout.block_align != layout.channels * np.dtype(dtype).itemsize:
+            mapped.close()
+            return None
+
+        frames = layout.data_size // layout.block_align
+        samples = np.frombuffer(mapped, dtype=dtype, count=frames * layout.channels, offset=layout.data_offset)
+        samples = samples.reshape(frames, layout.channels)
+        if dtype is np.uint8:
+            return cls(samples, layout.sample_rate, 1 / 128.0, 128.0, handle=mapped)
+        if dtype is np.float32:
+            return cls(samples, layout.sample_rate, handle=mapped)
+        return cls(samples, layout.sample_rate, 1 / float(2 ** (layout.bits_per_sample - 1)), handle=mapped)
+
+    @classmethod
+    def decode(cls, filepath: str) -> Optional["PcmSource"]:
+        """Decode any format ffmpeg understands (HiDock .hda recordings are MPEG audio) into memory."""
+        try:
+            from pydub import AudioSegment
+        except ImportError:
+            return None
+        audio = AudioSegment.from_file(filepath)
+        dtype = {1: np.uint8, 2: np.int16, 4: np.int32}.get(audio.sample_width)
+        if dtype is None:
+            audio = audio.set_sample_width(2)
+            dtype = np.int16
+        samples = np.frombuffer(audio.raw_data, dtype=dtype).reshape(-1, audio.channels)
+        if dtype is np.uint8:
+            return cls(samples, audio.frame_rate, 1 / 128.0, 128.0)
+        return cls(samples, audio.frame_rate, 1 / float(2 ** (8 * audio.sample_width - 1)))
+
+    @classmethod
+    def open(cls, filepath: str) -> Optional["PcmSource"]:
+        """Open a recording for streaming, memory-mapping WAV files and decoding everything else."""
+        try:
+            if filepath.lower().endswith((".hda", ".hta")):
+                # Converted once and shared with the waveform loader and transcription
+                filepath = get_or_convert(filepath, "wav") or filepath
+            with open(filepath, "rb") as f:
+                is_wav = f.read(4) == b"RIFF"
+            source = cls.from_wav(filepath) if is_wav else None
+            return source or cls.decode(filepath)
+        except Exception as e:
+            logger.error("PcmSource", "open", f"Cannot open {filepath} for streaming: {e}")
+            return None
+
+
+class AudioBlock(NamedTuple):
+    """Rendered output samples and the range of source frames they cover."""
+
+    samples: np.ndarray
+    source_start: float
+    source_end: float
+    generation: int
+
+
+class StreamingPlayback:
+    """Ring buffer of rendered blocks between a PCM source and an audio output."""
+
+    def __init__(
+        self,
+        output_rate: int = 44100,
+        output_channels: int = 2,
+        block_frames: int = DEFAULT_BLOCK_FRAMES,
+        buffer_blocks: int = DEFAULT_BUFFER_BLOCKS,
+    ):
+        self.output_rate = output_rate
+        self.output_channels = output_channels
+        self.block_frames = block_frames
+        self.buffer_blocks = buffer_blocks
+        self.source: Optional[PcmSource] = None
+        self.speed = 1.0
+        self.volume = 1.0
+        self.generation = 0
+
+        self._ring: Deque[AudioBlock] = deque()
+        self._condition = threading.Condition()
+        self._cursor = 0.0  # next source frame to render
+        self._consumed = 0.0  # source frames played so far
+        self._exhausted = False
+        self._running = False
+        self._producer: Optional[threading.Thread] = None
+
+    # Control (any thread)
+
+    def load(self, source: PcmSource):
+        with self._condition:
+            if self.source is not None and self.source is not source:
+                self.source.close()
+            self.source = source
+            self._reset(0.0)
+
+    def unload(self):
+        with self._condition:
+            if self.source is not None:
+                self.source.close()
+            self.source = None
+            self._reset(0.0)
+
+    def seek(self, seconds: float):
+        """Continue from `seconds`; blocks rendered for the old position are discarded."""
+        with self._condition:
+            if self.source is not None:
+                self._reset(min(max(0.0, seconds * self.source.sample_rate), float(self.source.frames)))
+
+    def set_speed(self, speed: float):
+        with self._condition:
+            if speed != self.speed:
+                self.speed = speed
+                self._reset(self._consumed)
+
+    def _reset(self, frame: float):
+        self._ring.clear()
+        self._cursor = self._consumed = frame
+        self._exhausted = False
+        self.generation += 1
+        self._condition.notify_all()
+
+    @property
+    def position(self) -> float:
+        """Playback position in seconds, from the source frames the output has consumed."""
+        source = self.source
+        return self._consumed / source.sample_rate if source else 0.0
+
+    @property
+    def exhausted(self) -> bool:
+        """True once every source frame has been rendered and pulled."""
+        return self._exhausted and not self._ring
+
+    # Producer
+
+    def start(self):
+        if self._producer and self._producer.is_alive():
+            return
+        self._running = True
+        self._producer = threading.Thread(target=self._produce_loop, name="AudioStreamProducer", daemon=True)
+        self._producer.start()
+
+    def close(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._producer and self._producer is not threading.current_thread():
+            self._producer.join(timeout=1.0)
+        self.unload()
+
+    def _produce_loop(self):
+        while True:
+            with self._condition:
+                while self._running and (
+                    self.source is None or self._exhausted or len(self._ring) >= self.buffer_blocks
+                ):
+                    self._condition.wait()
+                if not self._running:
+                    return
+            self.produce()
+
+    def produce(self) -> bool:
+        """Render one block at the read cursor into the ring buffer; False at the end of the source."""
+        with self._condition:
+            source, cursor, speed, generation = self.source, self._cursor, self.speed, self.generation
+        if source is None:
+            return False
+
+        try:
+            block = self._render(source, cursor, speed, generation)
+        except Exception as e:
+            block = None
+            if generation == self.generation:
+                logger.error("StreamingPlayback", "produce", f"Error rendering audio: {e}")
+        with self._condition:
+            if generation != self.generation:
+                return True  # seeked or unloaded while rendering
+            if block is None:
+                self._exhausted = True
+                return False
+            self._ring.append(block)
+            self._cursor = block.source_end
+            return True
+
+    def _render(self, source: PcmSource, cursor: float, speed: float, generation: int) -> Optional[AudioBlock]:
+        step = source.sample_rate * speed / self.output_rate
+        count = min(self.block_frames, int(np.ceil((source.frames - cursor) / step)))
+        if count <= 0:
+            return None
+
+        positions = cursor + step * np.arange(count)
+        first = int(positions[0])
+        chunk = source.read(first, int(positions[-1]) + 2 - first)
+        index = positions - first
+        low = index.astype(np.int64)
+        high = np.minimum(low + 1, len(chunk) - 1)
+        fraction = (index - low).astype(np.float32)[:, None]
+        samples = chunk[low] * (1.0 - fraction) + chunk[high] * fraction
+
+        if source.channels != self.output_channels:
+            if self.output_channels == 1:
+                samples = samples.mean(axis=1, keepdims=True)
+            else:
+                samples = np.repeat(
+                    samples[:, :1] if source.channels == 1 else samples.mean(axis=1, keepdims=True),
+                    self.output_channels,
+                    axis=1,
+                )
+        return AudioBlock(samples, cursor, min(cursor + step * count, float(source.frames)), generation)
+
+    # Consumer (audio output)
+
+    def pull(self) -> Optional[AudioBlock]:
+        """Next block with the volume applied, or None if the ring buffer is empty."""
+        with self._condition:
+            if not self._ring:
+                return None
+            block = self._ring.popleft()
+            self._condition.notify_all()
+        return block._replace(samples=block.samples * np.float32(self.volume))
+
+    def mark_played(self, block: AudioBlock, fraction: float):
+        """Record that `fraction` of `block` has been heard."""
+        with self._condition:
+            if block.generation == self.generation:
+                self._consumed = block.source_start + (block.source_end - block.source_start) * fraction
+
+
+class MixerOutput:
+    """
+    Plays engine blocks on a pygame mixer channel.
+
+    One block plays while the next is queued behind it; when the queued
+    block starts, the next one is pulled. The position inside the playing
+    block is reported to the engine on every poll.
+    """
+
+    def __init__(self, engine: StreamingPlayback, poll_interval: float = 0.01):
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.on_finished: Optional[Callable[[], None]] = None
+        self.channel = pygame.mixer.find_channel(True) if PYGAME_AVAILABLE else None
+        self._playing: Optional[AudioBlock] = None
+        self._playing_since = 0.0
+        self._queued: Optional[AudioBlock] = None
+        self._generation = -1
+        self._active = threading.Event()
+        self._stop = threading.Event()
+        self._paused_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self.finished = False
+
+    def start(self):
+        """Start (or restart after `stop`) feeding the channel."""
+        self.finished = False
+        self._paused_at = None
+        self.engine.start()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="AudioStreamOutput", daemon=True)
+            self._thread.start()
+        self._active.set()
+
+    def pause(self):
+        self._active.clear()
+        if self._paused_at is None:
+            self._paused_at = time.monotonic()
+        self.channel.pause()
+
+    def resume(self):
+        if self._paused_at is not None:
+            self._playing_since += time.monotonic() - self._paused_at
+            self._paused_at = None
+        self.channel.unpause()
+        self._active.set()
+
+    def stop(self):
+        self._active.clear()
+        self.channel.stop()
+        self._playing = self._queued = None
+        self._paused_at = None
+
+    def close(self):
+        self.stop()
+        self._stop.set()
+        self._active.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._active.wait()
+            if self._stop.is_set():
+                return
+            try:
+                self._feed()
+            except Exception as e:
+                logger.error("MixerOutput", "_run", f"Audio output error: {e}")
+                self.stop()
+            self._stop.wait(self.poll_interval)
+
+    def _feed(self):
+        engine = self.engine
+        if self._generation != engine.generation:
+            # Seek or speed change: drop what the channel holds for the old position
+            self._generation = engine.generation
+            self.channel.stop()
+            self._playing = self._queued = None
+
+        now = time.monotonic()
+        if self._queued is not None and self.channel.get_queue() is None:
+            self._playing, self._playing_since, self._queued = self._queued, now, None
+        elif self._playing is not None and not self.channel.get_busy():
+            self._playing = None
+
+        if self._queued is None:
+            block = engine.pull()
+            if block is not None and block.generation != self._generation:
+                # Seeked between the check above and the pull
+                self._generation = block.generation
+                self.channel.stop()
+                self._playing = None
+            if block is not None:
+                sound = pygame.mixer.Sound(buffer=self._to_pcm16(block.samples))
+                if self._playing is None:
+                    self.channel.play(sound)
+                    self._playing, self._playing_since = block, now
+                else:
+                    self.channel.queue(sound)
+                    self._queued = block
+            elif self._playing is None and engine.exhausted:
+                self._active.clear()
+                self.finished = True
+                if self.on_finished:
+                    self.on_finished()
+                return
+
+        if self._playing is not None:
+            duration = len(self._playing.samples) / engine.output_rate
+            engine.mark_played(self._playing, min(1.0, (now - self._playing_since) / duration))
+
+    @staticmethod
+    def _to_pcm16(samples: np.ndarray) -> bytes:
+        return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
@@ -0,0 +1,527 @@
+# -*- coding: utf-8 -*-
+"""
+Chunked, parallel transcription for long recordings.
+
+A multi-hour recording sent as one provider call is slow, can hit provider
+output limits, and has to be redone entirely if it fails. This module:
+- Finds speech regions with a lightweight energy-based VAD (NumPy only) that
+  streams the WAV in blocks, so multi-hour recordings are never held in memory
+- Packs them into ~target-length chunks that are only ever cut in silence
+  (same planning strategy as scripts/experiments/wer/wer_lib.py)
+- Transcribes the chunks concurrently with a bounded worker pool and a
+  per-provider request rate limit
+- Stitches the chunk transcripts back together with absolute timestamps
+- Allows retrying only the chunks that failed
+
+Chunk transcriptions go through `AIServiceManager.transcribe_audio`, so every
+chunk is individually cached by content hash and a re-run only pays for the
+chunks that did not succeed previously.
+"""
+
+import os
+import re
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config_and_logger import logger
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# --- Defaults ---
+DEFAULT_TARGET_CHUNK_SECONDS = 600.0  # ~10 minute chunks
+DEFAULT_CHUNK_PAD_SECONDS = 0.5
+DEFAULT_MIN_DURATION_FOR_CHUNKING = 1200.0  # only chunk recordings longer than 20 minutes
+DEFAULT_MAX_WORKERS = 4
+VAD_FRAME_MS = 30
+VAD_MIN_SILENCE_MS = 300
+VAD_THRESHOLD_DB = -45.0  # absolute floor; the adaptive threshold is derived from the noise floor
+VAD_BLOCK_FRAMES = 1000  # VAD frames decoded per read (~30 s of audio)
+
+# Requests per minute allowed per provider when chunking. Conservative values that fit
+# the free tiers; configurable through `ChunkedTranscriber(requests_per_minute=...)`.
+DEFAULT_PROVIDER_RATE_LIMITS = {
+    "gemini": 10,
+    "openai": 50,
+    "anthropic": 50,
+    "openrouter": 20,
+    "ollama": 0,  # local, no limit
+    "lmstudio": 0,
+}
+
+_TIMESTAMP_RE = re.compile(r"\[(\d{1,3}):(\d{2})(?::(\d{2}))?\]")
+
+
+class RateLimiter:
+    """Thread-safe minimum-interval limiter (requests per minute)."""
+
+    def __init__(self, requests_per_minute: float, clock: Callable[[], float] = time.monotonic, sleep=time.sleep):
+        self.interval = self._interval_for(requests_per_minute)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    @staticmethod
+    def _interval_for(requests_per_minute: Optional[float]) -> float:
+        return 60.0 / requests_per_minute if requests_per_minute and requests_per_minute > 0 else 0.0
+
+    def set_rate(self, requests_per_minute: float):
+        """Change the rate in place, keeping the slot already reserved by earlier requests."""
+        with self._lock:
+            self.interval = self._interval_for(requests_per_minute)
+
+    def acquire(self) -> float:
+        """Block until a request may start. Returns the time waited in seconds."""
+        if self.interval <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next_slot)
+            self._next_slot = start + self.interval
+        wait = start - now
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_provider_rate_limiter(provider: str, requests_per_minute: Optional[float] = None) -> RateLimiter:
+    """
+    Return the process-wide rate limiter for a provider, so concurrent files share the budget.
+
+    The limiter is created once per provider; a configured `requests_per_minute` updates
+    its rate in place instead of replacing it, so in-flight spacing is preserved.
+    """
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(provider)
+        if limiter is None:
+            if requests_per_minute is None:
+                requests_per_minute = DEFAULT_PROVIDER_RATE_LIMITS.get(provider, 20)
+            limiter = RateLimiter(requests_per_minute)
+            _rate_limiters[provider] = limiter
+        elif requests_per_minute is not None:
+            limiter.set_rate(requests_per_minute)
+        return limiter
+
+
+# --- Audio helpers ---
+
+
+def _open_pcm16_wav(audio_file_path: str) -> wave.Wave_read:
+    """Open a 16-bit PCM WAV file, raising wave.Error for anything else."""
+    wf = wave.open(audio_file_path, "rb")
+    if wf.getsampwidth() != 2:
+        sample_width = wf.getsampwidth()
+        wf.close()
+        raise wave.Error(f"unsupported sample width {sample_width}")
+    return wf
+
+
+def _to_mono(raw: bytes, channels: int):
+    """Interpret raw 16-bit PCM frames as mono int16 samples."""
+    samples = np.frombuffer(raw, dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples
+
+
+def get_audio_duration_seconds(audio_file_path: str) -> float:
+    """Cheap duration probe (WAV header only). Returns 0.0 if unknown."""
+    try:
+        with wave.open(audio_file_path, "rb") as wf:
+            rate = wf.getframerate()
+            return wf.getnframes() / float(rate) if rate else 0.0
+    except (wave.Error, EOFError, OSError):
+        return 0.0
+
+
+def _frame_levels_db(samples, frame_len: int):
+    """RMS level in dB of each complete `frame_len` frame of an int16 block."""
+    n_frames = len(samples) // frame_len
+    frames = samples[: n_frames * frame_len].astype(np.float32).reshape(n_frames, frame_len) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1) + 1e-12)
+    return 20.0 * np.log10(rms)
+
+
+def compute_frame_levels(audio_file_path: str, frame_ms: int = VAD_FRAME_MS) -> Tuple[Any, int, int]:
+    """
+    Stream a 16-bit PCM WAV in blocks and compute each VAD frame's RMS level.
+
+    Only one block of samples (`VAD_BLOCK_FRAMES` frames) is decoded at a time, so
+    memory stays at one float per frame regardless of the recording length.
+
+    Returns:
+        (level_db, frame_len, sample_rate) where level_db holds one value per frame.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("numpy is required for chunked transcription")
+
+    with _open_pcm16_wav(audio_file_path) as wf:
+        channels = wf.getnchannels()
+        sample_rate = wf.getframerate()
+        frame_len = max(1, int(sample_rate * frame_ms / 1000))
+        levels = []
+        while True:
+            raw = wf.readframes(frame_len * VAD_BLOCK_FRAMES)
+            if not raw:
+                break
+            levels.append(_frame_levels_db(_to_mono(raw, channels), frame_len))
+    level_db = np.concatenate(levels) if levels else np.zeros(0, dtype=np.float32)
+    return level_db, frame_len, sample_rate
+
+
+def detect_speech_regions_in_file(
+    audio_file_path: str,
+    frame_ms: int = VAD_FRAME_MS,
+    min_silence_ms: int = VAD_MIN_SILENCE_MS,
+    threshold_db: float = VAD_THRESHOLD_DB,
+) -> List[Tuple[float, float]]:
+    """Energy-based voice activity detection streamed from a 16-bit PCM WAV file."""
+    level_db, frame_len, sample_rate = compute_frame_levels(audio_file_path, frame_ms)
+    return speech_regions_from_levels(level_db, frame_len / float(sample_rate), frame_ms, min_silence_ms, threshold_db)
+
+
+def speech_regions_from_levels(
+    level_db,
+    frame_s: float,
+    frame_ms: int = VAD_FRAME_MS,
+    min_silence_ms: int = VAD_MIN_SILENCE_MS,
+    threshold_db: float = VAD_THRESHOLD_DB,
+) -> List[Tuple[float, float]]:
+    """
+    Turn per-frame levels into speech regions.
+
+    Frames are marked as speech when their RMS level is above an adaptive threshold
+    (noise floor + 10 dB, never below `threshold_db`). Speech runs separated by less
+    than `min_silence_ms` of silence are merged.
+
+    Returns:
+        List of (start_seconds, end_seconds) speech regions.
+    """
+    if len(level_db) == 0:
+        return []
+
+    noise_floor = float(np.percentile(level_db, 10))
+    threshold = max(threshold_db, noise_floor + 10.0)
+    voiced = level_db > threshold
+    if not voiced.any():
+        return []
+
+    # Find run boundaries of voiced frames
+    padded = np.concatenate(([False], voiced, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+
+    min_gap_frames = max(1, int(min_silence_ms / frame_ms))
+    regions: List[Tuple[float, float]] = []
+    cur_start, cur_end = starts[0], ends[0]
+    for s, e in zip(starts[1:], ends[1:]):
+        if s - cur_end < min_gap_frames:
+            cur_end = e
+        else:
+            regions.append((cur_start * frame_s, cur_end * frame_s))
+            cur_start, cur_end = s, e
+    regions.append((cur_start * frame_s, cur_end * frame_s))
+    return regions
+
+
+def plan_vad_chunks(
+    regions: List[Tuple[float, float]], target_sec: float, pad: float, total: float
+) -> List[Tuple[float, float]]:
+    """
+    Pack speech regions into chunks of ~target_sec, only ever cutting in the
+    silence between regions. Each chunk is padded by `pad` and clamped to [0, total].
+    """
+    if not regions:
+        return [(0.0, total)]
+    chunks, cs, ce = [], regions[0][0], regions[0][1]
+    for s, e in regions[1:]:
+        if e - cs > target_sec:  # would overflow -> close chunk at the gap
+            chunks.append((cs, ce))
+            cs, ce = s, e
+        else:
+            ce = e
+    chunks.append((cs, ce))
+    return [(max(0.0, a - pad), min(total, b + pad)) for a, b in chunks]
+
+
+def plan_fixed_chunks(total: float, target_sec: float) -> List[Tuple[float, float]]:
+    """Fixed target_sec windows regardless of speech."""
+    out, t = [], 0.0
+    while t < total:
+        out.append((t, min(total, t + target_sec)))
+        t += target_sec
+    return out
+
+
+def _format_timestamp(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    if hours:
+        return f"[{hours:02d}:{minutes:02d}:{secs:02d}]"
+    return f"[{minutes:02d}:{secs:02d}]"
+
+
+def shift_timestamps(text: str, offset_seconds: float) -> str:
+    """Rewrite [MM:SS] / [HH:MM:SS] markers relative to a chunk into absolute times."""
+
+    def _replace(match):
+        a, b, c = match.group(1), match.group(2), match.group(3)
+        if c is not None:
+            seconds = int(a) * 3600 + int(b) * 60 + int(c)
+        else:
+            seconds = int(a) * 60 + int(b)
+        return _format_timestamp(seconds + offset_seconds)
+
+    return _TIMESTAMP_RE.sub(_replace, text)
+
+
+# --- Transcriber ---
+
+
+@dataclass
+class ChunkResult:
+    """Outcome of transcribing a single chunk."""
+
+    index: int
+    start: float
+    end: float
+    success: bool = False
+    transcription: str = ""
+    error: Optional[str] = None
+    seconds: float = 0.0
+    attempts: int = 0
+
+
+@dataclass
+class ChunkedTranscriptionResult:
+    """Stitched outcome of a chunked transcription."""
+
+    audio_file_path: str
+    language: str
+    chunks: List[ChunkResult] = field(default_factory=list)
+    wall_seconds: float = 0.0
+
+    @property
+    def failed_chunks(self) -> List[ChunkResult]:
+        return [c for c in self.chunks if not c.success]
+
+    @property
+    def success(self) -> bool:
+        return bool(self.chunks) and not self.failed_chunks
+
+    @property
+    def transcription(self) -> str:
+        """Full transcript with absolute timestamps (failed chunks marked as gaps)."""
+        parts = []
+        for chunk in sorted(self.chunks, key=lambda c: c.index):
+            if chunk.success:
+                parts.append(shift_timestamps(chunk.transcription.strip(), chunk.start))
+            else:
+                parts.append(f"{_format_timestamp(chunk.start)} [transcription unavailable for this segment]")
+        return "\n".join(p for p in parts if p)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Provider-style result dictionary."""
+        result = {
+            "success": self.success,
+            "transcription": self.transcription,
+            "language": self.language,
+            "chunk_count": len(self.chunks),
+            "failed_chunks": [c.index for c in self.failed_chunks],
+            "wall_seconds": self.wall_seconds,
+        }
+        if not self.success:
+            errors = {c.error for c in self.failed_chunks if c.error}
+            result["error"] = "; ".join(sorted(errors)) or "One or more chunks failed"
+        return result
+
+
+class ChunkedTranscriber:
+    """
+    Splits long recordings into silence-bounded chunks and transcribes them in parallel.
+
+    Args:
+        service: AIServiceManager with `provider_name` already configured.
+        provider_name: Provider used for every chunk.
+        max_workers: Number of chunks transcribed concurrently.
+        target_chunk_seconds: Approximate chunk length.
+        requests_per_minute: Override for the provider's rate limit (0 disables it).
+        max_attempts: Attempts per chunk before it is reported as failed.
+    """
+
+    def __init__(
+        self,
+        service,
+        provider_name: str,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        target_chunk_seconds: float = DEFAULT_TARGET_CHUNK_SECONDS,
+        pad_seconds: float = DEFAULT_CHUNK_PAD_SECONDS,
+        requests_per_minute: Optional[float] = None,
+        max_attempts: int = 2,
+    ):
+        self.service = service
+        self.provider_name = provider_name
+        self.max_workers = max(1, max_workers)
+        self.target_chunk_seconds = target_chunk_seconds
+        self.pad_seconds = pad_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.rate_limiter = get_provider_rate_limiter(provider_name, requests_per_minute)
+        self._converted: Optional[Tuple[str, str]] = None  # (source path, temporary WAV path)
+
+    def plan(self, wav_path: str) -> List[Tuple[float, float]]:
+        """Plan chunk boundaries for a 16-bit PCM WAV file."""
+        total = get_audio_duration_seconds(wav_path)
+        if total <= self.target_chunk_seconds:
+            return [(0.0, total)]
+        regions = detect_speech_regions_in_file(wav_path)
+        if not regions:
+            return plan_fixed_chunks(total, self.target_chunk_seconds)
+        chunks = plan_vad_chunks(regions, self.target_chunk_seconds, self.pad_seconds, total)
+        # A single region longer than the target (no silence at all) is cut at fixed points
+        planned = []
+        for start, end in chunks:
+            if end - start > self.target_chunk_seconds * 1.5:
+                sub_chunks = plan_fixed_chunks(end - start, self.target_chunk_seconds)
+                planned.extend((start + a, start + b) for a, b in sub_chunks)
+            else:
+                planned.append((start, end))
+        return planned
+
+    def transcribe(self, audio_file_path: str, language: str = "auto") -> ChunkedTranscriptionResult:
+        """Transcribe a recording chunk by chunk."""
+        wav_path = self._wav_source(audio_file_path)
+        plan = self.plan(wav_path)
+        chunks = [ChunkResult(index=i, start=s, end=e) for i, (s, e) in enumerate(plan)]
+        result = ChunkedTranscriptionResult(audio_file_path=audio_file_path, language=language, chunks=chunks)
+        logger.info(
+            "ChunkedTranscriber",
+            "transcribe",
+            f"Transcribing {os.path.basename(audio_file_path)} in {len(chunks)} chunk(s) "
+            f"with {self.max_workers} worker(s) via {self.provider_name}",
+        )
+        self._run(result, chunks, wav_path)
+        return result
+
+    def retry_failed(self, result: ChunkedTranscriptionResult) -> ChunkedTranscriptionResult:
+        """Re-transcribe only the chunks that failed in a previous run."""
+        failed = result.failed_chunks
+        if not failed:
+            return result
+        wav_path = self._wav_source(result.audio_file_path)
+        logger.info("ChunkedTranscriber", "retry_failed", f"Retrying {len(failed)} failed chunk(s)")
+        self._run(result, failed, wav_path)
+        return result
+
+    def close(self):
+        """Remove the temporary WAV created for a non-WAV recording, if any."""
+        if self._converted is not None:
+            try:
+                os.remove(self._converted[1])
+            except OSError:
+                pass
+            self._converted = None
+
+    def _wav_source(self, audio_file_path: str) -> str:
+        """
+        Return a 16-bit PCM WAV path for the recording.
+
+        WAV files are read in place. Other formats have to be decoded by pydub anyway,
+        so they are converted once to a temporary mono WAV that is kept for retries.
+        """
+        try:
+            with _open_pcm16_wav(audio_file_path):
+                return audio_file_path
+        except (wave.Error, EOFError):
+            pass
+        if self._converted is not None and self._converted[0] == audio_file_path:
+            return self._converted[1]
+        self.close()
+
+        from pydub import AudioSegment
+
+        fd, wav_path = tempfile.mkstemp(prefix="hidock_chunks_", suffix=".wav")
+        os.close(fd)
+        AudioSegment.from_file(audio_file_path).set_sample_width(2).set_channels(1).export(wav_path, format="wav")
+        self._converted = (audio_file_path, wav_path)
+        return wav_path
+
+    def _run(self, result: ChunkedTranscriptionResult, chunks: List[ChunkResult], wav_path: str):
+        start_time = time.time()
+        with tempfile.TemporaryDirectory(prefix="hidock_chunks_") as temp_dir:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="TranscribeChunk") as pool:
+                futures = [
+                    pool.submit(self._transcribe_chunk, chunk, wav_path, result.language, temp_dir)
+                    for chunk in chunks
+                ]
+                for future in futures:
+                    future.result()
+        result.wall_seconds += time.time() - start_time
+        logger.info(
+            "ChunkedTranscriber",
+            "_run",
+            f"{len(chunks) - len([c for c in chunks if not c.success])}/{len(chunks)} chunk(s) succeeded "
+            f"in {time.time() - start_time:.1f}s",
+        )
+
+    def _write_chunk_wav(self, chunk: ChunkResult, wav_path: str, chunk_path: str):
+        """Copy the chunk's span of the source WAV to a mono WAV, one block at a time."""
+        with _open_pcm16_wav(wav_path) as src, wave.open(chunk_path, "wb") as dst:
+            channels = src.getnchannels()
+            sample_rate = src.getframerate()
+            i0 = max(0, int(chunk.start * sample_rate))
+            i1 = min(src.getnframes(), int(chunk.end * sample_rate))
+            dst.setnchannels(1)
+            dst.setsampwidth(2)
+            dst.setframerate(sample_rate)
+            src.setpos(min(i0, src.getnframes()))
+            block = sample_rate * 30
+            remaining = i1 - i0
+            while remaining > 0:
+                raw = src.readframes(min(block, remaining))
+                if not raw:
+                    break
+                remaining -= len(raw) // (2 * channels)
+                dst.writeframes(_to_mono(raw, channels).tobytes())
+
+    def _transcribe_chunk(self, chunk: ChunkResult, wav_path: str, language: str, temp_dir: str):
+        chunk_path = os.path.join(temp_dir, f"chunk_{chunk.index:04d}.wav")
+        self._write_chunk_wav(chunk, wav_path, chunk_path)
+
+        for _ in range(self.max_attempts):
+            chunk.attempts += 1
+            self.rate_limiter.acquire()
+            call_start = time.time()
+            try:
+                response = self.service.transcribe_audio(self.provider_name, chunk_path, language)
+            except Exception as e:
+                response = {"success": False, "error": str(e)}
+            chunk.seconds += time.time() - call_start
+
+            if response.get("success") and response.get("transcription"):
+                chunk.success = True
+                chunk.error = None
+                chunk.transcription = response["transcription"]
+                return
+            chunk.error = response.get("error", "Empty transcription")
+            logger.warning(
+                "ChunkedTranscriber",
+                "_transcribe_chunk",
+                f"Chunk {chunk.index} ({chunk.start:.0f}-{chunk.end:.0f}s) attempt {chunk.attempts} failed: "
+                f"{chunk.error}",
+            )
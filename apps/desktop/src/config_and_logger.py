@@ -81,6 +81,9 @@ def get_default_config() -> dict:
         "console_log_level": "ERROR",  # Console only for ERROR and above
         "gui_log_level": "ERROR",  # GUI disabled by default
         "file_log_level": "INFO",  # File logs INFO and above
+        "performance_tracing_enabled": False,
+        "conversion_cache_max_size_mb": 2048,
+        "convert_downloads_to_wav": False,
     }
 
 
@@ -123,6 +126,9 @@ def _validate_and_merge_config(defaults, loaded_config):
         "auto_refresh_interval_s": int,
         "playback_volume": (int, float),
         "treeview_sort_descending": bool,
+        "performance_tracing_enabled": bool,
+        "conversion_cache_max_size_mb": int,
+        "convert_downloads_to_wav": bool,
         "log_level": lambda x: x in ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
         "appearance_mode": lambda x: x in ["Light", "Dark", "System"],
     }
@@ -6,12 +6,12 @@ IDeviceInterface, providing consistent API across platforms.
 """
 
 # import asyncio  # Commented out - async functions use async/await but don't use asyncio directly
-# import threading  # Commented out - not used in current implementation
+import threading
 import time
 from datetime import datetime
 
 # from pathlib import Path  # Commented out - not used, may be needed for future file operations
-from typing import Callable, Dict, List, Optional  # Removed Any - not used
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from config_and_logger import logger
 from constants import ALL_VENDOR_IDS, DEFAULT_PRODUCT_ID, DEFAULT_VENDOR_ID, HIDOCK_PRODUCT_IDS
@@ -28,7 +28,17 @@ from device_interface import (  # DeviceModel,  # Commented out - not used direc
     detect_device_model,
     get_model_capabilities,
 )
+from device_state_cache import (
+    CARD_INFO,
+    CURRENT_RECORDING,
+    DEVICE_INFO,
+    DEVICE_SETTINGS,
+    FILE_LIST,
+    DeviceStateCache,
+)
 from hidock_device import HiDockJensen
+from transfer_policy import stream_with_retry
+from transfer_progress import ProgressThrottler, TransferStats, TransferStatsRegistry
 
 
 class DesktopDeviceAdapter(IDeviceInterface):
@@ -47,6 +57,8 @@ class DesktopDeviceAdapter(IDeviceInterface):
         self.progress_callbacks: Dict[str, Callable[[OperationProgress], None]] = {}
         self._current_device_info: Optional[DeviceInfo] = None
         self._connection_start_time: Optional[datetime] = None
+        self.transfer_stats = TransferStatsRegistry()
+        self.state_cache = DeviceStateCache()
 
     async def discover_devices(self) -> List[DeviceInfo]:
         """
@@ -153,6 +165,8 @@ class DesktopDeviceAdapter(IDeviceInterface):
                 if not success:
                     raise ConnectionError(error_msg or "Connection failed")
 
+            self.state_cache.notify("connected")
+
             # Get device information
             device_info_raw = self.jensen_device.get_device_info() or {}
             model = detect_device_model(vid, pid)
@@ -168,6 +182,7 @@ class DesktopDeviceAdapter(IDeviceInterface):
                 connected=True,
                 connection_time=self._connection_start_time,
             )
+            self.state_cache.put(DEVICE_INFO, self._current_device_info)
 
             logger.info(
                 "DesktopDeviceAdapter",
@@ -189,6 +204,7 @@ class DesktopDeviceAdapter(IDeviceInterface):
         """Disconnect from the current device."""
         try:
             self.jensen_device.disconnect()
+            self.state_cache.notify("disconnected")
             self._current_device_info = None
             self._connection_start_time = None
             logger.info("DesktopDeviceAdapter", "disconnect", "Device disconnected successfully")
@@ -209,6 +225,9 @@ class DesktopDeviceAdapter(IDeviceInterface):
             return self._current_device_info
 
         # Fallback to querying device info
+        return self.state_cache.get_or_fetch(DEVICE_INFO, self._query_device_info)
+
+    def _query_device_info(self) -> DeviceInfo:
         device_info_raw = self.jensen_device.get_device_info() or {}
         model = detect_device_model(DEFAULT_VENDOR_ID, DEFAULT_PRODUCT_ID)
 
@@ -232,40 +251,16 @@ class DesktopDeviceAdapter(IDeviceInterface):
             # Check if file list streaming is in progress to avoid command collisions
             if hasattr(self.jensen_device, "is_file_list_streaming") and self.jensen_device.is_file_list_streaming():
                 # Return cached/fallback values during streaming to avoid collisions
-                total_capacity = 8 * 1024 * 1024 * 1024  # 8GB fallback
-                used_space = 0
-                status_raw = 0
-                free_space = total_capacity
-                file_count = 0
-            else:
-                # Get card info from Jensen device
-                card_info = self.jensen_device.get_card_info()
-                if card_info:
-                    status_raw = card_info.get("status_raw", 0)
-                    total_capacity = card_info.get("capacity", 0) * 1024 * 1024  # Convert MB to bytes
-                    # Note: Device firmware reports FREE space in "used" field (firmware bug/naming issue)
-                    free_space = card_info.get("used", 0) * 1024 * 1024  # Actually free space
-                    used_space = total_capacity - free_space  # Calculate actual used space
-                else:
-                    # Fallback values
-                    total_capacity = 8 * 1024 * 1024 * 1024  # 8GB
-                    used_space = 0
-                    status_raw = 0
-                    free_space = total_capacity
-
-                # Get file count
-                file_count_info = self.jensen_device.get_file_count()
-                file_count = file_count_info.get("count", 0) if file_count_info else 0
-
-            return StorageInfo(
-                total_capacity=total_capacity,
-                used_space=used_space,
-                free_space=free_space,
-                file_count=file_count,
-                health_status="good",
-                last_updated=datetime.now(),
-                status_raw=status_raw,
+                cached = self.state_cache.peek(CARD_INFO)
+                if cached is not None:
+                    return cached[0]
+                return self._fallback_storage_info()
+
+            # Failed reads (timeouts, collisions) return fallback values that must not be cached
+            storage_info, _complete = self.state_cache.get_or_fetch(
+                CARD_INFO, self._query_storage_info, should_cache=lambda result: result[1]
             )
+            return storage_info
 
         except Exception as e:
             logger.error(
@@ -275,16 +270,79 @@ class DesktopDeviceAdapter(IDeviceInterface):
             )
             raise
 
-    async def get_recordings(self) -> List[AudioRecording]:
-        """Get list of audio recordings on the device."""
+    @staticmethod
+    def _fallback_storage_info(file_count: int = 0) -> StorageInfo:
+        total_capacity = 8 * 1024 * 1024 * 1024  # 8GB fallback
+        return StorageInfo(
+            total_capacity=total_capacity,
+            used_space=0,
+            free_space=total_capacity,
+            file_count=file_count,
+            health_status="good",
+            last_updated=datetime.now(),
+            status_raw=0,
+        )
+
+    def _query_storage_info(self) -> Tuple[StorageInfo, bool]:
+        """Read storage info from the device; the flag is False if any read failed and fallbacks were used."""
+        # Get card info from Jensen device
+        card_info = self.jensen_device.get_card_info()
+
+        # Get file count
+        file_count_info = self.jensen_device.get_file_count()
+        file_count = file_count_info.get("count", 0) if file_count_info else 0
+
+        if not card_info:
+            return self._fallback_storage_info(file_count), False
+
+        status_raw = card_info.get("status_raw", 0)
+        total_capacity = card_info.get("capacity", 0) * 1024 * 1024  # Convert MB to bytes
+        # Note: Device firmware reports FREE space in "used" field (firmware bug/naming issue)
+        free_space = card_info.get("used", 0) * 1024 * 1024  # Actually free space
+        used_space = total_capacity - free_space  # Calculate actual used space
+
+        storage_info = StorageInfo(
+            total_capacity=total_capacity,
+            used_space=used_space,
+            free_space=free_space,
+            file_count=file_count,
+            health_status="good",
+            last_updated=datetime.now(),
+            status_raw=status_raw,
+        )
+        return storage_info, file_count_info is not None
+
+    async def get_recordings(
+        self, batch_callback: Optional[Callable] = None, use_cache: bool = True
+    ) -> List[AudioRecording]:
+        """
+        Get list of audio recordings on the device.
+
+        `batch_callback(new_files, parsed_count, expected_count)` is called from the
+        USB thread as entries stream in (see HiDockJensen.list_files). A complete
+        list is cached until a recording is deleted, started or stopped, or the
+        card is formatted; `use_cache=False` always lists the device.
+        """
         if not self.is_connected():
             raise ConnectionError("No device connected")
 
+        if not use_cache:
+            self.state_cache.invalidate((FILE_LIST,))
+        files, _complete = self.state_cache.get_or_fetch(
+            FILE_LIST, lambda: self._query_recordings(batch_callback), should_cache=lambda result: result[1]
+        )
+        # Callers annotate the entries they are given, so the cached list is never handed out
+        return [dict(f) for f in files]
+
+    def _query_recordings(self, batch_callback: Optional[Callable]) -> Tuple[List[AudioRecording], bool]:
+        """List the device; returns (files, complete)."""
         try:
             # Use retry mechanism to handle incomplete transfers more robustly
-            files_info = self.jensen_device.list_files_with_retry(timeout_s=20, max_retries=2)
+            files_info = self.jensen_device.list_files_with_retry(
+                timeout_s=20, max_retries=2, batch_callback=batch_callback
+            )
             if not files_info or "files" not in files_info:
-                return []
+                return [], False
 
             # Check for errors in the response
             if "error" in files_info:
@@ -305,7 +363,7 @@ class DesktopDeviceAdapter(IDeviceInterface):
                         "get_recordings",
                         f"Using incomplete file list: {len(files_info['files'])}/{files_info.get('expected', '?')} files",
                     )
-                    return files_info["files"]
+                    return files_info["files"], False
                 else:
                     # For other errors, raise exception to trigger retry/fallback
                     raise ConnectionError(f"Failed to get complete file list: {error_msg}")
@@ -327,7 +385,7 @@ class DesktopDeviceAdapter(IDeviceInterface):
                 )
 
             # Return the raw file info dictionaries directly, as the GUI expects this format.
-            return files_info["files"]
+            return files_info["files"], not files_info.get("incomplete")
 
         except Exception as e:
             # Check if this is an expected abort
@@ -346,24 +404,33 @@ class DesktopDeviceAdapter(IDeviceInterface):
                 )
             raise
 
-    async def get_current_recording_filename(self) -> Optional[str]:
-        """Get the filename of the currently active recording."""
+    async def get_current_recording_filename(self, refresh: bool = False) -> Optional[str]:
+        """
+        Get the filename of the currently active recording.
+
+        The last answer is cached; `refresh=True` (used by the recording status
+        poll) always asks the device, and a changed answer means a recording
+        started or stopped, which invalidates the card info and file list.
+        """
         if not self.is_connected():
             raise ConnectionError("No device connected")
 
         try:
             # Check if file list streaming is in progress to avoid command collisions
             if hasattr(self.jensen_device, "is_file_list_streaming") and self.jensen_device.is_file_list_streaming():
-                # Return None during streaming to avoid collisions
-                return None
+                # Return the last known recording (or None) during streaming to avoid collisions
+                return self.state_cache.peek(CURRENT_RECORDING)
 
-            # This is a lightweight command to check for an active recording
-            recording_info = self.jensen_device.get_recording_file()
-            if not recording_info or not recording_info.get("name"):
-                return None
+            if not refresh:
+                return self.state_cache.get_or_fetch(CURRENT_RECORDING, self._query_current_recording)
 
-            # The device returns the filename of the active recording.
-            return recording_info.get("name")
+            known = self.state_cache.contains(CURRENT_RECORDING)
+            previous = self.state_cache.peek(CURRENT_RECORDING)
+            current = self._query_current_recording()
+            if known and current != previous:
+                self.state_cache.notify("recording_changed")
+            self.state_cache.put(CURRENT_RECORDING, current)
+            return current
 
         except Exception as e:
             logger.error(
@@ -373,6 +440,15 @@ class DesktopDeviceAdapter(IDeviceInterface):
             )
             return None  # Return None on error to avoid crashing the polling loop
 
+    def _query_current_recording(self) -> Optional[str]:
+        # This is a lightweight command to check for an active recording
+        recording_info = self.jensen_device.get_recording_file()
+        if not recording_info or not recording_info.get("name"):
+            return None
+
+        # The device returns the filename of the active recording.
+        return recording_info.get("name")
+
     async def download_recording(
         self,
         recording_id: str,
@@ -384,6 +460,46 @@ class DesktopDeviceAdapter(IDeviceInterface):
         if not self.is_connected():
             raise ConnectionError("No device connected")
 
+        # Opened on the first chunk so a recording that cannot be found leaves no empty file behind
+        output_file = None
+
+        def write_chunk(chunk: bytes):
+            nonlocal output_file
+            if output_file is None:
+                output_file = open(output_path, "wb")
+            output_file.write(chunk)
+
+        try:
+            await self.stream_recording(
+                recording_id,
+                write_chunk,
+                progress_callback=progress_callback,
+                file_size=file_size,
+            )
+            if output_file is None:
+                output_file = open(output_path, "wb")
+        finally:
+            if output_file is not None:
+                output_file.close()
+
+    async def stream_recording(
+        self,
+        recording_id: str,
+        data_callback: Callable[[bytes], Any],
+        progress_callback: Optional[Callable[[OperationProgress], None]] = None,
+        file_size: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> int:
+        """
+        Stream an audio recording from the device, passing each chunk to `data_callback`.
+
+        `data_callback` runs on the USB reading thread, so it should hand the
+        chunk off rather than do slow work. Setting `cancel_event` stops the
+        transfer between chunks. Returns the number of bytes received.
+        """
+        if not self.is_connected():
+            raise ConnectionError("No device connected")
+
         try:
             # If file size is provided (from cache), use it to avoid expensive file list operation
             if file_size is not None:
@@ -391,14 +507,14 @@ class DesktopDeviceAdapter(IDeviceInterface):
                 recording_size = file_size
                 logger.debug(
                     "DesktopDeviceAdapter",
-                    "download_recording",
+                    "stream_recording",
                     f"Using cached file size {file_size} for {recording_id}",
                 )
             else:
                 # Fallback: Get recording info - we need the file size for proper download
                 logger.debug(
                     "DesktopDeviceAdapter",
-                    "download_recording",
+                    "stream_recording",
                     f"No cached size available, fetching file list for {recording_id}",
                 )
                 recordings = await self.get_recordings()
@@ -412,55 +528,77 @@ class DesktopDeviceAdapter(IDeviceInterface):
             if progress_callback:
                 self.add_progress_listener(f"download_{recording_id}", progress_callback)
 
-            # Open output file for streaming write
-            bytes_written = 0
-
-            with open(output_path, "wb") as output_file:
-
-                def data_callback(chunk: bytes):
-                    nonlocal bytes_written
-                    output_file.write(chunk)
-                    bytes_written += len(chunk)
-
-                def progress_update(bytes_received: int, total_bytes: int):
-                    if progress_callback:
-                        progress = OperationProgress(
-                            operation_id=f"download_{recording_id}",
-                            operation_name=f"Downloading {recording_filename}",
-                            progress=(bytes_received / total_bytes if total_bytes > 0 else 0.0),
-                            status=OperationStatus.IN_PROGRESS,
-                            bytes_processed=bytes_received,
-                            total_bytes=total_bytes,
-                            start_time=datetime.now(),
-                        )
-                        progress_callback(progress)
+            bytes_received_total = 0
+            operation_id = f"download_{recording_id}"
+            throttler = ProgressThrottler(operation_id, recording_size)
+            self.transfer_stats.start(throttler.stats)
+            transfer_start_time = datetime.now()
+
+            def chunk_received(chunk: bytes):
+                nonlocal bytes_received_total
+                data_callback(chunk)
+                bytes_received_total += len(chunk)
+
+            def progress_update(bytes_received: int, total_bytes: int):
+                # Every USB packet reports progress; only forward rate-limited updates
+                if not throttler.update(bytes_received, total_bytes) or not progress_callback:
+                    return
+                progress = OperationProgress(
+                    operation_id=operation_id,
+                    operation_name=f"Downloading {recording_filename}",
+                    progress=throttler.stats.progress,
+                    status=OperationStatus.IN_PROGRESS,
+                    bytes_processed=bytes_received,
+                    total_bytes=total_bytes,
+                    start_time=transfer_start_time,
+                    estimated_completion=throttler.estimated_completion(),
+                    bytes_per_second=throttler.stats.smoothed_rate,
+                )
+                progress_callback(progress)
 
-                # Use Jensen device to stream the file directly to disk
-                result = self.jensen_device.stream_file(
-                    filename=recording_filename,
-                    file_length=recording_size,
-                    data_callback=data_callback,
+            # Stream the file straight to the caller; timeouts scale with the file size and
+            # a transfer that fails part way is resumed from the last byte received
+            try:
+                result = stream_with_retry(
+                    self.jensen_device,
+                    recording_filename,
+                    recording_size,
+                    chunk_received,
                     progress_callback=progress_update,
-                    timeout_s=180,
+                    cancel_event=cancel_event,
                 )
+            finally:
+                stats = throttler.finish()
+                self.transfer_stats.finish(operation_id)
+
+            if result != "OK":
+                raise RuntimeError(f"Download failed: {result}")
 
-                if result != "OK":
-                    raise RuntimeError(f"Download failed: {result}")
+            logger.info(
+                "DesktopDeviceAdapter",
+                "stream_recording",
+                f"Downloaded {recording_filename}: {bytes_received_total} bytes in {stats.elapsed_seconds:.2f}s "
+                f"({stats.average_mb_per_s:.2f} MB/s, {stats.emitted_updates}/{stats.raw_updates} progress updates)",
+            )
+            self.state_cache.notify("download_complete")
 
             # Final progress update
             if progress_callback:
                 final_progress = OperationProgress(
-                    operation_id=f"download_{recording_id}",
+                    operation_id=operation_id,
                     operation_name=f"Downloaded {recording_filename}",
                     progress=1.0,
                     status=OperationStatus.COMPLETED,
-                    bytes_processed=bytes_written,
+                    bytes_processed=bytes_received_total,
                     total_bytes=recording_size,
+                    start_time=transfer_start_time,
+                    bytes_per_second=stats.average_rate,
                 )
                 progress_callback(final_progress)
+            return bytes_received_total
 
         except Exception as e:
-            logger.error("DesktopDeviceAdapter", "download_recording", f"Download failed: {e}")
+            logger.error("DesktopDeviceAdapter", "stream_recording", f"Download failed: {e}")
             if progress_callback:
                 error_progress = OperationProgress(
                     operation_id=f"download_{recording_id}",
@@ -503,6 +641,7 @@ class DesktopDeviceAdapter(IDeviceInterface):
 
             if result.get("result") != "success":
                 raise RuntimeError(f"Delete failed: {result.get('result', 'unknown error')}")
+            self.state_cache.notify("recording_deleted")
 
             if progress_callback:
                 progress_callback(
@@ -548,6 +687,7 @@ class DesktopDeviceAdapter(IDeviceInterface):
 
             if result.get("result") != "success":
                 raise RuntimeError(f"Format failed: {result.get('result', 'unknown error')}")
+            self.state_cache.notify("storage_formatted")
 
             if progress_callback:
                 progress_callback(
@@ -658,6 +798,14 @@ class DesktopDeviceAdapter(IDeviceInterface):
         """Remove a progress listener."""
         self.progress_callbacks.pop(operation_id, None)
 
+    def get_transfer_stats(self, recording_id: str) -> Optional[TransferStats]:
+        """Get throughput statistics for an active or recently completed download."""
+        return self.transfer_stats.get(f"download_{recording_id}")
+
+    def get_transfer_summary(self) -> Dict[str, float]:
+        """Get aggregate throughput (MB/s) over recently completed downloads."""
+        return self.transfer_stats.summary()
+
     async def test_connection(self) -> bool:
         """Test the current device connection."""
         if not self.is_connected():
@@ -690,8 +838,10 @@ class DesktopDeviceAdapter(IDeviceInterface):
 
         try:
             # Call the Jensen device's get_device_settings method
-            settings = self.jensen_device.get_device_settings()
-            return settings
+            settings = self.state_cache.get_or_fetch(
+                DEVICE_SETTINGS, self.jensen_device.get_device_settings, should_cache=lambda s: s is not None
+            )
+            return dict(settings) if settings is not None else None
         except Exception as e:
             logger.error(
                 "DesktopDeviceAdapter",
@@ -700,6 +850,16 @@ class DesktopDeviceAdapter(IDeviceInterface):
             )
             return None
 
+    def set_device_settings(self, settings: Dict[str, bool]) -> Optional[Dict[str, str]]:
+        """Write device-specific behavior settings; returns the device's result dictionary."""
+        result = self.jensen_device.set_device_settings(settings)
+        self.state_cache.notify("settings_changed")
+        return result
+
+    def get_state_cache_statistics(self) -> Dict[str, object]:
+        """Get hit/miss counts of the device state cache."""
+        return self.state_cache.get_statistics()
+
     async def recover_from_error(self) -> bool:
         """Attempt to recover from communication errors by resetting device state and reconnecting."""
         try:
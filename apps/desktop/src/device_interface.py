@@ -123,6 +123,7 @@ class OperationProgress:
     total_bytes: int = 0
     start_time: Optional[datetime] = None
     estimated_completion: Optional[datetime] = None
+    bytes_per_second: Optional[float] = None  # smoothed transfer rate, if known
 
 
 @dataclass
@@ -0,0 +1,273 @@
+"""
+Prioritised Device Command Scheduling for HiDock Desktop Application.
+
+Every device operation needs the USB link to itself. A plain lock hands the
+link to whichever thread wins the race, so a batch download keeps it busy
+from one file to the next and short queries (recording status, device and
+storage info) either wait behind the whole batch or give up.
+
+DeviceCommandScheduler owns the link and grants it in priority order:
+- interactive queries before normal operations before bulk transfers,
+  first come first served within a priority
+- threads take the link with `hold()`/`acquire()`, or hand a command to
+  `submit()`, which runs it on the scheduler's own thread and returns a
+  Future that can be cancelled until the command starts
+- per-priority wait and hold times are recorded for diagnostics
+
+A file transfer streams as one device command and cannot be paused, so
+queued commands are interleaved between the files of a batch.
+
+The scheduler can be used wherever a `threading.Lock` was: `with scheduler:`
+and `acquire()` default to normal priority.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from config_and_logger import logger
+
+LATENCY_SAMPLES = 200  # recent waits kept per priority for percentile estimates
+
+
+class CommandPriority(IntEnum):
+    """Lower values are granted the device link first."""
+
+    INTERACTIVE = 0  # short queries the user is waiting for: recording status, device info
+    NORMAL = 1  # connect, file list refreshes, deletes
+    BULK = 2  # file transfers
+
+
+@dataclass(order=True)
+class _Request:
+    priority: int
+    sequence: int
+    label: str = field(compare=False)
+    enqueued: float = field(compare=False)
+    job: Optional[Callable[[], Any]] = field(default=None, compare=False)
+    future: Optional[Future] = field(default=None, compare=False)
+    granted: float = field(default=0.0, compare=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.future is not None and self.future.cancelled()
+
+
+class _PriorityLatency:
+    """Wait (queued to granted) and hold times for one priority."""
+
+    def __init__(self):
+        self.granted = 0
+        self.cancelled = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_hold = 0.0
+        self.max_hold = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def to_dict(self) -> Dict[str, float]:
+        waits = sorted(self.recent_waits)
+        return {
+            "granted": self.granted,
+            "cancelled": self.cancelled,
+            "timed_out": self.timed_out,
+            "mean_wait_ms": 1000 * self.total_wait / self.granted if self.granted else 0.0,
+            "p95_wait_ms": 1000 * waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+            "max_wait_ms": 1000 * self.max_wait,
+            "mean_hold_ms": 1000 * self.total_hold / self.granted if self.granted else 0.0,
+            "max_hold_ms": 1000 * self.max_hold,
+        }
+
+
+class DeviceCommandScheduler:
+    """Grants exclusive use of the device link to queued threads and commands in priority order."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._waiting: List[_Request] = []  # heap
+        self._sequence = itertools.count()
+        self._owner: Optional[_Request] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="DeviceScheduler")
+        self.latency = {priority: _PriorityLatency() for priority in CommandPriority}
+
+    # Lock interface
+
+    def acquire(
+        self,
+        blocking: bool = True,
+        timeout: float = -1,
+        priority: CommandPriority = CommandPriority.NORMAL,
+        label: str = "",
+    ) -> bool:
+        """
+        Wait for the device link; returns False if `timeout` expires first.
+
+        Like `threading.Lock.acquire`, but waiting threads are granted the link
+        in priority order. A non-blocking acquire only succeeds if the link is
+        idle and nothing is queued.
+        """
+        with self._condition:
+            request = _Request(priority, next(self._sequence), label, time.monotonic())
+            if not blocking:
+                if self._owner is None and not self._waiting:
+                    self._grant(request)
+                    return True
+                return False
+
+            heapq.heappush(self._waiting, request)
+            deadline = None if timeout is None or timeout < 0 else request.enqueued + timeout
+            while not (self._owner is None and self._waiting[0] is request):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._waiting.remove(request)
+                    heapq.heapify(self._waiting)
+                    self.latency[request.priority].timed_out += 1
+                    self._grant_next()
+                    return False
+                self._condition.wait(remaining)
+            heapq.heappop(self._waiting)
+            self._grant(request)
+            return True
+
+    def release(self):
+        with self._condition:
+            if self._owner is None:
+                raise RuntimeError("release unlocked device scheduler")
+            owner, self._owner = self._owner, None
+            held = time.monotonic() - owner.granted
+            stats = self.latency[owner.priority]
+            stats.total_hold += held
+            stats.max_hold = max(stats.max_hold, held)
+            self._grant_next()
+
+    def locked(self) -> bool:
+        return self._owner is not None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    @contextmanager
+    def hold(self, priority: CommandPriority = CommandPriority.NORMAL, label: str = "") -> Iterator[None]:
+        """Hold the device link for the duration of a `with` block."""
+        self.acquire(priority=priority, label=label)
+        try:
+            yield
+        finally:
+            self.release()
+
+    # Queued commands
+
+    def submit(
+        self,
+        function: Callable[..., Any],
+        *args,
+        priority: CommandPriority = CommandPriority.NORMAL,
+        label: str = "",
+        **kwargs,
+    ) -> Future:
+        """
+        Queue `function(*args, **kwargs)` to run on the scheduler thread while it holds the link.
+
+        The returned Future can be cancelled until the command is granted the link.
+        """
+        future = Future()
+        with self._condition:
+            request = _Request(
+                priority,
+                next(self._sequence),
+                label or getattr(function, "__name__", "command"),
+                time.monotonic(),
+                job=lambda: function(*args, **kwargs),
+                future=future,
+            )
+            heapq.heappush(self._waiting, request)
+            self._grant_next()
+        # A cancelled command gives up its place straight away
+        future.add_done_callback(lambda f: self._on_cancelled() if f.cancelled() else None)
+        return future
+
+    def cancel_pending(self, priority: Optional[CommandPriority] = None) -> int:
+        """Cancel queued commands (of one priority, or all); returns how many were cancelled."""
+        with self._condition:
+            pending = [
+                r.future for r in self._waiting if r.future is not None and (priority is None or r.priority == priority)
+            ]
+        return sum(1 for future in pending if future.cancel())
+
+    def _on_cancelled(self):
+        with self._condition:
+            self._grant_next()
+
+    def _grant(self, request: _Request):
+        request.granted = time.monotonic()
+        self._owner = request
+        waited = request.granted - request.enqueued
+        stats = self.latency[request.priority]
+        stats.granted += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+        stats.recent_waits.append(waited)
+
+    def _grant_next(self):
+        """Pass an idle link to the first queued request; called with the condition held."""
+        while self._owner is None and self._waiting:
+            request = self._waiting[0]
+            if request.cancelled:
+                heapq.heappop(self._waiting)
+                self.latency[request.priority].cancelled += 1
+                continue
+            if request.job is None:
+                # A waiting thread: wake it so it can take the link
+                self._condition.notify_all()
+                return
+            heapq.heappop(self._waiting)
+            if not request.future.set_running_or_notify_cancel():
+                self.latency[request.priority].cancelled += 1
+                continue
+            self._grant(request)
+            try:
+                self._executor.submit(self._run, request)
+            except RuntimeError:  # shut down
+                self._owner = None
+                request.future.set_exception(RuntimeError("Device scheduler is shut down"))
+            return
+
+    def _run(self, request: _Request):
+        try:
+            result = request.job()
+        except BaseException as e:  # handed to the caller through the future
+            logger.debug("DeviceScheduler", "_run", f"Command '{request.label}' failed: {e}")
+            self.release()
+            request.future.set_exception(e)
+            return
+        # Released first so callers woken by the result find the link free
+        self.release()
+        request.future.set_result(result)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Per-priority wait/hold latency and the current queue."""
+        with self._condition:
+            return {
+                "owner": self._owner.label if self._owner else None,
+                "queued": len(self._waiting),
+                "priorities": {priority.name.lower(): stats.to_dict() for priority, stats in self.latency.items()},
+            }
+
+    def shutdown(self):
+        """Cancel queued commands and stop the scheduler thread."""
+        # Commands are only submitted once granted, so after cancelling the queued ones the
+        # single worker holds nothing but the running command
+        self.cancel_pending()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,116 @@
+"""
+Device State Caching for HiDock Desktop Application.
+
+Device information, card usage, behaviour settings, the active recording and
+the file list only change when something happens to the device: a recording
+starts or stops, a file is deleted, the card is formatted, a setting is
+written or the device is reconnected. Instead of re-querying over USB on a
+timer, the device adapter keeps the last answer for each of these entries
+and drops it when one of those events is reported.
+
+Each entry has a generation counter that is bumped on invalidation, so a
+query that was already in flight when an event arrived does not store its
+now-stale answer.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from config_and_logger import logger
+
+DEVICE_INFO = "info"
+CARD_INFO = "card"
+DEVICE_SETTINGS = "settings"
+CURRENT_RECORDING = "recording"
+FILE_LIST = "files"
+ALL_ENTRIES = (DEVICE_INFO, CARD_INFO, DEVICE_SETTINGS, CURRENT_RECORDING, FILE_LIST)
+
+# Entries dropped by each device event
+EVENT_INVALIDATIONS = {
+    "connected": ALL_ENTRIES,
+    "disconnected": ALL_ENTRIES,
+    # Transfers hold the link for minutes while the recording poll is skipped
+    "download_complete": (CURRENT_RECORDING,),
+    "recording_deleted": (CARD_INFO, FILE_LIST),
+    "storage_formatted": (CARD_INFO, FILE_LIST, CURRENT_RECORDING),
+    "recording_changed": (CARD_INFO, FILE_LIST),
+    "settings_changed": (DEVICE_SETTINGS,),
+}
+
+
+class DeviceStateCache:
+    """Last known device state per entry, invalidated by device events rather than by age."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        self._generations = dict.fromkeys(ALL_ENTRIES, 0)
+        self.stats = {entry: {"hits": 0, "misses": 0, "invalidations": 0} for entry in ALL_ENTRIES}
+        self.event_counts: Dict[str, int] = {}
+
+    def contains(self, entry: str) -> bool:
+        with self._lock:
+            return entry in self._values
+
+    def peek(self, entry: str, default: Any = None) -> Any:
+        """Return the cached value of an entry without counting a hit or miss."""
+        with self._lock:
+            return self._values.get(entry, default)
+
+    def put(self, entry: str, value: Any) -> None:
+        with self._lock:
+            self._values[entry] = value
+
+    def get_or_fetch(
+        self, entry: str, fetch: Callable[[], Any], should_cache: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Return the cached value of `entry`, or call `fetch()` and cache its result.
+
+        `fetch` runs outside the lock; its result is only stored if the entry was
+        not invalidated in the meantime and `should_cache(result)` allows it.
+        Exceptions from `fetch` propagate and leave the entry empty.
+        """
+        with self._lock:
+            if entry in self._values:
+                self.stats[entry]["hits"] += 1
+                return self._values[entry]
+            self.stats[entry]["misses"] += 1
+            generation = self._generations[entry]
+
+        value = fetch()
+        if should_cache is None or should_cache(value):
+            with self._lock:
+                if self._generations[entry] == generation:
+                    self._values[entry] = value
+        return value
+
+    def invalidate(self, entries: Iterable[str] = ALL_ENTRIES) -> None:
+        with self._lock:
+            for entry in entries:
+                self._generations[entry] += 1
+                if entry in self._values:
+                    del self._values[entry]
+                    self.stats[entry]["invalidations"] += 1
+
+    def notify(self, event: str) -> None:
+        """Drop the entries a device event makes stale (see EVENT_INVALIDATIONS)."""
+        if event not in EVENT_INVALIDATIONS:
+            raise ValueError(f"Unknown device event: {event}")
+        with self._lock:
+            self.event_counts[event] = self.event_counts.get(event, 0) + 1
+        logger.debug("DeviceStateCache", "notify", f"{event}: invalidating {', '.join(EVENT_INVALIDATIONS[event])}")
+        self.invalidate(EVENT_INVALIDATIONS[event])
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Hit/miss counts per entry and overall, plus how often each event was reported."""
+        with self._lock:
+            hits = sum(counts["hits"] for counts in self.stats.values())
+            misses = sum(counts["misses"] for counts in self.stats.values())
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "entries": {entry: dict(counts, cached=entry in self._values) for entry, counts in self.stats.items()},
+                "events": dict(self.event_counts),
+            }
@@ -0,0 +1,310 @@
+"""
+Pipelined Multi-File Downloads for HiDock Desktop Application.
+
+Downloading a batch one file at a time leaves the USB link idle while each
+file is written, validated and catalogued. DownloadPipeline overlaps those
+steps across files with three stages connected by queues:
+- reader: streams the files from the device back to back and only queues
+  the received chunks, so the link is never kept waiting on the disk
+- writer: coalesces chunks into large vectored writes (`os.writev` where
+  available) to a `.part` file that is renamed into place once complete
+- finisher: validates each finished file and updates the metadata cache,
+  optionally converting it, while the next file is already transferring
+
+The chunk queue is bounded by bytes, so a slow disk throttles the transfer
+instead of buffering a whole card in memory. What streaming a file and
+finishing it mean is supplied by the caller (see FileOperationsManager).
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+from config_and_logger import logger
+
+DEFAULT_BUFFER_LIMIT_BYTES = 32 * 1024 * 1024  # received but not yet written
+DEFAULT_WRITE_BATCH_BYTES = 1024 * 1024  # chunks coalesced into one write
+PARTIAL_SUFFIX = ".part"
+
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX") if hasattr(os, "sysconf") else 1024
+except (ValueError, OSError):
+    _IOV_MAX = 1024
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
+class DownloadCancelledError(Exception):
+    """Raised for a job whose cancel event was set before it completed."""
+
+
+@dataclass
+class DownloadJob:
+    """One file to download; `context` is left to the caller (e.g. its FileOperation)."""
+
+    filename: str
+    path: Path
+    file_size: Optional[int] = None
+    context: Any = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    bytes_written: int = 0
+    error: Optional[BaseException] = None
+
+    @property
+    def partial_path(self) -> Path:
+        return self.path.with_name(self.path.name + PARTIAL_SUFFIX)
+
+
+# Chunk queue item kinds
+_DATA = 0
+_END = 1
+
+
+class _ByteBoundedQueue:
+    """FIFO that blocks producers while more than `limit_bytes` of chunks are queued."""
+
+    def __init__(self, limit_bytes: int):
+        self.limit_bytes = limit_bytes
+        self._items: Deque[tuple] = deque()
+        self._queued_bytes = 0
+        self._condition = threading.Condition()
+        self.peak_bytes = 0
+
+    def put(self, item: tuple, size: int = 0):
+        with self._condition:
+            # An empty queue always accepts, so one oversized chunk cannot deadlock
+            while self._items and self._queued_bytes + size > self.limit_bytes:
+                self._condition.wait()
+            self._items.append((item, size))
+            self._queued_bytes += size
+            self.peak_bytes = max(self.peak_bytes, self._queued_bytes)
+            self._condition.notify_all()
+
+    def get(self) -> tuple:
+        with self._condition:
+            while not self._items:
+                self._condition.wait()
+            item, size = self._items.popleft()
+            self._queued_bytes -= size
+            self._condition.notify_all()
+            return item
+
+
+def _write_all(fd: int, chunks: Sequence[bytes]) -> int:
+    """Write every chunk to `fd` with as few system calls as possible; returns the syscall count."""
+    calls = 0
+    if not hasattr(os, "writev"):
+        data = b"".join(chunks)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+            calls += 1
+        return calls
+
+    pending = [memoryview(chunk) for chunk in chunks if chunk]
+    while pending:
+        written = os.writev(fd, pending[:_IOV_MAX])
+        calls += 1
+        # Drop what was written, keeping the unwritten tail of a partly written chunk
+        while written and pending:
+            if written >= len(pending[0]):
+                written -= len(pending.pop(0))
+            else:
+                pending[0] = pending[0][written:]
+                written = 0
+    return calls
+
+
+class DownloadPipeline:
+    """Runs a batch of downloads through reader, writer and finisher stages."""
+
+    def __init__(
+        self,
+        stream_file: Callable[[DownloadJob, Callable[[bytes], None]], Any],
+        finish_file: Callable[[DownloadJob], None],
+        on_failed: Callable[[DownloadJob, BaseException], None],
+        buffer_limit_bytes: int = DEFAULT_BUFFER_LIMIT_BYTES,
+        write_batch_bytes: int = DEFAULT_WRITE_BATCH_BYTES,
+    ):
+        """
+        Args:
+            stream_file: Streams `job` from the device, passing each chunk to the
+                given callback; raises if the transfer fails.
+            finish_file: Post-processes a complete file at `job.path`; raises if
+                the file is not acceptable.
+            on_failed: Reports a job that failed or was cancelled at any stage.
+            buffer_limit_bytes: Received data allowed to wait for the writer.
+            write_batch_bytes: Data coalesced into each disk write.
+        """
+        self.stream_file = stream_file
+        self.finish_file = finish_file
+        self.on_failed = on_failed
+        self.write_batch_bytes = write_batch_bytes
+        self._chunks = _ByteBoundedQueue(buffer_limit_bytes)
+        self._finished: "queue.Queue[Optional[DownloadJob]]" = queue.Queue()
+        self.stop_event = threading.Event()
+        self._reading: Optional[DownloadJob] = None
+        self.stats: Dict[str, float] = {
+            "files_completed": 0,
+            "files_failed": 0,
+            "bytes_received": 0,
+            "write_calls": 0,
+            "transfer_seconds": 0.0,
+            "elapsed_seconds": 0.0,
+        }
+
+    def stop(self):
+        """Abandon the batch: the current transfer is cancelled and remaining jobs fail as cancelled."""
+        self.stop_event.set()
+        job = self._reading
+        if job is not None:
+            job.cancel_event.set()
+
+    def run(self, jobs: List[DownloadJob]) -> Dict[str, float]:
+        """Download `jobs` in order; blocks until every job is finished or failed."""
+        start = time.monotonic()
+        writer = threading.Thread(target=self._write_stage, name="DownloadPipeline-writer", daemon=True)
+        finisher = threading.Thread(target=self._finish_stage, name="DownloadPipeline-finisher", daemon=True)
+        writer.start()
+        finisher.start()
+        try:
+            self._read_stage(jobs)
+        finally:
+            self._chunks.put((_END, None, None))
+            writer.join()
+            self._finished.put(None)
+            finisher.join()
+        self.stats["elapsed_seconds"] = time.monotonic() - start
+        logger.info("DownloadPipeline", "run", f"Batch finished: {self.get_statistics()}")
+        return self.get_statistics()
+
+    def get_statistics(self) -> Dict[str, float]:
+        stats = dict(self.stats)
+        transfer = stats["transfer_seconds"]
+        stats["transfer_mb_per_s"] = stats["bytes_received"] / transfer / (1024 * 1024) if transfer else 0.0
+        stats["peak_buffered_bytes"] = self._chunks.peak_bytes
+        return stats
+
+    # Stages
+
+    def _read_stage(self, jobs: List[DownloadJob]):
+        for job in jobs:
+            if self.stop_event.is_set():
+                job.cancel_event.set()
+            if job.cancel_event.is_set():
+                self._chunks.put((_END, job, DownloadCancelledError(f"Download of {job.filename} cancelled")))
+                continue
+
+            def enqueue(chunk: bytes, job=job):
+                self._chunks.put((_DATA, job, chunk), len(chunk))
+
+            error = None
+            started = time.monotonic()
+            self._reading = job
+            try:
+                self.stream_file(job, enqueue)
+            except Exception as e:
+                error = e
+                if job.cancel_event.is_set():
+                    error = DownloadCancelledError(f"Download of {job.filename} cancelled")
+            finally:
+                self._reading = None
+            self.stats["transfer_seconds"] += time.monotonic() - started
+            self._chunks.put((_END, job, error))
+
+    def _write_stage(self):
+        current: Optional[DownloadJob] = None
+        output = None
+        batch: List[bytes] = []
+        batch_bytes = 0
+
+        def flush():
+            nonlocal batch, batch_bytes
+            if batch and output is not None and current.error is None:
+                try:
+                    self.stats["write_calls"] += _write_all(output.fileno(), batch)
+                except OSError as e:
+                    self._fail_write(current, e)
+            batch, batch_bytes = [], 0
+
+        while True:
+            kind, job, payload = self._chunks.get()
+            if kind == _DATA:
+                if job is not current:
+                    current, output = job, self._open_partial(job)
+                if job.error is not None:
+                    continue  # the write already failed; drain the rest of the transfer
+                batch.append(payload)
+                batch_bytes += len(payload)
+                job.bytes_written += len(payload)
+                self.stats["bytes_received"] += len(payload)
+                if batch_bytes >= self.write_batch_bytes:
+                    flush()
+                continue
+
+            if job is None:
+                return
+            if job is not current:
+                # Nothing was received: an empty file if the transfer succeeded, else nothing to clean up
+                current = job
+                output = self._open_partial(job) if payload is None else None
+            flush()
+            if output is not None:
+                output.close()
+            job.error = job.error or payload
+            if job.error is None:
+                try:
+                    os.replace(job.partial_path, job.path)
+                except OSError as e:
+                    job.error = e
+            if job.error is not None:
+                self._discard_partial(job)
+            self._finished.put(job)
+            current, output = None, None
+
+    def _finish_stage(self):
+        while True:
+            job = self._finished.get()
+            if job is None:
+                return
+            if job.error is None:
+                try:
+                    self.finish_file(job)
+                    self.stats["files_completed"] += 1
+                    continue
+                except Exception as e:
+                    job.error = e
+            self.stats["files_failed"] += 1
+            try:
+                self.on_failed(job, job.error)
+            except Exception as e:
+                logger.error("DownloadPipeline", "_finish_stage", f"Failure handler for {job.filename} raised: {e}")
+
+    # Helpers
+
+    def _open_partial(self, job: DownloadJob):
+        try:
+            job.path.parent.mkdir(parents=True, exist_ok=True)
+            return open(job.partial_path, "wb", buffering=0)
+        except OSError as e:
+            self._fail_write(job, e)
+            return None
+
+    def _fail_write(self, job: DownloadJob, error: OSError):
+        logger.error("DownloadPipeline", "_write_stage", f"Writing {job.partial_path} failed: {error}")
+        job.error = error
+        job.cancel_event.set()  # stop the transfer rather than stream into nowhere
+
+    @staticmethod
+    def _discard_partial(job: DownloadJob):
+        try:
+            job.partial_path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("DownloadPipeline", "_discard_partial", f"Could not remove {job.partial_path}: {e}")
@@ -19,6 +19,7 @@ import queue
 import sqlite3
 import threading
 import time
+from contextlib import nullcontext
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
@@ -27,6 +28,8 @@ from typing import Any, Callable, Dict, List, Optional
 
 from config_and_logger import logger
 from device_interface import OperationProgress
+from device_scheduler import CommandPriority, DeviceCommandScheduler
+from download_pipeline import DownloadCancelledError, DownloadJob, DownloadPipeline
 
 
 class FileOperationType(Enum):
@@ -303,6 +306,10 @@ class FileOperationsManager:
         self.cancel_event = threading.Event()
         self.max_concurrent_operations = 3
 
+        # Pipelined batch downloads, with a cancel event per queued file
+        self.active_pipelines: List[DownloadPipeline] = []
+        self.download_cancel_events: Dict[str, threading.Event] = {}
+
         # Progress callbacks
         self.progress_callbacks: Dict[str, Callable] = {}
         self.global_progress_callback: Optional[Callable] = None
@@ -404,14 +411,25 @@ class FileOperationsManager:
                 )
 
         finally:
-            operation.end_time = datetime.now()
-            self.operation_history.append(operation)
-            if operation.operation_id in self.active_operations:
-                del self.active_operations[operation.operation_id]
-
-            # Notify progress callback
-            if operation.operation_id in self.progress_callbacks:
-                self.progress_callbacks[operation.operation_id](operation)
+            self._finish_operation(operation)
+
+    def _finish_operation(self, operation: FileOperation):
+        """Move a finished operation to the history and notify its progress callback."""
+        operation.end_time = datetime.now()
+        self.operation_history.append(operation)
+        if operation.operation_id in self.active_operations:
+            del self.active_operations[operation.operation_id]
+        self.download_cancel_events.pop(operation.operation_id, None)
+
+        # Notify progress callback
+        if operation.operation_id in self.progress_callbacks:
+            self.progress_callbacks[operation.operation_id](operation)
+
+    def _hold_device(self, priority: CommandPriority, label: str):
+        """Context manager holding the device lock; a scheduler grants it by priority."""
+        if isinstance(self.device_lock, DeviceCommandScheduler):
+            return self.device_lock.hold(priority, label)
+        return self.device_lock
 
     def _execute_download(self, operation: FileOperation):
         """Execute a file download operation."""
@@ -427,23 +445,7 @@ class FileOperationsManager:
             )
             return
 
-        # The progress callback from the device adapter is more detailed (OperationProgress)
-        # than what the old code expected. We need to adapt and forward to the GUI.
-        def adapter_progress_callback(op_progress: OperationProgress):
-            # Check for cancellation during progress updates
-            if operation.status == FileOperationStatus.CANCELLED:
-                logger.info(
-                    "FileOpsManager",
-                    "_execute_download",
-                    f"Download of {filename} cancelled during progress update",
-                )
-                return
-
-            operation.progress = op_progress.progress * 100.0
-            if operation.operation_id in self.progress_callbacks:
-                # The GUI's callback expects a FileOperation object.
-                # We update the current operation and pass it along.
-                self.progress_callbacks[operation.operation_id](operation)
+        adapter_progress_callback = self._download_progress_forwarder(operation)
 
         try:
             # Get cached file size to avoid expensive file list operation
@@ -485,7 +487,7 @@ class FileOperationsManager:
                     "_execute_download",
                     f"Acquiring device lock for download of {filename}",
                 )
-                with self.device_lock:
+                with self._hold_device(CommandPriority.BULK, f"download {filename}"):
                     asyncio.run(
                         self.device_interface.device_interface.download_recording(
                             recording_id=filename,
@@ -524,7 +526,35 @@ class FileOperationsManager:
             )
             return
 
-        # Validate downloaded file
+        self._record_download(filename, local_path)
+
+    def _download_progress_forwarder(self, operation: FileOperation) -> Callable[[OperationProgress], None]:
+        """Adapt the device adapter's OperationProgress updates to the operation's progress callback."""
+
+        def adapter_progress_callback(op_progress: OperationProgress):
+            # Check for cancellation during progress updates
+            if operation.status == FileOperationStatus.CANCELLED:
+                logger.info(
+                    "FileOpsManager",
+                    "_execute_download",
+                    f"Download of {operation.filename} cancelled during progress update",
+                )
+                return
+
+            operation.progress = op_progress.progress * 100.0
+            if op_progress.bytes_per_second is not None:
+                operation.metadata["bytes_per_second"] = op_progress.bytes_per_second
+            if op_progress.estimated_completion is not None:
+                operation.metadata["estimated_completion"] = op_progress.estimated_completion
+            if operation.operation_id in self.progress_callbacks:
+                # The GUI's callback expects a FileOperation object.
+                # We update the current operation and pass it along.
+                self.progress_callbacks[operation.operation_id](operation)
+
+        return adapter_progress_callback
+
+    def _record_download(self, filename: str, local_path: Path):
+        """Validate a downloaded file and record it in the metadata cache and statistics."""
         if self._validate_downloaded_file(filename, local_path):
             # Update metadata cache
             metadata = self.metadata_cache.get_metadata(filename)
@@ -545,6 +575,77 @@ class FileOperationsManager:
         else:
             raise ValueError(f"File validation failed for {filename}")
 
+    def _run_download_pipeline(self, pipeline: DownloadPipeline, jobs: List[DownloadJob]):
+        """Run a pipelined batch download on its own thread."""
+        self.active_pipelines.append(pipeline)
+        try:
+            stats = pipeline.run(jobs)
+            self.operation_stats["total_operations_time"] += stats["elapsed_seconds"]
+            logger.info(
+                "FileOpsManager",
+                "_run_download_pipeline",
+                f"Pipelined download of {len(jobs)} files: {stats['files_completed']} completed, "
+                f"{stats['files_failed']} failed, {stats['transfer_mb_per_s']:.2f} MB/s while transferring",
+            )
+        finally:
+            self.active_pipelines.remove(pipeline)
+
+    def _stream_pipelined_download(self, job: DownloadJob, write_chunk: Callable[[bytes], None]):
+        """Reader stage: stream one file from the device, holding the device link for that file only."""
+        operation = job.context
+        operation.status = FileOperationStatus.IN_PROGRESS
+        operation.start_time = datetime.now()
+        label = f"download {job.filename}"
+        with self._hold_device(CommandPriority.BULK, label) if self.device_lock else nullcontext():
+            asyncio.run(
+                self.device_interface.device_interface.stream_recording(
+                    job.filename,
+                    write_chunk,
+                    progress_callback=self._download_progress_forwarder(operation),
+                    file_size=job.file_size,
+                    cancel_event=job.cancel_event,
+                )
+            )
+
+    def _finish_pipelined_download(self, job: DownloadJob, convert_to_wav: bool):
+        """Finishing stage: validate and catalogue a written file, optionally converting it."""
+        operation = job.context
+        if operation.status == FileOperationStatus.CANCELLED:
+            raise DownloadCancelledError(f"Download of {job.filename} cancelled")
+        self._record_download(job.filename, job.path)
+
+        if convert_to_wav and job.filename.lower().endswith((".hda", ".hta")):
+            # Fills the conversion cache so playback and transcription start straight away
+            from hta_converter import get_or_convert
+
+            if not get_or_convert(str(job.path), "wav"):
+                logger.warning(
+                    "FileOpsManager",
+                    "_finish_pipelined_download",
+                    f"Downloaded {job.filename} but could not convert it to WAV",
+                )
+
+        operation.status = FileOperationStatus.COMPLETED
+        operation.progress = 100.0
+        self._finish_operation(operation)
+
+    def _fail_pipelined_download(self, job: DownloadJob, error: BaseException):
+        """Record a pipelined download that failed or was cancelled."""
+        operation = job.context
+        if isinstance(error, DownloadCancelledError) or operation.status == FileOperationStatus.CANCELLED:
+            operation.status = FileOperationStatus.CANCELLED
+            logger.info("FileOpsManager", "_fail_pipelined_download", f"Download of {job.filename} cancelled")
+        else:
+            operation.status = FileOperationStatus.FAILED
+            operation.error_message = str(error)
+            self.operation_stats["failed_operations"] += 1
+            logger.error(
+                "FileOpsManager",
+                "_fail_pipelined_download",
+                f"Operation {operation.operation_id} failed: {error}",
+            )
+        self._finish_operation(operation)
+
     def _execute_delete(self, operation: FileOperation):
         """Execute a file deletion operation."""
         filename = operation.filename
@@ -557,7 +658,7 @@ class FileOperationsManager:
                     "_execute_delete",
                     f"Acquiring device lock for deletion of {filename}",
                 )
-                with self.device_lock:
+                with self._hold_device(CommandPriority.NORMAL, f"delete {filename}"):
                     asyncio.run(
                         self.device_interface.device_interface.delete_recording(
                             recording_id=filename,
@@ -732,18 +833,14 @@ class FileOperationsManager:
     def queue_download(self, filename: str, progress_callback: Callable = None) -> str:
         """Queue a file download operation."""
         # Check if file is already queued or downloading
-        for operation in self.active_operations.values():
-            if (
-                operation.filename == filename
-                and operation.operation_type == FileOperationType.DOWNLOAD
-                and operation.status in [FileOperationStatus.PENDING, FileOperationStatus.IN_PROGRESS]
-            ):
-                logger.warning(
-                    "FileOpsManager",
-                    "queue_download",
-                    f"Download for {filename} already in progress, skipping duplicate",
-                )
-                return operation.operation_id
+        active_id = self._active_download_id(filename)
+        if active_id:
+            logger.warning(
+                "FileOpsManager",
+                "queue_download",
+                f"Download for {filename} already in progress, skipping duplicate",
+            )
+            return active_id
 
         # Check if file is already downloaded and ask for confirmation
         metadata = self.metadata_cache.get_metadata(filename)
@@ -770,6 +867,17 @@ class FileOperationsManager:
         logger.info("FileOpsManager", "queue_download", f"Queued download for {filename}")
         return operation_id
 
+    def _active_download_id(self, filename: str) -> Optional[str]:
+        """Id of a queued or running download of `filename`, if there is one."""
+        for operation in list(self.active_operations.values()):
+            if (
+                operation.filename == filename
+                and operation.operation_type == FileOperationType.DOWNLOAD
+                and operation.status in [FileOperationStatus.PENDING, FileOperationStatus.IN_PROGRESS]
+            ):
+                return operation.operation_id
+        return None
+
     def queue_delete(self, filename: str, progress_callback: Callable = None) -> str:
         """Queue a file deletion operation."""
         operation_id = f"delete_{filename}_{int(time.time())}"
@@ -802,6 +910,72 @@ class FileOperationsManager:
         )
         return operation_ids
 
+    def queue_pipelined_download(
+        self, filenames: List[str], progress_callback: Callable = None, convert_to_wav: bool = False
+    ) -> List[str]:
+        """
+        Queue multiple files for download through a single transfer pipeline.
+
+        Unlike `queue_batch_download`, the files stream back to back over one
+        USB reader while earlier files are still being written, validated and
+        (with `convert_to_wav`) converted, so a large batch keeps the link busy.
+        Each file still gets its own operation that can be cancelled.
+        """
+        operation_ids = []
+        jobs = []
+        for filename in filenames:
+            active_id = self._active_download_id(filename)
+            if active_id:
+                logger.warning(
+                    "FileOpsManager",
+                    "queue_pipelined_download",
+                    f"Download for {filename} already in progress, skipping duplicate",
+                )
+                operation_ids.append(active_id)
+                continue
+
+            operation_id = f"download_{filename}_{int(time.time())}"
+            operation = FileOperation(
+                operation_id=operation_id,
+                operation_type=FileOperationType.DOWNLOAD,
+                filename=filename,
+                status=FileOperationStatus.PENDING,
+            )
+            cached_metadata = self.metadata_cache.get_metadata(filename)
+            job = DownloadJob(
+                filename=filename,
+                path=self.download_dir / filename,
+                file_size=cached_metadata.size if cached_metadata else None,
+                context=operation,
+            )
+
+            self.active_operations[operation_id] = operation
+            self.download_cancel_events[operation_id] = job.cancel_event
+            if progress_callback:
+                self.progress_callbacks[operation_id] = progress_callback
+            operation_ids.append(operation_id)
+            jobs.append(job)
+
+        if jobs:
+            pipeline = DownloadPipeline(
+                stream_file=self._stream_pipelined_download,
+                finish_file=lambda job: self._finish_pipelined_download(job, convert_to_wav),
+                on_failed=self._fail_pipelined_download,
+            )
+            threading.Thread(
+                target=self._run_download_pipeline,
+                args=(pipeline, jobs),
+                name="FileOpsDownloadPipeline",
+                daemon=True,
+            ).start()
+
+        logger.info(
+            "FileOpsManager",
+            "queue_pipelined_download",
+            f"Queued pipelined download for {len(jobs)} files",
+        )
+        return operation_ids
+
     def queue_batch_delete(self, filenames: List[str], progress_callback: Callable = None) -> List[str]:
         """Queue multiple files for deletion."""
         operation_ids = []
@@ -822,8 +996,14 @@ class FileOperationsManager:
             operation = self.active_operations[operation_id]
             operation.status = FileOperationStatus.CANCELLED
 
-            # Clean up partial downloads with retry mechanism
-            if operation.operation_type == FileOperationType.DOWNLOAD:
+            # Stop a pipelined transfer; the pipeline removes its own partial file
+            cancel_event = self.download_cancel_events.get(operation_id)
+            if cancel_event is not None:
+                cancel_event.set()
+
+            # Clean up partial downloads with retry mechanism. Pipelined downloads write to a
+            # .part file, so their final path may hold an earlier complete copy and is left alone.
+            elif operation.operation_type == FileOperationType.DOWNLOAD:
                 partial_file_path = self.download_dir / operation.filename
                 if partial_file_path.exists():
                     # Try multiple times to delete partial file (may be locked)
@@ -958,8 +1138,10 @@ class FileOperationsManager:
         # Cancel all operations
         self.cancel_all_operations()
 
-        # Signal worker threads to stop
+        # Signal worker threads and download pipelines to stop
         self.cancel_event.set()
+        for pipeline in list(self.active_pipelines):
+            pipeline.stop()
 
         # Add shutdown signals to queue
         for _ in self.worker_threads:
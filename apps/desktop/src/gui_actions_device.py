@@ -19,7 +19,9 @@ from tkinter import messagebox
 import usb.core
 from config_and_logger import logger
 from ctk_custom_widgets import CTkBanner
+from device_scheduler import CommandPriority
 from file_operations_manager import FileMetadata
+from transfer_progress import CoalescingDispatcher
 
 
 class DeviceActionsMixin:
@@ -866,8 +868,15 @@ class DeviceActionsMixin:
                 if hasattr(self, "_abort_file_operations") and self._abort_file_operations:
                     logger.info("GUI", "_refresh_file_list_thread", "File refresh aborted due to disconnect")
                     return
-                # Always fetch fresh data from device to ensure we have the latest files
-                recording_info = asyncio.run(self.device_manager.device_interface.get_recordings())
+                # The adapter's cached list is only trusted while the recording status poll runs: that poll is
+                # what turns recordings started or stopped on the device into cache invalidations.
+                # Entries are shown as they stream in when the list is still empty.
+                recording_info = asyncio.run(
+                    self.device_manager.device_interface.get_recordings(
+                        batch_callback=self._on_file_list_batch,
+                        use_cache=getattr(self, "_recording_check_timer_id", None) is not None,
+                    )
+                )
 
                 # Get storage info after file list to avoid command conflicts
                 # Future: use storage info for enhanced UI
@@ -1208,6 +1217,68 @@ class DeviceActionsMixin:
             )
             self.after(0, self.update_all_status_info)
 
+    def _on_file_list_batch(self, new_files, parsed_count, expected_count):
+        """Collect file list entries as they stream in. Called from the USB thread."""
+        if parsed_count == len(new_files):
+            # First batch of a new (or retried) listing
+            self._streamed_file_list = []
+            self._streamed_file_list_generation = getattr(self, "_streamed_file_list_generation", 0) + 1
+        self._streamed_file_list.extend(new_files)
+
+        dispatcher = getattr(self, "_file_list_batch_dispatcher", None)
+        if dispatcher is None:
+            dispatcher = CoalescingDispatcher(
+                lambda flush: self.after(0, flush), lambda args: self._show_streamed_file_batch(*args)
+            )
+            self._file_list_batch_dispatcher = dispatcher
+        dispatcher.submit(
+            "file_list",
+            (self._streamed_file_list, parsed_count, expected_count, self._streamed_file_list_generation),
+        )
+
+    def _show_streamed_file_batch(self, files, parsed_count, expected_count, generation):
+        """
+        Render streamed entries on the GUI thread while the file list is still loading.
+
+        Rows are only added when no real files are displayed yet (cold start). They use
+        "loading_" iids so the final _populate_treeview_from_data replaces them.
+        """
+        self.update_status_bar(progress_text=f"Loading files... {parsed_count}/{expected_count or '?'}")
+        if not (hasattr(self, "file_tree") and self.file_tree.winfo_exists()):
+            return
+
+        children = self.file_tree.get_children()
+        if any(not child.startswith("loading_") for child in children):
+            return  # Refreshing an existing list; keep it until the full result arrives
+
+        if getattr(self, "_streamed_rows_generation", None) != generation:
+            self.file_tree.delete(*children)
+            self._streamed_rows_generation = generation
+            self._streamed_rows_shown = 0
+
+        for index in range(self._streamed_rows_shown, parsed_count):
+            file_info = files[index]
+            size_bytes = file_info.get("length", 0) or 0
+            duration = file_info.get("duration", 0)
+            if isinstance(duration, (int, float)):
+                minutes, seconds = divmod(int(duration), 60)
+                duration = f"{minutes // 60:02d}:{minutes % 60:02d}:{seconds:02d}"
+            values = (
+                index + 1,
+                file_info["name"],
+                f"{file_info.get('createDate', '')} {file_info.get('createTime', '')}".strip() or "---",
+                f"{size_bytes / (1024 * 1024):.2f}",
+                duration,
+                "",
+                str(file_info.get("version", "N/A")),
+                "On Device",
+                "",
+            )
+            iid = f"loading_stream_{file_info['name']}"
+            if not self.file_tree.exists(iid):
+                self.file_tree.insert("", "end", iid=iid, values=values)
+        self._streamed_rows_shown = parsed_count
+
     def start_recording_status_check(self):  # Identical to original
         """Starts periodic checking of the recording status."""
         interval_s = self.recording_check_interval_var.get()
@@ -1223,6 +1294,9 @@ class DeviceActionsMixin:
         if self._recording_check_timer_id:
             self.after_cancel(self._recording_check_timer_id)
             self._recording_check_timer_id = None
+        if self._recording_status_future is not None:
+            self._recording_status_future.cancel()
+            self._recording_status_future = None
 
     def _check_recording_status_periodically(
         self,
@@ -1235,47 +1309,16 @@ class DeviceActionsMixin:
             if self.is_long_operation_active:
                 return
 
-            if self.device_lock.acquire(blocking=False):
-                try:
-                    # Skip recording check if file list streaming is active to avoid command conflicts
-                    if (
-                        hasattr(self.device_manager.device_interface, "jensen_device")
-                        and hasattr(
-                            self.device_manager.device_interface.jensen_device,
-                            "is_file_list_streaming",
-                        )
-                        and self.device_manager.device_interface.jensen_device.is_file_list_streaming()
-                    ):
-                        logger.debug(
-                            "GUI",
-                            "_check_recording_status_periodically",
-                            "Skipping recording check during file list streaming",
-                        )
-                        return
-
-                    # Use the new lightweight method instead of the heavy get_recordings()
-                    current_recording_filename = asyncio.run(
-                        self.device_manager.device_interface.get_current_recording_filename()
-                    )
-                    if not self.device_manager.device_interface.is_connected():
-                        self.stop_recording_status_check()
-                        return
-
-                    # A change in the reported filename indicates a new recording has started,
-                    # or the previous one has finished (filename becomes None).
-                    if current_recording_filename != self._previous_recording_filename:
-                        logger.info(
-                            "GUI",
-                            "_check_rec_status",
-                            f"Recording status changed (prev: '{self._previous_recording_filename}', "
-                            f"new: '{current_recording_filename}'). Refreshing file list.",
-                        )
-                        self._previous_recording_filename = current_recording_filename
-                        self.refresh_file_list_gui()
-                finally:
-                    self.device_lock.release()
-            else:
-                logger.debug("GUI", "_check_rec_status", "Skipping check, device is busy.")
+            if self._recording_status_future is not None and not self._recording_status_future.done():
+                logger.debug("GUI", "_check_rec_status", "Previous check is still queued, device is busy.")
+                return
+            # Queued ahead of transfers on the device scheduler: during a batch download it runs between files
+            self._recording_status_future = self.device_lock.submit(
+                self._query_recording_status, priority=CommandPriority.INTERACTIVE, label="recording status"
+            )
+            self._recording_status_future.add_done_callback(
+                lambda future: self.after(0, self._on_recording_status_checked, future)
+            )
         except (ConnectionError, usb.core.USBError, tkinter.TclError) as e:
             logger.error("GUI", "_check_rec_status", f"Unhandled: {e}\n{traceback.format_exc()}")
         finally:
@@ -1286,6 +1329,62 @@ class DeviceActionsMixin:
                 else:
                     self._recording_check_timer_id = self.after(interval_ms, self._check_recording_status_periodically)
 
+    def _query_recording_status(self):
+        """
+        Runs on the device scheduler thread while it holds the device.
+
+        Returns (checked, current_recording_filename).
+        """
+        # Skip recording check if file list streaming is active to avoid command conflicts
+        if (
+            hasattr(self.device_manager.device_interface, "jensen_device")
+            and hasattr(
+                self.device_manager.device_interface.jensen_device,
+                "is_file_list_streaming",
+            )
+            and self.device_manager.device_interface.jensen_device.is_file_list_streaming()
+        ):
+            logger.debug(
+                "GUI",
+                "_check_recording_status_periodically",
+                "Skipping recording check during file list streaming",
+            )
+            return False, None
+
+        # Use the new lightweight method instead of the heavy get_recordings().
+        # refresh=True bypasses the adapter's state cache and invalidates it when the recording changed.
+        current_recording_filename = asyncio.run(
+            self.device_manager.device_interface.get_current_recording_filename(refresh=True)
+        )
+        return True, current_recording_filename
+
+    def _on_recording_status_checked(self, future):
+        """Handles the result of a queued recording status check on the GUI thread."""
+        if future.cancelled():
+            return
+        try:
+            checked, current_recording_filename = future.result()
+        except (ConnectionError, usb.core.USBError) as e:
+            logger.error("GUI", "_check_rec_status", f"Unhandled: {e}\n{traceback.format_exc()}")
+            return
+        if not checked:
+            return
+        if not self.device_manager.device_interface.is_connected():
+            self.stop_recording_status_check()
+            return
+
+        # A change in the reported filename indicates a new recording has started,
+        # or the previous one has finished (filename becomes None).
+        if current_recording_filename != self._previous_recording_filename:
+            logger.info(
+                "GUI",
+                "_check_rec_status",
+                f"Recording status changed (prev: '{self._previous_recording_filename}', "
+                f"new: '{current_recording_filename}'). Refreshing file list.",
+            )
+            self._previous_recording_filename = current_recording_filename
+            self.refresh_file_list_gui()
+
     def start_auto_file_refresh_periodic_check(self):  # Identical to original
         """Starts periodic checking for file list refresh based on the auto-refresh settings."""
         self.stop_auto_file_refresh_periodic_check()
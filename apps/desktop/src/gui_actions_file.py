@@ -17,7 +17,11 @@ from tkinter import messagebox
 
 from config_and_logger import logger
 from file_operations_manager import FileOperationStatus, FileOperationType
-from transcription_module import process_audio_file_for_insights
+from lazy_imports import LazyImport
+from transfer_progress import CoalescingDispatcher
+
+# Imported on first use: pulls in the AI provider SDKs
+process_audio_file_for_insights = LazyImport("transcription_module", "process_audio_file_for_insights")
 
 
 class FileActionsMixin:
@@ -55,7 +59,15 @@ class FileActionsMixin:
             if not self.file_operations_manager.is_file_operation_active(filename, FileOperationType.DOWNLOAD):
                 self._update_file_status_in_treeview(filename, "Queued", ("queued",))
 
-        self.file_operations_manager.queue_batch_download(filenames_to_download, self._update_operation_progress)
+        if len(filenames_to_download) > 1:
+            # Several files stream back to back while earlier ones are written and validated
+            self.file_operations_manager.queue_pipelined_download(
+                filenames_to_download,
+                self._update_operation_progress,
+                convert_to_wav=self.config.get("convert_downloads_to_wav", False),
+            )
+        else:
+            self.file_operations_manager.queue_batch_download(filenames_to_download, self._update_operation_progress)
 
         # No need to refresh file list - downloads work with existing metadata
         # and status updates are handled by the progress callback
@@ -92,7 +104,15 @@ class FileActionsMixin:
         """
         # This is called from a worker thread. Schedule the actual GUI update
         # on the main thread to prevent UI freezes and race conditions.
-        self.after(0, self._perform_gui_update_for_operation, operation)
+        # Updates are coalesced per operation so a burst of progress callbacks
+        # results in a single GUI update showing the latest state.
+        dispatcher = getattr(self, "_operation_progress_dispatcher", None)
+        if dispatcher is None:
+            dispatcher = CoalescingDispatcher(
+                lambda flush: self.after(0, flush), self._perform_gui_update_for_operation
+            )
+            self._operation_progress_dispatcher = dispatcher
+        dispatcher.submit(operation.operation_id, operation)
 
     def _perform_gui_update_for_operation(self, operation):
         """Performs the actual GUI update on the main thread."""
@@ -105,6 +125,9 @@ class FileActionsMixin:
             elif operation.operation_type.value == "download":
                 display_text = f"Downloading ({operation.progress:.0f}%)"
                 status_text = f"Downloading {operation.filename}: {operation.progress:.0f}%"
+                rate = (operation.metadata or {}).get("bytes_per_second")
+                if rate:
+                    status_text += f" ({rate / (1024 * 1024):.2f} MB/s)"
                 tags = ("download",)
             else:
                 # Fallback for other operation types
@@ -353,7 +353,7 @@ class AuxiliaryMixin:
             return
         all_successful = True
         for name, value in settings_to_apply.items():
-            result = self.device_manager.device_interface.jensen_device.set_device_settings({name: value})
+            result = self.device_manager.device_interface.set_device_settings({name: value})
             if not result or result.get("result") != "success":
                 all_successful = False
                 logger.error(
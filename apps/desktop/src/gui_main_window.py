@@ -28,7 +28,6 @@ import sys
 
 # import tempfile  # Commented out - not used in current implementation
 import threading
-import time
 import tkinter
 import traceback
 
@@ -36,13 +35,10 @@ import traceback
 from tkinter import messagebox, ttk  # Removed filedialog - not used
 
 import customtkinter as ctk
-import numpy as np
 from async_calendar_mixin import AsyncCalendarMixin
 from audio_metadata_mixin import AudioMetadataMixin
-from audio_player_enhanced import EnhancedAudioPlayer
 
 # from audio_processing_advanced import AudioEnhancer  # Future: audio enhancement
-from audio_visualization import AudioVisualizationWidget
 from calendar_filter_engine import CalendarFilterEngine
 from calendar_search_widget import CalendarSearchWidget
 
@@ -55,12 +51,15 @@ from constants import DEFAULT_PRODUCT_ID, DEFAULT_VENDOR_ID
 # from ctk_custom_widgets import CTkBanner  # Commented out - not used
 from desktop_device_adapter import DesktopDeviceAdapter
 from device_interface import DeviceManager
+from device_scheduler import CommandPriority, DeviceCommandScheduler
 from file_operations_manager import FileOperationsManager
 from gui_actions_device import DeviceActionsMixin
 from gui_actions_file import FileActionsMixin
 from gui_auxiliary import AuxiliaryMixin
 from gui_event_handlers import EventHandlersMixin
 from gui_treeview import TreeViewMixin
+from lazy_imports import LazyImport, LazyObject, is_loaded
+from perf_trace import tracer
 
 # import usb.core  # Commented out - not used in current implementation
 from PIL import Image, ImageTk, UnidentifiedImageError
@@ -69,8 +68,15 @@ from toast_notification import ToastManager
 
 # from settings_window import SettingsDialog  # Commented out - not used directly
 # from storage_management import StorageMonitor, StorageOptimizer  # Future: storage features
-from transcription_module import process_audio_file_for_insights
 from unified_filter_widget import UnifiedFilterWidget
+from waveform_loader import WaveformLoader
+
+# Heavy subsystems are imported on first use to keep time-to-first-window low:
+# numpy/scipy/matplotlib (visualisation), pygame/pydub (player), AI provider SDKs (insights).
+np = LazyImport("numpy")
+EnhancedAudioPlayer = LazyImport("audio_player_enhanced", "EnhancedAudioPlayer")
+AudioVisualizationWidget = LazyImport("audio_visualization", "AudioVisualizationWidget")
+process_audio_file_for_insights = LazyImport("transcription_module", "process_audio_file_for_insights")
 
 
 # Architecture note (2026-06-22): AsyncCalendarMixin and AudioMetadataMixin were converted
@@ -113,6 +119,7 @@ class HiDockToolGUI(
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.config = load_config()
+        tracer.configure(self.config)
 
         self.title("HiDock Explorer Tool")
         try:
@@ -162,8 +169,9 @@ class HiDockToolGUI(
         self.device_adapter = DesktopDeviceAdapter(self.usb_backend_instance)
         self.device_manager = DeviceManager(self.device_adapter)
 
-        # Initialize device lock before file operations manager
-        self.device_lock = threading.Lock()
+        # Initialize device lock before file operations manager. The scheduler grants the device to queued
+        # work in priority order, so status queries are not starved by downloads.
+        self.device_lock = DeviceCommandScheduler()
         self._abort_file_operations = False  # Flag to abort file operations on disconnect
 
         self.file_operations_manager = FileOperationsManager(
@@ -178,7 +186,8 @@ class HiDockToolGUI(
 
         self.offline_mode_manager = OfflineModeManager(self.file_operations_manager, self.download_directory)
 
-        self.audio_player = EnhancedAudioPlayer(self)
+        self.audio_player = LazyObject(lambda: EnhancedAudioPlayer(self))
+        self.waveform_loader = WaveformLoader(dispatch=lambda callback, *args: self.after(0, callback, *args))
 
         self.available_usb_devices = []
         self.displayed_files_details = []
@@ -188,6 +197,7 @@ class HiDockToolGUI(
         self.treeview_sort_column = self.saved_treeview_sort_column
         self.treeview_sort_reverse = self.saved_treeview_sort_reverse
         self._recording_check_timer_id = None
+        self._recording_status_future = None
         self._auto_file_refresh_timer_id = None
         self._is_ui_refresh_in_progress = False
         self._previous_recording_filename = None
@@ -263,10 +273,6 @@ class HiDockToolGUI(
         self._selection_update_timer = None
         self._last_loaded_waveform_file = None
         self._waveform_loading = False
-        self._cached_device_info = None
-        self._device_info_cache_time = 0
-        self._cached_storage_info = None
-        self._storage_info_cache_time = 0
         self._cached_storage_text = None
 
         self._menu_image_references = []
@@ -1495,27 +1501,15 @@ class HiDockToolGUI(
             storage_text = "Storage: ---"
             is_connected = self.device_manager.device_interface.is_connected()
             if is_connected:
-                with self.device_lock:
-                    # Use cached device info if available and recent
-                    current_time = time.time()
-                    if (
-                        hasattr(self, "_cached_device_info")
-                        and hasattr(self, "_device_info_cache_time")
-                        and current_time - self._device_info_cache_time < 30.0
-                    ):  # 30 second cache
-                        device_info = self._cached_device_info
-                    else:
-                        # Check if still connected before getting device info
-                        if self.device_manager.device_interface.is_connected():
-                            try:
-                                device_info = asyncio.run(self.device_manager.device_interface.get_device_info())
-                                self._cached_device_info = device_info
-                                self._device_info_cache_time = current_time
-                            except (ConnectionError, Exception) as e:
-                                logger.debug("GUI", "_update_all_status_info_thread", f"Device info error: {e}")
-                                device_info = None
-                        else:
-                            device_info = None
+                with self.device_lock.hold(CommandPriority.INTERACTIVE, "status info"):
+                    # Device and card info come from the adapter's state cache, which is invalidated by device
+                    # events (delete, format, recording start/stop, reconnect), so these calls rarely reach USB
+                    device_info = None
+                    if self.device_manager.device_interface.is_connected():
+                        try:
+                            device_info = asyncio.run(self.device_manager.device_interface.get_device_info())
+                        except (ConnectionError, Exception) as e:
+                            logger.debug("GUI", "_update_all_status_info_thread", f"Device info error: {e}")
 
                     if device_info:
                         conn_status_text = f"Status: Connected ({device_info.model.value or 'HiDock'})"
@@ -1537,17 +1531,7 @@ class HiDockToolGUI(
                         else:
                             storage_text = "Storage: Fetching..."
                     else:
-                        # Use cached storage info if recent
-                        if (
-                            hasattr(self, "_cached_storage_info")
-                            and hasattr(self, "_storage_info_cache_time")
-                            and current_time - self._storage_info_cache_time < 60.0
-                        ):  # 60 second cache
-                            card_info = self._cached_storage_info
-                        else:
-                            card_info = asyncio.run(self.device_manager.device_interface.get_storage_info())
-                            self._cached_storage_info = card_info
-                            self._storage_info_cache_time = current_time
+                        card_info = asyncio.run(self.device_manager.device_interface.get_storage_info())
 
                         if card_info and card_info.total_capacity > 0:
                             used_bytes, capacity_bytes = (
@@ -1597,10 +1581,7 @@ class HiDockToolGUI(
             size_selected_bytes = 0
             if selected_items_count > 0 and hasattr(self, "file_tree") and self.file_tree.winfo_exists():
                 for item_iid in self.file_tree.selection():
-                    file_detail = next(
-                        (f for f in self.displayed_files_details if f["name"] == item_iid),
-                        None,
-                    )
+                    file_detail = self._get_file_detail(item_iid)
                     if file_detail:
                         size_selected_bytes += file_detail.get("length", 0)
             file_counts_text = (
@@ -1680,10 +1661,7 @@ class HiDockToolGUI(
         can_play_selected = num_selected == 1
         if can_play_selected:
             file_iid = self.file_tree.selection()[0]
-            file_detail = next(
-                (f for f in self.displayed_files_details if f["name"] == file_iid),
-                None,
-            )
+            file_detail = self._get_file_detail(file_iid)
             if file_detail:
                 is_audio_file = file_detail["name"].lower().endswith(".wav") or file_detail["name"].lower().endswith(
                     ".hda"
@@ -1769,7 +1747,11 @@ class HiDockToolGUI(
                 self.toolbar_cancel_button.configure(state="normal" if active_operations else "disabled")
 
             # Update playback controls based on audio player state
-            is_playing = hasattr(self, "audio_player") and self.audio_player.state.value in ["playing", "paused"]
+            is_playing = (
+                hasattr(self, "audio_player")
+                and is_loaded(self.audio_player)
+                and self.audio_player.state.value in ["playing", "paused"]
+            )
             self.actions_menu.entryconfig("Stop Playback", state="normal" if is_playing else "disabled")
         if hasattr(self, "device_menu"):
             self.device_menu.entryconfig("Sync Device Time", state="normal" if is_connected else "disabled")
@@ -2684,7 +2666,7 @@ class HiDockToolGUI(
 
         # Get the selected file details
         file_iid = selected_iids[0]
-        file_detail = next((f for f in self.displayed_files_details if f["name"] == file_iid), None)
+        file_detail = self._get_file_detail(file_iid)
         if not file_detail:
             messagebox.showerror("File Error", "Selected file details not found.", parent=self)
             return
@@ -2699,7 +2681,7 @@ class HiDockToolGUI(
 
         # from transcription_module import process_audio_file_for_insights  # Future: for audio insights feature
 
-        file_detail = next((f for f in self.displayed_files_details if f["name"] == file_iid), None)
+        file_detail = self._get_file_detail(file_iid)
         if not file_detail:
             messagebox.showerror("Transcription Error", "File details not found.", parent=self)
             return
@@ -3008,10 +2990,8 @@ class HiDockToolGUI(
         self.audio_visualizer_frame = ctk.CTkFrame(parent_frame)
         # Don't grid initially - will be shown when panel is toggled
 
-        self.audio_visualizer_widget = AudioVisualizationWidget(self.audio_visualizer_frame, height=150)
-
-        # Connect audio player to visualization widget for speed controls
-        self.audio_visualizer_widget.set_audio_player(self.audio_player)
+        # The widget (matplotlib/scipy) is built the first time it is shown or used
+        self.audio_visualizer_widget = LazyObject(self._build_audio_visualizer_widget)
 
         # Initially hide the visualization widget
         self._update_visualizer_visibility()
@@ -3019,6 +2999,14 @@ class HiDockToolGUI(
         # Setup audio player callbacks for visualization
         self._setup_audio_visualization_callbacks()
 
+    def _build_audio_visualizer_widget(self):
+        """Creates the audio visualization widget and connects it to the audio player."""
+        widget = AudioVisualizationWidget(self.audio_visualizer_frame, height=150)
+
+        # Connect audio player to visualization widget for speed controls
+        widget.set_audio_player(self.audio_player)
+        return widget
+
     def _set_minimum_window_size(self):
         """Sets the minimum size of the main window to ensure all widgets are visible."""
         self.update_idletasks()
@@ -3304,10 +3292,7 @@ You can dismiss this warning and continue using the application with limited aud
 
             # Get the selected file
             selected_iid = selected_iids[0]
-            file_detail = next(
-                (f for f in self.displayed_files_details if f["name"] == selected_iid),
-                None,
-            )
+            file_detail = self._get_file_detail(selected_iid)
 
             if not file_detail:
                 return
@@ -3325,15 +3310,14 @@ You can dismiss this warning and continue using the application with limited aud
                 if hasattr(self, "audio_visualizer_widget"):
                     # Only load if it's a different file to avoid redundant loading
                     if not hasattr(self, "_last_loaded_waveform_file") or self._last_loaded_waveform_file != filename:
-                        # Show immediate loading feedback
-                        self._show_waveform_loading_state(filename)
-
-                        # Load waveform in background thread for better performance
-                        import threading
-
-                        threading.Thread(
-                            target=self._load_waveform_background, args=(local_filepath, filename), daemon=True
-                        ).start()
+                        # Debounced and cancellable: only the file the selection settles on is loaded
+                        if self.waveform_loader.get_cached(local_filepath) is None:
+                            self._show_waveform_loading_state(filename)
+                        self.waveform_loader.request(
+                            local_filepath,
+                            on_ready=lambda data, rate, name=filename: self._update_waveform_with_data(data, rate, name),
+                            on_error=lambda error, name=filename: self._handle_waveform_load_error(name, error),
+                        )
 
                         self._last_loaded_waveform_file = filename
 
@@ -3384,36 +3368,6 @@ You can dismiss this warning and continue using the application with limited aud
         except Exception as e:
             logger.error("MainWindow", "_show_waveform_loading_state", f"Error showing loading state: {e}")
 
-    def _load_waveform_background(self, filepath, filename):
-        """Load waveform in background thread and update UI when complete."""
-        try:
-            # This runs in background thread - don't touch GUI directly
-            logger.info("WaveformLoader", "_load_waveform_background", f"Loading waveform for {filename}")
-
-            # Use the fixed AudioProcessor method instead of librosa directly
-            from audio_player_enhanced import AudioProcessor
-
-            # Load audio data in background (this is the slow part)
-            try:
-                y, sr = AudioProcessor.extract_waveform_data(filepath, max_points=2000)
-
-                if len(y) == 0:
-                    raise Exception("No waveform data extracted")
-
-                # Schedule GUI update on main thread with pre-processed data
-                self.after(0, self._update_waveform_with_data, y, sr, filename)
-
-            except Exception as load_error:
-                logger.debug(
-                    "WaveformLoader", "_load_waveform_background", f"Error loading audio waveform: {load_error}"
-                )
-                self.after(0, self._handle_waveform_load_error, filename, str(load_error))
-
-        except Exception as e:
-            logger.error("MainWindow", "_load_waveform_background", f"Error in background loading: {e}")
-            # Schedule error handling on main thread
-            self.after(0, self._handle_waveform_load_error, filename, str(e))
-
     def _update_waveform_with_data(self, audio_data, sample_rate, filename):
         """Update waveform visualization with pre-loaded data (called on main thread)."""
         try:
@@ -3505,10 +3459,7 @@ You can dismiss this warning and continue using the application with limited aud
             # Update the specific file's status in treeview without full refresh
             if self.current_playing_filename_for_replay:
                 # Find the file detail to determine the correct status
-                file_detail = next(
-                    (f for f in self.displayed_files_details if f["name"] == self.current_playing_filename_for_replay),
-                    None,
-                )
+                file_detail = self._get_file_detail(self.current_playing_filename_for_replay)
 
                 if file_detail:
                     # Determine the appropriate status after stopping playback
@@ -3597,7 +3548,7 @@ You can dismiss this warning and continue using the application with limited aud
             return
 
         file_iid = selected_iids[0]
-        file_detail = next((f for f in self.displayed_files_details if f["name"] == file_iid), None)
+        file_detail = self._get_file_detail(file_iid)
         if not file_detail:
             return
 
@@ -3774,6 +3725,19 @@ You can dismiss this warning and continue using the application with limited aud
         except Exception as e:
             logger.warning("GUI", "on_closing", f"Error during calendar shutdown: {e}")
 
+        # Stop audio processing workers; queued jobs resume on next launch
+        try:
+            if hasattr(self, "audio_metadata"):
+                self.shutdown_audio_processing_queue()
+        except Exception as e:
+            logger.warning("GUI", "on_closing", f"Error during audio processing shutdown: {e}")
+
+        self.waveform_loader.shutdown()
+        self.device_lock.shutdown()
+
+        if tracer.enabled:
+            tracer.dump_on_exit()
+
         if self.current_playing_temp_file and os.path.exists(self.current_playing_temp_file):
             try:
                 os.remove(self.current_playing_temp_file)
@@ -4115,7 +4079,7 @@ You can dismiss this warning and continue using the application with limited aud
         }
 
     def _process_selected_audio(self, file_iid):
-        file_detail = next((f for f in self.displayed_files_details if f["name"] == file_iid), None)
+        file_detail = self._get_file_detail(file_iid)
         if not file_detail:
             messagebox.showerror("Audio Processing Error", "File details not found.", parent=self)
             return
@@ -5057,7 +5021,7 @@ You can dismiss this warning and continue using the application with limited aud
             # Get file details for selected files
             selected_files = []
             for iid in selected_iids:
-                file_detail = next((f for f in self.displayed_files_details if f["name"] == iid), None)
+                file_detail = self._get_file_detail(iid)
                 if file_detail:
                     selected_files.append(file_detail.copy())
 
@@ -5394,6 +5358,12 @@ You can dismiss this warning and continue using the application with limited aud
     def batch_process_ready_files(self, max_files=5):
         return self.audio_metadata.batch_process_ready_files(max_files)
 
+    def get_audio_processing_queue_metrics(self):
+        return self.audio_metadata.get_audio_processing_queue_metrics()
+
+    def shutdown_audio_processing_queue(self):
+        return self.audio_metadata.shutdown_audio_processing_queue()
+
     def show_audio_metadata_dialog(self, filename):
         return self.audio_metadata.show_audio_metadata_dialog(filename)
 
@@ -7,10 +7,11 @@ import time
 import tkinter
 from datetime import datetime
 from tkinter import ttk
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import customtkinter as ctk
 from config_and_logger import logger
+from perf_trace import traced
 
 
 class TreeViewMixin:
@@ -147,6 +148,7 @@ class TreeViewMixin:
             # Files are already displayed - just update status bar, don't clear tree
             pass
 
+    @traced("ui.populate_treeview", "ui")
     def _populate_treeview_from_data(self, files_data):
         """
         Populates the Treeview with file data, preserving selection and scroll position.
@@ -311,6 +313,29 @@ class TreeViewMixin:
                         self.file_tree.selection_set(new_selection)
                 self.file_tree.yview_moveto(scroll_pos[0])
 
+    def _get_file_detail(self, file_iid: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the entry of displayed_files_details for a Treeview IID (the file name), or None.
+
+        Looks the name up in a name -> position index instead of scanning the list. The
+        index is rebuilt when the list is replaced, changes length, or the indexed
+        position no longer holds that name (e.g. after an in-place sort).
+        """
+        files = getattr(self, "displayed_files_details", None) or []
+        index = getattr(self, "_file_detail_index", None)
+        if index is None or index[0] is not files or index[1] != len(files):
+            index = self._rebuild_file_detail_index(files)
+
+        position = index[2].get(file_iid)
+        if position is not None and files[position].get("name") != file_iid:
+            position = self._rebuild_file_detail_index(files)[2].get(file_iid)
+        return files[position] if position is not None else None
+
+    def _rebuild_file_detail_index(self, files):
+        index = (files, len(files), {detail.get("name"): i for i, detail in enumerate(files)})
+        self._file_detail_index = index
+        return index
+
     def _remove_file_from_treeview(self, file_iid):
         """
         Removes a file from the Treeview and the displayed_files_details list.
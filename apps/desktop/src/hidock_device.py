@@ -16,6 +16,7 @@ import usb.util
 
 # Import the global logger instance from config_and_logger.py
 from config_and_logger import logger
+from perf_trace import span, traced
 
 # Import constants from the constants.py module
 from constants import (
@@ -32,11 +33,102 @@ from constants import (
     CMD_SET_DEVICE_TIME,
     CMD_SET_SETTINGS,
     CMD_TRANSFER_FILE,
+    CMD_TRANSFER_FILE_PARTIAL,
     DEFAULT_PRODUCT_ID,
     DEFAULT_VENDOR_ID,
     EP_IN_ADDR,
     EP_OUT_ADDR,
 )
+from transfer_policy import STREAM, TransferPolicy, get_transfer_policy
+
+
+class FileListStreamParser:
+    """
+    Incremental parser for the CMD_GET_FILE_LIST response stream.
+
+    Chunks are fed as they arrive from the device. Complete entries are parsed
+    immediately and a partial entry at the end of a chunk is carried over to the
+    next one, so the list is known to be complete as soon as the number of
+    entries announced in the 0xFFFF header has been parsed - no terminator
+    packet or timeout is needed.
+
+    Entry layout: version (1), name length (3, big-endian), name,
+    file length (4, big-endian), reserved (6), signature (16).
+    """
+
+    HEADER_SIZE = 6
+    ENTRY_FIXED_SIZE = 4 + 4 + 6 + 16
+    _COMPACT_THRESHOLD = 64 * 1024
+
+    def __init__(self, build_entry):
+        """
+        Args:
+            build_entry: Callable (filename, version, length, signature_hex) -> file info dict.
+        """
+        self._build_entry = build_entry
+        self._buffer = bytearray()
+        self._offset = 0
+        self._header_checked = False
+        self.expected_count = None
+        self.files = []
+        self.bytes_received = 0
+        self.chunks_received = 0
+
+    @property
+    def is_complete(self):
+        """True once every entry announced by the header has been parsed."""
+        return self.expected_count is not None and len(self.files) >= self.expected_count
+
+    @property
+    def pending_bytes(self):
+        """Bytes received but not yet consumed by a complete entry."""
+        return len(self._buffer) - self._offset
+
+    def feed(self, chunk):
+        """Consume a chunk and return the list of entries completed by it."""
+        self._buffer += chunk
+        self.bytes_received += len(chunk)
+        self.chunks_received += 1
+
+        buf = self._buffer
+        if not self._header_checked:
+            if len(buf) < 2:
+                return []
+            if buf[0] == 0xFF and buf[1] == 0xFF:
+                if len(buf) < self.HEADER_SIZE:
+                    return []
+                self.expected_count = struct.unpack_from(">I", buf, 2)[0]
+                self._offset = self.HEADER_SIZE
+            self._header_checked = True
+
+        new_files = []
+        offset = self._offset
+        end = len(buf)
+        while not self.is_complete and end - offset >= 4:
+            name_len = int.from_bytes(buf[offset + 1 : offset + 4], "big")
+            entry_size = self.ENTRY_FIXED_SIZE + name_len
+            if end - offset < entry_size:
+                break  # Partial entry, wait for the next chunk
+
+            version = buf[offset]
+            name_start = offset + 4
+            filename = bytes(buf[name_start : name_start + name_len]).rstrip(b"\x00").decode("ascii", errors="ignore")
+            length_offset = name_start + name_len
+            file_length = struct.unpack_from(">I", buf, length_offset)[0]
+            signature_start = length_offset + 4 + 6
+            signature_hex = bytes(buf[signature_start : signature_start + 16]).hex()
+
+            entry = self._build_entry(filename, version, file_length, signature_hex)
+            self.files.append(entry)
+            new_files.append(entry)
+            offset += entry_size
+
+        # Drop consumed bytes once they add up, keeping only the partial tail
+        if offset >= self._COMPACT_THRESHOLD or offset == end:
+            del buf[:offset]
+            offset = 0
+        self._offset = offset
+        return new_files
 
 
 class HiDockJensen:
@@ -67,6 +159,7 @@ class HiDockJensen:
         self.receive_buffer = bytearray()
         self.device_info = {}
         self.model = "unknown"
+        self.usb_address = None  # (bus, address) of the device to connect to when several are attached
         self.claimed_interface_number = -1
         self.detached_kernel_driver_on_interface = -1
         self.is_connected_flag = False
@@ -291,7 +384,10 @@ class HiDockJensen:
             "_find_device",
             f"Looking for VID={hex(vid_to_find)}, PID={hex(pid_to_find)}",
         )
-        device = usb.core.find(idVendor=vid_to_find, idProduct=pid_to_find, backend=self.usb_backend)
+        find_kwargs = {}
+        if self.usb_address is not None:
+            find_kwargs["custom_match"] = lambda dev: (dev.bus, dev.address) == tuple(self.usb_address)
+        device = usb.core.find(idVendor=vid_to_find, idProduct=pid_to_find, backend=self.usb_backend, **find_kwargs)
         if device is None:
             logger.info(  # Changed from error to info, as this is an expected scenario
                 "Jensen",
@@ -344,6 +440,7 @@ class HiDockJensen:
         pid: int = DEFAULT_PRODUCT_ID,
         auto_retry: bool = True,
         force_reset: bool = False,
+        usb_address: tuple[int, int] | None = None,
     ) -> tuple[bool, str | None]:
         """
         Connects to the HiDock device with automatic retry mechanisms.
@@ -358,6 +455,8 @@ class HiDockJensen:
             pid (int, optional): The Product ID of the device. Defaults to DEFAULT_PRODUCT_ID.
             auto_retry (bool, optional): Whether to automatically retry on failure. Defaults to True.
             force_reset (bool, optional): Whether to force a device state reset before connecting. Defaults to False.
+            usb_address (tuple[int, int], optional): (bus, address) selecting one of several attached
+                                                     devices. Defaults to None (the first one found).
 
         Returns:
             tuple[bool, str | None]: (True, None) if successful,
@@ -372,6 +471,9 @@ class HiDockJensen:
                 )
                 self.disconnect()
 
+            if usb_address is not None:
+                self.usb_address = tuple(usb_address)
+
             # Force reset if requested (useful for recovering from inconsistent states)
             if force_reset:
                 self.reset_device_state()
@@ -1104,7 +1206,8 @@ class HiDockJensen:
         Raises:
             usb.core.USBError or ConnectionError: If errors occur during send or receive.
         """
-        with self._usb_lock:  # Ensure send and receive are atomic relative to other commands
+        # Ensure send and receive are atomic relative to other commands
+        with self._usb_lock, span(f"device.command.{command_id}", "device"):
             try:
                 # Clear buffer only for non-streaming commands to avoid losing data from a previous stream
                 if command_id != CMD_TRANSFER_FILE:
@@ -1745,17 +1848,22 @@ class HiDockJensen:
             logger.error("Jensen", "async_parallel", f"Async parallel operation failed: {e}")
             return {"files": [], "totalFiles": 0, "totalSize": 0, "error": f"Async parallel operation failed: {e}"}
 
-    def list_files_with_retry(self, timeout_s=20, max_retries=2):
+    def list_files_with_retry(self, timeout_s=20, max_retries=2, batch_callback=None):
         """
         List files with automatic retry for incomplete transfers.
 
         Args:
-            timeout_s (int): Timeout for each attempt
+            timeout_s (int): Minimum timeout for each attempt; raised to what the transfer
+                policy expects for the number of files on the device
             max_retries (int): Maximum number of retries for incomplete data
+            batch_callback (callable, optional): Passed to list_files. A retry restarts
+                delivery, with parsed_count == len(new_files) on its first batch.
 
         Returns:
             dict: File list result with retry information
         """
+        policy = self.transfer_policy
+        timeout_s = max(timeout_s, policy.list_timeout())
         for attempt in range(max_retries + 1):
             # Check if we should abort
             if self._abort_operations:
@@ -1764,10 +1872,12 @@ class HiDockJensen:
 
             logger.info("Jensen", "list_files_with_retry", f"Attempt {attempt + 1}/{max_retries + 1} to get file list")
 
-            result = self.list_files(timeout_s)
+            started = time.monotonic()
+            result = self.list_files(timeout_s, batch_callback=batch_callback)
 
             # If successful and complete, return immediately
             if result and not result.get("incomplete"):
+                policy.record_listing(len(result.get("files", [])), time.monotonic() - started)
                 if attempt > 0:
                     logger.info("Jensen", "list_files_with_retry", f"Success on attempt {attempt + 1}")
                 return result
@@ -1793,18 +1903,17 @@ class HiDockJensen:
                     result["retries_attempted"] = attempt + 1
                     return result
 
-                # Wait before retrying
-                import time
-
-                retry_delay = 1.0 * (attempt + 1)  # Increasing delay
-                logger.info("Jensen", "list_files_with_retry", f"Waiting {retry_delay}s before retry...")
+                # Size the next attempt for the announced file count and back off as the link needs
+                timeout_s = max(timeout_s, policy.list_timeout(expected_count))
+                retry_delay = policy.backoff(attempt + 1)
+                logger.info("Jensen", "list_files_with_retry", f"Waiting {retry_delay:.1f}s before retry...")
                 time.sleep(retry_delay)
 
             else:
-                # Complete failure, retry with longer timeout
+                # Complete failure: the link stalled rather than the timeout being short, so back off
                 logger.error("Jensen", "list_files_with_retry", f"Attempt {attempt + 1} failed completely")
                 if attempt < max_retries:
-                    timeout_s = min(timeout_s * 1.5, 60)  # Increase timeout for retry
+                    time.sleep(policy.backoff(attempt + 1))
 
         # All retries failed
         logger.error("Jensen", "list_files_with_retry", f"All {max_retries + 1} attempts failed")
@@ -1816,17 +1925,22 @@ class HiDockJensen:
             "retries_attempted": max_retries + 1,
         }
 
-    def list_files(self, timeout_s=20):
+    @traced("device.list_files", "device")
+    def list_files(self, timeout_s=20, batch_callback=None):
         """
         Retrieves a list of files from the device, including metadata.
 
-        Parses the raw file list data from the device, extracting details like
-        filename, creation date/time, duration, size, and version.
+        Parses the raw file list data from the device as it streams in, extracting
+        details like filename, creation date/time, duration, size, and version.
         It handles different device firmware versions that might affect how
         file counts are determined.
 
         Args:
             timeout_s (int, optional): Timeout in seconds for the operation. Defaults to 20.
+            batch_callback (callable, optional): Called from the USB thread as
+                `batch_callback(new_files, parsed_count, expected_count)` whenever a chunk
+                completes one or more entries, so callers can show files before the
+                transfer finishes. `expected_count` is None if the device sent no header.
 
         Returns:
             dict or None: A dictionary containing
@@ -1878,64 +1992,48 @@ class HiDockJensen:
                         "error": "Failed to send command",
                     }
 
-                # Web-style handler approach: accumulate data chunks and continue until completion
-                file_list_chunks = []
-                expected_file_count = None
-
-                # Optimized handler - avoids parsing on every chunk
-                total_bytes_received = 0
+                # Entries are parsed incrementally as chunks arrive; the transfer is complete
+                # as soon as the header's file count has been parsed (or on the empty terminator).
+                parser = FileListStreamParser(self._build_file_list_entry)
 
                 def file_list_handler(response_data):
-                    nonlocal expected_file_count, total_bytes_received
-
                     if not response_data or len(response_data) == 0:
                         # Empty response signals end of transmission
                         logger.info(
                             "Jensen",
                             "list_files",
-                            f"Empty response received, completing file list with {len(file_list_chunks)} chunks",
+                            f"Empty response received, completing file list with {parser.chunks_received} chunks",
                         )
-                        return self._parse_file_list_chunks(file_list_chunks) if file_list_chunks else []
+                        return parser.files
 
-                    # Accumulate this chunk
-                    file_list_chunks.append(response_data)
-                    total_bytes_received += len(response_data)
+                    with span("device.parse_file_list_chunk", "device"):
+                        new_files = parser.feed(response_data)
                     # Throttle per-chunk DEBUG logging: a runaway/looping transfer can emit
                     # millions of chunks, and logging every one previously produced multi-GB
                     # log files. Log the first chunk and then only every 50th.
-                    if len(file_list_chunks) == 1 or len(file_list_chunks) % 50 == 0:
+                    if parser.chunks_received == 1 or parser.chunks_received % 50 == 0:
                         logger.debug(
                             "Jensen",
                             "list_files",
-                            f"Accumulated chunk {len(file_list_chunks)}, size: {len(response_data)} bytes, total: {total_bytes_received}",
+                            f"Chunk {parser.chunks_received}, size: {len(response_data)} bytes, "
+                            f"parsed {len(parser.files)}/{parser.expected_count} files",
                         )
+                    if parser.chunks_received == 1 and parser.expected_count is not None:
+                        logger.info("Jensen", "list_files", f"Expected {parser.expected_count} files from header")
 
-                    # Get expected count from first chunk header if available (fast header extraction)
-                    if expected_file_count is None and len(file_list_chunks) == 1:
-                        first_chunk = file_list_chunks[0]
-                        if len(first_chunk) >= 6 and first_chunk[0] == 0xFF and first_chunk[1] == 0xFF:
-                            expected_file_count = struct.unpack(">I", first_chunk[2:6])[0]
-                            logger.info(
-                                "Jensen",
-                                "list_files",
-                                f"Expected {expected_file_count} files from header",
-                            )
-
-                    # Fast completion estimation (avoids expensive parsing)
-                    if expected_file_count is not None:
-                        # Conservative heuristic: ~60 bytes per file (actual data shows 57 bytes/file)
-                        # Subtract 6 bytes for header
-                        estimated_files = max(0, (total_bytes_received - 6) // 60)
-
-                        if len(file_list_chunks) == 1 or len(file_list_chunks) % 50 == 0:
-                            logger.debug(
-                                "Jensen",
-                                "list_files",
-                                f"Estimated {estimated_files}/{expected_file_count} files from {total_bytes_received} bytes",
-                            )
+                    if new_files and batch_callback is not None:
+                        try:
+                            batch_callback(new_files, len(parser.files), parser.expected_count)
+                        except Exception as cb_error:
+                            logger.warning("Jensen", "list_files", f"File list batch callback failed: {cb_error}")
 
-                        # Don't use estimation to trigger early parsing - it was causing issues
-                        # Just continue accumulating chunks until we get an empty one
+                    if parser.is_complete:
+                        logger.info(
+                            "Jensen",
+                            "list_files",
+                            f"All {parser.expected_count} files parsed from {parser.chunks_received} chunks",
+                        )
+                        return parser.files
 
                     # Continue receiving more data
                     return None
@@ -1963,20 +2061,20 @@ class HiDockJensen:
 
                     # Bail out of a runaway transfer before it can exhaust memory/disk.
                     sane_byte_ceiling = MAX_FILE_LIST_BYTES
-                    if expected_file_count:
+                    if parser.expected_count:
                         # Allow generous slack over the device-reported count (120 bytes/file,
                         # +4KB header slack) but never exceed the absolute ceiling.
                         sane_byte_ceiling = min(
                             MAX_FILE_LIST_BYTES,
-                            (expected_file_count + 100) * 120 + 4096,
+                            (parser.expected_count + 100) * 120 + 4096,
                         )
-                    if total_bytes_received > sane_byte_ceiling or len(file_list_chunks) > MAX_FILE_LIST_CHUNKS:
+                    if parser.bytes_received > sane_byte_ceiling or parser.chunks_received > MAX_FILE_LIST_CHUNKS:
                         logger.error(
                             "Jensen",
                             "list_files",
-                            f"Runaway file-list transfer detected: {len(file_list_chunks)} chunks, "
-                            f"{total_bytes_received} bytes (expected ~{expected_file_count} files). "
-                            f"Aborting accumulation and parsing what was received.",
+                            f"Runaway file-list transfer detected: {parser.chunks_received} chunks, "
+                            f"{parser.bytes_received} bytes (expected ~{parser.expected_count} files). "
+                            f"Aborting accumulation and using what was parsed.",
                         )
                         final_files = file_list_handler(b"")  # Empty data signals completion
                         break
@@ -1999,6 +2097,10 @@ class HiDockJensen:
                         if result is not None:
                             # Handler indicates completion
                             final_files = result
+                            if response["body"]:
+                                # Completed on the entry count: absorb a trailing empty terminator,
+                                # if the device sends one, so it cannot end the next listing early.
+                                self._receive_response(seq_id, timeout_ms=200, streaming_cmd_id=CMD_GET_FILE_LIST)
                             break
 
                     elif response is None:  # Timeout
@@ -2015,17 +2117,19 @@ class HiDockJensen:
                         # Don't give up too early - only complete if we're confident we have all data
                         if consecutive_timeouts >= max_consecutive_timeouts:
                             # Check if we have a reasonable amount of data before giving up
-                            if file_list_chunks and total_bytes_received > 100:
+                            if parser.chunks_received and parser.bytes_received > 100:
                                 logger.info(
                                     "Jensen",
                                     "list_files",
-                                    f"Timeout after {len(file_list_chunks)} chunks ({total_bytes_received} bytes), processing available data",
+                                    f"Timeout after {parser.chunks_received} chunks ({parser.bytes_received} bytes), "
+                                    f"using {len(parser.files)} parsed files",
                                 )
                             else:
                                 logger.warning(
                                     "Jensen",
                                     "list_files",
-                                    f"Max timeouts reached with minimal data ({len(file_list_chunks)} chunks, {total_bytes_received} bytes)",
+                                    f"Max timeouts reached with minimal data ({parser.chunks_received} chunks, "
+                                    f"{parser.bytes_received} bytes)",
                                 )
                             # Give the handler a chance to process final data
                             final_files = file_list_handler(b"")  # Empty data signals completion
@@ -2052,6 +2156,7 @@ class HiDockJensen:
                 total_size_bytes = sum(file_info.get("length", 0) for file_info in final_files)
 
                 # Check if we received all expected files
+                expected_file_count = parser.expected_count
                 if expected_file_count and len(final_files) < expected_file_count:
                     logger.error(
                         "Jensen",
@@ -2083,6 +2188,21 @@ class HiDockJensen:
         """Check if file list streaming is currently in progress."""
         return getattr(self, "_file_list_streaming", False)
 
+    def _build_file_list_entry(self, filename, version, length, signature_hex):
+        """Build the file info dict for one parsed file list entry."""
+        create_date_str, create_time_str, time_obj = self._parse_filename_datetime_cached(filename)
+        return {
+            "name": filename,
+            "createDate": create_date_str,
+            "createTime": create_time_str,
+            "time": time_obj,
+            "duration": self._calculate_file_duration_cached(length, version),
+            "version": version,
+            "length": length,
+            "signature": signature_hex,
+        }
+
+    @traced("device.parse_file_list", "device")
     def _parse_file_list_chunks(self, chunks):
         """
         Ultra-fast binary parsing with pre-compiled structs and memoryview optimization.
@@ -2339,6 +2459,12 @@ class HiDockJensen:
         except Exception:
             return 0
 
+    @property
+    def transfer_policy(self) -> TransferPolicy:
+        """Adaptive timeouts learned from transfers with the connected device (see transfer_policy)."""
+        return get_transfer_policy(self.device_info.get("sn") or self.model)
+
+    @traced("device.stream_file", "device")
     def stream_file(
         self,
         filename,
@@ -2347,6 +2473,7 @@ class HiDockJensen:
         progress_callback=None,
         timeout_s=180,
         cancel_event: threading.Event = None,
+        stall_timeout_s=None,
     ):
         """
         Streams a file from the device.
@@ -2364,10 +2491,17 @@ class HiDockJensen:
             timeout_s (int, optional): Timeout in seconds for the entire streaming operation.
                                        Defaults to 180.
             cancel_event (threading.Event, optional): Event to signal cancellation. Defaults to None.
+            stall_timeout_s (float, optional): Longest wait for the next chunk before the link is
+                                               considered stalled. Defaults to the transfer policy's
+                                               learned stall threshold.
 
         Returns:
             str: Status of the operation ("OK", "cancelled", "fail_timeout", "fail_comms_error", etc.).
         """
+        policy = self.transfer_policy
+        if stall_timeout_s is None:
+            stall_timeout_s = policy.stall_timeout()
+        monitor = policy.begin(STREAM, file_length)
         with self._usb_lock:
             status_to_return = "fail"
             try:
@@ -2413,7 +2547,9 @@ class HiDockJensen:
 
                     # Use a shorter, rolling timeout for each read operation.
                     # This prevents timeouts on large files that are actively transferring.
-                    response = self._receive_response(initial_seq_id, 15000, streaming_cmd_id=CMD_TRANSFER_FILE)
+                    response = self._receive_response(
+                        initial_seq_id, int(stall_timeout_s * 1000), streaming_cmd_id=CMD_TRANSFER_FILE
+                    )
 
                     if response and response["id"] == CMD_TRANSFER_FILE:
                         chunk = response["body"]
@@ -2433,6 +2569,7 @@ class HiDockJensen:
                             time.sleep(0.1)
                             continue
                         bytes_received += len(chunk)
+                        monitor.on_chunk(len(chunk))
                         data_callback(chunk)
                         if progress_callback:
                             progress_callback(bytes_received, file_length)
@@ -2503,6 +2640,8 @@ class HiDockJensen:
                 )
                 status_to_return = "fail_exception"
             finally:
+                if status_to_return != "cancelled":
+                    policy.record(monitor, status_to_return == "OK")
                 # The receive buffer should not be cleared here, as it may contain data for the next response.
                 if (  # Flush logic should only run on failure to try and recover the connection
                     status_to_return not in ["OK", "cancelled"] and self.device and self.ep_in
@@ -2937,6 +3076,7 @@ class HiDockJensen:
         )
         return {"result": "failed"}
 
+    @traced("device.get_file_block", "device")
     def get_file_block(self, filename, offset, length, timeout_s=5):
         """
         Retrieves a specific block of data from a file on the device.
@@ -2985,3 +3125,41 @@ class HiDockJensen:
                 # self.receive_buffer.clear() # DO NOT DO THIS HERE
                 pass
             return status_to_return
+
+    @traced("device.read_file_partial", "device")
+    def read_file_partial(self, filename, offset, length, timeout_s=5):
+        """
+        Reads part of a file on the device (CMD_TRANSFER_FILE_PARTIAL).
+
+        Unlike stream_file, which always starts at the first byte, this reads
+        from any offset, so an interrupted download can be resumed.
+
+        Args:
+            filename (str): The name of the file to read from.
+            offset (int): The starting position (in bytes) to read from.
+            length (int): The number of bytes to read.
+            timeout_s (float, optional): Timeout in seconds for the operation. Defaults to 5.
+
+        Returns:
+            bytes or None: The bytes read (shorter than `length` at the end of the file),
+                           or None on failure.
+        """
+        with self._usb_lock:
+            try:
+                body = struct.pack(">II", offset, length) + filename.encode("ascii", errors="ignore")
+                seq_id = self._send_command(CMD_TRANSFER_FILE_PARTIAL, body, timeout_ms=int(timeout_s * 1000))
+                response = self._receive_response(seq_id, int(timeout_s * 1000))
+                if response and response["id"] == CMD_TRANSFER_FILE_PARTIAL:
+                    return bytes(response["body"])
+                logger.error(
+                    "Jensen",
+                    "read_file_partial",
+                    f"Failed to read {length} bytes at {offset} of '{filename}'. Response: {response}",
+                )
+            except (usb.core.USBError, ConnectionError) as e:
+                logger.error(
+                    "Jensen",
+                    "read_file_partial",
+                    f"USB/Connection error reading '{filename}' at {offset}: {e}",
+                )
+            return None
@@ -12,17 +12,224 @@ IMPORTANT: Audio format varies by device model:
 
 This converter attempts multiple detection strategies to handle different formats.
 
+Converted files are kept in a persistent cache keyed by the source content and
+the output settings, so playback, waveform display and transcription decode
+each recording at most once per format (see HTAConverter.get_or_convert).
+
 Requirements: 4.3
 """
 
+import hashlib
 import os
+import sqlite3
 
 # import struct  # Future: for binary data parsing if needed
 import tempfile
+import threading
+import time
 import wave
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from config_and_logger import load_config, logger
+from perf_trace import traced
+
+DEFAULT_CONVERSION_CACHE_MB = 2048
+DEFAULT_MP3_BITRATE = "128k"
+HASH_CHUNK_SIZE = 1024 * 1024
+STALE_PART_FILE_AGE_S = 3600
+
 
-from config_and_logger import logger
+class ConversionCache:
+    """
+    Size-bounded LRU store of converted recordings.
+
+    Entries are keyed by a hash of the source file's content plus the output
+    format, sample rate and bitrate, so a renamed or re-downloaded recording
+    still hits while a modified one does not. Conversions are written under a
+    temporary name and renamed into place, so readers never see a partial file.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = DEFAULT_CONVERSION_CACHE_MB * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "conversions.db"
+        self.max_size_bytes = max_size_bytes
+
+        self._lock = threading.Lock()
+        # (path, size, mtime_ns) -> content hash, so unchanged files are hashed once per session
+        self._file_hash_memo: Dict[Tuple[str, int, int], str] = {}
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._init_database()
+        self._remove_stale_part_files()
+
+    def _init_database(self):
+        """Initialize the SQLite index of cached conversions."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS conversions (
+                    cache_key TEXT PRIMARY KEY,
+                    content_hash TEXT,
+                    file_name TEXT,
+                    size INTEGER,
+                    created_at REAL,
+                    last_accessed REAL
+                )
+            """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_conversions_hash ON conversions (content_hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_conversions_access ON conversions (last_accessed)")
+            conn.commit()
+
+    def _remove_stale_part_files(self):
+        """Delete temporary files left behind by conversions that were interrupted."""
+        cutoff = time.time() - STALE_PART_FILE_AGE_S
+        for part_file in self.cache_dir.glob("*.part"):
+            try:
+                if part_file.stat().st_mtime < cutoff:
+                    part_file.unlink()
+            except OSError:
+                pass
+
+    def hash_file(self, file_path: str) -> Optional[str]:
+        """Return a hex digest of a file's content, or None if it cannot be read."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+
+        memo_key = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            cached = self._file_hash_memo.get(memo_key)
+        if cached:
+            return cached
+
+        digest = hashlib.blake2b(digest_size=20)
+        try:
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        except OSError as e:
+            logger.warning("ConversionCache", "hash_file", f"Could not hash {file_path}: {e}")
+            return None
+
+        content_hash = digest.hexdigest()
+        with self._lock:
+            self._file_hash_memo[memo_key] = content_hash
+        return content_hash
+
+    @staticmethod
+    def make_key(
+        content_hash: str, format_type: str, sample_rate: Optional[int] = None, bitrate: Optional[str] = None
+    ) -> str:
+        """Build the cache key for a conversion. A rate of None means the converter's default for the source."""
+        return "|".join([content_hash, format_type, str(sample_rate or "auto"), bitrate or ""])
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """Return the path of the cached conversion for `cache_key`, or None on a miss."""
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT file_name FROM conversions WHERE cache_key = ?", (cache_key,)).fetchone()
+            if row is not None:
+                path = self.cache_dir / row[0]
+                if path.exists():
+                    conn.execute(
+                        "UPDATE conversions SET last_accessed = ? WHERE cache_key = ?", (time.time(), cache_key)
+                    )
+                    conn.commit()
+                    self.stats["hits"] += 1
+                    return str(path)
+                # The file was removed behind our back; forget the entry
+                conn.execute("DELETE FROM conversions WHERE cache_key = ?", (cache_key,))
+                conn.commit()
+            self.stats["misses"] += 1
+        return None
+
+    def new_part_path(self, extension: str) -> str:
+        """Create an empty temporary file in the cache directory for a conversion to write into."""
+        fd, part_path = tempfile.mkstemp(suffix=f".{extension}.part", dir=self.cache_dir)
+        os.close(fd)
+        return part_path
+
+    def store(self, cache_key: str, content_hash: str, part_path: str, extension: str) -> str:
+        """Atomically move a finished conversion into the cache and return its final path."""
+        file_name = f"{hashlib.blake2b(cache_key.encode('utf-8'), digest_size=16).hexdigest()}.{extension}"
+        final_path = self.cache_dir / file_name
+        os.replace(part_path, final_path)
+        size = final_path.stat().st_size
+
+        now = time.time()
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO conversions
+                (cache_key, content_hash, file_name, size, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                (cache_key, content_hash, file_name, size, now, now),
+            )
+            self._evict_locked(conn, keep_key=cache_key)
+            conn.commit()
+            self.stats["stores"] += 1
+        return str(final_path)
+
+    def _evict_locked(self, conn: sqlite3.Connection, keep_key: Optional[str] = None):
+        """Delete least-recently-used conversions until the cache fits its size budget."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM conversions").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+        rows = conn.execute("SELECT cache_key, file_name, size FROM conversions ORDER BY last_accessed ASC").fetchall()
+        for cache_key, file_name, size in rows:
+            if total <= self.max_size_bytes:
+                break
+            if cache_key == keep_key:
+                continue
+            try:
+                os.remove(self.cache_dir / file_name)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # Still open elsewhere (Windows); try again on the next store
+                logger.debug("ConversionCache", "_evict_locked", f"Could not evict {file_name}: {e}")
+                continue
+            conn.execute("DELETE FROM conversions WHERE cache_key = ?", (cache_key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    def invalidate(self, content_hash: Optional[str] = None) -> int:
+        """Remove the conversions of one source (everything if None). Returns the number removed."""
+        where, params = (" WHERE content_hash = ?", (content_hash,)) if content_hash else ("", ())
+        removed = 0
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            for cache_key, file_name in conn.execute(f"SELECT cache_key, file_name FROM conversions{where}", params):
+                try:
+                    os.remove(self.cache_dir / file_name)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning("ConversionCache", "invalidate", f"Could not remove {file_name}: {e}")
+                    continue
+                conn.execute("DELETE FROM conversions WHERE cache_key = ?", (cache_key,))
+                removed += 1
+            conn.commit()
+        return removed
+
+    def invalidate_file(self, file_path: str) -> int:
+        """Remove all cached conversions of the current content of a recording."""
+        content_hash = self.hash_file(file_path)
+        return self.invalidate(content_hash) if content_hash else 0
+
+    def clear(self) -> int:
+        """Remove every cached conversion."""
+        return self.invalidate()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache size."""
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM conversions").fetchone()
+            stats = dict(self.stats)
+        stats.update({"entries": entries, "size_bytes": total, "max_size_bytes": self.max_size_bytes})
+        return stats
 
 
 class HTAConverter:
@@ -32,16 +239,91 @@ class HTAConverter:
     Handles MPEG Audio Layer 1/2 format files from HiDock devices.
     """
 
-    def __init__(self):
+    def __init__(
+        self, cache_dir: Optional[str] = None, cache_max_size_bytes: int = DEFAULT_CONVERSION_CACHE_MB * 1024 * 1024
+    ):
         self.temp_dir = tempfile.gettempdir()
+        self.cache: Optional[ConversionCache] = None
+        if cache_dir:
+            try:
+                self.cache = ConversionCache(cache_dir, cache_max_size_bytes)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("HTAConverter", "__init__", f"Conversion cache unavailable: {e}")
+        # One lock per cache key, so concurrent requests for the same conversion run it only once
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._key_locks_guard = threading.Lock()
+
+    def get_or_convert(
+        self,
+        hta_file_path: str,
+        format_type: str = "wav",
+        sample_rate: Optional[int] = None,
+        bitrate: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Return a converted copy of a recording, converting only on a cache miss.
+
+        The returned file is owned by the cache and must not be deleted by the
+        caller. Without a cache (or if the source cannot be read) the recording
+        is converted into the temp directory instead.
+
+        Args:
+            hta_file_path: Path to the input .hda/.hta file
+            format_type: Target format ("wav" or "mp3")
+            sample_rate: Output sample rate, or None for the transcription-compatible default
+            bitrate: MP3 bitrate such as "128k" (ignored for WAV)
+
+        Returns:
+            Path to the converted file, or None if conversion failed
+        """
+        if format_type not in ("wav", "mp3"):
+            logger.error("HTAConverter", "get_or_convert", f"Unsupported format: {format_type}")
+            return None
+        bitrate = (bitrate or DEFAULT_MP3_BITRATE) if format_type == "mp3" else None
+
+        content_hash = self.cache.hash_file(hta_file_path) if self.cache else None
+        if content_hash is None:
+            output_path = self._default_output_path(hta_file_path, format_type)
+            return self._convert_hta(hta_file_path, output_path, format_type, sample_rate, bitrate)
+
+        cache_key = ConversionCache.make_key(content_hash, format_type, sample_rate, bitrate)
+        with self._key_lock(cache_key):
+            cached = self.cache.get(cache_key)
+            if cached:
+                logger.debug("HTAConverter", "get_or_convert", f"Using cached conversion of {hta_file_path}")
+                return cached
+
+            part_path = self.cache.new_part_path(format_type)
+            try:
+                if self._convert_hta(hta_file_path, part_path, format_type, sample_rate, bitrate) is None:
+                    return None
+                return self.cache.store(cache_key, content_hash, part_path, format_type)
+            except OSError as e:
+                logger.error("HTAConverter", "get_or_convert", f"Could not cache conversion: {e}")
+                return None
+            finally:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+
+    def _key_lock(self, cache_key: str) -> threading.Lock:
+        with self._key_locks_guard:
+            return self._key_locks.setdefault(cache_key, threading.Lock())
+
+    def _default_output_path(self, hta_file_path: str, format_type: str) -> str:
+        base_name = os.path.splitext(os.path.basename(hta_file_path))[0]
+        extension = "wav" if format_type == "wav" else "mp3"
+        return os.path.join(self.temp_dir, f"{base_name}_converted.{extension}")
 
     def convert_hta_to_wav(self, hta_file_path: str, output_path: Optional[str] = None) -> Optional[str]:
         """
         Convert HiDock audio file (.hda/.hta) to WAV format.
 
         For transcription use, consider using convert_hta_for_transcription()
-        which ensures better compatibility with AI services.
+        which ensures better compatibility with AI services. Without an
+        output path the result comes from the conversion cache if one is set up.
         """
+        if output_path is None and self.cache:
+            return self.get_or_convert(hta_file_path, "wav")
         return self._convert_hta(hta_file_path, output_path, "wav")
 
     def convert_hta_for_transcription(self, hta_file_path: str, output_path: Optional[str] = None) -> Optional[str]:
@@ -51,14 +333,22 @@ class HTAConverter:
         This method ensures the output is compatible with OpenAI Whisper and other transcription APIs.
         Uses MP3 format which is more widely supported and has better compression.
         """
+        if output_path is None and self.cache:
+            return self.get_or_convert(hta_file_path, "mp3")
         if output_path is None:
             base_name = os.path.splitext(os.path.basename(hta_file_path))[0]
             output_path = os.path.join(self.temp_dir, f"{base_name}_transcription.mp3")
 
         return self._convert_hta(hta_file_path, output_path, "mp3")
 
+    @traced("audio.convert_hta", "audio")
     def _convert_hta(
-        self, hta_file_path: str, output_path: Optional[str] = None, format_type: str = "wav"
+        self,
+        hta_file_path: str,
+        output_path: Optional[str] = None,
+        format_type: str = "wav",
+        target_rate: Optional[int] = None,
+        bitrate: Optional[str] = None,
     ) -> Optional[str]:
         """
         Convert HiDock audio file (.hda/.hta) to specified format.
@@ -69,6 +359,8 @@ class HTAConverter:
             hta_file_path: Path to the input .hda/.hta file
             output_path: Optional output path for the converted file
             format_type: Target format ("wav" or "mp3")
+            target_rate: Output sample rate, or None for the transcription-compatible default
+            bitrate: MP3 bitrate (defaults to 128k)
 
         Returns:
             Path to the converted file, or None if conversion failed
@@ -92,9 +384,7 @@ class HTAConverter:
 
             # Generate output path if not provided
             if output_path is None:
-                base_name = os.path.splitext(os.path.basename(hta_file_path))[0]
-                extension = "wav" if format_type == "wav" else "mp3"
-                output_path = os.path.join(self.temp_dir, f"{base_name}_converted.{extension}")
+                output_path = self._default_output_path(hta_file_path, format_type)
 
             logger.info(
                 "HTAConverter",
@@ -104,7 +394,7 @@ class HTAConverter:
 
             # For MP3 output, use direct pydub conversion for better compatibility
             if format_type == "mp3":
-                return self._convert_to_mp3_direct(hta_file_path, output_path)
+                return self._convert_to_mp3_direct(hta_file_path, output_path, target_rate, bitrate)
 
             # For WAV, use the existing pipeline
             audio_data, sample_rate, channels = self._parse_hta_file(hta_file_path)
@@ -114,7 +404,8 @@ class HTAConverter:
 
             # Create output file
             if format_type == "wav":
-                self._create_wav_file(output_path, audio_data, sample_rate, channels)
+                wav_options = {"target_rate": target_rate} if target_rate else {}
+                self._create_wav_file(output_path, audio_data, sample_rate, channels, **wav_options)
             else:
                 logger.error("HTAConverter", "_convert_hta", f"Unsupported format: {format_type}")
                 return None
@@ -363,7 +654,9 @@ class HTAConverter:
             )
             return None, 0, 0
 
-    def _convert_to_mp3_direct(self, hta_file_path: str, output_path: str) -> Optional[str]:
+    def _convert_to_mp3_direct(
+        self, hta_file_path: str, output_path: str, target_rate: Optional[int] = None, bitrate: Optional[str] = None
+    ) -> Optional[str]:
         """
         Convert HTA file directly to MP3 using pydub for optimal transcription compatibility.
 
@@ -411,7 +704,8 @@ class HTAConverter:
             audio_segment = audio_segment.set_sample_width(2)  # 16-bit
 
             # Use optimal sample rate for speech transcription
-            target_rate = self._get_compatible_sample_rate(audio_segment.frame_rate)
+            target_rate = target_rate or self._get_compatible_sample_rate(audio_segment.frame_rate)
+            bitrate = bitrate or DEFAULT_MP3_BITRATE
             if audio_segment.frame_rate != target_rate:
                 logger.info(
                     "HTAConverter",
@@ -424,14 +718,14 @@ class HTAConverter:
             audio_segment.export(
                 output_path,
                 format="mp3",
-                bitrate="128k",  # Good quality for transcription
+                bitrate=bitrate,  # 128k default: good quality for transcription
                 parameters=["-ar", str(target_rate), "-ac", str(audio_segment.channels)],
             )
 
             logger.info(
                 "HTAConverter",
                 "_convert_to_mp3_direct",
-                f"MP3 conversion successful: {target_rate}Hz, {audio_segment.channels}ch, 128kbps",
+                f"MP3 conversion successful: {target_rate}Hz, {audio_segment.channels}ch, {bitrate}bps",
             )
 
             return output_path
@@ -445,12 +739,14 @@ class HTAConverter:
             logger.error("HTAConverter", "_convert_to_mp3_direct", f"Direct MP3 conversion failed: {e}")
             return None
 
-    def _create_wav_file(self, output_path: str, audio_data: bytes, sample_rate: int, channels: int):
+    def _create_wav_file(
+        self, output_path: str, audio_data: bytes, sample_rate: int, channels: int, target_rate: Optional[int] = None
+    ):
         """Create WAV file from audio data with transcription service compatibility."""
         try:
             # Ensure sample rate is compatible with transcription services
             # OpenAI Whisper works best with common sample rates
-            target_sample_rate = self._get_compatible_sample_rate(sample_rate)
+            target_sample_rate = target_rate or self._get_compatible_sample_rate(sample_rate)
 
             if target_sample_rate != sample_rate:
                 logger.info(
@@ -606,13 +902,37 @@ _hta_converter = None
 
 
 def get_hta_converter() -> HTAConverter:
-    """Get global HTA converter instance."""
+    """Get global HTA converter instance, backed by the conversion cache under ~/.hidock."""
     global _hta_converter
     if _hta_converter is None:
-        _hta_converter = HTAConverter()
+        max_size_mb = load_config().get("conversion_cache_max_size_mb", DEFAULT_CONVERSION_CACHE_MB)
+        _hta_converter = HTAConverter(
+            cache_dir=os.path.join(os.path.expanduser("~"), ".hidock", "conversion_cache"),
+            cache_max_size_bytes=max_size_mb * 1024 * 1024,
+        )
     return _hta_converter
 
 
+def get_or_convert(
+    hta_file_path: str, format_type: str = "wav", sample_rate: Optional[int] = None, bitrate: Optional[str] = None
+) -> Optional[str]:
+    """
+    Convenience function to get a cached conversion of a HiDock recording.
+
+    The returned file belongs to the conversion cache and must not be deleted.
+
+    Args:
+        hta_file_path: Path to the input .hta/.hda file
+        format_type: Target format ("wav" or "mp3")
+        sample_rate: Output sample rate, or None for the default
+        bitrate: MP3 bitrate such as "128k"
+
+    Returns:
+        Path to the converted file, or None if conversion failed
+    """
+    return get_hta_converter().get_or_convert(hta_file_path, format_type, sample_rate, bitrate)
+
+
 def convert_hta_to_wav(hta_file_path: str, output_path: Optional[str] = None) -> Optional[str]:
     """
     Convenience function to convert HTA file to WAV.
@@ -0,0 +1,387 @@
+"""
+Software HiDock Jensen Device Simulator for HiDock Desktop Application.
+
+`SimulatedJensenDevice` stands in for the PyUSB device object used by
+`HiDockJensen`: it exposes bulk IN/OUT endpoints, parses the Jensen packets
+written to the OUT endpoint and queues framed responses for the IN endpoint.
+Device info, file count, file list, file transfer, block and partial reads,
+delete and card info are implemented against a deterministic set of synthetic recordings.
+
+Link bandwidth, response latency, packet sizes and faults (stalls, protocol
+desync, dropped file list terminators) are configurable through
+`SimulatorConfig`, and every random choice is drawn from a seeded generator, so
+transfer throughput and parser behaviour can be benchmarked and tested on any
+machine without hardware.
+
+Usage:
+    device = SimulatedJensenDevice(SimulatorConfig(file_count=2000, bandwidth_bps=4_000_000))
+    jensen = HiDockJensen(usb_backend_instance_ref=object())
+    device.attach(jensen)
+    jensen.list_files()
+"""
+
+import array
+import random
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import usb.core
+
+from constants import (
+    CMD_DELETE_FILE,
+    CMD_GET_CARD_INFO,
+    CMD_GET_DEVICE_INFO,
+    CMD_GET_FILE_BLOCK,
+    CMD_GET_FILE_COUNT,
+    CMD_GET_FILE_LIST,
+    CMD_TRANSFER_FILE,
+    CMD_TRANSFER_FILE_PARTIAL,
+    DEFAULT_PRODUCT_ID,
+    DEFAULT_VENDOR_ID,
+    EP_IN_ADDR,
+    EP_OUT_ADDR,
+)
+
+SYNC_MARKER = b"\x12\x34"
+HEADER_SIZE = 12
+LIBUSB_ERROR_TIMEOUT = 110
+_CONTENT_PATTERN_SIZE = 64 * 1024
+
+
+@dataclass
+class SimulatorConfig:
+    """Behaviour of a simulated device. Sizes are in bytes, times in seconds."""
+
+    seed: int = 0
+    file_count: int = 100
+    min_file_size: int = 16 * 1024
+    max_file_size: int = 2 * 1024 * 1024
+    capacity_mb: int = 32 * 1024
+    version_number: int = 0x00060209
+    serial_number: str = "SIMJENSEN0000001"
+
+    # Link model
+    bandwidth_bps: Optional[float] = None  # None = unlimited
+    latency_s: float = 0.0  # delay before the first byte of each response
+    max_packet_size: int = 512  # wMaxPacketSize of both endpoints
+    file_list_chunk_size: int = 4096  # body size of each CMD_GET_FILE_LIST packet
+    transfer_chunk_size: int = 16 * 1024  # body size of each CMD_TRANSFER_FILE packet
+    partial_reads: bool = True  # False models firmware that acknowledges CMD_TRANSFER_FILE_PARTIAL without data
+
+    # Fault injection
+    stall_probability: float = 0.0  # chance a response packet is held back by `stall_s`
+    stall_s: float = 0.5
+    desync_probability: float = 0.0  # chance garbage bytes precede a response packet
+    drop_terminators: bool = False  # omit the empty packet that ends a file list
+
+
+@dataclass
+class SimulatedRecording:
+    """A synthetic recording whose content is generated on demand."""
+
+    name: str
+    length: int
+    version: int
+    signature: bytes
+    content_seed: int
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Return `length` bytes of content starting at `offset` (shorter at end of file)."""
+        end = min(self.length, offset + max(0, length))
+        if offset >= end:
+            return b""
+        pattern = _content_pattern(self.content_seed)
+        start = offset % len(pattern)
+        repeats = (start + end - offset) // len(pattern) + 1
+        return (pattern * repeats)[start : start + end - offset]
+
+
+_pattern_cache: Dict[int, bytes] = {}
+
+
+def _content_pattern(seed: int) -> bytes:
+    pattern = _pattern_cache.get(seed)
+    if pattern is None:
+        pattern = random.Random(seed).randbytes(_CONTENT_PATTERN_SIZE)
+        if len(_pattern_cache) > 256:
+            _pattern_cache.clear()
+        _pattern_cache[seed] = pattern
+    return pattern
+
+
+def generate_recordings(config: SimulatorConfig) -> List[SimulatedRecording]:
+    """Build `config.file_count` recordings with device-style names, deterministic for `config.seed`."""
+    rng = random.Random(config.seed)
+    recordings = []
+    timestamp = datetime(2025, 1, 1, 9, 0, 0)
+    for index in range(config.file_count):
+        timestamp += timedelta(minutes=rng.randint(5, 600), seconds=rng.randint(0, 59))
+        name = f"{timestamp.strftime('%Y%b%d-%H%M%S')}-Rec{index + 1:02d}.hda"
+        recordings.append(
+            SimulatedRecording(
+                name=name,
+                length=rng.randint(config.min_file_size, config.max_file_size),
+                version=1,
+                signature=rng.randbytes(16),
+                content_seed=rng.getrandbits(32),
+            )
+        )
+    return recordings
+
+
+def encode_file_list(recordings: List[SimulatedRecording]) -> bytes:
+    """Encode recordings as a CMD_GET_FILE_LIST payload (count header followed by entries)."""
+    data = bytearray(b"\xff\xff")
+    data += struct.pack(">I", len(recordings))
+    for recording in recordings:
+        name = recording.name.encode("ascii")
+        data.append(recording.version)
+        data += struct.pack(">I", len(name))[1:]
+        data += name
+        data += struct.pack(">I", recording.length)
+        data += b"\x00" * 6
+        data += recording.signature
+    return bytes(data)
+
+
+def build_packet(command_id: int, sequence_id: int, body: bytes = b"") -> bytes:
+    """Frame a device-to-host Jensen packet."""
+    return SYNC_MARKER + struct.pack(">HII", command_id, sequence_id, len(body)) + body
+
+
+class SimulatedEndpoint:
+    """Bulk endpoint with the attributes and read/write methods `HiDockJensen` uses."""
+
+    def __init__(self, device: "SimulatedJensenDevice", address: int, max_packet_size: int):
+        self.device = device
+        self.bEndpointAddress = address
+        self.wMaxPacketSize = max_packet_size
+        self.bmAttributes = 0x02  # bulk
+
+    def read(self, size_or_buffer, timeout=None):
+        return self.device.read(self.bEndpointAddress, size_or_buffer, timeout)
+
+    def write(self, data, timeout=None):
+        return self.device.write(self.bEndpointAddress, data, timeout)
+
+
+class _SimulatedInterface(list):
+    bInterfaceNumber = 0
+    bAlternateSetting = 0
+
+
+class _SimulatedContext:
+    """The part of PyUSB's device context reached through `usb.util` helpers."""
+
+    def managed_claim_interface(self, device, intf):
+        pass
+
+    def managed_release_interface(self, device, intf):
+        pass
+
+    def dispose(self, device, close_handle=True):
+        pass
+
+
+class SimulatedJensenDevice:
+    """PyUSB-compatible software model of a HiDock device speaking the Jensen protocol."""
+
+    def __init__(self, config: Optional[SimulatorConfig] = None, recordings: Optional[List[SimulatedRecording]] = None):
+        self.config = config or SimulatorConfig()
+        self.recordings = recordings if recordings is not None else generate_recordings(self.config)
+        self.idVendor = DEFAULT_VENDOR_ID
+        self.idProduct = DEFAULT_PRODUCT_ID
+        self.product = "HiDock Simulator"
+        self.manufacturer = "HiDock"
+        self.ep_out = SimulatedEndpoint(self, EP_OUT_ADDR, self.config.max_packet_size)
+        self.ep_in = SimulatedEndpoint(self, EP_IN_ADDR, self.config.max_packet_size)
+        self._interface = _SimulatedInterface([self.ep_out, self.ep_in])
+        self._ctx = _SimulatedContext()
+
+        self._rng = random.Random(self.config.seed ^ 0x5EED)
+        self._condition = threading.Condition()
+        self._host_buffer = bytearray()
+        self._pending = deque()  # [bytearray, available_at]
+        self._link_free_at = 0.0
+        self.stats = {
+            "commands": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "stalls": 0,
+            "desyncs": 0,
+            "dropped_terminators": 0,
+        }
+
+    # --- PyUSB device surface -------------------------------------------------
+
+    def is_kernel_driver_active(self, interface):
+        return False
+
+    def detach_kernel_driver(self, interface):
+        pass
+
+    def attach_kernel_driver(self, interface):
+        pass
+
+    def set_configuration(self, configuration=None):
+        pass
+
+    def get_active_configuration(self):
+        return [self._interface]
+
+    def clear_halt(self, ep):
+        pass
+
+    def reset(self):
+        with self._condition:
+            self._pending.clear()
+            self._host_buffer.clear()
+
+    def attach(self, jensen):
+        """Wire this device into `jensen` as if `connect()` had succeeded."""
+        jensen.device = self
+        jensen.ep_out = self.ep_out
+        jensen.ep_in = self.ep_in
+        jensen.is_connected_flag = True
+        jensen.sequence_id = 0
+        jensen.receive_buffer.clear()
+        jensen.model = f"HiDock Device (PID: {hex(self.idProduct)})"
+        return jensen
+
+    def write(self, endpoint, data, timeout=None):
+        """Accept host bytes on the OUT endpoint and queue responses to complete packets."""
+        data = bytes(data)
+        with self._condition:
+            self.stats["bytes_in"] += len(data)
+            self._host_buffer += data
+            while True:
+                packet = self._take_host_packet()
+                if packet is None:
+                    break
+                self._handle_command(*packet)
+            self._condition.notify_all()
+        return len(data)
+
+    def read(self, endpoint, size_or_buffer, timeout=None):
+        """Return the next bytes of the current response packet, honouring latency and bandwidth."""
+        size = size_or_buffer if isinstance(size_or_buffer, int) else len(size_or_buffer)
+        timeout_s = (timeout if timeout else 1000) / 1000.0
+        deadline = time.monotonic() + timeout_s
+
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if self._pending:
+                    ready_at = max(self._pending[0][1], self._link_free_at)
+                    if ready_at <= now:
+                        return self._pop_ready(size, now)
+                    wake_at = min(ready_at, deadline)
+                else:
+                    wake_at = deadline
+                if now >= deadline:
+                    raise usb.core.USBTimeoutError("Operation timed out", errno=LIBUSB_ERROR_TIMEOUT)
+                self._condition.wait(wake_at - now)
+
+    # --- Internals --------------------------------------------------------------
+
+    def _pop_ready(self, size, now):
+        frame = self._pending[0]
+        data = frame[0]
+        chunk = bytes(data[:size])
+        del data[:size]
+        if not data:
+            self._pending.popleft()
+        if self.config.bandwidth_bps:
+            self._link_free_at = max(now, self._link_free_at) + len(chunk) / self.config.bandwidth_bps
+        self.stats["bytes_out"] += len(chunk)
+        return array.array("B", chunk)
+
+    def _take_host_packet(self):
+        buf = self._host_buffer
+        sync = buf.find(SYNC_MARKER)
+        if sync == -1:
+            del buf[: max(0, len(buf) - 1)]
+            return None
+        del buf[:sync]
+        if len(buf) < HEADER_SIZE:
+            return None
+        command_id, sequence_id, body_len = struct.unpack_from(">HII", buf, 2)
+        body_len &= 0x00FFFFFF
+        if len(buf) < HEADER_SIZE + body_len:
+            return None
+        body = bytes(buf[HEADER_SIZE : HEADER_SIZE + body_len])
+        del buf[: HEADER_SIZE + body_len]
+        return command_id, sequence_id, body
+
+    def _respond(self, command_id, sequence_id, body=b""):
+        packet = bytearray(build_packet(command_id, sequence_id, body))
+        config = self.config
+        available_at = time.monotonic() + config.latency_s
+        if config.desync_probability and self._rng.random() < config.desync_probability:
+            packet[:0] = self._rng.randbytes(self._rng.randint(1, 16)).replace(SYNC_MARKER, b"\x00\x00")
+            self.stats["desyncs"] += 1
+        if config.stall_probability and self._rng.random() < config.stall_probability:
+            available_at += config.stall_s
+            self.stats["stalls"] += 1
+        self._pending.append([packet, available_at])
+
+    def _find_recording(self, name: str) -> Optional[SimulatedRecording]:
+        for recording in self.recordings:
+            if recording.name == name:
+                return recording
+        return None
+
+    def _handle_command(self, command_id, sequence_id, body):
+        self.stats["commands"] += 1
+        config = self.config
+
+        if command_id == CMD_GET_DEVICE_INFO:
+            serial = config.serial_number.encode("ascii")[:16].ljust(16, b"\x00")
+            self._respond(command_id, sequence_id, struct.pack(">I", config.version_number) + serial)
+
+        elif command_id == CMD_GET_FILE_COUNT:
+            self._respond(command_id, sequence_id, struct.pack(">I", len(self.recordings)))
+
+        elif command_id == CMD_GET_FILE_LIST:
+            payload = encode_file_list(self.recordings)
+            step = max(1, config.file_list_chunk_size)
+            for start in range(0, len(payload), step):
+                self._respond(command_id, sequence_id, payload[start : start + step])
+            if config.drop_terminators:
+                self.stats["dropped_terminators"] += 1
+            else:
+                self._respond(command_id, sequence_id)
+
+        elif command_id == CMD_TRANSFER_FILE:
+            recording = self._find_recording(body.decode("ascii", errors="ignore"))
+            if recording is None:
+                self._respond(command_id, sequence_id)
+                return
+            step = max(1, config.transfer_chunk_size)
+            for offset in range(0, recording.length, step):
+                self._respond(command_id, sequence_id, recording.read(offset, step))
+
+        elif command_id == CMD_GET_FILE_BLOCK or (command_id == CMD_TRANSFER_FILE_PARTIAL and config.partial_reads):
+            # Both reply with the raw bytes of the requested range in a single packet
+            offset, length = struct.unpack_from(">II", body)
+            recording = self._find_recording(body[8:].decode("ascii", errors="ignore"))
+            self._respond(command_id, sequence_id, recording.read(offset, length) if recording else b"")
+
+        elif command_id == CMD_DELETE_FILE:
+            recording = self._find_recording(body.decode("ascii", errors="ignore"))
+            if recording is not None:
+                self.recordings.remove(recording)
+            self._respond(command_id, sequence_id, bytes([0 if recording is not None else 1]))
+
+        elif command_id == CMD_GET_CARD_INFO:
+            used_mb = sum(r.length for r in self.recordings) // (1024 * 1024)
+            self._respond(command_id, sequence_id, struct.pack(">III", used_mb, config.capacity_mb, 0))
+
+        else:
+            # Unmodelled commands are acknowledged with an empty body
+            self._respond(command_id, sequence_id)
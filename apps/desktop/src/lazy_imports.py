@@ -0,0 +1,192 @@
+"""
+Lazy Imports and Startup Profiling for HiDock Desktop Application.
+
+Visualisation (matplotlib/scipy), the AI provider SDKs and the audio player
+(pygame/pydub) account for most of the time spent importing `gui_main_window`.
+`LazyImport` stands in for a module or one of its attributes and imports it on
+first use, and `LazyObject` defers constructing an object until it is first
+touched, so these subsystems are loaded when the user needs them instead of
+before the first window appears.
+
+`ImportTimer` records per-module import times for `main.py --profile-startup`.
+"""
+
+import importlib
+import sys
+import time
+from importlib.abc import MetaPathFinder
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class LazyImport:
+    """Proxy for a module, or an attribute of a module, that is imported on first use."""
+
+    def __init__(self, module_name: str, attribute: Optional[str] = None):
+        object.__setattr__(self, "_module_name", module_name)
+        object.__setattr__(self, "_attribute", attribute)
+        object.__setattr__(self, "_target", None)
+
+    def load(self) -> Any:
+        """Import now (if not done yet) and return the module or attribute."""
+        return self._resolve()
+
+    def _resolve(self) -> Any:
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            target = importlib.import_module(object.__getattribute__(self, "_module_name"))
+            attribute = object.__getattribute__(self, "_attribute")
+            if attribute is not None:
+                target = getattr(target, attribute)
+            object.__setattr__(self, "_target", target)
+        return target
+
+    @property
+    def is_loaded(self) -> bool:
+        return object.__getattribute__(self, "_target") is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self._resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        name = object.__getattribute__(self, "_module_name")
+        attribute = object.__getattribute__(self, "_attribute")
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<LazyImport {name}{'.' + attribute if attribute else ''} ({state})>"
+
+
+class LazyObject:
+    """
+    Proxy that builds its target with `factory()` on first attribute access or call.
+
+    Attributes assigned before the target exists (typically callbacks) are kept
+    and applied to it once it is built. The proxy is always truthy, so
+    `if self.audio_player:` checks do not force construction.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_target", None)
+        object.__setattr__(self, "_pending", {})
+
+    def _resolve(self) -> Any:
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            target = object.__getattribute__(self, "_factory")()
+            for name, value in object.__getattribute__(self, "_pending").items():
+                setattr(target, name, value)
+            object.__getattribute__(self, "_pending").clear()
+            object.__setattr__(self, "_target", target)
+        return target
+
+    @property
+    def is_loaded(self) -> bool:
+        return object.__getattribute__(self, "_target") is not None
+
+    def __getattr__(self, name: str) -> Any:
+        pending = object.__getattribute__(self, "_pending")
+        if name in pending:
+            return pending[name]
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            object.__getattribute__(self, "_pending")[name] = value
+        else:
+            setattr(target, name, value)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self._resolve()(*args, **kwargs)
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __repr__(self) -> str:
+        target = object.__getattribute__(self, "_target")
+        return f"<LazyObject {target!r}>" if target is not None else "<LazyObject (not built)>"
+
+
+def is_loaded(obj: Any) -> bool:
+    """False only for a `LazyImport`/`LazyObject` whose target has not been loaded yet."""
+    if isinstance(obj, (LazyImport, LazyObject)):
+        return obj.is_loaded
+    return True
+
+
+class _TimedLoader:
+    """Wraps a module loader to time `exec_module`, tracking nesting to derive self time."""
+
+    def __init__(self, loader, timer: "ImportTimer"):
+        self._loader = loader
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        timer = self._timer
+        timer._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = timer._stack.pop()
+            if timer._stack:
+                timer._stack[-1] += elapsed
+            timer.records[module.__name__] = (elapsed, elapsed - children, len(timer._stack))
+
+
+class ImportTimer(MetaPathFinder):
+    """Meta path hook recording cumulative and self import time of every module loaded while installed."""
+
+    def __init__(self):
+        self.records: Dict[str, Tuple[float, float, int]] = {}
+        self._stack: List[float] = []
+        self._finding = set()
+
+    def install(self) -> "ImportTimer":
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname in self._finding:
+            return None
+        self._finding.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._finding.discard(fullname)
+
+    def report(self, limit: int = 25) -> str:
+        """Table of the slowest top-level imports (cumulative) and the slowest modules by self time."""
+        top_level = sorted(
+            ((name, rec) for name, rec in self.records.items() if rec[2] == 0),
+            key=lambda item: item[1][0],
+            reverse=True,
+        )
+        by_self = sorted(self.records.items(), key=lambda item: item[1][1], reverse=True)
+        lines = [f"{'top-level import':<40} {'cumulative':>12}"]
+        lines += [f"{name:<40} {rec[0] * 1000:10.1f}ms" for name, rec in top_level[:limit]]
+        lines += ["", f"{'module (self time)':<40} {'self':>12}"]
+        lines += [f"{name:<40} {rec[1] * 1000:10.1f}ms" for name, rec in by_self[:limit]]
+        return "\n".join(lines)
@@ -0,0 +1,212 @@
+"""
+Opt-in Performance Tracing for HiDock Desktop Application.
+
+Timing spans are placed around device commands, file list parsing, metadata
+database calls, calendar enrichment, treeview population and audio conversion.
+While tracing is enabled (config key `performance_tracing_enabled`, or the
+`HIDOCK_PERF_TRACE=1` environment variable) each finished span is appended to a
+fixed-size ring buffer. When disabled, `span()` returns a shared no-op context,
+so instrumented code pays only for a flag check.
+
+Collected spans can be aggregated per name (count, p50, p95, max), exported as
+JSON or in the Chrome trace event format (open in chrome://tracing or
+https://ui.perfetto.dev), and are dumped to `~/.hidock/perf/` on exit.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from config_and_logger import logger
+
+DEFAULT_CAPACITY = 20000
+PERF_DUMP_DIR = os.path.join(os.path.expanduser("~"), ".hidock", "perf")
+
+_NOOP_SPAN = nullcontext()
+
+
+class SpanRecord(NamedTuple):
+    name: str
+    category: str
+    start_ns: int
+    duration_ns: int
+    thread_id: int
+    thread_name: str
+    args: Optional[Dict[str, Any]]
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_category", "_args", "_start")
+
+    def __init__(self, tracer: "PerfTracer", name: str, category: str, args: Optional[Dict[str, Any]]):
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._args = args
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter_ns() - self._start
+        args = self._args
+        if exc_type is not None:
+            args = {**(args or {}), "error": exc_type.__name__}
+        thread = threading.current_thread()
+        self._tracer._records.append(
+            SpanRecord(self._name, self._category, self._start, duration, thread.ident or 0, thread.name, args)
+        )
+        return False
+
+
+def _percentile(sorted_values: List[int], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class PerfTracer:
+    """Collects timing spans into a ring buffer while enabled."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, enabled: bool = False):
+        self.enabled = enabled
+        self._records: deque = deque(maxlen=capacity)
+        self._origin_ns = time.perf_counter_ns()
+
+    def set_enabled(self, enabled: bool):
+        if enabled and not self.enabled:
+            logger.info("PerfTracer", "set_enabled", f"Performance tracing enabled ({self._records.maxlen} spans)")
+        self.enabled = bool(enabled)
+
+    def configure(self, config: Dict[str, Any]):
+        """Enable tracing from the app config or the HIDOCK_PERF_TRACE environment variable."""
+        self.set_enabled(
+            bool(config.get("performance_tracing_enabled", False)) or os.environ.get("HIDOCK_PERF_TRACE") == "1"
+        )
+
+    def span(self, name: str, category: str = "app", **args):
+        """Context manager timing the enclosed block. Keyword arguments are stored with the span."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, category, args or None)
+
+    def traced(self, name: Optional[str] = None, category: str = "app") -> Callable:
+        """Decorator wrapping every call of a function in a span."""
+
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, span_name, category, None):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def clear(self):
+        self._records.clear()
+
+    def records(self) -> List[SpanRecord]:
+        return list(self._records)
+
+    def aggregates(self) -> Dict[str, Dict[str, float]]:
+        """Per span name: count, total, p50, p95 and max duration in milliseconds."""
+        durations: Dict[str, List[int]] = {}
+        for record in self.records():
+            durations.setdefault(record.name, []).append(record.duration_ns)
+
+        result = {}
+        for name, values in durations.items():
+            values.sort()
+            result[name] = {
+                "count": len(values),
+                "total_ms": sum(values) / 1e6,
+                "p50_ms": _percentile(values, 0.50) / 1e6,
+                "p95_ms": _percentile(values, 0.95) / 1e6,
+                "max_ms": values[-1] / 1e6,
+            }
+        return dict(sorted(result.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+    def format_aggregates(self) -> str:
+        """Plain-text table of `aggregates()`, slowest total first."""
+        aggregates = self.aggregates()
+        if not aggregates:
+            return "No spans recorded." + ("" if self.enabled else " Performance tracing is disabled.")
+        lines = [f"{'span':<36} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'total ms':>10}"]
+        for name, stats in aggregates.items():
+            lines.append(
+                f"{name[:36]:<36} {stats['count']:>7} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                f"{stats['max_ms']:>9.2f} {stats['total_ms']:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Spans as Chrome trace 'complete' events (timestamps in microseconds)."""
+        pid = os.getpid()
+        events = []
+        thread_names = {}
+        for record in self.records():
+            thread_names[record.thread_id] = record.thread_name
+            event = {
+                "name": record.name,
+                "cat": record.category,
+                "ph": "X",
+                "ts": (record.start_ns - self._origin_ns) / 1000,
+                "dur": record.duration_ns / 1000,
+                "pid": pid,
+                "tid": record.thread_id,
+            }
+            if record.args:
+                event["args"] = {key: str(value) for key, value in record.args.items()}
+            events.append(event)
+        for tid, thread_name in thread_names.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+    def export_json(self, path: str) -> str:
+        """Write aggregates and raw spans as plain JSON."""
+        data = {
+            "aggregates": self.aggregates(),
+            "spans": [
+                {**record._asdict(), "start_ns": record.start_ns - self._origin_ns} for record in self.records()
+            ],
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=str)
+        return path
+
+    def dump_on_exit(self, directory: str = PERF_DUMP_DIR) -> Optional[str]:
+        """Write a Chrome trace and a JSON summary for this session, if anything was recorded."""
+        if not self._records:
+            return None
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        try:
+            self.export_json(os.path.join(directory, f"perf-{stamp}.json"))
+            path = self.export_chrome_trace(os.path.join(directory, f"perf-{stamp}.trace.json"))
+            logger.info("PerfTracer", "dump_on_exit", f"Performance trace written to {path}")
+            return path
+        except OSError as e:
+            logger.warning("PerfTracer", "dump_on_exit", f"Could not write performance trace: {e}")
+            return None
+
+
+tracer = PerfTracer()
+span = tracer.span
+traced = tracer.traced
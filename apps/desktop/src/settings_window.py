@@ -29,6 +29,7 @@ except ImportError:
     Fernet = None  # Define Fernet as None when not available
 
 from config_and_logger import Logger, logger, update_config_settings  # For type hint and logger instance
+from perf_trace import tracer
 
 
 class SettingsDialog(ctk.CTkToplevel):
@@ -722,6 +723,73 @@ class SettingsDialog(ctk.CTkToplevel):
                 state="readonly",
             ).pack(fill="x", pady=2, padx=10)
 
+        # Performance Profiling
+        ctk.CTkLabel(scroll_frame, text="Performance Profiling:", font=ctk.CTkFont(weight="bold")).pack(
+            anchor="w", pady=(20, 2), padx=5
+        )
+
+        self.perf_tracing_var = ctk.BooleanVar(value=tracer.enabled)
+        ctk.CTkCheckBox(
+            scroll_frame,
+            text="Record timing spans (device, database, calendar, file list)",
+            variable=self.perf_tracing_var,
+            command=self._on_perf_tracing_toggled,
+        ).pack(anchor="w", pady=5, padx=10)
+
+        self.perf_summary_textbox = ctk.CTkTextbox(
+            scroll_frame, height=180, font=ctk.CTkFont(family="Courier", size=11), wrap="none"
+        )
+        self.perf_summary_textbox.pack(fill="x", pady=5, padx=10)
+
+        perf_buttons = ctk.CTkFrame(scroll_frame, fg_color="transparent")
+        perf_buttons.pack(fill="x", pady=(0, 10), padx=10)
+        ctk.CTkButton(perf_buttons, text="Refresh", width=100, command=self._refresh_perf_summary).pack(
+            side="left", padx=(0, 5)
+        )
+        ctk.CTkButton(perf_buttons, text="Clear", width=100, command=self._clear_perf_spans).pack(
+            side="left", padx=(0, 5)
+        )
+        ctk.CTkButton(
+            perf_buttons, text="Export Chrome Trace...", width=160, command=self._export_perf_trace
+        ).pack(side="left")
+        self._refresh_perf_summary()
+
+    def _on_perf_tracing_toggled(self):
+        """Apply the tracing checkbox immediately and persist it."""
+        enabled = self.perf_tracing_var.get()
+        tracer.set_enabled(enabled)
+        update_config_settings({"performance_tracing_enabled": enabled})
+        self._refresh_perf_summary()
+
+    def _refresh_perf_summary(self):
+        """Show the per-span p50/p95 summary in the read-only textbox."""
+        self.perf_summary_textbox.configure(state="normal")
+        self.perf_summary_textbox.delete("1.0", "end")
+        self.perf_summary_textbox.insert("1.0", tracer.format_aggregates())
+        self.perf_summary_textbox.configure(state="disabled")
+
+    def _clear_perf_spans(self):
+        tracer.clear()
+        self._refresh_perf_summary()
+
+    def _export_perf_trace(self):
+        """Save recorded spans in Chrome trace format (chrome://tracing, ui.perfetto.dev)."""
+        path = filedialog.asksaveasfilename(
+            parent=self,
+            title="Export Performance Trace",
+            defaultextension=".json",
+            initialfile="hidock-perf.trace.json",
+            filetypes=[("Chrome trace", "*.json"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            tracer.export_chrome_trace(path)
+            messagebox.showinfo("Export Complete", f"Performance trace saved to:\n{path}", parent=self)
+        except OSError as e:
+            logger.error("SettingsDialog", "_export_perf_trace", f"Failed to export trace: {e}")
+            messagebox.showerror("Export Failed", f"Could not save trace: {e}", parent=self)
+
     def _update_volume_label(self, *args):
         """Update the volume display label."""
         if hasattr(self, "volume_label") and "volume_var" in self.local_vars:
@@ -11,16 +11,23 @@ Requirements addressed: 2.1, 2.4, 9.4, 9.5
 """
 
 # import json  # Future: for storage statistics export
-# import os  # Future: for advanced path operations
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
 import shutil
 import sqlite3
+import struct
+import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from config_and_logger import logger
 
@@ -97,16 +104,166 @@ class StorageAnalytics:
     duplicate_files: List[Tuple[str, List[str]]]
 
 
-class StorageMonitor:
-    """Real-time storage monitoring with visual indicators."""
+SIZE_BUCKETS = ("small", "medium", "large", "huge")
+AGE_BUCKETS = ("recent", "week", "month", "old")
+
+# Duplicate detection reads the first and last DUPLICATE_PARTIAL_BLOCK bytes of
+# equal-sized files, and only files whose partial hashes also match are read in full.
+DUPLICATE_PARTIAL_BLOCK = 64 * 1024
+DUPLICATE_READ_CHUNK = 1024 * 1024
+
+
+def _hash_partial(path: str, file_size: int) -> Optional[str]:
+    """Hash of the first and last blocks; for small files this is the hash of the whole file."""
+    if file_size <= 2 * DUPLICATE_PARTIAL_BLOCK:
+        return _hash_full(path)
+    digest = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, "rb") as f:
+            digest.update(f.read(DUPLICATE_PARTIAL_BLOCK))
+            f.seek(-DUPLICATE_PARTIAL_BLOCK, os.SEEK_END)
+            digest.update(f.read(DUPLICATE_PARTIAL_BLOCK))
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _hash_full(path: str) -> Optional[str]:
+    """Streaming hash of the whole file."""
+    digest = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(DUPLICATE_READ_CHUNK):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+@dataclass
+class DirectoryScan:
+    """Result of visiting one directory during an incremental storage scan.
+
+    `files` is None when the directory's mtime matched the index, meaning its
+    entries were not listed and the indexed rows are still valid.
+    """
+
+    dir_path: str
+    parent_path: Optional[str]
+    mtime_ns: int
+    files: Optional[List[Tuple[str, str, str, int, float, int]]]
+    subdirs: List[str]
+
+
+# inotify(7) event masks used by the event-driven StorageMonitor
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+INOTIFY_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class _InotifyWatcher:
+    """Minimal ctypes binding to Linux inotify, readable with select()."""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+
+    def add_watch(self, path: str) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), INOTIFY_WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.watches[wd] = path
+        return wd
+
+    def remove_tree(self, path: str):
+        """Stop watching a directory and everything below it (e.g. after it moved out of the tree)."""
+        prefix = path + os.sep
+        for wd, watched in list(self.watches.items()):
+            if watched == path or watched.startswith(prefix):
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+    def read_events(self) -> List[Tuple[str, int, str]]:
+        """Drain pending events as (directory, mask, name) tuples."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, name_length = _INOTIFY_EVENT.unpack_from(data, offset)
+                offset += _INOTIFY_EVENT.size
+                name = os.fsdecode(data[offset : offset + name_length].rstrip(b"\0"))
+                offset += name_length
+                directory = self.watches.get(wd)
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                if directory is not None or mask & IN_Q_OVERFLOW:
+                    events.append((directory, mask, name))
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _warning_level_for(usage_percentage: float) -> StorageWarningLevel:
+    if usage_percentage >= 95:
+        return StorageWarningLevel.FULL
+    if usage_percentage >= 85:
+        return StorageWarningLevel.CRITICAL
+    if usage_percentage >= 70:
+        return StorageWarningLevel.WARNING
+    return StorageWarningLevel.NORMAL
 
-    def __init__(self, paths_to_monitor: List[str], update_interval: float = 30.0):
+
+class StorageMonitor:
+    """Real-time storage monitoring with visual indicators.
+
+    By default `disk_usage` is probed for every path each `update_interval`
+    seconds. With `event_driven=True` the monitored directories are watched
+    with inotify instead: usage is adjusted from the sizes of created and
+    deleted files as they happen, `disk_usage` is re-probed `reprobe_delay`
+    seconds after a change, and otherwise only every `full_probe_interval`
+    seconds to pick up writes by other programs. Where inotify is unavailable
+    the monitor falls back to the plain `disk_usage` poll.
+    """
+
+    def __init__(
+        self,
+        paths_to_monitor: List[str],
+        update_interval: float = 30.0,
+        event_driven: bool = False,
+        reprobe_delay: float = 2.0,
+        full_probe_interval: float = 600.0,
+    ):
         self.paths_to_monitor = [Path(p) for p in paths_to_monitor]
         self.update_interval = update_interval
+        self.event_driven = event_driven
+        self.reprobe_delay = reprobe_delay
+        self.full_probe_interval = full_probe_interval
         self.storage_info: Dict[str, StorageInfo] = {}
         self.callbacks: List[callable] = []
+        self.thresholds: set = set()
         self.monitoring_thread: Optional[threading.Thread] = None
         self.stop_event = threading.Event()
+        self.watch_mode: Optional[str] = None
+        self._file_sizes: Dict[str, int] = {}
+        self._devices: Dict[str, int] = {}
+        self._wake_pipe: Optional[Tuple[int, int]] = None
 
         # Initialize monitoring
         self._update_storage_info()
@@ -121,19 +278,29 @@ class StorageMonitor:
         if callback in self.callbacks:
             self.callbacks.remove(callback)
 
+    def add_threshold(self, usage_percentage: float):
+        """Always notify callbacks when usage crosses this percentage, however small the change."""
+        self.thresholds.add(usage_percentage)
+
     def start_monitoring(self):
         """Start the monitoring thread."""
         if self.monitoring_thread and self.monitoring_thread.is_alive():
             return
 
         self.stop_event.clear()
-        self.monitoring_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
+        target = self._event_loop if self.event_driven else self._monitoring_loop
+        self.monitoring_thread = threading.Thread(target=target, daemon=True)
         self.monitoring_thread.start()
         logger.info("StorageMonitor", "start_monitoring", "Storage monitoring started")
 
     def stop_monitoring(self):
         """Stop the monitoring thread."""
         self.stop_event.set()
+        if self._wake_pipe:
+            try:
+                os.write(self._wake_pipe[1], b"x")
+            except OSError:
+                pass
         if self.monitoring_thread:
             self.monitoring_thread.join(timeout=5.0)
         logger.info("StorageMonitor", "stop_monitoring", "Storage monitoring stopped")
@@ -144,29 +311,220 @@ class StorageMonitor:
             try:
                 old_info = self.storage_info.copy()
                 self._update_storage_info()
-
-                # Check for significant changes
-                for path_str, new_info in self.storage_info.items():
-                    old_info_for_path = old_info.get(path_str)
-                    if (
-                        not old_info_for_path
-                        or abs(new_info.usage_percentage - old_info_for_path.usage_percentage) > 1.0
-                        or new_info.warning_level != old_info_for_path.warning_level
-                    ):
-                        # Notify callbacks
-                        for callback in self.callbacks:
-                            try:
-                                callback(path_str, new_info)
-                            except Exception as e:
-                                logger.error(
-                                    "StorageMonitor",
-                                    "_monitoring_loop",
-                                    f"Callback error: {e}",
-                                )
+                self._notify_changes(old_info)
 
             except Exception as e:
                 logger.error("StorageMonitor", "_monitoring_loop", f"Monitoring error: {e}")
 
+    def _notify_changes(self, old_info: Dict[str, StorageInfo]):
+        """Notify callbacks of paths whose usage changed significantly or crossed a threshold."""
+        for path_str, new_info in self.storage_info.items():
+            old_info_for_path = old_info.get(path_str)
+            if (
+                not old_info_for_path
+                or abs(new_info.usage_percentage - old_info_for_path.usage_percentage) > 1.0
+                or new_info.warning_level != old_info_for_path.warning_level
+                or self._crossed_threshold(old_info_for_path.usage_percentage, new_info.usage_percentage)
+            ):
+                # Notify callbacks
+                for callback in self.callbacks:
+                    try:
+                        callback(path_str, new_info)
+                    except Exception as e:
+                        logger.error(
+                            "StorageMonitor",
+                            "_notify_changes",
+                            f"Callback error: {e}",
+                        )
+
+    def _crossed_threshold(self, old_percentage: float, new_percentage: float) -> bool:
+        low, high = sorted((old_percentage, new_percentage))
+        return any(low < threshold <= high for threshold in self.thresholds)
+
+    def _event_loop(self):
+        """Monitoring loop driven by filesystem events; sleeps until something changes."""
+        try:
+            watcher = self._start_watcher()
+        except OSError as e:
+            logger.warning("StorageMonitor", "_event_loop", f"inotify unavailable, polling disk usage: {e}")
+            self.watch_mode = "polling"
+            self._monitoring_loop()
+            return
+        try:
+            self._wake_pipe = os.pipe()
+        except OSError as e:
+            watcher.close()
+            logger.warning("StorageMonitor", "_event_loop", f"Cannot create wake pipe, polling disk usage: {e}")
+            self.watch_mode = "polling"
+            self._monitoring_loop()
+            return
+        self._snapshot_sizes()
+        self.watch_mode = "inotify"
+
+        next_full_probe = time.monotonic() + self.full_probe_interval
+        reprobe_at: Optional[float] = None
+        try:
+            while not self.stop_event.is_set():
+                deadlines = [next_full_probe]
+                if reprobe_at is not None:
+                    deadlines.append(reprobe_at)
+                timeout = max(0.0, min(deadlines) - time.monotonic())
+                readable, _, _ = select.select([self._wake_pipe[0], watcher.fd], [], [], timeout)
+                if self.stop_event.is_set():
+                    break
+
+                try:
+                    changed = watcher.fd in readable and self._apply_events(watcher, watcher.read_events())
+                    if changed and reprobe_at is None:
+                        reprobe_at = time.monotonic() + self.reprobe_delay
+
+                    now = time.monotonic()
+                    if (reprobe_at is not None and now >= reprobe_at) or now >= next_full_probe:
+                        old_info = self.storage_info.copy()
+                        self._update_storage_info()
+                        self._notify_changes(old_info)
+                        reprobe_at = None
+                        next_full_probe = now + self.full_probe_interval
+                except Exception as e:
+                    logger.error("StorageMonitor", "_event_loop", f"Monitoring error: {e}")
+        finally:
+            watcher.close()
+            wake_pipe, self._wake_pipe = self._wake_pipe, None
+            for fd in wake_pipe:
+                os.close(fd)
+
+    def _start_watcher(self) -> "_InotifyWatcher":
+        watcher = _InotifyWatcher()
+        try:
+            for path in self.paths_to_monitor:
+                if path.is_dir():
+                    self._watch_tree(watcher, str(path))
+        except OSError:
+            watcher.close()
+            raise
+        return watcher
+
+    def _watch_tree(self, watcher: "_InotifyWatcher", directory: str):
+        watcher.add_watch(directory)
+        for root, dirs, _ in os.walk(directory):
+            for name in dirs:
+                watcher.add_watch(os.path.join(root, name))
+
+    @staticmethod
+    def _scan_sizes(directories: List[str]) -> Dict[str, int]:
+        """Sizes of all files below the given directories."""
+        sizes = {}
+        pending = list(directories)
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                sizes[entry.path] = entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return sizes
+
+    def _snapshot_sizes(self):
+        self._file_sizes = self._scan_sizes([str(path) for path in self.paths_to_monitor])
+        self._devices = {}
+        for path in self.paths_to_monitor:
+            try:
+                self._devices[str(path)] = os.stat(path).st_dev
+            except OSError:
+                continue
+
+    def _apply_events(self, watcher: "_InotifyWatcher", events: List[Tuple[str, int, str]]) -> bool:
+        """Update tracked file sizes from inotify events; returns True if anything changed."""
+        deltas: Dict[str, int] = {}
+        for directory, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: resynchronise the whole snapshot
+                old_sizes = self._file_sizes
+                self._snapshot_sizes()
+                self._add_deltas(deltas, old_sizes, self._file_sizes)
+                continue
+            if mask & IN_DELETE_SELF or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & IN_MOVED_FROM:
+                    watcher.remove_tree(path)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._watch_tree(watcher, path)
+                    except OSError as e:
+                        logger.warning("StorageMonitor", "_apply_events", f"Cannot watch {path}: {e}")
+                old_sizes = {p: s for p, s in self._file_sizes.items() if p.startswith(path + os.sep)}
+                new_sizes = self._scan_sizes([path]) if mask & (IN_CREATE | IN_MOVED_TO) else {}
+                for p in old_sizes:
+                    del self._file_sizes[p]
+                self._file_sizes.update(new_sizes)
+                self._add_deltas(deltas, old_sizes, new_sizes)
+                continue
+
+            old_size = self._file_sizes.pop(path, 0)
+            new_size = 0
+            if mask & (IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO):
+                try:
+                    new_size = os.stat(path, follow_symlinks=False).st_size
+                    self._file_sizes[path] = new_size
+                except OSError:
+                    pass
+            if new_size != old_size:
+                deltas[path] = deltas.get(path, 0) + new_size - old_size
+
+        return self._apply_deltas(deltas)
+
+    @staticmethod
+    def _add_deltas(deltas: Dict[str, int], old_sizes: Dict[str, int], new_sizes: Dict[str, int]):
+        for path in old_sizes.keys() | new_sizes.keys():
+            delta = new_sizes.get(path, 0) - old_sizes.get(path, 0)
+            if delta:
+                deltas[path] = deltas.get(path, 0) + delta
+
+    def _apply_deltas(self, deltas: Dict[str, int]) -> bool:
+        """Adjust the usage of every monitored path on the same device as the changed files and notify."""
+        if not deltas:
+            return False
+
+        device_deltas: Dict[int, int] = {}
+        for path, delta in deltas.items():
+            root = self._monitored_root(path)
+            if root is not None and root in self._devices:
+                device = self._devices[root]
+                device_deltas[device] = device_deltas.get(device, 0) + delta
+
+        old_info = self.storage_info.copy()
+        for path_str, info in old_info.items():
+            delta = device_deltas.get(self._devices.get(path_str))
+            if not delta:
+                continue
+            used = min(info.total_space, max(0, info.used_space + delta))
+            usage_percentage = (used / info.total_space) * 100 if info.total_space > 0 else 0
+            self.storage_info[path_str] = StorageInfo(
+                total_space=info.total_space,
+                used_space=used,
+                free_space=max(0, info.free_space - (used - info.used_space)),
+                usage_percentage=usage_percentage,
+                warning_level=_warning_level_for(usage_percentage),
+                last_updated=datetime.now(),
+            )
+        self._notify_changes(old_info)
+        return True
+
+    def _monitored_root(self, path: str) -> Optional[str]:
+        for root in self.paths_to_monitor:
+            root_str = str(root)
+            if path == root_str or path.startswith(root_str.rstrip(os.sep) + os.sep):
+                return root_str
+        return None
+
     def _update_storage_info(self):
         """Update storage information for all monitored paths."""
         for path in self.paths_to_monitor:
@@ -178,22 +536,12 @@ class StorageMonitor:
                 total, used, free = shutil.disk_usage(path)
                 usage_percentage = (used / total) * 100 if total > 0 else 0
 
-                # Determine warning level
-                if usage_percentage >= 95:
-                    warning_level = StorageWarningLevel.FULL
-                elif usage_percentage >= 85:
-                    warning_level = StorageWarningLevel.CRITICAL
-                elif usage_percentage >= 70:
-                    warning_level = StorageWarningLevel.WARNING
-                else:
-                    warning_level = StorageWarningLevel.NORMAL
-
                 self.storage_info[str(path)] = StorageInfo(
                     total_space=total,
                     used_space=used,
                     free_space=free,
                     usage_percentage=usage_percentage,
-                    warning_level=warning_level,
+                    warning_level=_warning_level_for(usage_percentage),
                     last_updated=datetime.now(),
                 )
 
@@ -210,6 +558,11 @@ class StorageMonitor:
             return {path: self.storage_info.get(path)} if path in self.storage_info else {}
         return self.storage_info.copy()
 
+    def get_tracked_size(self, path: str) -> int:
+        """Total size of files below a monitored directory (only tracked while watching with inotify)."""
+        prefix = path.rstrip(os.sep) + os.sep
+        return sum(size for file_path, size in self._file_sizes.copy().items() if file_path.startswith(prefix))
+
     def get_warning_level(self, path: str) -> StorageWarningLevel:
         """Get warning level for a specific path."""
         info = self.storage_info.get(path)
@@ -217,12 +570,21 @@ class StorageMonitor:
 
 
 class StorageOptimizer:
-    """Storage optimization suggestions and cleanup utilities."""
+    """Storage optimization suggestions and cleanup utilities.
 
-    def __init__(self, base_paths: List[str], cache_dir: str = None):
+    File sizes and mtimes are kept in a persisted index (`file_stats` and
+    `dir_stats` tables). A rescan only lists directories whose mtime changed
+    since the previous scan, so repeated analyses of large, mostly unchanged
+    trees touch little more than one `stat()` per directory. Directory mtimes
+    do not change when a file is rewritten in place; pass `full_rescan=True`
+    to `analyze_storage` to re-stat every file.
+    """
+
+    def __init__(self, base_paths: List[str], cache_dir: str = None, scan_workers: int = 8):
         self.base_paths = [Path(p) for p in base_paths]
         self.cache_dir = Path(cache_dir) if cache_dir else Path.home() / ".hidock" / "cache"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.scan_workers = scan_workers
 
         # Database for tracking file information
         self.db_path = self.cache_dir / "storage_optimization.db"
@@ -257,90 +619,243 @@ class StorageOptimizer:
                 )
             """
             )
+
+            # Incremental scan index
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS file_stats (
+                    file_path TEXT PRIMARY KEY,
+                    root_path TEXT NOT NULL,
+                    dir_path TEXT NOT NULL,
+                    file_name TEXT NOT NULL,
+                    extension TEXT NOT NULL,
+                    file_size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    inode INTEGER
+                )
+            """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_stats_dir ON file_stats(dir_path)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_stats_root ON file_stats(root_path)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_stats_size_name ON file_stats(file_size, file_name)")
+
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dir_stats (
+                    dir_path TEXT PRIMARY KEY,
+                    root_path TEXT NOT NULL,
+                    parent_path TEXT,
+                    mtime_ns INTEGER NOT NULL
+                )
+            """
+            )
+
+            # Content hashes for duplicate detection, valid while (inode, size, mtime) is unchanged
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS file_hashes (
+                    inode INTEGER NOT NULL,
+                    file_size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    partial_hash TEXT,
+                    full_hash TEXT,
+                    PRIMARY KEY (inode, file_size, mtime)
+                )
+            """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_hashes_full ON file_hashes(full_hash)")
             conn.commit()
 
-    def analyze_storage(self) -> StorageAnalytics:
-        """Perform comprehensive storage analysis."""
-        logger.info("StorageOptimizer", "analyze_storage", "Starting storage analysis")
+    def _scan_directory_level(
+        self, dir_path: str, parent_path: Optional[str], known_dirs: Dict[str, Tuple[int, List[str]]], full_rescan: bool
+    ) -> Optional[DirectoryScan]:
+        """Visit one directory, listing it only if its mtime differs from the index."""
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return None  # Removed since it was listed; dropped from the index by the caller
 
-        total_files = 0
-        total_size = 0
-        file_type_distribution = {}
-        size_distribution = {"small": 0, "medium": 0, "large": 0, "huge": 0}
-        age_distribution = {"recent": 0, "week": 0, "month": 0, "old": 0}
-        duplicate_files = []
-        file_hashes = {}
+        known = known_dirs.get(dir_path)
+        if known is not None and known[0] == mtime_ns and not full_rescan:
+            return DirectoryScan(dir_path, parent_path, mtime_ns, None, known[1])
 
-        now = datetime.now()
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            files.append(
+                                (
+                                    entry.path,
+                                    entry.name,
+                                    Path(entry.name).suffix.lower(),
+                                    stat.st_size,
+                                    stat.st_mtime,
+                                    entry.inode(),
+                                )
+                            )
+                    except OSError as e:
+                        logger.warning(
+                            "StorageOptimizer", "_scan_directory_level", f"Error analyzing {entry.path}: {e}"
+                        )
+        except OSError as e:
+            logger.warning("StorageOptimizer", "_scan_directory_level", f"Cannot list {dir_path}: {e}")
+            return None
+
+        return DirectoryScan(dir_path, parent_path, mtime_ns, files, subdirs)
+
+    def _scan_tree(
+        self, dir_path: str, parent_path: Optional[str], known_dirs: Dict[str, Tuple[int, List[str]]], full_rescan: bool
+    ) -> List[DirectoryScan]:
+        """Visit a directory tree depth-first, pruning listings of unchanged directories."""
+        scans = []
+        stack = [(dir_path, parent_path)]
+        while stack:
+            path, parent = stack.pop()
+            scan = self._scan_directory_level(path, parent, known_dirs, full_rescan)
+            if scan is not None:
+                scans.append(scan)
+                stack.extend((subdir, path) for subdir in scan.subdirs)
+        return scans
+
+    def _load_known_dirs(self, conn: sqlite3.Connection, root: str) -> Dict[str, Tuple[int, List[str]]]:
+        """Indexed directories under `root`: path -> (mtime_ns, child directory paths)."""
+        rows = conn.execute("SELECT dir_path, parent_path, mtime_ns FROM dir_stats WHERE root_path = ?", (root,))
+        known = {}
+        children: Dict[str, List[str]] = {}
+        for dir_path, parent_path, mtime_ns in rows:
+            known[dir_path] = mtime_ns
+            if parent_path is not None:
+                children.setdefault(parent_path, []).append(dir_path)
+        return {path: (mtime_ns, children.get(path, [])) for path, mtime_ns in known.items()}
+
+    def refresh_file_index(self, paths: Optional[List[Path]] = None, full_rescan: bool = False) -> Dict[str, int]:
+        """
+        Bring the file index up to date for `paths` (default: the base paths).
+
+        The top level of each path is visited first, then each top-level
+        subdirectory tree is scanned by a worker thread. Returns counts of
+        added, updated and removed files and of directories listed.
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0, "dirs_listed": 0}
+        paths = self.base_paths if paths is None else paths
+
+        with sqlite3.connect(self.db_path) as conn, ThreadPoolExecutor(max_workers=self.scan_workers) as executor:
+            for base_path in paths:
+                root = str(base_path)
+                known_dirs = self._load_known_dirs(conn, root)
+
+                top = self._scan_directory_level(root, None, known_dirs, full_rescan) if base_path.is_dir() else None
+                scans = [top] if top else []
+                if top:
+                    futures = [
+                        executor.submit(self._scan_tree, subdir, root, known_dirs, full_rescan)
+                        for subdir in top.subdirs
+                    ]
+                    for future in futures:
+                        scans.extend(future.result())
+
+                self._apply_scans(conn, root, scans, known_dirs, counts)
+            conn.commit()
 
-        for base_path in self.base_paths:
-            if not base_path.exists():
+        return counts
+
+    def _apply_scans(
+        self,
+        conn: sqlite3.Connection,
+        root: str,
+        scans: List[DirectoryScan],
+        known_dirs: Dict[str, Tuple[int, List[str]]],
+        counts: Dict[str, int],
+    ):
+        """Write the changes found by a scan of `root` to the index."""
+        for scan in scans:
+            conn.execute(
+                "INSERT OR REPLACE INTO dir_stats (dir_path, root_path, parent_path, mtime_ns) VALUES (?, ?, ?, ?)",
+                (scan.dir_path, root, scan.parent_path, scan.mtime_ns),
+            )
+            if scan.files is None:
                 continue
 
-            for file_path in base_path.rglob("*"):
-                if not file_path.is_file():
+            counts["dirs_listed"] += 1
+            indexed = {
+                row[0]: row[1:]
+                for row in conn.execute(
+                    "SELECT file_path, file_size, mtime, inode FROM file_stats WHERE dir_path = ?", (scan.dir_path,)
+                )
+            }
+            changed = []
+            for file_path, file_name, extension, file_size, mtime, inode in scan.files:
+                previous = indexed.pop(file_path, None)
+                if previous == (file_size, mtime, inode):
                     continue
+                counts["updated" if previous else "added"] += 1
+                changed.append((file_path, root, scan.dir_path, file_name, extension, file_size, mtime, inode))
 
-                try:
-                    stat = file_path.stat()
-                    file_size = stat.st_size
-                    modified_time = datetime.fromtimestamp(stat.st_mtime)
-
-                    total_files += 1
-                    total_size += file_size
-
-                    # File type distribution
-                    extension = file_path.suffix.lower()
-                    if extension not in file_type_distribution:
-                        file_type_distribution[extension] = {
-                            "count": 0,
-                            "total_size": 0,
-                            "avg_size": 0,
-                        }
-
-                    file_type_distribution[extension]["count"] += 1
-                    file_type_distribution[extension]["total_size"] += file_size
-                    file_type_distribution[extension]["avg_size"] = (
-                        file_type_distribution[extension]["total_size"] / file_type_distribution[extension]["count"]
-                    )
+            conn.executemany("INSERT OR REPLACE INTO file_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)", changed)
+            conn.executemany("DELETE FROM file_stats WHERE file_path = ?", [(path,) for path in indexed])
+            counts["removed"] += len(indexed)
 
-                    # Size distribution
-                    if file_size < 1024 * 1024:  # < 1MB
-                        size_distribution["small"] += 1
-                    elif file_size < 10 * 1024 * 1024:  # < 10MB
-                        size_distribution["medium"] += 1
-                    elif file_size < 100 * 1024 * 1024:  # < 100MB
-                        size_distribution["large"] += 1
-                    else:
-                        size_distribution["huge"] += 1
-
-                    # Age distribution
-                    age_days = (now - modified_time).days
-                    if age_days <= 1:
-                        age_distribution["recent"] += 1
-                    elif age_days <= 7:
-                        age_distribution["week"] += 1
-                    elif age_days <= 30:
-                        age_distribution["month"] += 1
-                    else:
-                        age_distribution["old"] += 1
-
-                    # Duplicate detection (simplified - using size as hash for performance)
-                    file_key = f"{file_size}_{file_path.name}"
-                    if file_key in file_hashes:
-                        file_hashes[file_key].append(str(file_path))
-                    else:
-                        file_hashes[file_key] = [str(file_path)]
+        # Directories that no longer exist
+        visited = {scan.dir_path for scan in scans}
+        for dir_path in known_dirs.keys() - visited:
+            cursor = conn.execute("DELETE FROM file_stats WHERE dir_path = ?", (dir_path,))
+            counts["removed"] += cursor.rowcount
+            conn.execute("DELETE FROM dir_stats WHERE dir_path = ?", (dir_path,))
 
-                except Exception as e:
-                    logger.warning(
-                        "StorageOptimizer",
-                        "analyze_storage",
-                        f"Error analyzing {file_path}: {e}",
-                    )
+    def analyze_storage(self, full_rescan: bool = False) -> StorageAnalytics:
+        """Perform comprehensive storage analysis."""
+        logger.info("StorageOptimizer", "analyze_storage", "Starting storage analysis")
+
+        counts = self.refresh_file_index(full_rescan=full_rescan)
+        logger.debug(
+            "StorageOptimizer",
+            "analyze_storage",
+            f"Index refreshed: {counts['added']} added, {counts['updated']} updated, "
+            f"{counts['removed']} removed, {counts['dirs_listed']} directories listed",
+        )
+
+        roots = [str(base_path) for base_path in self.base_paths if base_path.exists()]
+        in_roots = f"root_path IN ({','.join('?' * len(roots))})"
+        now = time.time()
+        day = 24 * 60 * 60
 
-        # Find duplicates
-        duplicate_files = [(key, paths) for key, paths in file_hashes.items() if len(paths) > 1]
+        with sqlite3.connect(self.db_path) as conn:
+            # One pass over the index: per extension, the count and size plus the size
+            # (< 1MB, < 10MB, < 100MB, larger) and age (whole days since modification
+            # <= 1, <= 7, <= 30, older) buckets, which are then summed over extensions.
+            rows = conn.execute(
+                f"""
+                SELECT extension, COUNT(*), SUM(file_size),
+                    SUM(file_size < 1048576),
+                    SUM(file_size >= 1048576 AND file_size < 10485760),
+                    SUM(file_size >= 10485760 AND file_size < 104857600),
+                    SUM(file_size >= 104857600),
+                    SUM(mtime > ?),
+                    SUM(mtime <= ? AND mtime > ?),
+                    SUM(mtime <= ? AND mtime > ?),
+                    SUM(mtime <= ?)
+                FROM file_stats WHERE {in_roots} GROUP BY extension
+            """,
+                [now - 2 * day, now - 2 * day, now - 8 * day, now - 8 * day, now - 31 * day, now - 31 * day] + roots,
+            ).fetchall()
+
+            # File type distribution
+            file_type_distribution = {
+                extension: {"count": count, "total_size": size, "avg_size": size / count}
+                for extension, count, size, *_ in rows
+            }
+            total_files = sum(row[1] for row in rows)
+            total_size = sum(row[2] for row in rows)
+            size_distribution = {key: sum(row[3 + i] for row in rows) for i, key in enumerate(SIZE_BUCKETS)}
+            age_distribution = {key: sum(row[7 + i] for row in rows) for i, key in enumerate(AGE_BUCKETS)}
+
+        duplicate_files = self.find_duplicates()
 
         # Calculate growth trend (simplified)
         growth_trend = {"daily": 0.0, "weekly": 0.0, "monthly": 0.0}
@@ -371,15 +886,87 @@ class StorageOptimizer:
 
         return analytics
 
+    def find_duplicates(self, paths: Optional[List[Path]] = None) -> List[Tuple[str, List[str]]]:
+        """
+        Find files with identical content among the indexed files under `paths`.
+
+        Candidates are narrowed in stages: equal size, then equal hash of the
+        first and last blocks, then equal full-content hash. Hashing runs in a
+        thread pool and hashes are cached by (inode, size, mtime), so
+        unchanged files are never re-read. Hard links to the same inode count
+        as one file. Returns `(f"{size}_{hash}", paths)` groups, oldest file first.
+        """
+        roots = [str(base_path) for base_path in (self.base_paths if paths is None else paths)]
+        in_roots = f"root_path IN ({','.join('?' * len(roots))})"
+
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                f"""
+                SELECT s.file_path, s.file_size, s.mtime, s.inode, h.partial_hash, h.full_hash
+                FROM file_stats s
+                LEFT JOIN file_hashes h ON h.inode = s.inode AND h.file_size = s.file_size AND h.mtime = s.mtime
+                WHERE s.{in_roots} AND s.file_size > 0 AND s.file_size IN (
+                    SELECT file_size FROM file_stats WHERE {in_roots} GROUP BY file_size HAVING COUNT(*) > 1
+                )
+            """,
+                roots + roots,
+            ).fetchall()
+
+            # Stage 1: equal size, one entry per inode
+            by_size: Dict[int, Dict[Any, List[Any]]] = {}
+            for file_path, file_size, mtime, inode, partial_hash, full_hash in rows:
+                inodes = by_size.setdefault(file_size, {})
+                inodes.setdefault(inode or file_path, [file_path, file_size, mtime, inode, partial_hash, full_hash])
+            candidates = [entry for inodes in by_size.values() if len(inodes) > 1 for entry in inodes.values()]
+
+            # Stage 2: partial hash; stage 3: full hash of files whose size and partial hash collide
+            self._fill_hashes(candidates, 4, lambda entry: _hash_partial(entry[0], entry[1]))
+            partial_groups: Dict[Tuple[int, str], List[List[Any]]] = {}
+            for entry in candidates:
+                if entry[4] is not None:
+                    partial_groups.setdefault((entry[1], entry[4]), []).append(entry)
+            candidates = [entry for group in partial_groups.values() if len(group) > 1 for entry in group]
+            for entry in candidates:
+                if entry[1] <= 2 * DUPLICATE_PARTIAL_BLOCK:
+                    entry[5] = entry[4]  # The partial hash already covers the whole file
+            self._fill_hashes(candidates, 5, lambda entry: _hash_full(entry[0]))
+
+            hashed = [entry for inodes in by_size.values() for entry in inodes.values() if entry[4] is not None]
+            conn.executemany(
+                "INSERT OR REPLACE INTO file_hashes (inode, file_size, mtime, partial_hash, full_hash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(entry[3], entry[1], entry[2], entry[4], entry[5]) for entry in hashed if entry[3]],
+            )
+            conn.commit()
+
+        groups: Dict[str, List[List[Any]]] = {}
+        for entry in candidates:
+            if entry[5] is not None:
+                groups.setdefault(f"{entry[1]}_{entry[5]}", []).append(entry)
+        return [
+            (key, [entry[0] for entry in sorted(group, key=lambda e: (e[2], e[0]))])
+            for key, group in sorted(groups.items())
+            if len(group) > 1
+        ]
+
+    def _fill_hashes(self, entries: List[List[Any]], column: int, hash_func: Callable[[List[Any]], Optional[str]]):
+        """Compute missing hashes (entry[column] is None) in the thread pool."""
+        missing = [entry for entry in entries if entry[column] is None]
+        if not missing:
+            return
+        with ThreadPoolExecutor(max_workers=self.scan_workers) as executor:
+            for entry, digest in zip(missing, executor.map(hash_func, missing)):
+                entry[column] = digest
+
     def generate_optimization_suggestions(self, analytics: StorageAnalytics) -> List[OptimizationSuggestion]:
         """Generate storage optimization suggestions based on analysis."""
         suggestions = []
 
         # Duplicate file removal
         if analytics.duplicate_files:
-            duplicate_savings = (
-                sum(len(paths) - 1 for _, paths in analytics.duplicate_files) * 1024 * 1024
-            )  # Rough estimate
+            duplicate_savings = sum(
+                self._duplicate_group_size(key) * (len(paths) - 1) for key, paths in analytics.duplicate_files
+            )
 
             suggestions.append(
                 OptimizationSuggestion(
@@ -447,29 +1034,39 @@ class StorageOptimizer:
 
         return suggestions
 
+    @staticmethod
+    def _duplicate_group_size(key: str) -> int:
+        """File size encoded in a `find_duplicates` group key (rough estimate for other keys)."""
+        size, _, _ = key.partition("_")
+        return int(size) if size.isdigit() else 1024 * 1024
+
     def _estimate_cache_size(self) -> int:
         """Estimate the size of cache and temporary files."""
         cache_size = 0
 
-        # Check application cache
+        # Check application cache (through the incremental index)
         if self.cache_dir.exists():
-            for file_path in self.cache_dir.rglob("*"):
-                if file_path.is_file():
-                    try:
-                        cache_size += file_path.stat().st_size
-                    except (OSError, PermissionError):
-                        pass
+            self.refresh_file_index([self.cache_dir])
+            with sqlite3.connect(self.db_path) as conn:
+                cache_size += conn.execute(
+                    "SELECT COALESCE(SUM(file_size), 0) FROM file_stats WHERE root_path = ?", (str(self.cache_dir),)
+                ).fetchone()[0]
 
-        # Check system temp directories
+        # Check system temp directories (top level only, one listing each)
         temp_dirs = [Path.home() / "AppData" / "Local" / "Temp", Path("/tmp")]
         for temp_dir in temp_dirs:
             if temp_dir.exists():
-                for file_path in temp_dir.glob("hidock_*"):
-                    if file_path.is_file():
-                        try:
-                            cache_size += file_path.stat().st_size
-                        except (OSError, PermissionError):
-                            pass
+                try:
+                    with os.scandir(temp_dir) as entries:
+                        for entry in entries:
+                            if entry.name.startswith("hidock_"):
+                                try:
+                                    if entry.is_file():
+                                        cache_size += entry.stat().st_size
+                                except OSError:
+                                    pass
+                except OSError:
+                    pass
 
         return cache_size
 
@@ -532,8 +1129,9 @@ class StorageOptimizer:
         return result
 
     def _remove_duplicates(self, duplicate_files: List[str], dry_run: bool) -> Dict[str, Any]:
-        """Remove duplicate files."""
+        """Remove duplicate files, skipping any without an unchanged, verified copy that is kept."""
         result = {"success": True, "files_processed": 0, "space_saved": 0, "errors": []}
+        to_remove = set(duplicate_files)
 
         for file_path_str in duplicate_files:
             file_path = Path(file_path_str)
@@ -541,6 +1139,10 @@ class StorageOptimizer:
                 continue
 
             try:
+                if not self._has_kept_copy(file_path_str, to_remove):
+                    result["errors"].append(f"Skipped {file_path}: no verified copy remains")
+                    continue
+
                 file_size = file_path.stat().st_size
 
                 if not dry_run:
@@ -554,6 +1156,36 @@ class StorageOptimizer:
 
         return result
 
+    def _has_kept_copy(self, file_path: str, to_remove: set) -> bool:
+        """True if the file still matches its hashed state and an identical file outside `to_remove` exists."""
+        stat = os.stat(file_path)
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT full_hash FROM file_hashes WHERE inode = ? AND file_size = ? AND mtime = ?",
+                (stat.st_ino, stat.st_size, stat.st_mtime),
+            ).fetchone()
+            if not row or row[0] is None:
+                return False
+            copies = conn.execute(
+                """
+                SELECT s.file_path, s.file_size, s.mtime, s.inode FROM file_stats s
+                JOIN file_hashes h ON h.inode = s.inode AND h.file_size = s.file_size AND h.mtime = s.mtime
+                WHERE h.full_hash = ? AND s.file_size = ?
+            """,
+                (row[0], stat.st_size),
+            ).fetchall()
+
+        for copy_path, copy_size, copy_mtime, copy_inode in copies:
+            if copy_path in to_remove or copy_inode == stat.st_ino:
+                continue
+            try:
+                copy_stat = os.stat(copy_path)
+            except OSError:
+                continue
+            if (copy_stat.st_size, copy_stat.st_mtime, copy_stat.st_ino) == (copy_size, copy_mtime, copy_inode):
+                return True
+        return False
+
     def _cleanup_old_files(self, dry_run: bool, days_old: int = 30) -> Dict[str, Any]:
         """Clean up files older than specified days."""
         result = {"success": True, "files_processed": 0, "space_saved": 0, "errors": []}
@@ -673,6 +1305,12 @@ class StorageQuotaManager:
 
         # Register for storage updates
         self.storage_monitor.add_callback(self._check_quota_violations)
+        self._register_thresholds()
+
+    def _register_thresholds(self):
+        """Have the monitor report quota threshold crossings as soon as they happen."""
+        self.storage_monitor.add_threshold(self.quota_config.warning_threshold * 100)
+        self.storage_monitor.add_threshold(self.quota_config.critical_threshold * 100)
 
     def add_warning_callback(self, callback: callable):
         """Add a callback for quota warnings."""
@@ -813,6 +1451,7 @@ class StorageQuotaManager:
     def update_quota_config(self, new_config: StorageQuota):
         """Update quota configuration."""
         self.quota_config = new_config
+        self._register_thresholds()
         logger.info("StorageQuotaManager", "update_quota_config", "Quota configuration updated")
 
     def enable_auto_cleanup(self, enabled: bool = True):
@@ -844,7 +1483,7 @@ def create_storage_management_system(
         )
 
     # Create components
-    storage_monitor = StorageMonitor([download_dir] + base_paths)
+    storage_monitor = StorageMonitor([download_dir] + base_paths, event_driven=True)
     storage_optimizer = StorageOptimizer(base_paths)
     quota_manager = StorageQuotaManager(quota_config, storage_monitor)
 
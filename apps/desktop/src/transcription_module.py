@@ -17,22 +17,25 @@ import os
 import wave
 from typing import Any, Dict, Optional
 
-from ai_service import ai_service
+from ai_service import ai_service, get_gemini_client
+from chunked_transcription import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_MIN_DURATION_FOR_CHUNKING,
+    DEFAULT_TARGET_CHUNK_SECONDS,
+    ChunkedTranscriber,
+    get_audio_duration_seconds,
+)
 from config_and_logger import logger
 
 # import base64  # Future: base64 encoding for audio data
 # import tempfile  # Future: temporary file operations
 # from typing import Literal, Optional  # Future: enhanced type annotations
 
-
-try:
-    from google import genai
-except ImportError:
-    genai = None
-
 # --- Constants ---
 TRANSCRIPTION_FAILED_DEFAULT_MSG = "Transcription failed or no content returned."
 TRANSCRIPTION_PARSE_ERROR_MSG_PREFIX = "Error parsing transcription response:"
+# Providers that accept audio input and can therefore transcribe chunks
+CHUNKED_TRANSCRIPTION_PROVIDERS = {"gemini", "openai", "amazon", "qwen", "deepseek"}
 
 
 def _call_gemini_api(payload: Dict[str, Any], api_key: str = "") -> Optional[Dict[str, Any]]:
@@ -79,21 +82,17 @@ def _call_gemini_api(payload: Dict[str, Any], api_key: str = "") -> Optional[Dic
             mock_response["candidates"][0]["content"]["parts"][0]["text"] = json.dumps(mock_json_output)
         return mock_response
 
-    if genai is None:
-        logger.error(
-            "GeminiAPI",
-            "_call_gemini_api",
-            "google-genai not available. Install with: pip install google-genai",
-        )
-        return None
     try:
-        client = genai.Client(api_key=api_key)
+        client = get_gemini_client(api_key)
         # Use model from payload config if provided, otherwise use gemini-2.0-flash-exp
         model_name = payload.get("model", "gemini-2.0-flash-exp")
         response = client.models.generate_content(
             model=model_name, contents=payload.get("contents"), config=payload.get("generationConfig")
         )
         return response.to_dict()
+    except ImportError as e:
+        logger.error("GeminiAPI", "_call_gemini_api", str(e))
+        return None
     except Exception as e:
         logger.error("GeminiAPI", "_call_gemini_api", f"Exception during Gemini API call: {e}")
         return None
@@ -268,6 +267,36 @@ def _get_audio_duration(audio_path: str) -> int:
         return 0
 
 
+def _should_chunk_transcription(audio_file_path: str, provider: str, config: Optional[Dict[str, Any]]) -> bool:
+    """Decide whether a recording is long enough to be transcribed in parallel chunks."""
+    config = config or {}
+    if provider not in CHUNKED_TRANSCRIPTION_PROVIDERS or not config.get("chunk_long_recordings", True):
+        return False
+    min_duration = config.get("chunk_min_duration_seconds", DEFAULT_MIN_DURATION_FOR_CHUNKING)
+    return get_audio_duration_seconds(audio_file_path) > min_duration
+
+
+def _transcribe_in_chunks(
+    audio_file_path: str, provider: str, config: Optional[Dict[str, Any]], language: str
+) -> Dict[str, Any]:
+    """Transcribe a long recording as silence-bounded chunks in parallel, retrying failed chunks once."""
+    config = config or {}
+    transcriber = ChunkedTranscriber(
+        ai_service,
+        provider,
+        max_workers=config.get("chunk_max_workers", DEFAULT_MAX_WORKERS),
+        target_chunk_seconds=config.get("chunk_target_seconds", DEFAULT_TARGET_CHUNK_SECONDS),
+        requests_per_minute=config.get("chunk_requests_per_minute"),
+    )
+    try:
+        result = transcriber.transcribe(audio_file_path, language)
+        if result.failed_chunks:
+            result = transcriber.retry_failed(result)
+    finally:
+        transcriber.close()
+    return result.to_dict()
+
+
 async def process_audio_file_for_insights(
     audio_file_path: str,
     provider: str = "gemini",
@@ -311,37 +340,26 @@ async def process_audio_file_for_insights(
     try:
         # Check if it's an HTA/HDA file and convert it first
         ext = os.path.splitext(audio_file_path)[1].lower()
-        temp_audio_file = None
 
         if ext in [".hta", ".hda"]:
-            # HDA files are just WAV files with a different extension
-            # Create a temporary .wav copy for transcription
-            import shutil
-            import tempfile
+            # HiDock recordings are MPEG audio; transcribe the shared cached WAV conversion
+            from hta_converter import get_or_convert
 
-            temp_fd, temp_wav_path = tempfile.mkstemp(suffix=".wav", prefix="hda_")
-            os.close(temp_fd)
-
-            try:
-                # Copy HDA to WAV (it's already WAV format, just different extension)
-                shutil.copy2(audio_file_path, temp_wav_path)
-                temp_audio_file = temp_wav_path
-                audio_file_path = temp_wav_path
-                ext = ".wav"
-                logger.info(
-                    "TranscriptionModule",
-                    "process_audio_file",
-                    f"Created WAV copy of HDA file: {temp_wav_path}",
-                )
-            except Exception as copy_error:
+            converted_path = get_or_convert(audio_file_path, "wav")
+            if not converted_path:
                 logger.error(
                     "TranscriptionModule",
                     "process_audio_file",
-                    f"Failed to copy HDA file to WAV: {copy_error}",
+                    f"Failed to convert HDA file to WAV: {audio_file_path}",
                 )
-                if os.path.exists(temp_wav_path):
-                    os.remove(temp_wav_path)
-                return {"error": f"Failed to prepare HDA file: {copy_error}"}
+                return {"error": "Failed to convert HTA file to WAV format."}
+            logger.info(
+                "TranscriptionModule",
+                "process_audio_file",
+                f"Using converted WAV of HDA file: {converted_path}",
+            )
+            audio_file_path = converted_path
+            ext = ".wav"
 
     except Exception as e:
         logger.error("TranscriptionModule", "process_audio_file", f"File preparation error: {e}")
@@ -357,8 +375,23 @@ async def process_audio_file_for_insights(
             )
             return {"error": f"Failed to configure provider: {provider}"}
 
+        failed_chunks = []
+        if _should_chunk_transcription(audio_file_path, provider, config):
+            # Long recordings: parallel chunked transcription, then a single analysis call
+            logger.info(
+                "TranscriptionModule",
+                "process_audio_file",
+                "Using chunked parallel transcription for long recording",
+            )
+            chunked_result = _transcribe_in_chunks(audio_file_path, provider, config, language)
+            full_transcription = chunked_result.get("transcription", "")
+            failed_chunks = chunked_result.get("failed_chunks", [])
+            if chunked_result.get("chunk_count", 0) > len(failed_chunks):
+                meeting_insights = await extract_meeting_insights(full_transcription, provider, api_key, config)
+            else:
+                meeting_insights = {"summary": "N/A - Transcription failed"}
         # Use combined transcription + analysis for Gemini (more efficient)
-        if provider == "gemini":
+        elif provider == "gemini":
             logger.info(
                 "TranscriptionModule",
                 "process_audio_file",
@@ -367,7 +400,7 @@ async def process_audio_file_for_insights(
 
             gemini_provider = ai_service.get_provider("gemini")
             if gemini_provider and hasattr(gemini_provider, "transcribe_and_analyze_audio"):
-                result = gemini_provider.transcribe_and_analyze_audio(audio_file_path, language)
+                result = ai_service.transcribe_and_analyze_audio("gemini", audio_file_path, language)
 
                 if result.get("success"):
                     full_transcription = result.get("transcription", "")
@@ -435,26 +468,13 @@ async def process_audio_file_for_insights(
                 audio_file_path
             )
 
-    # Clean up temporary converted file if created
-    if temp_audio_file and os.path.exists(temp_audio_file):
-        try:
-            os.remove(temp_audio_file)
-            logger.info(
-                "TranscriptionModule",
-                "process_audio_file",
-                f"Cleaned up temporary file: {temp_audio_file}",
-            )
-        except Exception as e:
-            logger.warning(
-                "TranscriptionModule",
-                "process_audio_file",
-                f"Could not clean up temporary file: {e}",
-            )
-
-    return {
+    result = {
         "transcription": full_transcription,
         "insights": meeting_insights,
     }
+    if failed_chunks:
+        result["failed_chunks"] = failed_chunks
+    return result
 
 
 async def main_test() -> None:
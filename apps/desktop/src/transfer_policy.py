@@ -0,0 +1,369 @@
+"""
+Adaptive Transfer Timeouts for HiDock Desktop Application.
+
+Fixed timeouts fit no file size: three minutes is too short for a
+multi-gigabyte recording and far too long to notice a dead link on a small
+one. TransferPolicy learns from the transfers it sees on a device link:
+- stream and file listing throughput (exponentially weighted)
+- the longest pause between chunks of successful transfers
+- how long the link took to recover after a failed transfer
+
+From these it derives, per file size, a generous overall deadline and a
+short stall threshold (the longest silence before the link is considered
+dead), and how long to back off before retrying.
+
+`stream_with_retry` is the retry loop built on the policy. A transfer that
+fails part way is resumed from the last delivered byte with partial reads
+(CMD_TRANSFER_FILE_PARTIAL). Only if resuming fails is the file streamed
+again from the start, in which case the bytes already delivered are checked
+against the replay and only the remainder is passed on.
+"""
+
+import statistics
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from config_and_logger import logger
+
+DEFAULT_STREAM_BPS = 256 * 1024  # assumed until a transfer has been measured
+DEFAULT_LIST_ENTRIES_PER_S = 200.0
+MIN_RATE_SAMPLE_BYTES = 64 * 1024  # smaller transfers mostly measure latency
+RATE_SMOOTHING = 0.3
+
+TIMEOUT_SAFETY_FACTOR = 3.0
+MIN_TRANSFER_TIMEOUT_S = 30.0
+MIN_LIST_TIMEOUT_S = 20.0
+DEFAULT_STALL_TIMEOUT_S = 15.0  # the fixed per-read timeout used before anything is measured
+MIN_STALL_TIMEOUT_S = 5.0
+MAX_STALL_TIMEOUT_S = 30.0
+STALL_GAP_FACTOR = 4.0  # stall threshold relative to the longest gap seen in healthy transfers
+DEFAULT_BACKOFF_S = 1.0
+MAX_BACKOFF_S = 30.0
+MAX_RETRIES = 3
+RESUME_BLOCK_SIZE = 64 * 1024  # bytes requested per partial read when resuming
+
+# Failures that leave the device usable; anything else (disconnect, cancel, file errors) is final
+RETRYABLE_STATUSES = ("fail_timeout", "fail_comms_error")
+
+STREAM = "stream"
+PARTIAL = "partial"
+
+GAP_SAMPLES = 50
+RECOVERY_SAMPLES = 20
+
+
+class _RateEstimate:
+    """Exponentially weighted throughput estimate."""
+
+    def __init__(self, initial: float):
+        self.value = initial
+        self.samples = 0
+
+    def add(self, rate: float):
+        if rate <= 0:
+            return
+        self.value = rate if self.samples == 0 else RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * self.value
+        self.samples += 1
+
+
+class TransferMonitor:
+    """Bytes, duration and the longest gap between chunks of one transfer."""
+
+    def __init__(self, kind: str, total_bytes: int, clock: Callable[[], float] = time.monotonic):
+        self.kind = kind
+        self.total_bytes = total_bytes
+        self._clock = clock
+        self.started = clock()
+        self.last_chunk = self.started
+        self.bytes = 0
+        self.max_gap = 0.0
+
+    def on_chunk(self, size: int):
+        now = self._clock()
+        self.max_gap = max(self.max_gap, now - self.last_chunk)
+        self.last_chunk = now
+        self.bytes += size
+
+    @property
+    def elapsed(self) -> float:
+        return self._clock() - self.started
+
+    @property
+    def idle(self) -> float:
+        """Seconds since the last chunk (or the start)."""
+        return self._clock() - self.last_chunk
+
+
+class TransferPolicy:
+    """Timeouts, stall thresholds and retry backoff learned from transfers on one device link."""
+
+    def __init__(self, link_key: str = "default", clock: Callable[[], float] = time.monotonic):
+        self.link_key = link_key
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.rates = {STREAM: _RateEstimate(DEFAULT_STREAM_BPS), PARTIAL: _RateEstimate(DEFAULT_STREAM_BPS)}
+        self.list_rate = _RateEstimate(DEFAULT_LIST_ENTRIES_PER_S)
+        self.last_list_entries = 0
+        self._max_gaps: Deque[float] = deque(maxlen=GAP_SAMPLES)
+        self._recoveries: Deque[float] = deque(maxlen=RECOVERY_SAMPLES)
+        self.stats = {"transfers": 0, "failures": 0, "stalls": 0, "retries": 0, "resumes": 0}
+
+    # Derived limits
+
+    def expected_duration(self, size: int, kind: str = STREAM) -> float:
+        return max(0, size) / self.rates[kind].value
+
+    def stall_timeout(self) -> float:
+        """Longest silence from the device before a transfer is abandoned as stalled."""
+        with self._lock:
+            if not self._max_gaps:
+                return DEFAULT_STALL_TIMEOUT_S
+            typical_gap = max(self._max_gaps)
+        return min(MAX_STALL_TIMEOUT_S, max(MIN_STALL_TIMEOUT_S, STALL_GAP_FACTOR * typical_gap))
+
+    def transfer_timeout(self, size: int, kind: str = STREAM) -> float:
+        """Overall deadline for transferring `size` bytes; stalls are caught by `stall_timeout` long before."""
+        expected = TIMEOUT_SAFETY_FACTOR * self.expected_duration(size, kind) + self.stall_timeout()
+        return max(MIN_TRANSFER_TIMEOUT_S, expected)
+
+    def list_timeout(self, expected_entries: Optional[int] = None) -> float:
+        """Deadline for listing `expected_entries` files (the last listing's size if unknown)."""
+        entries = expected_entries if expected_entries is not None else self.last_list_entries
+        expected = TIMEOUT_SAFETY_FACTOR * entries / self.list_rate.value + self.stall_timeout()
+        return max(MIN_LIST_TIMEOUT_S, expected)
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry `attempt` (1-based): the typical recovery time, doubled per attempt."""
+        with self._lock:
+            base = statistics.median(self._recoveries) if self._recoveries else DEFAULT_BACKOFF_S
+        return min(MAX_BACKOFF_S, max(0.1, base) * 2 ** max(0, attempt - 1))
+
+    # Measurements
+
+    def begin(self, kind: str, total_bytes: int) -> TransferMonitor:
+        return TransferMonitor(kind, total_bytes, self._clock)
+
+    def record(self, monitor: TransferMonitor, succeeded: bool):
+        """Learn from a finished transfer."""
+        with self._lock:
+            self.stats["transfers"] += 1
+            if succeeded:
+                if monitor.bytes >= MIN_RATE_SAMPLE_BYTES and monitor.elapsed > 0:
+                    self.rates[monitor.kind].add(monitor.bytes / monitor.elapsed)
+                self._max_gaps.append(monitor.max_gap)
+                return
+            self.stats["failures"] += 1
+            if monitor.idle >= DEFAULT_STALL_TIMEOUT_S or (
+                self._max_gaps and monitor.idle >= STALL_GAP_FACTOR * max(self._max_gaps)
+            ):
+                self.stats["stalls"] += 1
+
+    def record_recovery(self, seconds: float):
+        """Time from a failed transfer until data flowed again."""
+        with self._lock:
+            self._recoveries.append(seconds)
+
+    def record_listing(self, entries: int, seconds: float):
+        with self._lock:
+            self.last_list_entries = entries
+            if entries and seconds > 0:
+                self.list_rate.add(entries / seconds)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            "link": self.link_key,
+            "stream_bytes_per_s": self.rates[STREAM].value,
+            "partial_bytes_per_s": self.rates[PARTIAL].value,
+            "list_entries_per_s": self.list_rate.value,
+            "stall_timeout_s": self.stall_timeout(),
+            **self.stats,
+        }
+
+
+_policies: Dict[str, TransferPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_transfer_policy(link_key: str = "default") -> TransferPolicy:
+    """The shared policy for a device link, created on first use."""
+    with _policies_lock:
+        policy = _policies.get(link_key)
+        if policy is None:
+            policy = _policies[link_key] = TransferPolicy(link_key)
+        return policy
+
+
+class _ReplayMismatch(Exception):
+    """The start of a retried stream differs from the bytes already delivered."""
+
+
+def _resume_stream(
+    device,
+    filename: str,
+    file_length: int,
+    offset: int,
+    deliver: Callable[[bytes], Any],
+    progress_callback: Optional[Callable[[int, int], None]],
+    cancel_event: Optional[threading.Event],
+    policy: TransferPolicy,
+) -> str:
+    """Read `filename` from `offset` to the end with partial reads, passing each block to `deliver`."""
+    monitor = policy.begin(PARTIAL, file_length - offset)
+    while offset < file_length:
+        if cancel_event is not None and cancel_event.is_set():
+            return "cancelled"
+        length = min(RESUME_BLOCK_SIZE, file_length - offset)
+        timeout_s = policy.stall_timeout() + TIMEOUT_SAFETY_FACTOR * policy.expected_duration(length, PARTIAL)
+        data = device.read_file_partial(filename, offset, length, timeout_s=timeout_s)
+        if not data:
+            policy.record(monitor, False)
+            return "fail_comms_error" if device.is_connected() else "fail_disconnected"
+        data = bytes(data[:length])
+        monitor.on_chunk(len(data))
+        try:
+            deliver(data)
+        except Exception as e:
+            logger.error("TransferPolicy", "_resume_stream", f"Error in data callback for '{filename}': {e}")
+            return "fail_exception"
+        offset += len(data)
+        if progress_callback:
+            progress_callback(offset, file_length)
+    policy.record(monitor, True)
+    return "OK"
+
+
+def stream_with_retry(
+    device,
+    filename: str,
+    file_length: int,
+    data_callback: Callable[[bytes], Any],
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    policy: Optional[TransferPolicy] = None,
+    max_retries: int = MAX_RETRIES,
+    offset: int = 0,
+    offset_crc: int = 0,
+) -> str:
+    """
+    Stream `filename` from a HiDockJensen, retrying after link failures.
+
+    After a failure, and a backoff taken from the policy, the transfer is
+    resumed from the last byte passed to `data_callback` with partial reads.
+    A resume that fails without delivering anything (e.g. firmware without
+    partial reads) falls back to a fresh `stream_file` from the first byte:
+    the bytes already delivered are replayed by the device, checked (CRC-32)
+    against what was delivered and discarded. Either way `data_callback`
+    sees every byte exactly once, in order. A replay that differs ends the
+    transfer with "fail_data_mismatch", since the delivered bytes cannot be
+    taken back.
+
+    Args:
+        offset: Bytes of the file already received (e.g. by an earlier
+            session); the transfer starts by resuming from here
+        offset_crc: CRC-32 of those bytes, to check a replay against
+
+    Returns:
+        str: "OK", or the status of the last failed attempt ("cancelled",
+        "fail_disconnected", "fail_timeout", "fail_data_mismatch", ...).
+    """
+    if policy is None:
+        policy = getattr(device, "transfer_policy", None)
+        if not isinstance(policy, TransferPolicy):
+            policy = get_transfer_policy()
+
+    delivered = offset
+    delivered_crc = offset_crc
+    failed_at = None
+    resume_failed = False
+
+    stream_kwargs = {}
+    if cancel_event is not None:
+        stream_kwargs["cancel_event"] = cancel_event
+
+    def deliver(chunk: bytes):
+        nonlocal delivered, delivered_crc, failed_at
+        if failed_at is not None:
+            policy.record_recovery(time.monotonic() - failed_at)
+            failed_at = None
+        delivered_crc = zlib.crc32(chunk, delivered_crc)
+        delivered += len(chunk)
+        data_callback(chunk)
+
+    attempt = 0
+    while True:
+        if delivered and not resume_failed:
+            resumed_from = delivered
+            policy.stats["resumes"] += 1
+            status = _resume_stream(
+                device, filename, file_length, delivered, deliver, progress_callback, cancel_event, policy
+            )
+            # Keep resuming while it makes progress; otherwise restart from the first byte
+            resume_failed = delivered == resumed_from
+        else:
+            position = 0
+            replay_crc = 0
+            mismatch = False
+
+            def on_chunk(chunk: bytes):
+                nonlocal position, replay_crc, mismatch
+                if position < delivered:
+                    replayed = chunk[: delivered - position]
+                    replay_crc = zlib.crc32(replayed, replay_crc)
+                    position += len(replayed)
+                    if position == delivered and replay_crc != delivered_crc:
+                        mismatch = True
+                        raise _ReplayMismatch(filename)
+                    chunk = chunk[len(replayed) :]
+                if chunk:
+                    position += len(chunk)
+                    deliver(chunk)
+
+            def on_progress(received: int, total: int):
+                # A restart replays bytes already reported; only report progress beyond them
+                if progress_callback and received >= delivered:
+                    progress_callback(received, total)
+
+            try:
+                status = device.stream_file(
+                    filename=filename,
+                    file_length=file_length,
+                    data_callback=on_chunk,
+                    progress_callback=on_progress,
+                    timeout_s=policy.transfer_timeout(file_length),
+                    **stream_kwargs,
+                )
+            except _ReplayMismatch:
+                # HiDockJensen.stream_file reports callback errors as a status; other devices may raise
+                status = "fail_data_mismatch"
+            if mismatch:
+                logger.error(
+                    "TransferPolicy",
+                    "stream_with_retry",
+                    f"Restarted transfer of '{filename}' does not match the {delivered} bytes already received",
+                )
+                return "fail_data_mismatch"
+        if status == "OK" or status not in RETRYABLE_STATUSES or attempt >= max_retries:
+            return status
+        if not device.is_connected():
+            return "fail_disconnected"
+
+        attempt += 1
+        delay = policy.backoff(attempt)
+        policy.stats["retries"] += 1
+        logger.warning(
+            "TransferPolicy",
+            "stream_with_retry",
+            f"Transfer of '{filename}' failed ({status}) at {delivered}/{file_length} bytes; "
+            f"{'streaming it again' if resume_failed or not delivered else 'resuming'} in {delay:.1f}s "
+            f"(attempt {attempt}/{max_retries})",
+        )
+        if failed_at is None:
+            failed_at = time.monotonic()
+        if cancel_event is not None:
+            if cancel_event.wait(delay):
+                return "cancelled"
+        else:
+            time.sleep(delay)
@@ -0,0 +1,283 @@
+"""
+Transfer Progress Aggregation for HiDock Desktop Application.
+
+The device streams files in small USB packets and every packet used to produce
+a progress object that was forwarded all the way to the GUI. This module sits
+between the transport and the GUI and provides:
+- Rate limiting of progress updates (time- and percent-based)
+- Smoothed throughput (exponential moving average) and ETA estimation
+- Per-transfer statistics (MB/s) for diagnosing slow USB links
+- Coalescing of updates so only the latest state is delivered to the GUI thread
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+# Defaults tuned for a Tk main loop: ~10 updates per second or every 1% is plenty
+DEFAULT_MIN_INTERVAL_S = 0.1
+DEFAULT_MIN_PERCENT_STEP = 1.0
+DEFAULT_SMOOTHING = 0.3
+MAX_RECENT_TRANSFERS = 50
+
+
+@dataclass
+class TransferStats:
+    """Throughput statistics for a single transfer."""
+
+    transfer_id: str
+    total_bytes: int
+    bytes_transferred: int = 0
+    start_time: float = 0.0
+    last_update_time: float = 0.0
+    end_time: Optional[float] = None
+    smoothed_rate: float = 0.0  # bytes per second (EMA)
+    raw_updates: int = 0
+    emitted_updates: int = 0
+
+    @property
+    def elapsed_seconds(self) -> float:
+        """Seconds elapsed since the transfer started (until it ended, if finished)."""
+        end = self.end_time if self.end_time is not None else self.last_update_time
+        return max(0.0, end - self.start_time)
+
+    @property
+    def average_rate(self) -> float:
+        """Average throughput over the whole transfer in bytes per second."""
+        elapsed = self.elapsed_seconds
+        return self.bytes_transferred / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def average_mb_per_s(self) -> float:
+        """Average throughput in MB/s."""
+        return self.average_rate / (1024 * 1024)
+
+    @property
+    def current_mb_per_s(self) -> float:
+        """Smoothed instantaneous throughput in MB/s."""
+        return self.smoothed_rate / (1024 * 1024)
+
+    @property
+    def progress(self) -> float:
+        """Progress as a fraction between 0.0 and 1.0."""
+        if self.total_bytes <= 0:
+            return 0.0
+        return min(1.0, self.bytes_transferred / self.total_bytes)
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Estimated seconds remaining based on the smoothed rate, or None if unknown."""
+        if self.total_bytes <= 0 or self.smoothed_rate <= 0:
+            return None
+        remaining = max(0, self.total_bytes - self.bytes_transferred)
+        return remaining / self.smoothed_rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a serialisable summary of the statistics."""
+        return {
+            "transfer_id": self.transfer_id,
+            "total_bytes": self.total_bytes,
+            "bytes_transferred": self.bytes_transferred,
+            "elapsed_seconds": self.elapsed_seconds,
+            "average_mb_per_s": self.average_mb_per_s,
+            "current_mb_per_s": self.current_mb_per_s,
+            "eta_seconds": self.eta_seconds,
+            "raw_updates": self.raw_updates,
+            "emitted_updates": self.emitted_updates,
+        }
+
+
+class ProgressThrottler:
+    """
+    Rate-limits raw (bytes_received, total_bytes) updates for one transfer.
+
+    Raw updates are always accounted for in the statistics, but `update()` only
+    returns True when an update should be forwarded: when `min_interval_s` has
+    elapsed since the last forwarded update, when progress moved at least
+    `min_percent_step` percent, or when the transfer completes.
+    """
+
+    def __init__(
+        self,
+        transfer_id: str,
+        total_bytes: int,
+        min_interval_s: float = DEFAULT_MIN_INTERVAL_S,
+        min_percent_step: float = DEFAULT_MIN_PERCENT_STEP,
+        smoothing: float = DEFAULT_SMOOTHING,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_interval_s = min_interval_s
+        self.min_percent_step = min_percent_step
+        self.smoothing = smoothing
+        self._clock = clock
+
+        now = clock()
+        self.stats = TransferStats(
+            transfer_id=transfer_id, total_bytes=total_bytes, start_time=now, last_update_time=now
+        )
+        self._last_emit_time: Optional[float] = None
+        self._last_emit_percent = 0.0
+        self._rate_sample_time = now
+        self._rate_sample_bytes = 0
+
+    def update(self, bytes_transferred: int, total_bytes: Optional[int] = None) -> bool:
+        """
+        Record a raw progress update.
+
+        Returns:
+            bool: True if this update should be forwarded to listeners.
+        """
+        now = self._clock()
+        stats = self.stats
+        if total_bytes is not None and total_bytes > 0:
+            stats.total_bytes = total_bytes
+        stats.bytes_transferred = bytes_transferred
+        stats.last_update_time = now
+        stats.raw_updates += 1
+
+        # Update the smoothed rate on a short sampling window rather than per packet,
+        # otherwise sub-millisecond packet gaps make the instantaneous rate meaningless.
+        sample_elapsed = now - self._rate_sample_time
+        if sample_elapsed >= min(self.min_interval_s, 0.05) and sample_elapsed > 0:
+            instant_rate = (bytes_transferred - self._rate_sample_bytes) / sample_elapsed
+            if stats.smoothed_rate <= 0:
+                stats.smoothed_rate = instant_rate
+            else:
+                stats.smoothed_rate = self.smoothing * instant_rate + (1 - self.smoothing) * stats.smoothed_rate
+            self._rate_sample_time = now
+            self._rate_sample_bytes = bytes_transferred
+
+        percent = stats.progress * 100.0
+        completed = stats.total_bytes > 0 and bytes_transferred >= stats.total_bytes
+        should_emit = (
+            completed
+            or self._last_emit_time is None
+            or now - self._last_emit_time >= self.min_interval_s
+            or percent - self._last_emit_percent >= self.min_percent_step
+        )
+        if should_emit:
+            self._last_emit_time = now
+            self._last_emit_percent = percent
+            stats.emitted_updates += 1
+        return should_emit
+
+    def finish(self) -> TransferStats:
+        """Mark the transfer as finished and return its final statistics."""
+        self.stats.end_time = self._clock()
+        if self.stats.smoothed_rate <= 0:
+            self.stats.smoothed_rate = self.stats.average_rate
+        return self.stats
+
+    def estimated_completion(self) -> Optional[datetime]:
+        """Wall-clock estimate of when the transfer will complete."""
+        eta = self.stats.eta_seconds
+        if eta is None:
+            return None
+        return datetime.now() + timedelta(seconds=eta)
+
+
+class TransferStatsRegistry:
+    """Thread-safe store of active and recently completed transfer statistics."""
+
+    def __init__(self, max_recent: int = MAX_RECENT_TRANSFERS):
+        self._lock = threading.Lock()
+        self._active: Dict[str, TransferStats] = {}
+        self._recent: List[TransferStats] = []
+        self._max_recent = max_recent
+
+    def start(self, stats: TransferStats) -> None:
+        """Register an active transfer."""
+        with self._lock:
+            self._active[stats.transfer_id] = stats
+
+    def finish(self, transfer_id: str) -> Optional[TransferStats]:
+        """Move a transfer from the active set to the recent history."""
+        with self._lock:
+            stats = self._active.pop(transfer_id, None)
+            if stats is not None:
+                self._recent.append(stats)
+                if len(self._recent) > self._max_recent:
+                    self._recent = self._recent[-self._max_recent :]
+            return stats
+
+    def get(self, transfer_id: str) -> Optional[TransferStats]:
+        """Return statistics for an active or recently completed transfer."""
+        with self._lock:
+            if transfer_id in self._active:
+                return self._active[transfer_id]
+            for stats in reversed(self._recent):
+                if stats.transfer_id == transfer_id:
+                    return stats
+            return None
+
+    def active(self) -> List[TransferStats]:
+        """Return statistics for all active transfers."""
+        with self._lock:
+            return list(self._active.values())
+
+    def recent(self) -> List[TransferStats]:
+        """Return statistics for recently completed transfers, oldest first."""
+        with self._lock:
+            return list(self._recent)
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate throughput summary over recently completed transfers."""
+        with self._lock:
+            recent = list(self._recent)
+        total_bytes = sum(s.bytes_transferred for s in recent)
+        total_time = sum(s.elapsed_seconds for s in recent)
+        rates = [s.average_mb_per_s for s in recent if s.elapsed_seconds > 0]
+        return {
+            "transfers": len(recent),
+            "total_bytes": total_bytes,
+            "average_mb_per_s": (total_bytes / total_time / (1024 * 1024)) if total_time > 0 else 0.0,
+            "slowest_mb_per_s": min(rates) if rates else 0.0,
+            "fastest_mb_per_s": max(rates) if rates else 0.0,
+        }
+
+
+class CoalescingDispatcher:
+    """
+    Delivers only the latest update per key to a target thread.
+
+    Worker threads call `submit(key, value)` as often as they like; at most one
+    delivery is scheduled at a time via `schedule` (e.g. ``lambda fn: widget.after(0, fn)``)
+    and, when it runs, `handler` is invoked once per key with the most recent value.
+    """
+
+    def __init__(self, schedule: Callable[[Callable[[], None]], Any], handler: Callable[[Any], None]):
+        self._schedule = schedule
+        self._handler = handler
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Any] = {}
+        self._flush_scheduled = False
+        self.submitted = 0
+        self.delivered = 0
+
+    def submit(self, key: str, value: Any) -> None:
+        """Queue `value` for `key`, replacing any undelivered value for the same key."""
+        with self._lock:
+            self._pending[key] = value
+            self.submitted += 1
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        try:
+            self._schedule(self.flush)
+        except Exception:
+            # The target loop is gone (e.g. window destroyed); drop pending updates
+            with self._lock:
+                self._flush_scheduled = False
+                self._pending.clear()
+
+    def flush(self) -> None:
+        """Deliver all pending updates. Runs on the target thread."""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._flush_scheduled = False
+        for value in pending.values():
+            self.delivered += 1
+            self._handler(value)
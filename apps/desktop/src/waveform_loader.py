@@ -0,0 +1,203 @@
+"""
+Background Waveform Loading for HiDock Desktop Application.
+
+Selecting a file in the list requests its waveform. Requests are handled by
+a small worker pool and are:
+- debounced: a job waits for a short quiet period before loading, so
+  arrowing through the list only loads the file the selection settles on
+- cancellable: each request supersedes the previous one, whose token is
+  cancelled so the stale job stops before loading or drops its result
+- cached: recently loaded waveforms are kept in an in-memory LRU keyed by
+  path, size and modification time, so returning to a file is instant
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from config_and_logger import logger
+
+# (samples, sample_rate); NumPy is not imported here so the main window can create the loader at startup
+WaveformData = Tuple[Any, int]
+WaveformCacheKey = Tuple[str, int, int, int]
+
+
+def _extract_waveform(filepath: str, max_points: int) -> WaveformData:
+    # Imported on first use: the audio player pulls in pygame
+    from audio_player_enhanced import AudioProcessor
+
+    return AudioProcessor.extract_waveform_data(filepath, max_points=max_points)
+
+
+class CancellationToken:
+    """Flag shared between a request and its job; set when the request is superseded."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep for up to `timeout` seconds; returns True as soon as the token is cancelled."""
+        return self._event.wait(timeout)
+
+
+class WaveformLoader:
+    """Debounced, cancellable waveform loading on a worker pool with an LRU of recent results."""
+
+    def __init__(
+        self,
+        dispatch: Callable[..., None],
+        load_function: Callable[[str, int], WaveformData] = _extract_waveform,
+        max_workers: int = 2,
+        debounce_s: float = 0.15,
+        cache_size: int = 32,
+    ):
+        """
+        Args:
+            dispatch: Runs `callback(*args)` on the GUI thread, e.g. via `widget.after(0, ...)`
+            load_function: Returns (data, sample_rate) for a file and a maximum number of points
+            max_workers: Number of worker threads
+            debounce_s: Quiet period a request waits for before it starts loading
+            cache_size: Number of waveforms kept in memory
+        """
+        self._dispatch = dispatch
+        self._load = load_function
+        self.debounce_s = debounce_s
+        self.cache_size = cache_size
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="WaveformLoader")
+        self._lock = threading.Lock()
+        self._current: Optional[CancellationToken] = None
+        self._futures: Set[Future] = set()
+        self._cache: "OrderedDict[WaveformCacheKey, WaveformData]" = OrderedDict()
+        self.stats = {"requests": 0, "hits": 0, "loads": 0, "cancelled": 0}
+
+    @staticmethod
+    def _cache_key(filepath: str, max_points: int) -> Optional[WaveformCacheKey]:
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        return os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns, max_points
+
+    def get_cached(self, filepath: str, max_points: int = 2000) -> Optional[WaveformData]:
+        """Return the cached waveform of a file if it is loaded and unchanged."""
+        key = self._cache_key(filepath, max_points)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def request(
+        self,
+        filepath: str,
+        on_ready: Callable[[Any, int], None],
+        on_error: Optional[Callable[[str], None]] = None,
+        max_points: int = 2000,
+    ) -> CancellationToken:
+        """
+        Load the waveform of `filepath`, superseding any earlier request.
+
+        `on_ready(data, sample_rate)` or `on_error(message)` is dispatched to the
+        GUI thread unless the request is superseded first. Cached waveforms are
+        dispatched immediately.
+        """
+        token = CancellationToken()
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+            self._current = token
+            self.stats["requests"] += 1
+
+        cached = self.get_cached(filepath, max_points)
+        if cached is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+            self._dispatch(on_ready, *cached)
+            return token
+
+        try:
+            future = self._executor.submit(self._run, token, filepath, max_points, on_ready, on_error)
+        except RuntimeError:
+            return token  # shut down
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._forget_future)
+        return token
+
+    def _forget_future(self, future: Future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def cancel(self):
+        """Cancel the outstanding request, if any."""
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+                self._current = None
+
+    def _run(
+        self,
+        token: CancellationToken,
+        filepath: str,
+        max_points: int,
+        on_ready: Callable[[Any, int], None],
+        on_error: Optional[Callable[[str], None]],
+    ):
+        # Wait out the quiet period; a newer request cancels this one before any work is done
+        if token.wait(self.debounce_s):
+            with self._lock:
+                self.stats["cancelled"] += 1
+            return
+
+        key = self._cache_key(filepath, max_points)
+        try:
+            logger.debug("WaveformLoader", "_run", f"Loading waveform for {os.path.basename(filepath)}")
+            data, sample_rate = self._load(filepath, max_points)
+            if len(data) == 0:
+                raise ValueError("No waveform data extracted")
+        except Exception as e:
+            logger.debug("WaveformLoader", "_run", f"Error loading waveform for {filepath}: {e}")
+            if not token.cancelled and on_error:
+                self._dispatch(on_error, str(e))
+            return
+
+        with self._lock:
+            self.stats["loads"] += 1
+            # Cached even if superseded: the work is done and the user may come back to the file
+            if key is not None:
+                self._cache[key] = (data, sample_rate)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            if token.cancelled:
+                self.stats["cancelled"] += 1
+                return
+        self._dispatch(on_ready, data, sample_rate)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def get_statistics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats, cached=len(self._cache))
+
+    def shutdown(self):
+        """Cancel outstanding work and stop the worker pool without waiting for running loads."""
+        self.cancel()
+        # Drop queued loads ourselves; shutdown(cancel_futures=True) needs Python 3.9
+        with self._lock:
+            pending = list(self._futures)
+        for future in pending:
+            future.cancel()
+        self._executor.shutdown(wait=False)
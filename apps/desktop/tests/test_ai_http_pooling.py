@@ -0,0 +1,163 @@
+"""
+Tests for pooled HTTP sessions, token streaming and batch analysis of local LLM providers.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+
+import pytest
+
+import ai_service
+from ai_service import AIServiceManager, LMStudioProvider, OllamaProvider, close_shared_clients, get_http_session
+
+ANALYSIS = {"summary": "ok", "topics": ["a"]}
+
+
+class _LocalLLMHandler(BaseHTTPRequestHandler):
+    """Minimal Ollama / OpenAI-compatible server recording client connections."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.connections.add(self.client_address)
+        self.server.requests.append(body)
+        text = json.dumps(ANALYSIS)
+        tokens = [text[:10], text[10:]]
+
+        if self.path == "/api/generate":
+            if body.get("stream"):
+                lines = [json.dumps({"response": t, "done": False}) for t in tokens]
+                lines.append(json.dumps({"response": "", "done": True}))
+                payload = "\n".join(lines) + "\n"
+            else:
+                payload = json.dumps({"response": text, "done": True})
+        else:
+            if body.get("stream"):
+                events = [json.dumps({"choices": [{"delta": {"content": t}}]}) for t in tokens]
+                payload = "".join(f"data: {e}\n\n" for e in events) + "data: [DONE]\n\n"
+            else:
+                payload = json.dumps({"choices": [{"message": {"content": text}}]})
+
+        data = payload.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def llm_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _LocalLLMHandler)
+    server.connections = set()
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    close_shared_clients()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    close_shared_clients()
+    server.shutdown()
+    server.server_close()
+
+
+class TestPooledSessions:
+    """Test keep-alive connection reuse."""
+
+    def test_session_is_shared_per_base_url(self):
+        assert get_http_session("http://a") is get_http_session("http://a")
+        assert get_http_session("http://a") is not get_http_session("http://b")
+        close_shared_clients()
+
+    def test_gemini_client_is_shared_per_api_key(self):
+        with patch("ai_service.genai") as mock_genai:
+            assert ai_service.get_gemini_client("key") is ai_service.get_gemini_client("key")
+            mock_genai.Client.assert_called_once_with(api_key="key")
+        close_shared_clients()
+
+    def test_gemini_client_without_sdk_raises_clear_error(self):
+        with patch("ai_service.genai", None):
+            with pytest.raises(ImportError, match="pip install google-genai"):
+                ai_service.get_gemini_client("key")
+
+    def test_sequential_requests_reuse_one_connection(self, llm_server):
+        server, url = llm_server
+        provider = OllamaProvider("", {"base_url": url, "model": "llama3"})
+
+        for _ in range(5):
+            result = provider.analyze_text("transcript")
+            assert result["success"] is True
+            assert result["analysis"] == ANALYSIS
+
+        assert len(server.requests) == 5
+        assert len(server.connections) == 1
+
+    def test_read_timeout_is_configurable(self, llm_server):
+        _, url = llm_server
+        provider = OllamaProvider("", {"base_url": url, "timeout": 600})
+        session = Mock()
+        session.post.return_value.__enter__ = Mock(return_value=Mock(json=Mock(return_value={"response": "{}"})))
+        session.post.return_value.__exit__ = Mock(return_value=False)
+
+        with patch("ai_service.get_http_session", return_value=session):
+            provider.analyze_text("transcript")
+
+        assert session.post.call_args.kwargs["timeout"] == (ai_service.HTTP_CONNECT_TIMEOUT, 600)
+
+
+class TestStreaming:
+    """Test incremental token delivery."""
+
+    def test_ollama_streams_tokens(self, llm_server):
+        server, url = llm_server
+        tokens = []
+        result = OllamaProvider("", {"base_url": url}).analyze_text("t", stream_callback=tokens.append)
+
+        assert result["analysis"] == ANALYSIS
+        assert len(tokens) == 2
+        assert server.requests[0]["stream"] is True
+
+    def test_lmstudio_streams_server_sent_events(self, llm_server):
+        _, url = llm_server
+        tokens = []
+        result = LMStudioProvider("", {"base_url": url}).analyze_text("t", stream_callback=tokens.append)
+
+        assert result["analysis"] == ANALYSIS
+        assert "".join(tokens) == json.dumps(ANALYSIS)
+
+    def test_manager_passes_callback_only_to_streaming_providers(self, tmp_path):
+        manager = AIServiceManager()
+        manager.cache_enabled = False
+        provider = Mock(supports_streaming=False)
+        provider.analyze_text.return_value = {"success": True}
+        manager.providers["gemini"] = provider
+
+        manager.analyze_text("gemini", "text", stream_callback=print)
+        provider.analyze_text.assert_called_once_with("text", "insights")
+
+
+class TestBatchAnalysis:
+    """Test concurrent analysis of many transcripts."""
+
+    def test_batch_keeps_order_and_bounds_connections(self, llm_server):
+        server, url = llm_server
+        manager = AIServiceManager()
+        manager.cache_enabled = False
+        manager.providers["ollama"] = OllamaProvider("", {"base_url": url})
+
+        texts = [f"transcript {i}" for i in range(12)]
+        results = manager.analyze_texts_batch("ollama", texts, max_workers=4)
+
+        assert len(results) == 12
+        assert all(r["success"] for r in results)
+        assert len(server.requests) == 12
+        assert 1 <= len(server.connections) <= 4
+
+    def test_empty_batch(self):
+        assert AIServiceManager().analyze_texts_batch("ollama", []) == []
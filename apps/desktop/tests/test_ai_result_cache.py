@@ -0,0 +1,147 @@
+"""
+Tests for the content-addressed AI result cache and its AIServiceManager integration.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from ai_result_cache import AIResultCache, hash_text
+from ai_service import PROMPT_VERSION, AIServiceManager
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AIResultCache(str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "meeting.wav"
+    path.write_bytes(b"RIFF" + b"\x01" * 1000)
+    return path
+
+
+class TestAIResultCache:
+    """Test the SQLite result cache."""
+
+    def test_get_set_roundtrip(self, cache):
+        key = cache.make_key("analysis", "abc", "gemini", "model", PROMPT_VERSION, "en")
+        assert cache.get(key) is None
+        assert cache.set(key, "abc", "analysis", "gemini", "model", {"success": True, "analysis": {"x": 1}})
+        assert cache.get(key) == {"success": True, "analysis": {"x": 1}}
+        stats = cache.get_statistics()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+    def test_key_distinguishes_model_and_language(self, cache):
+        base = cache.make_key("transcription", "h", "gemini", "m1", "1", "en")
+        assert base != cache.make_key("transcription", "h", "gemini", "m2", "1", "en")
+        assert base != cache.make_key("transcription", "h", "gemini", "m1", "1", "es")
+        assert base != cache.make_key("transcription", "h", "gemini", "m1", "2", "en")
+
+    def test_unserialisable_result_is_not_cached(self, cache):
+        assert cache.set("k", "h", "analysis", "p", "m", {"obj": object()}) is False
+        assert cache.get("k") is None
+
+    def test_lru_eviction_respects_size_budget(self, tmp_path):
+        cache = AIResultCache(str(tmp_path / "small"), max_size_bytes=300)
+        payload = {"text": "x" * 100}
+        cache.set("a", "ha", "analysis", "p", "m", payload)
+        cache.set("b", "hb", "analysis", "p", "m", payload)
+        cache.get("a")  # make "a" most recently used
+        cache.set("c", "hc", "analysis", "p", "m", payload)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == payload
+        assert cache.get("c") == payload
+        assert cache.get_statistics()["evictions"] == 1
+
+    def test_hash_file_tracks_content(self, cache, audio_file):
+        first = cache.hash_file(str(audio_file))
+        assert first == cache.hash_file(str(audio_file))
+        audio_file.write_bytes(b"different content")
+        assert cache.hash_file(str(audio_file)) != first
+        assert cache.hash_file(str(audio_file.parent / "missing.wav")) is None
+
+    def test_invalidate_by_hash_and_provider(self, cache):
+        cache.set("1", "h1", "analysis", "gemini", "m", {"v": 1})
+        cache.set("2", "h1", "analysis", "openai", "m", {"v": 2})
+        cache.set("3", "h2", "analysis", "gemini", "m", {"v": 3})
+
+        assert cache.invalidate(content_hash="h1", provider="openai") == 1
+        assert cache.invalidate(content_hash="h1") == 1
+        assert cache.clear() == 1
+        assert cache.get_statistics()["entries"] == 0
+
+
+class TestAIServiceManagerCaching:
+    """Test result caching through the service manager."""
+
+    def _manager(self, cache, result):
+        manager = AIServiceManager(result_cache=cache)
+        provider = Mock()
+        provider.config = {"model": "test-model"}
+        provider.transcribe_audio.return_value = dict(result)
+        provider.transcribe_and_analyze_audio.return_value = dict(result)
+        provider.analyze_text.return_value = dict(result)
+        manager.providers["gemini"] = provider
+        return manager, provider
+
+    def test_repeated_transcription_hits_cache(self, cache, audio_file):
+        manager, provider = self._manager(cache, {"success": True, "transcription": "hello"})
+
+        first = manager.transcribe_audio("gemini", str(audio_file), "en")
+        second = manager.transcribe_audio("gemini", str(audio_file), "en")
+
+        assert provider.transcribe_audio.call_count == 1
+        assert first["transcription"] == second["transcription"] == "hello"
+        assert second["cached"] is True
+
+        # A different language is a different cache entry
+        manager.transcribe_audio("gemini", str(audio_file), "es")
+        assert provider.transcribe_audio.call_count == 2
+
+    def test_combined_and_analysis_are_cached(self, cache, audio_file):
+        manager, provider = self._manager(cache, {"success": True, "analysis": {"summary": "s"}})
+
+        manager.transcribe_and_analyze_audio("gemini", str(audio_file))
+        manager.transcribe_and_analyze_audio("gemini", str(audio_file))
+        manager.analyze_text("gemini", "transcript", "meeting_insights")
+        manager.analyze_text("gemini", "transcript", "meeting_insights")
+
+        assert provider.transcribe_and_analyze_audio.call_count == 1
+        assert provider.analyze_text.call_count == 1
+        assert cache.get_statistics()["entries"] == 2
+
+    def test_failures_and_mock_results_are_not_cached(self, cache, audio_file):
+        manager, provider = self._manager(cache, {"success": False, "error": "quota"})
+        manager.transcribe_audio("gemini", str(audio_file))
+        manager.transcribe_audio("gemini", str(audio_file))
+        assert provider.transcribe_audio.call_count == 2
+
+        provider.analyze_text.return_value = {"success": True, "mock": True, "analysis": {}}
+        manager.analyze_text("gemini", "text")
+        manager.analyze_text("gemini", "text")
+        assert provider.analyze_text.call_count == 2
+
+    def test_use_cache_false_and_invalidation(self, cache, audio_file):
+        manager, provider = self._manager(cache, {"success": True, "transcription": "hello"})
+
+        manager.transcribe_audio("gemini", str(audio_file))
+        manager.transcribe_audio("gemini", str(audio_file), use_cache=False)
+        assert provider.transcribe_audio.call_count == 2
+
+        assert manager.invalidate_cached_results(str(audio_file)) == 1
+        manager.transcribe_audio("gemini", str(audio_file))
+        assert provider.transcribe_audio.call_count == 3
+
+    def test_cache_can_be_disabled(self, cache, audio_file):
+        manager, provider = self._manager(cache, {"success": True, "transcription": "hello"})
+        manager.cache_enabled = False
+
+        manager.transcribe_audio("gemini", str(audio_file))
+        manager.transcribe_audio("gemini", str(audio_file))
+        assert provider.transcribe_audio.call_count == 2
+        assert hash_text("a") != hash_text("b")
@@ -0,0 +1,126 @@
+"""Tests for scale-factor waveform envelopes of MPEG Layer I/II audio."""
+
+import numpy as np
+import pytest
+
+from audio_envelope import extract_mpeg_waveform, mpeg_envelope, side_info_layout
+
+# MPEG-2 Layer 2, 64 kb/s, 16000 Hz, mono, no CRC: the HiDock H1E recording format (576-byte frames)
+H1E_HEADER = bytes([0xFF, 0xF5, 0x88, 0xC0])
+H1E_ALLOCATION_BITS = [4] * 4 + [3] * 7 + [2] * 19
+# MPEG-1 Layer 2, 128 kb/s, 48000 Hz, joint stereo (bound 4), with CRC (384-byte frames): table B.2a
+JOINT_STEREO_HEADER = bytes([0xFF, 0xFC, 0x84, 0x40])
+TABLE_A_ALLOCATION_BITS = [4] * 11 + [3] * 12 + [2] * 4
+
+
+def _layer2_frame(header, frame_length, allocation_bits, channels, scale_factors, bound=None, crc=False):
+    """
+    Encode a Layer II frame whose side information carries `scale_factors`.
+
+    `scale_factors` maps (subband, channel) to (scfsi, [indices]); every other
+    subband is left unallocated.
+    """
+    bound = len(allocation_bits) if bound is None else bound
+    bits = []
+
+    def write(value, width):
+        bits.extend((value >> (width - 1 - i)) & 1 for i in range(width))
+
+    write(int.from_bytes(header, "big"), 32)
+    if crc:
+        write(0xBEEF, 16)
+    for subband, width in enumerate(allocation_bits):
+        for channel in range(channels if subband < bound else 1):
+            allocated = (subband, channel) in scale_factors or (subband >= bound and (subband, 1) in scale_factors)
+            write(1 if allocated else 0, width)
+    for subband in range(len(allocation_bits)):
+        for channel in range(channels):
+            if (subband, channel) in scale_factors:
+                write(scale_factors[(subband, channel)][0], 2)
+    for subband in range(len(allocation_bits)):
+        for channel in range(channels):
+            for index in scale_factors.get((subband, channel), (0, []))[1]:
+                write(index, 6)
+
+    bits.extend([1, 0] * ((frame_length * 8 - len(bits)) // 2))  # sample data
+    return np.packbits(bits).tobytes()[:frame_length]
+
+
+def _h1e_frame(scale_factors):
+    return _layer2_frame(H1E_HEADER, 576, H1E_ALLOCATION_BITS, 1, scale_factors)
+
+
+def test_h1e_frame_peaks_come_from_the_largest_scale_factor():
+    frames = [
+        _h1e_frame({(0, 0): (2, [3])}),  # one scale factor: 2 ** (1 - 3/3) = 1.0
+        _h1e_frame({(5, 0): (0, [30, 27, 33]), (20, 0): (3, [40, 41])}),  # 2 ** (1 - 27/3)
+        _h1e_frame({}),  # nothing allocated: silence
+        _h1e_frame({(2, 0): (1, [60, 45]), (29, 0): (2, [50])}),  # 2 ** (1 - 45/3)
+    ]
+
+    peaks, sample_rate, samples_per_frame = mpeg_envelope(b"".join(frames))
+
+    np.testing.assert_allclose(peaks, [1.0, 2.0**-8, 0.0, 2.0**-14])
+    assert (sample_rate, samples_per_frame) == (16000, 1152)
+
+
+def test_joint_stereo_shares_allocation_above_bound():
+    layout = side_info_layout(JOINT_STEREO_HEADER)
+    assert (layout.subbands, layout.channels) == (27, 2)
+    assert len(layout.allocation_positions) == 4 * 2 + 23  # one field per subband above the bound
+    assert layout.allocation_positions[0] == 48  # after the CRC
+
+    frame = _layer2_frame(
+        JOINT_STEREO_HEADER,
+        384,
+        TABLE_A_ALLOCATION_BITS,
+        2,
+        {(1, 0): (2, [21]), (10, 0): (2, [12]), (10, 1): (1, [20, 9])},
+        bound=4,
+        crc=True,
+    )
+    padded_header = bytes([0xFF, 0xFC, 0x86, 0x40])
+    padded = _layer2_frame(
+        padded_header, 385, TABLE_A_ALLOCATION_BITS, 2, {(3, 1): (2, [6])}, bound=4, crc=True
+    )  # padding bit set: frames are no longer a constant length
+
+    peaks, sample_rate, _ = mpeg_envelope(frame + padded + frame)
+
+    np.testing.assert_allclose(peaks, [0.25, 0.5, 0.25])
+    assert sample_rate == 48000
+
+
+def test_waveform_is_bucketed_and_mirrored(tmp_path):
+    loud, quiet = _h1e_frame({(0, 0): (2, [6])}), _h1e_frame({(0, 0): (2, [12])})
+    path = tmp_path / "REC001.hda"
+    path.write_bytes(b"ID3\x03\x00\x00\x00\x00\x00\x00" + (quiet * 9 + loud) * 100)
+
+    data, sample_rate = extract_mpeg_waveform(str(path), max_points=200)
+
+    assert sample_rate == 16000
+    assert len(data) == 200 and data.dtype == np.float32
+    # Every bucket of ten frames contains one loud frame; the peak wins
+    np.testing.assert_allclose(data[0::2], 0.5)
+    np.testing.assert_allclose(data[1::2], -0.5)
+
+
+def test_layer3_and_unknown_files_are_not_handled(tmp_path):
+    layer3 = tmp_path / "meeting.mp3"
+    layer3.write_bytes((bytes([0xFF, 0xFB, 0x90, 0x00]) + b"\x00" * 413) * 20)  # MPEG-1 Layer 3, 128 kb/s
+    text = tmp_path / "notes.hda"
+    text.write_bytes(b"not audio" * 100)
+
+    assert extract_mpeg_waveform(str(layer3)) is None
+    assert extract_mpeg_waveform(str(text)) is None
+    assert extract_mpeg_waveform(str(tmp_path / "missing.hda")) is None
+
+
+@pytest.mark.parametrize("max_points", [2, 1000])
+def test_short_recordings_keep_one_point_pair_per_frame(tmp_path, max_points):
+    path = tmp_path / "REC002.hda"
+    path.write_bytes(_h1e_frame({(0, 0): (2, [3])}) * 3)
+
+    data, _ = extract_mpeg_waveform(str(path), max_points=max_points)
+
+    assert len(data) == (2 if max_points == 2 else 6)
+    assert data.max() == pytest.approx(1.0)
@@ -0,0 +1,106 @@
+"""Tests for header-only audio probing."""
+
+import os
+import struct
+import wave
+from unittest.mock import patch
+
+import pytest
+
+import audio_probe
+from audio_probe import clear_probe_cache, iter_mpeg_frames, parse_mpeg_header, probe_audio_file
+
+# MPEG-2 Layer 2, 64 kb/s, 16000 Hz, mono: the HiDock H1E recording format (576-byte frames)
+H1E_HEADER = bytes([0xFF, 0xF5, 0x88, 0xC0])
+# MPEG-1 Layer 2, 128 kb/s, 44100 Hz, stereo (417 or 418-byte frames depending on padding)
+PADDED_HEADER = bytes([0xFF, 0xFD, 0x92, 0x00])
+
+
+def _frame(header: bytes) -> bytes:
+    length = parse_mpeg_header(header).frame_length
+    return header + b"\x55" * (length - 4)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    clear_probe_cache()
+    yield
+    clear_probe_cache()
+
+
+def test_parse_h1e_header():
+    header = parse_mpeg_header(H1E_HEADER)
+
+    assert (header.layer, header.sample_rate, header.bitrate, header.channels) == (2, 16000, 64000, 1)
+    assert header.frame_length == 576
+    assert header.samples_per_frame == 1152
+    assert parse_mpeg_header(b"\xff\xf5\xf8\xc0") is None  # bad bitrate index
+
+
+def test_probe_constant_bitrate_hda(tmp_path):
+    path = tmp_path / "REC001.hda"
+    path.write_bytes(_frame(H1E_HEADER) * 250 + b"\x00" * 100)  # trailing partial frame is ignored
+
+    info = probe_audio_file(str(path))
+
+    assert info["duration"] == pytest.approx(250 * 1152 / 16000)
+    assert (info["sample_rate"], info["channels"], info["bitrate"]) == (16000, 1, 64000)
+
+
+def test_probe_walks_padded_frames_and_skips_junk(tmp_path):
+    padded = bytes([PADDED_HEADER[0], PADDED_HEADER[1], PADDED_HEADER[2] | 0x02, PADDED_HEADER[3]])
+    stream = b"".join(_frame(padded if i % 3 == 0 else PADDED_HEADER) for i in range(30))
+    path = tmp_path / "meeting.mp3"
+    path.write_bytes(b"ID3\x03\x00\x00\x00\x00\x00\x05" + b"\x00" * 5 + stream[:2000] + b"junk" + stream[2000:])
+
+    info = probe_audio_file(str(path))
+    frames = list(iter_mpeg_frames(stream))
+
+    assert len(frames) == 30
+    assert info["sample_rate"] == 44100 and info["channels"] == 2
+    # The junk inside frame 5 shifts the following headers; the walk resynchronises on them
+    assert info["duration"] == pytest.approx(30 * 1152 / 44100)
+
+
+def test_probe_wav_headers(tmp_path):
+    path = tmp_path / "clip.wav"
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(8000)
+        wav_file.writeframes(b"\x00\x00" * 2 * 12000)
+
+    info = probe_audio_file(str(path))
+
+    assert info["duration"] == pytest.approx(1.5)
+    assert (info["sample_rate"], info["channels"], info["bitrate"]) == (8000, 2, 8000 * 16 * 2)
+
+
+def test_probe_truncated_wav_uses_available_data(tmp_path):
+    path = tmp_path / "interrupted.wav"
+    fmt = struct.pack("<HHIIHH", 1, 1, 16000, 32000, 2, 16)
+    path.write_bytes(b"RIFF\xff\xff\xff\xffWAVEfmt \x10\x00\x00\x00" + fmt + b"data\xff\xff\xff\xff" + b"\x00" * 32000)
+
+    assert probe_audio_file(str(path))["duration"] == pytest.approx(1.0)
+
+
+def test_probe_results_cached_by_size_and_mtime(tmp_path):
+    path = tmp_path / "REC002.hda"
+    path.write_bytes(_frame(H1E_HEADER) * 10)
+    assert probe_audio_file(str(path))["duration"] == pytest.approx(10 * 1152 / 16000)
+
+    with patch.object(audio_probe, "probe_mpeg") as probe_mpeg:
+        probe_audio_file(str(path))
+    probe_mpeg.assert_not_called()
+
+    path.write_bytes(_frame(H1E_HEADER) * 20)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000))
+    assert probe_audio_file(str(path))["duration"] == pytest.approx(20 * 1152 / 16000)
+
+
+def test_probe_unrecognised_or_missing_file(tmp_path):
+    path = tmp_path / "notes.hda"
+    path.write_bytes(b"not audio at all" * 10)
+
+    assert probe_audio_file(str(path)) is None
+    assert probe_audio_file(str(tmp_path / "missing.hda")) is None
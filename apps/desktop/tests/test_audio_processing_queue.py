@@ -0,0 +1,173 @@
+"""
+Tests for the persistent, stage-pipelined audio processing queue.
+"""
+
+import threading
+import time
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+from audio_metadata_db import AudioMetadataDB, JobStage, JobStatus, ProcessingStatus
+from audio_metadata_mixin import AudioMetadataMixin
+from audio_processing_queue import AudioProcessingQueue
+
+
+@pytest.fixture
+def db(tmp_path):
+    return AudioMetadataDB(str(tmp_path / "meta" / "audio_metadata.db"))
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestJobTable:
+    """Test job persistence in AudioMetadataDB."""
+
+    def test_enqueue_claim_complete(self, db):
+        job_id = db.enqueue_job("a.hda", JobStage.CONVERSION, {"x": 1})
+        assert db.enqueue_job("a.hda", JobStage.CONVERSION) == job_id  # no duplicates
+
+        job = db.claim_next_job(JobStage.CONVERSION)
+        assert job.id == job_id
+        assert job.status == JobStatus.RUNNING
+        assert job.attempts == 1
+        assert job.payload == {"x": 1}
+        assert db.claim_next_job(JobStage.CONVERSION) is None
+
+        db.complete_job(job_id)
+        assert db.get_active_jobs() == []
+        metrics = db.get_job_stage_metrics()
+        assert metrics["conversion"]["done"] == 1
+        assert metrics["transcription"]["done"] == 0
+
+    def test_interrupted_jobs_are_requeued(self, tmp_path, db):
+        db.enqueue_job("a.hda", JobStage.TRANSCRIPTION)
+        db.claim_next_job(JobStage.TRANSCRIPTION)
+
+        # Simulate a restart with a fresh manager on the same file
+        reopened = AudioMetadataDB(db.db_path)
+        assert reopened.requeue_interrupted_jobs() == 1
+        job = reopened.claim_next_job(JobStage.TRANSCRIPTION)
+        assert job.filename == "a.hda"
+        assert job.attempts == 2
+
+    def test_fail_and_purge(self, db):
+        job_id = db.enqueue_job("a.hda", JobStage.ANALYSIS)
+        db.claim_next_job(JobStage.ANALYSIS)
+        db.fail_job(job_id, "quota", retry=True)
+        assert db.get_active_jobs()[0].status == JobStatus.QUEUED
+
+        db.claim_next_job(JobStage.ANALYSIS)
+        db.fail_job(job_id, "quota")
+        assert db.get_job_stage_metrics()["analysis"]["failed"] == 1
+        assert db.purge_finished_jobs() == 1
+
+
+class TestAudioProcessingQueue:
+    """Test stage pipelining, retries and metrics."""
+
+    def test_stages_of_different_files_overlap(self, db):
+        lock = threading.Lock()
+        running = set()
+        overlaps = []
+
+        def stage_handler(stage):
+            def handler(filename, payload):
+                with lock:
+                    running.add(stage)
+                    if len(running) > 1:
+                        overlaps.append(set(running))
+                time.sleep(0.05)
+                with lock:
+                    running.discard(stage)
+                return {"from": stage.value}
+
+            return handler
+
+        queue = AudioProcessingQueue(db, {stage: stage_handler(stage) for stage in JobStage}, poll_interval=0.05)
+        queue.start()
+        try:
+            for i in range(4):
+                queue.submit(f"rec{i}.hda")
+            assert _wait_for(lambda: db.get_job_stage_metrics()["analysis"]["done"] == 4)
+        finally:
+            queue.stop()
+
+        assert overlaps, "stages never ran concurrently"
+        metrics = queue.get_metrics()
+        assert all(metrics[stage.value]["done"] == 4 for stage in JobStage)
+        assert metrics["conversion"]["avg_seconds"] >= 0.04
+
+    def test_payload_is_handed_to_next_stage(self, db):
+        seen = []
+        handlers = {
+            JobStage.CONVERSION: lambda f, p: {"audio_path": f"/tmp/{f}.wav"},
+            JobStage.TRANSCRIPTION: lambda f, p: seen.append(p) or {},
+            JobStage.ANALYSIS: lambda f, p: {},
+        }
+        queue = AudioProcessingQueue(db, handlers, poll_interval=0.05)
+        queue.start()
+        try:
+            queue.submit("a.hda")
+            assert _wait_for(lambda: db.get_job_stage_metrics()["analysis"]["done"] == 1)
+        finally:
+            queue.stop()
+        assert seen == [{"audio_path": "/tmp/a.hda.wav"}]
+
+    def test_failed_stage_is_retried_then_reported(self, db):
+        attempts = []
+        events = []
+
+        def failing(filename, payload):
+            attempts.append(filename)
+            raise RuntimeError("provider down")
+
+        handlers = {JobStage.CONVERSION: lambda f, p: {}, JobStage.TRANSCRIPTION: failing}
+        queue = AudioProcessingQueue(
+            db, handlers, max_attempts=2, poll_interval=0.05, on_job_event=lambda j, s: events.append((j.stage, s))
+        )
+        queue.start()
+        try:
+            queue.submit("a.hda")
+            assert _wait_for(lambda: (JobStage.TRANSCRIPTION, JobStatus.FAILED) in events)
+        finally:
+            queue.stop()
+
+        assert attempts == ["a.hda", "a.hda"]
+        assert db.get_job_stage_metrics()["analysis"]["queued"] == 0
+
+
+class TestMixinIntegration:
+    """Test that the metadata mixin drives files through the queue."""
+
+    def test_start_audio_processing_runs_all_stages(self, tmp_path, db):
+        audio = tmp_path / "rec.wav"
+        audio.write_bytes(b"RIFF")
+        gui = Mock()
+        gui.config = {}
+        gui.after = lambda delay, func, *args: None
+        db.create_file_entry("rec.wav", str(audio), 4, 1.0, datetime.now())
+
+        mixin = AudioMetadataMixin(gui=gui)
+        with (
+            patch("audio_metadata_mixin.get_audio_metadata_db", return_value=db),
+            patch.object(AudioMetadataMixin, "_find_local_file_path", return_value=str(audio)),
+            patch.object(AudioMetadataMixin, "_transcribe_audio_file", return_value={"text": "hello"}),
+            patch.object(AudioMetadataMixin, "_analyze_transcription_with_ai", return_value={"summary": "Standup"}),
+        ):
+            assert mixin.start_audio_processing("rec.wav")
+            assert _wait_for(lambda: db.get_metadata("rec.wav").processing_status == ProcessingStatus.COMPLETED)
+            mixin.shutdown_audio_processing_queue()
+
+        metadata = db.get_metadata("rec.wav")
+        assert metadata.transcription_text == "hello"
+        assert metadata.ai_summary == "Standup"
+        assert mixin.get_audio_processing_queue_metrics()["analysis"]["done"] == 1
@@ -0,0 +1,148 @@
+"""Tests for the streaming playback engine."""
+
+import os
+import time
+import wave
+
+import numpy as np
+import pytest
+
+from audio_stream import PcmSource, StreamingPlayback
+
+
+def _write_wav(path, samples: np.ndarray, sample_rate: int = 16000, channels: int = 1):
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.astype(np.int16).tobytes())
+    return str(path)
+
+
+@pytest.fixture
+def ramp_wav(tmp_path):
+    """Two seconds of mono 16 kHz audio whose sample values count up."""
+    return _write_wav(tmp_path / "ramp.wav", np.arange(32000) % 30000)
+
+
+def _engine(source, **kwargs):
+    engine = StreamingPlayback(output_rate=16000, output_channels=1, block_frames=1000, **kwargs)
+    engine.load(source)
+    return engine
+
+
+def test_wav_source_is_memory_mapped(ramp_wav):
+    source = PcmSource.open(ramp_wav)
+
+    assert (source.frames, source.sample_rate, source.channels) == (32000, 16000, 1)
+    assert not source.samples.flags.writeable  # a view of the read-only mapping, not a copy
+    np.testing.assert_allclose(source.read(100, 3)[:, 0], np.array([100, 101, 102]) / 32768.0)
+    source.close()
+
+
+def test_blocks_follow_the_read_cursor(ramp_wav):
+    engine = _engine(PcmSource.open(ramp_wav))
+
+    assert engine.produce() and engine.produce()
+    first, second = engine.pull(), engine.pull()
+
+    assert (first.source_start, first.source_end, second.source_start) == (0, 1000, 1000)
+    np.testing.assert_allclose(second.samples[:3, 0], np.array([1000, 1001, 1002]) / 32768.0, rtol=1e-6)
+    assert engine.pull() is None
+
+
+def test_seek_discards_buffered_blocks_and_jumps_to_frame(ramp_wav):
+    engine = _engine(PcmSource.open(ramp_wav))
+    engine.produce()
+    stale = engine.pull()
+    engine.produce()
+
+    engine.seek(1.5)
+
+    assert engine.position == pytest.approx(1.5)
+    assert engine.pull() is None
+    engine.produce()
+    block = engine.pull()
+    assert block.source_start == 24000
+    np.testing.assert_allclose(block.samples[0, 0], 24000 / 32768.0, rtol=1e-6)
+
+    # Reports for blocks from before the seek are ignored
+    engine.mark_played(stale, 1.0)
+    assert engine.position == pytest.approx(1.5)
+
+
+def test_position_counts_played_frames(ramp_wav):
+    engine = _engine(PcmSource.open(ramp_wav))
+    engine.produce()
+    engine.produce()
+    engine.pull()
+    block = engine.pull()
+
+    engine.mark_played(block, 0.25)
+
+    assert engine.position == pytest.approx(1250 / 16000)
+
+
+def test_speed_and_volume_are_applied_in_stream(ramp_wav):
+    engine = _engine(PcmSource.open(ramp_wav))
+    engine.set_speed(2.0)
+    engine.volume = 0.5
+
+    engine.produce()
+    block = engine.pull()
+
+    assert (block.source_start, block.source_end) == (0, 2000)
+    np.testing.assert_allclose(block.samples[:3, 0], np.array([0, 2, 4]) * 0.5 / 32768.0, rtol=1e-6)
+
+
+def test_mono_source_is_resampled_to_stereo_output(ramp_wav):
+    engine = StreamingPlayback(output_rate=32000, output_channels=2, block_frames=4)
+    engine.load(PcmSource.open(ramp_wav))
+
+    engine.produce()
+    block = engine.pull()
+
+    assert block.samples.shape == (4, 2)
+    np.testing.assert_allclose(block.samples[:, 0], block.samples[:, 1])
+    np.testing.assert_allclose(block.samples[:, 0], np.array([0, 0.5, 1, 1.5]) / 32768.0, rtol=1e-6)
+    assert block.source_end == 2
+
+
+def test_end_of_source(ramp_wav):
+    engine = _engine(PcmSource.open(ramp_wav))
+    engine.seek(1.99)
+
+    assert engine.produce()
+    assert not engine.produce()
+    assert not engine.exhausted  # the last block has not been pulled yet
+    assert engine.pull().source_end == 32000
+    assert engine.exhausted
+
+
+def test_mixer_output_plays_through_dummy_driver(ramp_wav, monkeypatch):
+    pygame = pytest.importorskip("pygame")
+    from audio_stream import MixerOutput
+
+    monkeypatch.setitem(os.environ, "SDL_AUDIODRIVER", "dummy")
+    try:
+        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=1024)
+    except pygame.error as e:
+        pytest.skip(f"No audio output available: {e}")
+    engine = StreamingPlayback(44100, 2)
+    engine.load(PcmSource.open(ramp_wav))
+    output = MixerOutput(engine)
+    try:
+        output.start()
+        time.sleep(0.3)
+        assert 0.1 < engine.position < 1.0
+
+        engine.seek(1.9)
+        deadline = time.monotonic() + 2.0
+        while not output.finished and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert output.finished
+        assert engine.position == pytest.approx(2.0)
+    finally:
+        output.close()
+        engine.close()
+        pygame.mixer.quit()
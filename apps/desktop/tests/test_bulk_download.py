@@ -0,0 +1,251 @@
+"""
+Tests for the bulk download utility: manifest, skip decisions, and offloading a device.
+"""
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+import bulk_download
+from bulk_download import MANIFEST_NAME, DeviceReport, DownloadManifest, offload_device, plan_downloads, print_report
+from hidock_device import HiDockJensen
+from jensen_simulator import SimulatedJensenDevice, SimulatorConfig
+
+
+def _quiet(message):
+    pass
+
+
+def _file(name, length, signature="ab" * 16):
+    return {"name": name, "length": length, "signature": signature, "duration": 1.0}
+
+
+class TestDownloadManifest:
+    """Test the persisted record of completed files."""
+
+    def test_records_survive_a_reload(self, tmp_path):
+        manifest = DownloadManifest(tmp_path, _quiet)
+        manifest.record(_file("REC1.hda", 100), "SN1")
+        manifest.record_partial(_file("REC2.hda", 200), "SN1")
+        manifest.save()
+
+        reloaded = DownloadManifest(tmp_path, _quiet)
+        assert reloaded.partial["REC2.hda"]["length"] == 200
+        assert "REC2.hda" not in reloaded.entries
+        assert reloaded.entries["REC1.hda"]["length"] == 100
+        assert reloaded.entries["REC1.hda"]["signature"] == "ab" * 16
+        assert reloaded.entries["REC1.hda"]["device"] == "SN1"
+        assert not (tmp_path / (MANIFEST_NAME + ".tmp")).exists()
+
+    def test_unreadable_manifest_is_ignored(self, tmp_path):
+        (tmp_path / MANIFEST_NAME).write_text("{not json")
+        log = Mock()
+
+        manifest = DownloadManifest(tmp_path, log)
+
+        assert manifest.entries == {}
+        assert "ignoring unreadable manifest" in log.call_args.args[0]
+
+    def test_classify(self, tmp_path):
+        manifest = DownloadManifest(tmp_path, _quiet)
+        manifest.record(_file("DONE.hda", 10), "SN1")
+        manifest.record(_file("PART.hda", 10), "SN1")
+        manifest.record(_file("CHANGED.hda", 10), "SN1")
+        for name, size in (("DONE.hda", 10), ("PART.hda", 4), ("CHANGED.hda", 10), ("OLD.hda", 10)):
+            (tmp_path / name).write_bytes(b"x" * size)
+
+        assert manifest.classify(_file("DONE.hda", 10), tmp_path / "DONE.hda") == "complete"
+        assert manifest.classify(_file("PART.hda", 10), tmp_path / "PART.hda") == "download"
+        assert manifest.classify(_file("CHANGED.hda", 10, "cd" * 16), tmp_path / "CHANGED.hda") == "stale"
+        assert manifest.classify(_file("OLD.hda", 10), tmp_path / "OLD.hda") == "adopt"
+        assert manifest.classify(_file("NEW.hda", 10), tmp_path / "NEW.hda") == "download"
+
+    def test_only_matching_in_progress_downloads_can_be_resumed(self, tmp_path):
+        manifest = DownloadManifest(tmp_path, _quiet)
+        manifest.record_partial(_file("PART.hda", 10), "SN1")
+
+        assert manifest.can_resume(_file("PART.hda", 10), 4)
+        assert not manifest.can_resume(_file("PART.hda", 10, "cd" * 16), 4)
+        assert not manifest.can_resume(_file("PART.hda", 12), 4)
+        assert not manifest.can_resume(_file("PART.hda", 10), 0)
+        assert not manifest.can_resume(_file("OTHER.hda", 10), 4)
+
+        manifest.record(_file("PART.hda", 10), "SN1")
+        assert manifest.partial == {}
+
+
+def test_plan_skips_known_files_and_drops_stale_copies(tmp_path):
+    manifest = DownloadManifest(tmp_path, _quiet)
+    manifest.record(_file("DONE.hda", 10), "SN1")
+    manifest.record(_file("CHANGED.hda", 10), "SN1")
+    for name in ("DONE.hda", "CHANGED.hda", "OLD.hda"):
+        (tmp_path / name).write_bytes(b"x" * 10)
+    files = [_file("DONE.hda", 10), _file("CHANGED.hda", 10, "cd" * 16), _file("OLD.hda", 10), _file("NEW.hda", 5)]
+
+    to_download, skipped = plan_downloads(files, tmp_path, manifest, "SN1", _quiet)
+
+    assert [f["name"] for f in to_download] == ["CHANGED.hda", "NEW.hda"]
+    assert skipped == 2
+    assert not (tmp_path / "CHANGED.hda").exists()
+    saved = json.loads((tmp_path / MANIFEST_NAME).read_text())["files"]
+    assert sorted(saved) == ["DONE.hda", "OLD.hda"]
+
+
+@pytest.fixture
+def simulated():
+    config = SimulatorConfig(file_count=4, min_file_size=20_000, max_file_size=60_000, serial_number="SIMBULK000000001")
+    device = SimulatedJensenDevice(config)
+    return device, device.attach(HiDockJensen(object()))
+
+
+def test_offload_downloads_everything_then_skips_without_touching_the_device(tmp_path, simulated):
+    device, jensen = simulated
+
+    report = offload_device(jensen, tmp_path, "SIMBULK000000001", log=_quiet)
+
+    assert report.downloaded == 4 and report.skipped == 0 and report.failed == []
+    assert report.verified == report.files_on_device == 4
+    assert report.bytes_downloaded == sum(r.length for r in device.recordings)
+    for recording in device.recordings:
+        assert (tmp_path / recording.name).read_bytes() == recording.read(0, recording.length)
+
+    with patch.object(jensen, "stream_file") as stream_file, patch.object(jensen, "get_file_block") as get_block:
+        again = offload_device(jensen, tmp_path, "SIMBULK000000001", log=_quiet)
+
+    stream_file.assert_not_called()
+    get_block.assert_not_called()
+    assert again.downloaded == 0 and again.skipped == 4 and again.succeeded
+
+
+def _listed(recording):
+    return _file(recording.name, recording.length, recording.signature.hex())
+
+
+def test_offload_resumes_a_recorded_partial_file(tmp_path, simulated):
+    device, jensen = simulated
+    recording = device.recordings[0]
+    half = recording.length // 2
+    (tmp_path / recording.name).write_bytes(recording.read(0, half))
+    manifest = DownloadManifest(tmp_path, _quiet)
+    manifest.record_partial(_listed(recording), "SIMBULK000000001")
+    manifest.save()
+
+    with patch.object(jensen, "read_file_partial", wraps=jensen.read_file_partial) as read_partial:
+        report = offload_device(jensen, tmp_path, "SIMBULK000000001", log=_quiet)
+
+    assert read_partial.call_args_list[0].args[:2] == (recording.name, half)
+    assert report.succeeded
+    assert (tmp_path / recording.name).read_bytes() == recording.read(0, recording.length)
+    assert report.bytes_downloaded == sum(r.length for r in device.recordings) - half
+    assert DownloadManifest(tmp_path, _quiet).partial == {}
+
+
+@pytest.mark.parametrize("recorded_signature", [None, "cd" * 16])
+def test_offload_replaces_an_unverified_partial_file_from_the_start(tmp_path, simulated, recorded_signature):
+    device, jensen = simulated
+    recording = device.recordings[0]
+    (tmp_path / recording.name).write_bytes(b"\xff" * (recording.length // 2))
+    if recorded_signature:
+        manifest = DownloadManifest(tmp_path, _quiet)
+        manifest.record_partial(_file(recording.name, recording.length, recorded_signature), "SIMBULK000000001")
+        manifest.save()
+
+    with patch.object(jensen, "read_file_partial") as read_partial:
+        report = offload_device(jensen, tmp_path, "SIMBULK000000001", log=_quiet)
+
+    read_partial.assert_not_called()
+    assert report.succeeded
+    assert (tmp_path / recording.name).read_bytes() == recording.read(0, recording.length)
+    assert report.bytes_downloaded == sum(r.length for r in device.recordings)
+
+
+def test_failed_download_leaves_no_partial_file(tmp_path, simulated):
+    device, jensen = simulated
+    recording = device.recordings[0]
+
+    def failing_stream(filename, file_length, data_callback, *args, **kwargs):
+        data_callback(b"x" * 100)
+        return "fail_disconnected"
+
+    with patch.object(jensen, "stream_file", side_effect=failing_stream):
+        success, error, transferred = bulk_download.download_file(
+            jensen, _file(recording.name, 500), tmp_path, 1, _quiet
+        )
+
+    assert not success and error == "Transfer failed: fail_disconnected"
+    assert transferred == 100
+    assert not (tmp_path / recording.name).exists()
+
+
+def test_failed_download_keeps_a_recorded_partial_file_for_the_next_run(tmp_path, simulated):
+    device, jensen = simulated
+    recording = device.recordings[0]
+    manifest = DownloadManifest(tmp_path, _quiet)
+
+    def failing_stream(filename, file_length, data_callback, *args, **kwargs):
+        data_callback(recording.read(0, 1000))
+        return "fail_disconnected"
+
+    with patch.object(jensen, "stream_file", side_effect=failing_stream):
+        success, _, _ = bulk_download.download_file(
+            jensen, _listed(recording), tmp_path, 1, _quiet, manifest=manifest, device_serial="SIMBULK000000001"
+        )
+
+    assert not success
+    assert (tmp_path / recording.name).stat().st_size == 1000
+    assert recording.name in DownloadManifest(tmp_path, _quiet).partial
+
+    success, error, transferred = bulk_download.download_file(
+        jensen, _listed(recording), tmp_path, 1, _quiet, manifest=manifest, device_serial="SIMBULK000000001"
+    )
+
+    assert success and error is None
+    assert transferred == recording.length - 1000
+    assert (tmp_path / recording.name).read_bytes() == recording.read(0, recording.length)
+
+
+def test_attached_device_always_offloads_into_its_serial_folder(tmp_path, simulated):
+    device, jensen = simulated
+    usb_device = {"vid": 0x10D6, "pid": 0xB00D, "bus": 1, "address": 4}
+
+    with (
+        patch.object(bulk_download, "HiDockJensen", return_value=jensen),
+        patch.object(jensen, "connect", return_value=(True, None)),
+        patch.object(jensen, "disconnect"),
+    ):
+        report = bulk_download.offload_attached_device("backend", usb_device, tmp_path, 3, _quiet)
+
+    assert report.succeeded
+    assert report.output_dir == tmp_path / "SIMBULK000000001"
+    assert sorted(p.name for p in report.output_dir.glob("*.hda")) == sorted(r.name for r in device.recordings)
+    assert not list(tmp_path.glob("*.hda"))
+
+
+def test_report_aggregates_devices_and_logs_failures(tmp_path, capsys):
+    reports = [
+        DeviceReport("bus 1 address 2", "SN1", downloaded=2, verified=2, files_on_device=2, bytes_downloaded=4096),
+        DeviceReport(
+            "bus 1 address 3", "SN2", downloaded=1, verified=1, files_on_device=2, failed=[("REC9.hda", "Timeout")]
+        ),
+    ]
+
+    exit_code = print_report(reports, 2.0, tmp_path)
+
+    output = capsys.readouterr().out
+    assert exit_code == 1
+    assert "Devices: 2" in output
+    assert "Aggregate throughput: 2.0 KB/s" in output
+    assert "SN2 REC9.hda: Timeout" in (tmp_path / "failed_downloads.txt").read_text()
+
+
+def test_find_devices_filters_hidock_ids():
+    hidock = Mock(idVendor=bulk_download.ALL_VENDOR_IDS[0], idProduct=bulk_download.HIDOCK_PRODUCT_IDS[0], bus=1)
+    hidock.address = 7
+    with patch.object(bulk_download.usb.core, "find", return_value=iter([hidock])) as find:
+        devices = bulk_download.find_devices("backend")
+
+    assert devices == [{"vid": hidock.idVendor, "pid": hidock.idProduct, "bus": 1, "address": 7}]
+    match = find.call_args.kwargs["custom_match"]
+    assert match(hidock)
+    assert not match(Mock(idVendor=0x1234, idProduct=hidock.idProduct))
@@ -0,0 +1,238 @@
+"""
+Tests for chunked, parallel transcription of long recordings.
+"""
+
+import threading
+import time
+import wave
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import transcription_module
+from chunked_transcription import (
+    ChunkedTranscriber,
+    RateLimiter,
+    compute_frame_levels,
+    detect_speech_regions_in_file,
+    get_provider_rate_limiter,
+    plan_fixed_chunks,
+    plan_vad_chunks,
+    shift_timestamps,
+)
+
+SAMPLE_RATE = 8000
+
+
+def _speech_with_pauses(bursts, gap_s=1.0, burst_s=4.0):
+    """Build int16 audio of tone bursts (speech stand-in) separated by silence."""
+    t = np.arange(int(burst_s * SAMPLE_RATE)) / SAMPLE_RATE
+    burst = (np.sin(2 * np.pi * 300 * t) * 8000).astype(np.int16)
+    gap = np.zeros(int(gap_s * SAMPLE_RATE), dtype=np.int16)
+    parts = []
+    for _ in range(bursts):
+        parts.extend([gap, burst])
+    parts.append(gap)
+    return np.concatenate(parts)
+
+
+def _write_wav(path, samples):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(samples.tobytes())
+    return str(path)
+
+
+class FakeService:
+    """Stands in for AIServiceManager; records concurrency and can fail chunks."""
+
+    def __init__(self, fail_indices=(), delay=0.02):
+        self.fail_indices = set(fail_indices)
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def transcribe_audio(self, provider_name, audio_file_path, language="auto"):
+        index = int(audio_file_path.rsplit("_", 1)[1].split(".")[0])
+        with self._lock:
+            self.calls.append(index)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if index in self.fail_indices:
+            self.fail_indices.discard(index)
+            return {"success": False, "error": "quota"}
+        return {"success": True, "transcription": f"[00:01] Speaker 1: chunk {index}"}
+
+
+class TestPlanning:
+    """Test VAD and chunk planning."""
+
+    def test_detect_speech_regions(self, tmp_path):
+        path = _write_wav(tmp_path / "speech.wav", _speech_with_pauses(3))
+        regions = detect_speech_regions_in_file(path)
+        assert len(regions) == 3
+        for (start, end), expected_start in zip(regions, [1.0, 6.0, 11.0]):
+            assert start == pytest.approx(expected_start, abs=0.05)
+            assert end - start == pytest.approx(4.0, abs=0.05)
+
+    def test_silence_has_no_regions(self, tmp_path):
+        path = _write_wav(tmp_path / "silence.wav", np.zeros(SAMPLE_RATE * 2, dtype=np.int16))
+        assert detect_speech_regions_in_file(path) == []
+
+    def test_plan_vad_chunks_cuts_only_between_regions(self):
+        regions = [(0, 4), (5, 9), (10, 14), (15, 19)]
+        assert plan_vad_chunks(regions, 10, 0.5, 20) == [(0.0, 9.5), (9.5, 19.5)]
+        assert plan_vad_chunks([], 10, 0.5, 20) == [(0.0, 20)]
+
+    def test_plan_fixed_chunks(self):
+        assert plan_fixed_chunks(25, 10) == [(0, 10), (10, 20), (20, 25)]
+
+    def test_shift_timestamps(self):
+        text = "[00:05] Speaker 1: hi\n[01:10] Speaker 2: hello"
+        assert shift_timestamps(text, 3600) == "[01:00:05] Speaker 1: hi\n[01:01:10] Speaker 2: hello"
+        assert shift_timestamps("[00:00:30] x", 60) == "[01:30] x"
+
+    def test_file_vad_streams_in_blocks(self, tmp_path):
+        samples = _speech_with_pauses(3)
+        path = _write_wav(tmp_path / "speech.wav", samples)
+        whole = detect_speech_regions_in_file(path)
+
+        with patch("chunked_transcription.VAD_BLOCK_FRAMES", 7):
+            level_db, frame_len, rate = compute_frame_levels(path)
+            regions = detect_speech_regions_in_file(path)
+
+        assert rate == SAMPLE_RATE
+        assert len(level_db) == len(samples) // frame_len
+        assert regions == pytest.approx(whole)
+
+    def test_file_vad_downmixes_stereo(self, tmp_path):
+        samples = _speech_with_pauses(2)
+        path = tmp_path / "stereo.wav"
+        with wave.open(str(path), "wb") as wf:
+            wf.setnchannels(2)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            # Speech on the left channel only
+            wf.writeframes(np.column_stack([samples, np.zeros_like(samples)]).tobytes())
+
+        regions = detect_speech_regions_in_file(str(path))
+
+        assert len(regions) == 2
+        for (start, end), expected_start in zip(regions, [1.0, 6.0]):
+            assert start == pytest.approx(expected_start, abs=0.05)
+            assert end - start == pytest.approx(4.0, abs=0.05)
+
+
+class TestRateLimiter:
+    """Test per-provider request spacing."""
+
+    def test_spacing(self):
+        now = [0.0]
+        sleeps = []
+
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+
+        limiter = RateLimiter(60, clock=lambda: now[0], sleep=fake_sleep)
+        assert limiter.acquire() == 0.0
+        assert limiter.acquire() == pytest.approx(1.0)
+        assert limiter.acquire() == pytest.approx(2.0)
+        assert sleeps == [pytest.approx(1.0), pytest.approx(2.0)]
+
+    def test_unlimited(self):
+        assert RateLimiter(0).acquire() == 0.0
+
+    def test_provider_limiter_is_shared_and_updated_in_place(self):
+        limiter = get_provider_rate_limiter("test-shared", 60)
+        limiter._next_slot = 123.0
+
+        again = get_provider_rate_limiter("test-shared", 30)
+
+        assert again is limiter
+        assert again.interval == pytest.approx(2.0)
+        assert again._next_slot == 123.0
+        assert get_provider_rate_limiter("test-shared") is limiter
+
+
+class TestChunkedTranscriber:
+    """Test parallel transcription and stitching."""
+
+    def test_transcribes_chunks_in_parallel_and_stitches(self, tmp_path):
+        path = _write_wav(tmp_path / "long.wav", _speech_with_pauses(6))
+        service = FakeService()
+        transcriber = ChunkedTranscriber(
+            service, "test", max_workers=3, target_chunk_seconds=10, requests_per_minute=0
+        )
+
+        result = transcriber.transcribe(path, "en")
+
+        assert result.success
+        assert len(result.chunks) == 3
+        assert sorted(service.calls) == [0, 1, 2]
+        assert service.max_active > 1
+        lines = result.transcription.splitlines()
+        assert lines[0].endswith("chunk 0")
+        # Second chunk starts at ~10.5s, so its [00:01] marker becomes [00:11] or later
+        assert lines[1].startswith("[00:1")
+        assert result.to_dict()["failed_chunks"] == []
+
+    def test_retry_only_failed_chunks(self, tmp_path):
+        path = _write_wav(tmp_path / "long.wav", _speech_with_pauses(6))
+        service = FakeService(fail_indices={1})
+        transcriber = ChunkedTranscriber(
+            service, "test", max_workers=2, target_chunk_seconds=10, requests_per_minute=0, max_attempts=1
+        )
+
+        result = transcriber.transcribe(path)
+        assert not result.success
+        assert [c.index for c in result.failed_chunks] == [1]
+        assert "transcription unavailable" in result.transcription
+        assert result.to_dict()["error"] == "quota"
+
+        transcriber.retry_failed(result)
+        assert result.success
+        assert sorted(service.calls) == [0, 1, 1, 2]
+
+    def test_short_audio_is_single_chunk(self, tmp_path):
+        path = _write_wav(tmp_path / "short.wav", _speech_with_pauses(1))
+        service = FakeService()
+        result = ChunkedTranscriber(service, "test", target_chunk_seconds=60, requests_per_minute=0).transcribe(path)
+        assert len(result.chunks) == 1
+        assert result.transcription == "[00:01] Speaker 1: chunk 0"
+
+
+class TestProcessAudioFileIntegration:
+    """Test that long recordings take the chunked path in the transcription module."""
+
+    @pytest.mark.asyncio
+    async def test_long_recording_uses_chunked_path(self, tmp_path):
+        path = _write_wav(tmp_path / "meeting.wav", _speech_with_pauses(6))
+        service = FakeService()
+        config = {"chunk_min_duration_seconds": 5, "chunk_target_seconds": 10, "chunk_requests_per_minute": 0}
+
+        with (
+            patch.object(transcription_module.ai_service, "configure_provider", return_value=True),
+            patch.object(transcription_module.ai_service, "transcribe_audio", side_effect=service.transcribe_audio),
+            patch("transcription_module.extract_meeting_insights", return_value={"summary": "ok"}) as mock_insights,
+        ):
+            result = await transcription_module.process_audio_file_for_insights(path, "gemini", "key", config)
+
+        assert sorted(service.calls) == [0, 1, 2]
+        assert "chunk 2" in result["transcription"]
+        assert result["insights"]["summary"] == "ok"
+        assert "failed_chunks" not in result
+        mock_insights.assert_called_once()
+
+    def test_short_recording_is_not_chunked(self, tmp_path):
+        path = _write_wav(tmp_path / "meeting.wav", _speech_with_pauses(1))
+        assert not transcription_module._should_chunk_transcription(path, "gemini", None)
+        assert not transcription_module._should_chunk_transcription(path, "ollama", {"chunk_min_duration_seconds": 0})
+        assert transcription_module._should_chunk_transcription(path, "gemini", {"chunk_min_duration_seconds": 1})
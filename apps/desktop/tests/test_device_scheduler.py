@@ -0,0 +1,119 @@
+"""Tests for the prioritised device command scheduler."""
+
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from device_scheduler import CommandPriority, DeviceCommandScheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = DeviceCommandScheduler()
+    yield scheduler
+    scheduler.shutdown()
+
+
+def _start_waiter(scheduler, priority, name, order):
+    def wait():
+        with scheduler.hold(priority, name):
+            order.append(name)
+
+    thread = threading.Thread(target=wait, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_for_queue(scheduler, length, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while scheduler.get_statistics()["queued"] < length and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert scheduler.get_statistics()["queued"] == length
+
+
+def test_waiting_threads_are_granted_by_priority_then_arrival(scheduler):
+    order = []
+    scheduler.acquire(priority=CommandPriority.BULK, label="download 1")
+    threads = []
+    for priority, name in [
+        (CommandPriority.BULK, "download 2"),
+        (CommandPriority.NORMAL, "refresh"),
+        (CommandPriority.BULK, "download 3"),
+        (CommandPriority.INTERACTIVE, "status"),
+    ]:
+        threads.append(_start_waiter(scheduler, priority, name, order))
+        _wait_for_queue(scheduler, len(threads))
+
+    scheduler.release()
+    for thread in threads:
+        thread.join(2.0)
+
+    assert order == ["status", "refresh", "download 2", "download 3"]
+
+
+def test_submitted_commands_run_between_bulk_transfers(scheduler):
+    order = []
+    scheduler.acquire(priority=CommandPriority.BULK, label="download 1")
+    bulk = _start_waiter(scheduler, CommandPriority.BULK, "download 2", order)
+    _wait_for_queue(scheduler, 1)
+
+    future = scheduler.submit(
+        lambda: order.append("recording status") or "REC001.hda", priority=CommandPriority.INTERACTIVE
+    )
+    scheduler.release()
+
+    assert future.result(2.0) == "REC001.hda"
+    bulk.join(2.0)
+    assert order == ["recording status", "download 2"]
+
+
+def test_queued_command_can_be_cancelled(scheduler):
+    calls = []
+    scheduler.acquire()
+    future = scheduler.submit(calls.append, "ran")
+
+    assert future.cancel()
+    scheduler.release()
+
+    with pytest.raises(CancelledError):
+        future.result(1.0)
+    assert calls == []
+    assert not scheduler.locked()
+    assert scheduler.get_statistics()["priorities"]["normal"]["cancelled"] == 1
+
+
+def test_command_errors_are_returned_through_the_future(scheduler):
+    def fail():
+        raise ConnectionError("No device connected")
+
+    with pytest.raises(ConnectionError):
+        scheduler.submit(fail).result(2.0)
+    assert not scheduler.locked()
+
+
+def test_lock_interface(scheduler):
+    with scheduler:
+        assert scheduler.locked()
+        assert not scheduler.acquire(blocking=False)
+        assert not scheduler.acquire(timeout=0.05, priority=CommandPriority.INTERACTIVE)
+    assert scheduler.acquire(blocking=False)
+    scheduler.release()
+
+    with pytest.raises(RuntimeError):
+        scheduler.release()
+    assert scheduler.get_statistics()["priorities"]["interactive"]["timed_out"] == 1
+
+
+def test_latency_metrics_per_priority(scheduler):
+    scheduler.acquire(priority=CommandPriority.BULK)
+    future = scheduler.submit(lambda: None, priority=CommandPriority.INTERACTIVE)
+    time.sleep(0.05)
+    scheduler.release()
+    future.result(2.0)
+
+    stats = scheduler.get_statistics()["priorities"]
+    assert stats["interactive"]["granted"] == 1
+    assert stats["interactive"]["max_wait_ms"] >= 40
+    assert stats["bulk"]["max_hold_ms"] >= 40
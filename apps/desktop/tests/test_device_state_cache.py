@@ -0,0 +1,172 @@
+"""Tests for the device state cache and its use by the desktop device adapter."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from desktop_device_adapter import DesktopDeviceAdapter
+from device_state_cache import CARD_INFO, FILE_LIST, DeviceStateCache
+
+FILES = [{"name": "REC001.hda", "length": 1024}, {"name": "REC002.hda", "length": 2048}]
+
+
+class TestDeviceStateCache:
+    def test_fetches_once_until_invalidated(self):
+        cache = DeviceStateCache()
+        fetch = Mock(side_effect=["first", "second"])
+
+        assert cache.get_or_fetch(CARD_INFO, fetch) == "first"
+        assert cache.get_or_fetch(CARD_INFO, fetch) == "first"
+        cache.notify("recording_deleted")
+        assert cache.get_or_fetch(CARD_INFO, fetch) == "second"
+
+        stats = cache.get_statistics()
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+        assert stats["entries"][CARD_INFO]["invalidations"] == 1
+        assert stats["events"] == {"recording_deleted": 1}
+
+    def test_events_only_drop_their_entries(self):
+        cache = DeviceStateCache()
+        for entry in ("info", "card", "settings", "recording", "files"):
+            cache.put(entry, entry)
+
+        cache.notify("settings_changed")
+        assert not cache.contains("settings") and cache.contains("card")
+        cache.notify("recording_changed")
+        assert not cache.contains("card") and not cache.contains("files") and cache.contains("info")
+        cache.notify("disconnected")
+        assert not any(cache.contains(entry) for entry in ("info", "recording"))
+
+        with pytest.raises(ValueError):
+            cache.notify("unplugged")
+
+    def test_query_in_flight_during_invalidation_is_not_stored(self):
+        cache = DeviceStateCache()
+
+        def fetch():
+            cache.notify("storage_formatted")  # the event arrives while the device is being queried
+            return "stale"
+
+        assert cache.get_or_fetch(CARD_INFO, fetch) == "stale"
+        assert not cache.contains(CARD_INFO)
+
+    def test_results_rejected_by_should_cache_are_returned_but_not_kept(self):
+        cache = DeviceStateCache()
+
+        assert cache.get_or_fetch(FILE_LIST, lambda: None, should_cache=lambda value: value is not None) is None
+        assert not cache.contains(FILE_LIST)
+
+    def test_none_is_a_cacheable_value(self):
+        cache = DeviceStateCache()
+        fetch = Mock(return_value=None)
+
+        cache.get_or_fetch("recording", fetch)
+        cache.get_or_fetch("recording", fetch)
+
+        assert fetch.call_count == 1
+
+
+class TestAdapterStateCaching:
+    def setup_method(self):
+        self.patcher = patch("desktop_device_adapter.HiDockJensen")
+        self.jensen = Mock()
+        self.patcher.start().return_value = self.jensen
+        self.jensen.is_connected.return_value = True
+        self.jensen.is_file_list_streaming.return_value = False
+        self.jensen.get_card_info.return_value = {"capacity": 1000, "used": 750, "status_raw": 0}
+        self.jensen.get_file_count.return_value = {"count": 2}
+        self.jensen.list_files_with_retry.return_value = {"files": [dict(f) for f in FILES], "totalFiles": 2}
+        self.jensen.get_recording_file.return_value = None
+        self.adapter = DesktopDeviceAdapter()
+
+    def teardown_method(self):
+        self.patcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_repeated_queries_are_served_from_the_cache(self):
+        for _ in range(3):
+            await self.adapter.get_storage_info()
+            files = await self.adapter.get_recordings()
+
+        assert self.jensen.get_card_info.call_count == 1
+        assert self.jensen.list_files_with_retry.call_count == 1
+        assert files == FILES
+        assert self.adapter.get_state_cache_statistics()["hits"] == 4
+
+    @pytest.mark.asyncio
+    async def test_callers_cannot_modify_the_cached_file_list(self):
+        files = await self.adapter.get_recordings()
+        files[0]["is_recording"] = True
+
+        assert "is_recording" not in (await self.adapter.get_recordings())[0]
+
+    @pytest.mark.asyncio
+    async def test_incomplete_file_lists_are_not_cached(self):
+        self.jensen.list_files_with_retry.return_value = {"files": FILES[:1], "incomplete": True, "expected": 2}
+
+        await self.adapter.get_recordings()
+        await self.adapter.get_recordings()
+
+        assert self.jensen.list_files_with_retry.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_delete_invalidates_card_and_file_list(self):
+        self.jensen.delete_file.return_value = {"result": "success"}
+        await self.adapter.get_storage_info()
+        await self.adapter.get_recordings()
+
+        await self.adapter.delete_recording("REC001.hda")
+        await self.adapter.get_storage_info()
+        await self.adapter.get_recordings()
+
+        assert self.jensen.get_card_info.call_count == 2
+        assert self.jensen.list_files_with_retry.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_recording_poll_detects_start_and_invalidates(self):
+        await self.adapter.get_recordings()
+        assert await self.adapter.get_current_recording_filename(refresh=True) is None
+
+        self.jensen.get_recording_file.return_value = {"name": "REC003.hda"}
+        assert await self.adapter.get_current_recording_filename() is None  # cached answer
+        assert await self.adapter.get_current_recording_filename(refresh=True) == "REC003.hda"
+        await self.adapter.get_recordings()
+
+        assert self.jensen.list_files_with_retry.call_count == 2
+        assert self.adapter.get_state_cache_statistics()["events"] == {"recording_changed": 1}
+
+    @pytest.mark.asyncio
+    async def test_settings_are_cached_until_written(self):
+        self.jensen.get_device_settings.return_value = {"autoRecord": True}
+        self.jensen.set_device_settings.return_value = {"result": "success"}
+
+        await self.adapter.get_device_settings()
+        assert await self.adapter.get_device_settings() == {"autoRecord": True}
+        self.adapter.set_device_settings({"autoRecord": False})
+        self.jensen.get_device_settings.return_value = {"autoRecord": False}
+
+        assert await self.adapter.get_device_settings() == {"autoRecord": False}
+        assert self.jensen.get_device_settings.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_streaming_returns_last_known_card_info(self):
+        card = await self.adapter.get_storage_info()
+        self.jensen.is_file_list_streaming.return_value = True
+
+        assert await self.adapter.get_storage_info() is card
+
+    @pytest.mark.asyncio
+    async def test_failed_card_info_reads_are_not_cached(self):
+        self.jensen.get_card_info.return_value = None
+
+        fallback = await self.adapter.get_storage_info()
+        self.jensen.is_file_list_streaming.return_value = True
+        assert await self.adapter.get_storage_info() is not fallback
+        self.jensen.is_file_list_streaming.return_value = False
+        self.jensen.get_card_info.return_value = {"capacity": 1000, "used": 750, "status_raw": 0}
+        card = await self.adapter.get_storage_info()
+
+        assert fallback.used_space == 0
+        assert card.total_capacity == 1000 * 1024 * 1024
+        assert self.jensen.get_card_info.call_count == 2
+        assert await self.adapter.get_storage_info() is card
@@ -0,0 +1,269 @@
+"""Tests for pipelined multi-file downloads."""
+
+import threading
+import time
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+import download_pipeline
+from desktop_device_adapter import DesktopDeviceAdapter
+from download_pipeline import DownloadCancelledError, DownloadJob, DownloadPipeline, _write_all
+from file_operations_manager import FileMetadata, FileOperationsManager, FileOperationStatus
+
+CHUNK = 4096
+
+
+def _content(name, size):
+    return (name.encode() * (size // len(name) + 1))[:size]
+
+
+def _streamer(contents, chunk=CHUNK, delay=0.0):
+    def stream_file(job, write_chunk):
+        data = contents[job.filename]
+        for start in range(0, len(data), chunk):
+            if job.cancel_event.is_set():
+                raise RuntimeError("Download failed: cancelled")
+            write_chunk(data[start : start + chunk])
+            if delay:
+                time.sleep(delay)
+
+    return stream_file
+
+
+class _Recorder:
+    def __init__(self):
+        self.finished = []
+        self.failed = []
+
+    def finish(self, job):
+        assert job.path.exists() and not job.partial_path.exists()
+        self.finished.append(job.filename)
+
+    def fail(self, job, error):
+        self.failed.append((job.filename, error))
+
+
+def test_files_are_streamed_written_and_finished_in_order(tmp_path):
+    contents = {f"REC{i}.hda": _content(f"REC{i}", 50_000 + i * 1000) for i in range(4)}
+    jobs = [DownloadJob(name, tmp_path / name) for name in contents]
+    recorder = _Recorder()
+    pipeline = DownloadPipeline(_streamer(contents), recorder.finish, recorder.fail, write_batch_bytes=16 * 1024)
+
+    stats = pipeline.run(jobs)
+
+    assert recorder.finished == list(contents)
+    assert recorder.failed == []
+    for name, data in contents.items():
+        assert (tmp_path / name).read_bytes() == data
+    assert stats["files_completed"] == 4
+    assert stats["bytes_received"] == sum(len(d) for d in contents.values())
+    # Chunks are coalesced: far fewer writes than chunks received
+    assert stats["write_calls"] < stats["bytes_received"] / CHUNK / 2
+
+
+def test_failed_and_cancelled_transfers_leave_no_partial_file(tmp_path):
+    contents = {"A.hda": _content("A", 20_000), "B.hda": _content("B", 20_000), "C.hda": _content("C", 20_000)}
+    jobs = [DownloadJob(name, tmp_path / "downloads" / name) for name in contents]
+    jobs[1].cancel_event.set()
+    streamer = _streamer(contents)
+
+    def stream_file(job, write_chunk):
+        if job.filename == "C.hda":
+            write_chunk(contents["C.hda"][:CHUNK])
+            raise RuntimeError("Download failed: fail_comms_error")
+        streamer(job, write_chunk)
+
+    recorder = _Recorder()
+    DownloadPipeline(stream_file, recorder.finish, recorder.fail).run(jobs)
+
+    assert recorder.finished == ["A.hda"]
+    assert [name for name, _ in recorder.failed] == ["B.hda", "C.hda"]
+    assert isinstance(recorder.failed[0][1], DownloadCancelledError)
+    assert "fail_comms_error" in str(recorder.failed[1][1])
+    assert sorted(p.name for p in (tmp_path / "downloads").iterdir()) == ["A.hda"]
+
+
+def test_write_error_stops_the_transfer(tmp_path):
+    contents = {"A.hda": _content("A", 200_000), "B.hda": _content("B", 10_000)}
+    jobs = [DownloadJob(name, tmp_path / name) for name in contents]
+    recorder = _Recorder()
+    pipeline = DownloadPipeline(
+        _streamer(contents, delay=0.001), recorder.finish, recorder.fail, write_batch_bytes=CHUNK
+    )
+
+    real_write_all = download_pipeline._write_all
+
+    def failing_write_all(fd, chunks):
+        if jobs[0].bytes_written > 20_000 and not jobs[0].cancel_event.is_set():
+            raise OSError(28, "No space left on device")
+        return real_write_all(fd, chunks)
+
+    with patch.object(download_pipeline, "_write_all", side_effect=failing_write_all):
+        pipeline.run(jobs)
+
+    assert jobs[0].cancel_event.is_set()
+    assert [name for name, _ in recorder.failed] == ["A.hda"]
+    assert isinstance(recorder.failed[0][1], OSError)
+    assert recorder.finished == ["B.hda"]
+    assert not jobs[0].partial_path.exists() and not jobs[0].path.exists()
+
+
+def test_buffered_data_is_bounded_by_the_byte_limit(tmp_path):
+    contents = {"A.hda": _content("A", 400_000)}
+    recorder = _Recorder()
+    pipeline = DownloadPipeline(
+        _streamer(contents), recorder.finish, recorder.fail, buffer_limit_bytes=8 * CHUNK, write_batch_bytes=CHUNK
+    )
+
+    real_write_all = download_pipeline._write_all
+
+    def slow_write_all(fd, chunks):
+        time.sleep(0.002)
+        return real_write_all(fd, chunks)
+
+    with patch.object(download_pipeline, "_write_all", side_effect=slow_write_all):
+        stats = pipeline.run([DownloadJob("A.hda", tmp_path / "A.hda")])
+
+    assert stats["peak_buffered_bytes"] <= 8 * CHUNK
+    assert (tmp_path / "A.hda").read_bytes() == contents["A.hda"]
+
+
+def test_write_all_resumes_partial_vectored_writes(tmp_path):
+    if not hasattr(download_pipeline.os, "writev"):
+        pytest.skip("os.writev not available")
+    real_writev = download_pipeline.os.writev
+
+    def short_writev(fd, buffers):
+        # Write at most 5 bytes per call
+        head = bytes(buffers[0][:5])
+        return real_writev(fd, [head])
+
+    path = tmp_path / "out.bin"
+    with open(path, "wb", buffering=0) as output, patch.object(download_pipeline.os, "writev", short_writev):
+        calls = _write_all(output.fileno(), [b"hello ", b"", b"pipelined ", b"world"])
+
+    assert path.read_bytes() == b"hello pipelined world"
+    assert calls == 5
+
+
+@pytest.fixture
+def manager(tmp_path):
+    device_interface = Mock()
+    manager = FileOperationsManager(device_interface, download_dir=str(tmp_path / "downloads"), cache_dir=str(tmp_path))
+    yield manager
+    manager.shutdown()
+    manager.metadata_cache.close()
+
+
+def _wait_until_idle(manager, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while (manager.active_operations or manager.active_pipelines) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not manager.active_operations
+
+
+def test_manager_pipelined_download_updates_operations_and_metadata(manager):
+    contents = {"REC1.hda": _content("REC1", 30_000), "REC2.hda": _content("REC2", 45_000)}
+    for name, data in contents.items():
+        manager.metadata_cache.set_metadata(FileMetadata(name, len(data), 10.0, datetime.now(), f"/device/{name}"))
+    calls = []
+
+    async def stream_recording(recording_id, data_callback, progress_callback=None, file_size=None, cancel_event=None):
+        calls.append((recording_id, file_size, threading.current_thread().name))
+        _streamer(contents)(DownloadJob(recording_id, manager.download_dir / recording_id), data_callback)
+        return file_size
+
+    manager.device_interface.device_interface.stream_recording = stream_recording
+    updates = []
+
+    operation_ids = manager.queue_pipelined_download(
+        list(contents), lambda op: updates.append((op.filename, op.status))
+    )
+    _wait_until_idle(manager)
+
+    assert len(operation_ids) == 2
+    assert [(name, size) for name, size, _ in calls] == [("REC1.hda", 30_000), ("REC2.hda", 45_000)]
+    for name, data in contents.items():
+        assert (manager.download_dir / name).read_bytes() == data
+        metadata = manager.metadata_cache.get_metadata(name)
+        assert metadata.download_count == 1
+        assert metadata.local_path == str(manager.download_dir / name)
+        assert (name, FileOperationStatus.COMPLETED) in updates
+    assert manager.operation_stats["total_downloads"] == 2
+    assert manager.operation_stats["total_bytes_downloaded"] == 75_000
+
+
+def test_manager_cancels_a_pipelined_download(manager):
+    started = threading.Event()
+
+    async def stream_recording(recording_id, data_callback, progress_callback=None, file_size=None, cancel_event=None):
+        data_callback(b"x" * CHUNK)
+        started.set()
+        assert cancel_event.wait(5.0)
+        raise RuntimeError("Download failed: cancelled")
+
+    manager.device_interface.device_interface.stream_recording = stream_recording
+    updates = []
+
+    (operation_id,) = manager.queue_pipelined_download(["REC1.hda"], lambda op: updates.append(op.status))
+    assert started.wait(5.0)
+    assert manager.cancel_operation(operation_id)
+    _wait_until_idle(manager)
+
+    assert updates[-1] == FileOperationStatus.CANCELLED
+    assert manager.operation_stats["failed_operations"] == 0
+    assert list(manager.download_dir.iterdir()) == []
+
+
+def test_cancelling_a_pipelined_download_keeps_an_earlier_complete_copy(manager):
+    started = threading.Event()
+    earlier_copy = manager.download_dir / "REC1.hda"
+    earlier_copy.write_bytes(b"complete recording")
+
+    async def stream_recording(recording_id, data_callback, progress_callback=None, file_size=None, cancel_event=None):
+        data_callback(b"x" * CHUNK)
+        started.set()
+        assert cancel_event.wait(5.0)
+        raise RuntimeError("Download failed: cancelled")
+
+    manager.device_interface.device_interface.stream_recording = stream_recording
+
+    (operation_id,) = manager.queue_pipelined_download(["REC1.hda"])
+    assert started.wait(5.0)
+    assert manager.cancel_operation(operation_id)
+    _wait_until_idle(manager)
+
+    assert list(manager.download_dir.iterdir()) == [earlier_copy]
+    assert earlier_copy.read_bytes() == b"complete recording"
+
+
+@pytest.mark.asyncio
+async def test_adapter_streams_chunks_and_passes_the_cancel_event(tmp_path):
+    with patch("desktop_device_adapter.HiDockJensen") as mock_jensen_cls:
+        mock_jensen = mock_jensen_cls.return_value
+        mock_jensen.is_connected.return_value = True
+        adapter = DesktopDeviceAdapter()
+
+    def fake_stream_file(filename, file_length, data_callback, progress_callback, timeout_s, cancel_event):
+        assert not cancel_event.is_set()
+        for _ in range(4):
+            data_callback(b"\1" * 256)
+            progress_callback(256, file_length)
+        return "OK"
+
+    mock_jensen.stream_file.side_effect = fake_stream_file
+    chunks = []
+
+    received = await adapter.stream_recording("REC1.hda", chunks.append, file_size=1024, cancel_event=threading.Event())
+
+    assert received == 1024
+    assert b"".join(chunks) == b"\1" * 1024
+
+    # A failed download does not leave an empty file behind
+    mock_jensen.stream_file.side_effect = None
+    mock_jensen.stream_file.return_value = "fail_disconnected"
+    with pytest.raises(RuntimeError):
+        await adapter.download_recording("REC1.hda", str(tmp_path / "REC1.hda"), file_size=1024)
+    assert not (tmp_path / "REC1.hda").exists()
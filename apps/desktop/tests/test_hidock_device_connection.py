@@ -46,6 +46,18 @@ class TestHiDockJensenConnection:
             idVendor=DEFAULT_VENDOR_ID, idProduct=DEFAULT_PRODUCT_ID, backend=jensen_device.usb_backend
         )
 
+    @patch("hidock_device.usb.core.find")
+    def test_find_device_selects_usb_address(self, mock_find, jensen_device):
+        """Test _find_device only matches the device at usb_address when one is set."""
+        mock_find.return_value = None
+        jensen_device.usb_address = (1, 7)
+
+        jensen_device._find_device(DEFAULT_VENDOR_ID, DEFAULT_PRODUCT_ID)
+
+        match = mock_find.call_args.kwargs["custom_match"]
+        assert match(Mock(bus=1, address=7))
+        assert not match(Mock(bus=1, address=8))
+
     @patch("hidock_device.usb.core.find")
     def test_find_device_string_descriptor_error(self, mock_find, jensen_device):
         """Test _find_device with string descriptor errors - covering lines 313-328."""
@@ -12,7 +12,7 @@ from unittest.mock import Mock, patch
 import pytest
 import usb.core
 from constants import CMD_DELETE_FILE, CMD_GET_FILE_BLOCK, CMD_GET_FILE_COUNT, CMD_GET_FILE_LIST, CMD_TRANSFER_FILE
-from hidock_device import HiDockJensen
+from hidock_device import FileListStreamParser, HiDockJensen
 
 
 class TestHiDockJensenFileListOperations:
@@ -753,3 +753,82 @@ class TestHiDockJensenGetFileBlock:
             struct.pack(">I", offset) + struct.pack(">I", length) + filename.encode("ascii", errors="ignore")
         )
         mock_send.assert_called_once_with(CMD_GET_FILE_BLOCK, expected_body, timeout_ms=5000)
+
+
+def _file_list_entry(name, length, version=1):
+    entry = bytearray([version])
+    entry.extend(struct.pack(">I", len(name))[1:])
+    entry.extend(name.encode())
+    entry.extend(struct.pack(">I", length))
+    entry.extend(b"\x00" * 6)
+    entry.extend(bytes(range(16)))
+    return bytes(entry)
+
+
+class TestFileListStreamParser:
+    """Test incremental parsing of the file list stream."""
+
+    @pytest.fixture
+    def jensen_device(self):
+        device = HiDockJensen(Mock())
+        device.device = Mock()
+        device.ep_in = Mock()
+        device.ep_out = Mock()
+        device.is_connected_flag = True
+        device.device_info = {"versionNumber": 12345}
+        return device
+
+    @pytest.fixture
+    def file_list_data(self):
+        names = [f"2025May{day:02d}-1{day % 10}0000-Rec{day:02d}.hda" for day in range(1, 31)]
+        data = bytearray([0xFF, 0xFF]) + struct.pack(">I", len(names))
+        for i, name in enumerate(names):
+            data += _file_list_entry(name, 32000 * (i + 1), version=1 + i % 3)
+        return names, bytes(data)
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 512, 100000])
+    def test_matches_batch_parser_for_any_chunking(self, jensen_device, file_list_data, chunk_size):
+        names, data = file_list_data
+        parser = FileListStreamParser(jensen_device._build_file_list_entry)
+
+        for start in range(0, len(data), chunk_size):
+            parser.feed(data[start : start + chunk_size])
+
+        assert parser.is_complete
+        assert parser.pending_bytes == 0
+        assert parser.files == jensen_device._parse_file_list_chunks([data])
+        assert [f["name"] for f in parser.files] == names
+
+    def test_partial_entry_is_carried_over(self, jensen_device):
+        entry = _file_list_entry("REC001.wav", 1000)
+        parser = FileListStreamParser(jensen_device._build_file_list_entry)
+
+        assert parser.feed(b"\xff\xff" + struct.pack(">I", 1) + entry[:10]) == []
+        assert not parser.is_complete
+        new_files = parser.feed(entry[10:])
+        assert [f["name"] for f in new_files] == ["REC001.wav"]
+        assert new_files[0]["signature"] == bytes(range(16)).hex()
+        assert parser.is_complete
+
+    def test_list_files_completes_on_count_and_streams_batches(self, jensen_device, file_list_data):
+        names, data = file_list_data
+        chunks = [data[i : i + 400] for i in range(0, len(data), 400)]
+        responses = [{"id": CMD_GET_FILE_LIST, "sequence": 1, "body": c} for c in chunks]
+        batches = []
+
+        with patch.object(jensen_device, "_send_command", return_value=1):
+            with patch.object(jensen_device, "_receive_response") as mock_receive:
+                # No empty terminator: only the data chunks, then silence
+                mock_receive.side_effect = responses + [None] * 20
+                result = jensen_device.list_files(
+                    batch_callback=lambda new, parsed, expected: batches.append((len(new), parsed, expected))
+                )
+
+        assert result["totalFiles"] == len(names)
+        assert "error" not in result
+        # All data chunks plus one short drain for a possible terminator - no timeout loop
+        assert mock_receive.call_count == len(chunks) + 1
+        assert mock_receive.call_args.kwargs["timeout_ms"] == 200
+        assert len(batches) > 1
+        assert batches[-1][1:] == (len(names), len(names))
+        assert sum(b[0] for b in batches) == len(names)
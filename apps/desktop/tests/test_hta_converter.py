@@ -508,6 +508,114 @@ class TestErrorHandling:
                         assert result is None
 
 
+class TestConversionCache:
+    """Test the persistent, content-keyed conversion cache."""
+
+    PCM = b"\x01\x00\x02\x00" * 4000  # 8000 frames of 16-bit mono
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.cache_dir = tempfile.mkdtemp()
+        self.source_dir = tempfile.mkdtemp()
+        self.converter = HTAConverter(cache_dir=self.cache_dir)
+
+    def _recording(self, name="REC001.hda", content=b"recording-1"):
+        path = os.path.join(self.source_dir, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def test_recording_is_converted_once(self):
+        """Test repeated requests reuse the cached conversion."""
+        source = self._recording()
+
+        with patch.object(HTAConverter, "_parse_hta_file", return_value=(self.PCM, 16000, 1)) as mock_parse:
+            first = self.converter.get_or_convert(source)
+            second = self.converter.convert_hta_to_wav(source)
+
+        assert first == second
+        assert os.path.dirname(first) == self.cache_dir
+        mock_parse.assert_called_once_with(source)
+        with wave.open(first, "rb") as wav_file:
+            assert (wav_file.getframerate(), wav_file.getnframes()) == (16000, 8000)
+        assert self.converter.cache.get_statistics()["hits"] == 1
+
+    def test_cache_is_keyed_by_content_and_settings(self):
+        """Test renamed copies hit while changed content or output settings miss."""
+        source = self._recording()
+        renamed = self._recording("renamed.hda")
+        changed = self._recording("REC002.hda", b"recording-2")
+
+        with patch.object(HTAConverter, "_parse_hta_file", return_value=(self.PCM, 16000, 1)) as mock_parse:
+            original = self.converter.get_or_convert(source)
+            assert self.converter.get_or_convert(renamed) == original
+            assert self.converter.get_or_convert(changed) != original
+            resampled = self.converter.get_or_convert(source, sample_rate=8000)
+
+        assert mock_parse.call_count == 3
+        with wave.open(resampled, "rb") as wav_file:
+            assert wav_file.getframerate() == 8000
+
+    def test_least_recently_used_conversions_are_evicted(self):
+        """Test the cache stays within its size budget by evicting the oldest entries."""
+        converter = HTAConverter(cache_dir=self.cache_dir, cache_max_size_bytes=len(self.PCM) * 2 + 200)
+        sources = [self._recording(f"REC{i}.hda", f"recording-{i}".encode()) for i in range(3)]
+
+        with patch.object(HTAConverter, "_parse_hta_file", return_value=(self.PCM, 16000, 1)):
+            first, second = converter.get_or_convert(sources[0]), converter.get_or_convert(sources[1])
+            converter.get_or_convert(sources[0])  # touch, so the second is now least recently used
+            third = converter.get_or_convert(sources[2])
+
+        assert os.path.exists(first) and os.path.exists(third)
+        assert not os.path.exists(second)
+        stats = converter.cache.get_statistics()
+        assert (stats["entries"], stats["evictions"]) == (2, 1)
+
+    def test_failed_conversion_leaves_nothing_behind(self):
+        """Test a failed conversion neither caches an entry nor leaves a partial file."""
+        source = self._recording()
+
+        with patch.object(HTAConverter, "_parse_hta_file", return_value=(None, 0, 0)):
+            assert self.converter.get_or_convert(source) is None
+
+        assert self.converter.cache.get_statistics()["entries"] == 0
+        assert not [name for name in os.listdir(self.cache_dir) if name.endswith(".part")]
+
+    def test_concurrent_requests_share_one_conversion(self):
+        """Test simultaneous requests for the same recording convert it only once."""
+        import threading
+
+        source = self._recording()
+        results = []
+
+        def slow_parse(_path):
+            threading.Event().wait(0.05)
+            return self.PCM, 16000, 1
+
+        with patch.object(HTAConverter, "_parse_hta_file", side_effect=slow_parse) as mock_parse:
+            threads = [
+                threading.Thread(target=lambda: results.append(self.converter.get_or_convert(source)))
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert mock_parse.call_count == 1
+        assert len(set(results)) == 1 and results[0]
+
+    def test_deleted_cache_file_is_reconverted(self):
+        """Test an entry whose file was removed is treated as a miss."""
+        source = self._recording()
+
+        with patch.object(HTAConverter, "_parse_hta_file", return_value=(self.PCM, 16000, 1)) as mock_parse:
+            os.remove(self.converter.get_or_convert(source))
+            assert os.path.exists(self.converter.get_or_convert(source))
+
+        assert mock_parse.call_count == 2
+
+
 class TestModuleIntegration:
     """Test module-level integration."""
 
@@ -0,0 +1,168 @@
+"""
+Tests for the software Jensen device simulator, driving the real HiDockJensen transport against it.
+"""
+
+import time
+from unittest.mock import patch
+
+import pytest
+import usb.core
+
+from hidock_device import HiDockJensen
+from jensen_simulator import SimulatedJensenDevice, SimulatorConfig, encode_file_list, generate_recordings
+
+
+def _connected(config=None):
+    device = SimulatedJensenDevice(config or SimulatorConfig(file_count=20, max_file_size=256 * 1024))
+    jensen = HiDockJensen(object())
+    device.attach(jensen)
+    return device, jensen
+
+
+class TestSyntheticRecordings:
+    """Test deterministic generation of recordings and content."""
+
+    def test_same_seed_same_recordings(self):
+        first = generate_recordings(SimulatorConfig(seed=7, file_count=50))
+        second = generate_recordings(SimulatorConfig(seed=7, file_count=50))
+        other = generate_recordings(SimulatorConfig(seed=8, file_count=50))
+
+        assert encode_file_list(first) == encode_file_list(second)
+        assert encode_file_list(first) != encode_file_list(other)
+        assert len({r.name for r in first}) == 50
+
+    def test_content_is_stable_across_offsets(self):
+        recording = generate_recordings(SimulatorConfig(file_count=1, min_file_size=300000))[0]
+        whole = recording.read(0, recording.length)
+
+        assert len(whole) == recording.length
+        assert recording.read(70000, 100000) == whole[70000:170000]
+        assert recording.read(recording.length - 10, 100) == whole[-10:]
+
+
+class TestSimulatedCommands:
+    """Test the common commands through HiDockJensen."""
+
+    def test_device_info_and_card_info(self):
+        device, jensen = _connected()
+
+        info = jensen.get_device_info()
+        assert info["versionCode"] == "6.2.9"
+        assert info["sn"] == "SIMJENSEN0000001"
+
+        card = jensen.get_card_info()
+        assert card["capacity"] == device.config.capacity_mb
+        assert card["used"] == sum(r.length for r in device.recordings) // (1024 * 1024)
+
+    def test_list_thousands_of_files(self):
+        device, jensen = _connected(SimulatorConfig(file_count=3000, file_list_chunk_size=1000))
+        batches = []
+
+        result = jensen.list_files(batch_callback=lambda new, parsed, expected: batches.append(parsed))
+
+        assert result["totalFiles"] == 3000
+        assert "error" not in result
+        assert [f["name"] for f in result["files"]] == [r.name for r in device.recordings]
+        assert result["files"][0]["time"] is not None
+        assert len(batches) > 10 and batches[-1] == 3000
+
+    def test_stream_file_and_block_read(self):
+        device, jensen = _connected(SimulatorConfig(file_count=3, transfer_chunk_size=5000, max_packet_size=64))
+        recording = device.recordings[1]
+        received = bytearray()
+
+        status = jensen.stream_file(recording.name, recording.length, received.extend)
+
+        assert status == "OK"
+        assert bytes(received) == recording.read(0, recording.length)
+        assert jensen.get_file_block(recording.name, 1000, 256) == bytes(received[1000:1256])
+        assert jensen.read_file_partial(recording.name, 1000, 256) == bytes(received[1000:1256])
+        assert jensen.read_file_partial(recording.name, recording.length - 10, 256) == bytes(received[-10:])
+
+    def test_delete_file(self):
+        device, jensen = _connected()
+        name = device.recordings[0].name
+
+        assert jensen.delete_file(name)["result"] == "success"
+        assert jensen.delete_file(name)["result"] == "not-exists"
+        assert jensen.get_file_count()["count"] == 19
+
+    def test_connect_through_pyusb_surface(self):
+        device = SimulatedJensenDevice(SimulatorConfig(file_count=5))
+        jensen = HiDockJensen(object())
+
+        with patch("hidock_device.usb.core.find", return_value=device):
+            connected, error = jensen.connect(auto_retry=False)
+
+        assert connected, error
+        assert jensen.ep_in is device.ep_in
+        assert jensen.list_files()["totalFiles"] == 5
+        jensen.disconnect()
+        assert not jensen.is_connected()
+
+
+class TestLinkModel:
+    """Test bandwidth, latency and read timeouts."""
+
+    def test_read_times_out_without_pending_data(self):
+        device = SimulatedJensenDevice(SimulatorConfig(file_count=0))
+        with pytest.raises(usb.core.USBTimeoutError):
+            device.ep_in.read(512, timeout=10)
+
+    def test_bandwidth_limits_transfer_rate(self):
+        config = SimulatorConfig(file_count=1, min_file_size=200000, max_file_size=200000, bandwidth_bps=2_000_000)
+        device, jensen = _connected(config)
+
+        start = time.monotonic()
+        status = jensen.stream_file(device.recordings[0].name, 200000, lambda chunk: None)
+        elapsed = time.monotonic() - start
+
+        assert status == "OK"
+        assert elapsed >= 0.09
+
+
+class TestFaultInjection:
+    """Test stalls, desync and dropped terminators."""
+
+    def test_stalls_delay_but_complete_the_listing(self):
+        config = SimulatorConfig(file_count=200, file_list_chunk_size=512, stall_probability=0.2, stall_s=0.05)
+        device, jensen = _connected(config)
+
+        result = jensen.list_files()
+
+        assert result["totalFiles"] == 200
+        assert device.stats["stalls"] > 0
+
+    def test_desync_is_recovered_for_plain_commands(self):
+        device, jensen = _connected(SimulatorConfig(file_count=5, desync_probability=1.0))
+
+        assert jensen.get_card_info() is not None
+        assert device.stats["desyncs"] >= 1
+
+    def test_desync_fails_a_stream_fast(self):
+        config = SimulatorConfig(file_count=1, transfer_chunk_size=1024, desync_probability=1.0)
+        device, jensen = _connected(config)
+        jensen._last_health_check = time.time()  # the health check would absorb the first desync
+
+        status = jensen.stream_file(device.recordings[0].name, device.recordings[0].length, lambda c: None)
+
+        assert status == "fail_comms_error"
+
+    def test_dropped_terminator_completes_on_count(self):
+        device, jensen = _connected(SimulatorConfig(file_count=50, drop_terminators=True))
+
+        result = jensen.list_files()
+
+        assert result["totalFiles"] == 50
+        assert device.stats["dropped_terminators"] == 1
+
+    def test_faults_are_deterministic_for_a_seed(self):
+        def stalls(seed):
+            config = SimulatorConfig(
+                seed=seed, file_count=100, file_list_chunk_size=256, stall_probability=0.3, stall_s=0
+            )
+            device, jensen = _connected(config)
+            jensen.list_files()
+            return device.stats["stalls"]
+
+        assert stalls(3) == stalls(3)
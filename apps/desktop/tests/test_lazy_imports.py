@@ -0,0 +1,118 @@
+"""
+Tests for lazy imports, deferred objects, the import timer and the cached FFmpeg probe.
+"""
+
+import os
+import sys
+from unittest.mock import Mock, patch
+
+from lazy_imports import ImportTimer, LazyImport, LazyObject, is_loaded
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from scripts import runtime_deps_check  # noqa: E402
+
+
+class TestLazyImport:
+    """Test module and attribute proxies."""
+
+    def test_module_is_imported_on_first_use(self):
+        sys.modules.pop("colorsys", None)
+        colorsys = LazyImport("colorsys")
+
+        assert "colorsys" not in sys.modules
+        assert not colorsys.is_loaded
+        assert colorsys.rgb_to_hsv(1, 0, 0)[0] == 0
+        assert colorsys.is_loaded
+
+    def test_attribute_proxy_is_callable(self):
+        dumps = LazyImport("json", "dumps")
+        assert dumps({"a": 1}) == '{"a": 1}'
+        assert dumps.load() is __import__("json").dumps
+
+
+class TestLazyObject:
+    """Test deferred construction."""
+
+    def test_built_once_on_first_access(self):
+        factory = Mock(return_value=Mock(state="stopped"))
+        player = LazyObject(factory)
+
+        assert player  # truthiness does not build
+        assert not is_loaded(player)
+        assert player.state == "stopped"
+        assert player.state == "stopped"
+        factory.assert_called_once()
+        assert is_loaded(player)
+
+    def test_attributes_set_before_build_are_applied(self):
+        target = Mock()
+        player = LazyObject(lambda: target)
+        callback = Mock()
+
+        player.on_state_changed = callback
+        assert player.on_state_changed is callback
+        assert not player.is_loaded
+
+        player.play()
+        assert target.on_state_changed is callback
+        target.play.assert_called_once()
+
+    def test_plain_objects_count_as_loaded(self):
+        assert is_loaded(object())
+
+
+class TestImportTimer:
+    """Test import time recording."""
+
+    def test_records_cumulative_and_self_time(self):
+        sys.modules.pop("fractions", None)
+        timer = ImportTimer().install()
+        try:
+            import fractions  # noqa: F401
+        finally:
+            timer.uninstall()
+
+        cumulative, self_time, depth = timer.records["fractions"]
+        assert depth == 0
+        assert 0 <= self_time <= cumulative
+        assert "fractions" in timer.report()
+        assert timer not in sys.meta_path
+
+
+class TestFfmpegProbeCache:
+    """Test the TTL cache around the FFmpeg probe."""
+
+    def test_positive_probe_is_reused(self, tmp_path):
+        ffmpeg = tmp_path / "ffmpeg"
+        ffmpeg.write_text("")
+        cache = str(tmp_path / "cache.json")
+        probe = Mock(return_value=Mock(returncode=0, stdout=f"{ffmpeg}\n"))
+
+        with (
+            patch.object(runtime_deps_check, "FFMPEG_PROBE_CACHE", cache),
+            patch.object(runtime_deps_check, "run_command", probe),
+        ):
+            assert runtime_deps_check.check_ffmpeg() == (True, str(ffmpeg))
+            assert runtime_deps_check.check_ffmpeg() == (True, str(ffmpeg))
+            assert probe.call_count == 1
+
+            ffmpeg.unlink()  # a vanished binary invalidates the cache
+            runtime_deps_check.check_ffmpeg()
+            assert probe.call_count == 2
+
+    def test_expired_or_missing_results_are_probed(self, tmp_path):
+        cache = str(tmp_path / "cache.json")
+        probe = Mock(return_value=Mock(returncode=1, stdout=""))
+
+        with (
+            patch.object(runtime_deps_check, "FFMPEG_PROBE_CACHE", cache),
+            patch.object(runtime_deps_check, "run_command", probe),
+        ):
+            assert runtime_deps_check.check_ffmpeg() == (False, None)
+            assert runtime_deps_check.check_ffmpeg() == (False, None)
+            assert probe.call_count == 2
+
+        runtime_deps_check._store_ffmpeg_path(__file__, cache)
+        assert runtime_deps_check._load_cached_ffmpeg_path(cache, ttl_seconds=0) is None
+        assert runtime_deps_check._load_cached_ffmpeg_path(cache) == __file__
@@ -0,0 +1,101 @@
+"""
+Tests for the opt-in performance tracer.
+"""
+
+import json
+
+from perf_trace import PerfTracer, SpanRecord
+
+
+class TestPerfTracer:
+    """Test span collection, aggregation and export."""
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = PerfTracer()
+
+        with tracer.span("device.command", "device"):
+            pass
+        traced = tracer.traced("work")(lambda x: x * 2)
+
+        assert traced(4) == 8
+        assert tracer.records() == []
+        assert "disabled" in tracer.format_aggregates()
+
+    def test_ring_buffer_keeps_latest_spans(self):
+        tracer = PerfTracer(capacity=3, enabled=True)
+
+        for i in range(5):
+            with tracer.span(f"span{i}"):
+                pass
+
+        assert [r.name for r in tracer.records()] == ["span2", "span3", "span4"]
+
+    def test_aggregates_percentiles(self):
+        tracer = PerfTracer(enabled=True)
+        for duration_ms in range(1, 101):
+            tracer._records.append(
+                SpanRecord("db.get_metadata", "db", 0, duration_ms * 1_000_000, 1, "MainThread", None)
+            )
+
+        stats = tracer.aggregates()["db.get_metadata"]
+
+        assert stats["count"] == 100
+        assert stats["p50_ms"] == 51
+        assert stats["p95_ms"] == 95
+        assert stats["max_ms"] == 100
+        assert "db.get_metadata" in tracer.format_aggregates()
+
+    def test_traced_decorator_and_errors(self):
+        tracer = PerfTracer(enabled=True)
+
+        @tracer.traced(category="calendar")
+        def enrich():
+            raise ValueError("boom")
+
+        try:
+            enrich()
+        except ValueError:
+            pass
+
+        record = tracer.records()[0]
+        assert record.name.endswith("enrich")
+        assert record.category == "calendar"
+        assert record.args == {"error": "ValueError"}
+
+    def test_chrome_trace_format(self, tmp_path):
+        tracer = PerfTracer(enabled=True)
+        with tracer.span("device.command.4", "device", size=512):
+            pass
+
+        path = tracer.export_chrome_trace(str(tmp_path / "trace.json"))
+        with open(path, encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+
+        complete = [e for e in events if e["ph"] == "X"]
+        assert complete[0]["name"] == "device.command.4"
+        assert complete[0]["cat"] == "device"
+        assert complete[0]["args"] == {"size": "512"}
+        assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in events)
+
+    def test_dump_on_exit(self, tmp_path):
+        tracer = PerfTracer(enabled=True)
+        assert tracer.dump_on_exit(str(tmp_path)) is None
+
+        with tracer.span("ui.populate_treeview", "ui"):
+            pass
+        path = tracer.dump_on_exit(str(tmp_path))
+
+        assert path.endswith(".trace.json")
+        assert len(list(tmp_path.glob("perf-*.json"))) == 2
+
+    def test_configure_from_config_and_environment(self, monkeypatch):
+        tracer = PerfTracer()
+        monkeypatch.delenv("HIDOCK_PERF_TRACE", raising=False)
+
+        tracer.configure({"performance_tracing_enabled": True})
+        assert tracer.enabled
+        tracer.configure({})
+        assert not tracer.enabled
+        monkeypatch.setenv("HIDOCK_PERF_TRACE", "1")
+        tracer.configure({})
+        assert tracer.enabled
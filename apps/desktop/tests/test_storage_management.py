@@ -5,8 +5,10 @@ This test suite covers storage monitoring, optimization, quota management,
 and analytics functionality for the HiDock storage management system.
 """
 
+import sys
 import threading
 from datetime import datetime
+from pathlib import Path
 from unittest.mock import Mock, patch
 
 import pytest
@@ -270,6 +272,119 @@ class TestStorageMonitor:
         assert mock_disk_usage.call_count >= len(self.test_paths)
 
 
+class TestEventDrivenStorageMonitor:
+    """Test event-driven monitoring with incremental usage updates."""
+
+    def _monitor(self, root, **kwargs):
+        monitor = StorageMonitor([str(root)], event_driven=True, reprobe_delay=60.0, **kwargs)
+        quota = StorageQuota(
+            max_total_size=10000, max_file_count=100, max_file_size=10000, retention_days=30, auto_cleanup_enabled=False
+        )
+        manager = StorageQuotaManager(quota, monitor)
+        warnings = []
+        warned = threading.Event()
+
+        def on_warning(path, violation, info):
+            warnings.append((violation["type"], info.used_space))
+            warned.set()
+
+        manager.add_warning_callback(on_warning)
+        return monitor, warnings, warned
+
+    def _wait_for_watcher(self, monitor):
+        for _ in range(200):
+            if monitor.watch_mode:
+                return
+            threading.Event().wait(0.01)
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+    def test_file_events_update_usage_without_reprobing(self, tmp_path):
+        with patch("storage_management.shutil.disk_usage", return_value=(10000, 7800, 2200)) as disk_usage:
+            monitor, warnings, warned = self._monitor(tmp_path)
+            try:
+                self._wait_for_watcher(monitor)
+                assert monitor.watch_mode == "inotify"
+                probes = disk_usage.call_count
+
+                (tmp_path / "sub").mkdir()
+                (tmp_path / "sub" / "rec.hda").write_bytes(b"x" * 300)
+
+                assert warned.wait(5.0)
+                assert ("warning_usage", 8100) in warnings
+                assert disk_usage.call_count == probes
+                assert monitor.get_storage_info(str(tmp_path))[str(tmp_path)].free_space == 1900
+                assert monitor.get_tracked_size(str(tmp_path)) == 300
+
+                warned.clear()
+                (tmp_path / "sub" / "rec.hda").unlink()
+                for _ in range(500):
+                    if monitor.storage_info[str(tmp_path)].used_space == 7800:
+                        break
+                    threading.Event().wait(0.01)
+                assert monitor.storage_info[str(tmp_path)].used_space == 7800
+                assert monitor.get_tracked_size(str(tmp_path)) == 0
+            finally:
+                monitor.stop_monitoring()
+        assert not monitor.monitoring_thread.is_alive()
+
+    def test_falls_back_to_disk_usage_polling_without_inotify(self, tmp_path):
+        usage = [(10000, 7800, 2200)]
+        with (
+            patch("storage_management.shutil.disk_usage", side_effect=lambda _path: usage[0]),
+            patch("storage_management._InotifyWatcher", side_effect=OSError("unsupported")),
+            patch.object(StorageMonitor, "_scan_sizes") as scan_sizes,
+        ):
+            monitor, warnings, warned = self._monitor(tmp_path, update_interval=0.05)
+            try:
+                self._wait_for_watcher(monitor)
+                assert monitor.watch_mode == "polling"
+
+                usage[0] = (10000, 8100, 1900)
+
+                assert warned.wait(5.0)
+                assert ("warning_usage", 8100) in warnings
+                scan_sizes.assert_not_called()
+            finally:
+                monitor.stop_monitoring()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+    def test_closes_watcher_when_wake_pipe_fails(self, tmp_path):
+        watcher = Mock()
+        with (
+            patch("storage_management.shutil.disk_usage", return_value=(10000, 7800, 2200)),
+            patch.object(StorageMonitor, "_start_watcher", return_value=watcher),
+            patch("storage_management.os.pipe", side_effect=OSError("too many files")),
+        ):
+            monitor, _, _ = self._monitor(tmp_path, update_interval=0.05)
+            try:
+                self._wait_for_watcher(monitor)
+                assert monitor.watch_mode == "polling"
+                watcher.close.assert_called_once()
+            finally:
+                monitor.stop_monitoring()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+    def test_unwatches_directories_moved_out_of_tree(self, tmp_path):
+        root = tmp_path / "watched"
+        (root / "meetings" / "2024").mkdir(parents=True)
+        (root / "meetings" / "2024" / "rec.hda").write_bytes(b"x" * 300)
+        with patch("storage_management.shutil.disk_usage", return_value=(10000, 7800, 2200)):
+            monitor = StorageMonitor([str(root)], update_interval=60.0)
+            monitor.stop_monitoring()
+            monitor._snapshot_sizes()
+            watcher = monitor._start_watcher()
+            try:
+                assert len(watcher.watches) == 3
+
+                (root / "meetings").rename(tmp_path / "archive")
+                monitor._apply_events(watcher, watcher.read_events())
+
+                assert list(watcher.watches.values()) == [str(root)]
+                assert monitor.get_tracked_size(str(root)) == 0
+            finally:
+                watcher.close()
+
+
 class TestStorageOptimizer:
     """Test the StorageOptimizer class."""
 
@@ -372,6 +487,143 @@ class TestStorageOptimizer:
         assert result is False
 
 
+class TestIncrementalFileIndex:
+    """Test the persisted file-stat index behind analyze_storage."""
+
+    def _make_tree(self, root):
+        for folder in ("a", "b/nested"):
+            (root / folder).mkdir(parents=True)
+        (root / "top.txt").write_bytes(b"x" * 10)
+        (root / "a" / "rec1.wav").write_bytes(b"x" * 100)
+        (root / "a" / "rec2.hda").write_bytes(b"x" * 200)
+        (root / "b" / "nested" / "rec1.wav").write_bytes(b"x" * 100)
+
+    def test_analysis_matches_tree(self, tmp_path):
+        root = tmp_path / "recordings"
+        self._make_tree(root)
+        optimizer = StorageOptimizer([str(root)], cache_dir=str(tmp_path / "cache"))
+
+        analytics = optimizer.analyze_storage()
+
+        assert analytics.total_files == 4
+        assert analytics.total_size == 410
+        assert analytics.file_type_distribution[".wav"] == {"count": 2, "total_size": 200, "avg_size": 100}
+        assert analytics.size_distribution == {"small": 4, "medium": 0, "large": 0, "huge": 0}
+        assert analytics.age_distribution["recent"] == 4
+        assert len(analytics.duplicate_files) == 1
+        key, paths = analytics.duplicate_files[0]
+        assert key.startswith("100_")
+        assert sorted(paths) == sorted([str(root / "a" / "rec1.wav"), str(root / "b" / "nested" / "rec1.wav")])
+
+    def test_unchanged_directories_are_not_listed(self, tmp_path):
+        root = tmp_path / "recordings"
+        self._make_tree(root)
+        optimizer = StorageOptimizer([str(root)], cache_dir=str(tmp_path / "cache"))
+        assert optimizer.refresh_file_index()["added"] == 4
+
+        (root / "a" / "rec3.wav").write_bytes(b"x" * 5)
+        counts = optimizer.refresh_file_index()
+
+        assert counts == {"added": 1, "updated": 0, "removed": 0, "dirs_listed": 1}
+        assert optimizer.analyze_storage().total_files == 5
+
+    def test_removed_files_and_directories_leave_the_index(self, tmp_path):
+        import shutil
+
+        root = tmp_path / "recordings"
+        self._make_tree(root)
+        optimizer = StorageOptimizer([str(root)], cache_dir=str(tmp_path / "cache"))
+        optimizer.refresh_file_index()
+
+        (root / "top.txt").unlink()
+        shutil.rmtree(root / "b")
+        counts = optimizer.refresh_file_index()
+
+        assert counts["removed"] == 2
+        analytics = optimizer.analyze_storage()
+        assert analytics.total_files == 2
+        assert analytics.duplicate_files == []
+
+    def test_full_rescan_sees_in_place_rewrites(self, tmp_path):
+        import os
+
+        root = tmp_path / "recordings"
+        self._make_tree(root)
+        optimizer = StorageOptimizer([str(root)], cache_dir=str(tmp_path / "cache"))
+        optimizer.refresh_file_index()
+
+        target = root / "a" / "rec1.wav"
+        dir_stat = os.stat(root / "a")
+        target.write_bytes(b"x" * 1000)
+        os.utime(root / "a", ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+
+        assert optimizer.analyze_storage().total_size == 410
+        assert optimizer.analyze_storage(full_rescan=True).total_size == 1310
+
+
+class TestContentHashDuplicates:
+    """Test staged content-hash duplicate detection and removal."""
+
+    def _optimizer(self, tmp_path):
+        root = tmp_path / "recordings"
+        root.mkdir()
+        return root, StorageOptimizer([str(root)], cache_dir=str(tmp_path / "cache"))
+
+    def test_renamed_copies_found_and_same_name_differences_ignored(self, tmp_path):
+        root, optimizer = self._optimizer(tmp_path)
+        (root / "one").mkdir()
+        (root / "two").mkdir()
+        big = bytes(range(256)) * 1024  # larger than the two partial-hash blocks
+        (root / "one" / "meeting.wav").write_bytes(big)
+        (root / "two" / "meeting-copy.wav").write_bytes(big)
+        (root / "one" / "same.wav").write_bytes(b"a" * 500)
+        (root / "two" / "same.wav").write_bytes(b"b" * 500)
+        (root / "one" / "middle.bin").write_bytes(b"x" * 100000 + b"1" + b"x" * 100000)
+        (root / "two" / "middle.bin").write_bytes(b"x" * 100000 + b"2" + b"x" * 100000)
+
+        optimizer.refresh_file_index()
+        duplicates = optimizer.find_duplicates()
+
+        assert len(duplicates) == 1
+        assert sorted(duplicates[0][1]) == [str(root / "one" / "meeting.wav"), str(root / "two" / "meeting-copy.wav")]
+        assert duplicates[0][0].startswith(f"{len(big)}_")
+
+    def test_hashes_are_cached_by_inode_size_and_mtime(self, tmp_path):
+        root, optimizer = self._optimizer(tmp_path)
+        data = b"z" * 300000
+        (root / "a.wav").write_bytes(data)
+        (root / "b.wav").write_bytes(data)
+        optimizer.refresh_file_index()
+        first = optimizer.find_duplicates()
+
+        with (
+            patch("storage_management._hash_partial") as partial,
+            patch("storage_management._hash_full") as full,
+        ):
+            assert optimizer.find_duplicates() == first
+        partial.assert_not_called()
+        full.assert_not_called()
+
+    def test_remove_duplicates_keeps_one_verified_copy(self, tmp_path):
+        root, optimizer = self._optimizer(tmp_path)
+        for name in ("a.wav", "b.wav", "c.wav"):
+            (root / name).write_bytes(b"same content")
+        analytics = optimizer.analyze_storage()
+        suggestion = optimizer.generate_optimization_suggestions(analytics)[0]
+
+        assert suggestion.type == OptimizationType.DUPLICATE_REMOVAL
+        assert suggestion.potential_savings == 2 * len(b"same content")
+
+        (root / suggestion.files_affected[0]).write_bytes(b"edited since analysis")
+        result = optimizer.execute_optimization(suggestion)
+
+        assert result["files_processed"] == 1
+        assert len(result["errors"]) == 1
+        assert sorted(p.name for p in root.iterdir()) == sorted(
+            ["a.wav", Path(suggestion.files_affected[0]).name]
+        )
+
+
 class TestStorageQuotaManager:
     """Test the StorageQuotaManager class."""
 
@@ -0,0 +1,298 @@
+"""
+Tests for adaptive transfer timeouts and retried transfers.
+"""
+
+import threading
+import zlib
+from unittest.mock import Mock, patch
+
+import pytest
+
+import transfer_policy
+from hidock_device import HiDockJensen
+from jensen_simulator import SimulatedJensenDevice, SimulatorConfig
+from transfer_policy import (
+    DEFAULT_STALL_TIMEOUT_S,
+    MAX_STALL_TIMEOUT_S,
+    MIN_STALL_TIMEOUT_S,
+    MIN_TRANSFER_TIMEOUT_S,
+    STREAM,
+    TransferPolicy,
+    stream_with_retry,
+)
+
+MB = 1024 * 1024
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _transfer(policy, clock, size, seconds, chunks=10, kind=STREAM, succeeded=True, trailing_idle=0.0):
+    monitor = policy.begin(kind, size)
+    for _ in range(chunks):
+        clock.now += seconds / chunks
+        monitor.on_chunk(size // chunks)
+    clock.now += trailing_idle
+    policy.record(monitor, succeeded)
+    return monitor
+
+
+class TestTransferPolicy:
+    """Test limits derived from measured transfers."""
+
+    def test_defaults_before_anything_is_measured(self):
+        policy = TransferPolicy()
+
+        assert policy.stall_timeout() == DEFAULT_STALL_TIMEOUT_S
+        assert policy.transfer_timeout(100 * 1024) == MIN_TRANSFER_TIMEOUT_S
+        assert policy.transfer_timeout(4096 * MB) > 3600  # large recordings are not cut off at a fixed limit
+
+    def test_timeouts_follow_measured_throughput_and_file_size(self):
+        clock = FakeClock()
+        policy = TransferPolicy(clock=clock)
+        for _ in range(3):
+            _transfer(policy, clock, 10 * MB, seconds=5.0)  # 2 MB/s
+
+        assert policy.rates[STREAM].value == pytest.approx(2 * MB)
+        assert policy.expected_duration(1024 * MB) == pytest.approx(512)
+        assert policy.transfer_timeout(2048 * MB) == pytest.approx(2 * policy.transfer_timeout(1024 * MB), rel=0.05)
+        assert policy.transfer_timeout(1 * MB) == MIN_TRANSFER_TIMEOUT_S
+
+    def test_stall_threshold_follows_gaps_of_healthy_transfers(self):
+        clock = FakeClock()
+        policy = TransferPolicy(clock=clock)
+        _transfer(policy, clock, 10 * MB, seconds=2.0, chunks=10)  # 0.2 s between chunks
+        assert policy.stall_timeout() == MIN_STALL_TIMEOUT_S
+
+        _transfer(policy, clock, 10 * MB, seconds=20.0, chunks=10)  # 2 s between chunks
+        assert policy.stall_timeout() == pytest.approx(8.0)
+
+        _transfer(policy, clock, 10 * MB, seconds=200.0, chunks=10)
+        assert policy.stall_timeout() == MAX_STALL_TIMEOUT_S
+
+    def test_failures_do_not_teach_throughput_and_stalls_are_counted(self):
+        clock = FakeClock()
+        policy = TransferPolicy(clock=clock)
+        _transfer(policy, clock, 10 * MB, seconds=100.0, succeeded=False, trailing_idle=DEFAULT_STALL_TIMEOUT_S)
+
+        assert policy.rates[STREAM].samples == 0
+        assert policy.stats["failures"] == 1
+        assert policy.stats["stalls"] == 1
+
+    def test_backoff_uses_measured_recovery_time(self):
+        policy = TransferPolicy()
+        assert [policy.backoff(n) for n in (1, 2, 3)] == [1.0, 2.0, 4.0]
+
+        for seconds in (0.2, 0.3, 5.0):
+            policy.record_recovery(seconds)
+        assert policy.backoff(1) == pytest.approx(0.3)
+        assert policy.backoff(2) == pytest.approx(0.6)
+        assert policy.backoff(20) == transfer_policy.MAX_BACKOFF_S
+
+    def test_list_timeout_scales_with_file_count(self):
+        policy = TransferPolicy()
+        policy.record_listing(1000, 2.0)  # 500 entries/s
+
+        assert policy.list_timeout(100) == transfer_policy.MIN_LIST_TIMEOUT_S
+        assert policy.list_timeout(20000) == pytest.approx(3 * 40 + policy.stall_timeout())
+        assert policy.list_timeout() == pytest.approx(3 * 2 + policy.stall_timeout())  # sized for the last listing
+
+
+class TestStreamWithRetry:
+    """Test the retry loop."""
+
+    CONTENT = bytes(range(256)) * 4096  # 1 MB
+
+    def _device(self, fail_after, status="fail_comms_error", replay=None, partial_reads=True):
+        """
+        A device whose first stream fails after `fail_after` bytes; later streams send `replay`
+        (default CONTENT). Partial reads return CONTENT, or nothing without `partial_reads`.
+        """
+        device = Mock()
+        device.is_connected.return_value = True
+        attempts = []
+
+        def read_file_partial(filename, offset, length, timeout_s):
+            return self.CONTENT[offset : offset + length] if partial_reads else None
+
+        def stream_file(filename, file_length, data_callback, progress_callback, timeout_s):
+            content = self.CONTENT if not attempts else (replay or self.CONTENT)
+            end = fail_after if not attempts else file_length
+            attempts.append(end)
+            for start in range(0, end, 4096):
+                data_callback(content[start : min(start + 4096, end)])
+                progress_callback(min(start + 4096, end), file_length)
+            return status if end < file_length else "OK"
+
+        device.stream_file.side_effect = stream_file
+        device.read_file_partial.side_effect = read_file_partial
+        return device
+
+    def test_failed_stream_is_resumed_from_the_delivered_offset(self):
+        device = self._device(fail_after=300_000)
+        policy = TransferPolicy()
+        first_backoff = policy.backoff(1)
+        received = bytearray()
+        progress = []
+
+        with patch.object(transfer_policy.time, "sleep") as sleep:
+            status = stream_with_retry(
+                device,
+                "REC1.hda",
+                len(self.CONTENT),
+                received.extend,
+                progress_callback=lambda done, total: progress.append(done),
+                policy=policy,
+            )
+
+        assert status == "OK"
+        assert bytes(received) == self.CONTENT
+        assert device.stream_file.call_count == 1
+        assert device.read_file_partial.call_args_list[0].args[1:3] == (300_000, transfer_policy.RESUME_BLOCK_SIZE)
+        sleep.assert_called_once_with(first_backoff)
+        assert policy.stats["retries"] == 1
+        assert policy.stats["resumes"] == 1
+        assert progress == sorted(progress) and progress[-1] == len(self.CONTENT)
+
+    def test_failed_resume_falls_back_to_a_checked_restart(self):
+        device = self._device(fail_after=300_000, partial_reads=False)
+        received = bytearray()
+        progress = []
+
+        with patch.object(transfer_policy.time, "sleep") as sleep:
+            status = stream_with_retry(
+                device,
+                "REC1.hda",
+                len(self.CONTENT),
+                received.extend,
+                progress_callback=lambda done, total: progress.append(done),
+                policy=TransferPolicy(),
+            )
+
+        assert status == "OK"
+        assert bytes(received) == self.CONTENT
+        assert device.read_file_partial.call_count == 1
+        assert device.stream_file.call_count == 2
+        assert sleep.call_count == 2
+        assert progress == sorted(progress) and progress[-1] == len(self.CONTENT)
+
+    def test_resume_from_bytes_received_earlier(self):
+        device = self._device(fail_after=0)
+        received = bytearray()
+        offset = 500_000
+
+        status = stream_with_retry(
+            device,
+            "REC1.hda",
+            len(self.CONTENT),
+            received.extend,
+            offset=offset,
+            offset_crc=zlib.crc32(self.CONTENT[:offset]),
+        )
+
+        assert status == "OK"
+        assert bytes(received) == self.CONTENT[offset:]
+        device.stream_file.assert_not_called()
+
+    def test_replay_that_differs_from_delivered_bytes_fails(self):
+        changed = bytes([255]) + self.CONTENT[1:]
+        device = self._device(fail_after=300_000, replay=changed, partial_reads=False)
+        received = bytearray()
+
+        with patch.object(transfer_policy.time, "sleep"):
+            status = stream_with_retry(device, "REC1.hda", len(self.CONTENT), received.extend)
+
+        assert status == "fail_data_mismatch"
+        assert bytes(received) == self.CONTENT[:300_000]
+
+    def test_non_retryable_failures_are_returned_immediately(self):
+        device = self._device(fail_after=300_000, status="fail_file_io")
+        with patch.object(transfer_policy.time, "sleep") as sleep:
+            status = stream_with_retry(device, "REC1.hda", len(self.CONTENT), lambda chunk: None)
+
+        assert status == "fail_file_io"
+        sleep.assert_not_called()
+        assert device.stream_file.call_count == 1
+
+    def test_retries_stop_when_streams_keep_failing(self):
+        device = self._device(fail_after=300_000)
+        device.stream_file.side_effect = lambda **kwargs: "fail_comms_error"
+
+        with patch.object(transfer_policy.time, "sleep"):
+            status = stream_with_retry(device, "REC1.hda", len(self.CONTENT), lambda chunk: None, max_retries=2)
+
+        assert status == "fail_comms_error"
+        assert device.stream_file.call_count == 3
+
+    def test_cancel_during_backoff(self):
+        device = self._device(fail_after=300_000)
+        cancel_event = threading.Event()
+        policy = TransferPolicy()
+        policy.record_recovery(10.0)
+
+        def stream_file(**kwargs):
+            kwargs["data_callback"](self.CONTENT[:1000])
+            cancel_event.set()
+            return "fail_timeout"
+
+        device.stream_file.side_effect = stream_file
+        status = stream_with_retry(
+            device, "REC1.hda", len(self.CONTENT), lambda chunk: None, cancel_event=cancel_event, policy=policy
+        )
+
+        assert status == "cancelled"
+        assert device.stream_file.call_count == 1
+
+    @pytest.mark.parametrize("partial_reads, stream_calls", [(True, 1), (False, 2)])
+    def test_retry_against_the_simulator(self, partial_reads, stream_calls):
+        config = SimulatorConfig(
+            file_count=1, min_file_size=700_000, max_file_size=800_000, partial_reads=partial_reads
+        )
+        device = SimulatedJensenDevice(config)
+        jensen = device.attach(HiDockJensen(object()))
+        recording = device.recordings[0]
+        real_stream_file = jensen.stream_file
+        calls = []
+
+        def flaky_stream_file(filename, file_length, data_callback, **kwargs):
+            calls.append(filename)
+            if len(calls) == 1:
+                data_callback(recording.read(0, 123_456))
+                return "fail_timeout"
+            return real_stream_file(filename, file_length, data_callback, **kwargs)
+
+        received = bytearray()
+        with (
+            patch.object(jensen, "stream_file", side_effect=flaky_stream_file),
+            patch.object(transfer_policy.time, "sleep"),
+        ):
+            status = stream_with_retry(
+                jensen, recording.name, recording.length, received.extend, policy=TransferPolicy()
+            )
+
+        assert status == "OK"
+        assert len(calls) == stream_calls
+        assert bytes(received) == recording.read(0, recording.length)
+
+    def test_stream_file_teaches_the_device_policy(self):
+        config = SimulatorConfig(
+            file_count=1, min_file_size=300_000, max_file_size=300_000, serial_number="TESTPOLICY000001"
+        )
+        device = SimulatedJensenDevice(config)
+        jensen = device.attach(HiDockJensen(object()))
+        jensen.device_info = {"sn": "TESTPOLICY000001"}
+        recording = device.recordings[0]
+
+        assert jensen.stream_file(recording.name, recording.length, lambda chunk: None) == "OK"
+
+        policy = jensen.transfer_policy
+        assert policy.link_key == "TESTPOLICY000001"
+        assert policy.stats["transfers"] == 1
+        assert policy.rates[STREAM].samples == 1
@@ -0,0 +1,168 @@
+"""
+Tests for the transfer progress aggregation layer.
+"""
+
+from unittest.mock import Mock, mock_open, patch
+
+import pytest
+
+from desktop_device_adapter import DesktopDeviceAdapter
+from device_interface import OperationStatus
+from transfer_progress import CoalescingDispatcher, ProgressThrottler, TransferStats, TransferStatsRegistry
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgressThrottler:
+    """Test rate limiting and throughput estimation."""
+
+    def test_first_update_is_emitted(self):
+        clock = FakeClock()
+        throttler = ProgressThrottler("t", 1000, clock=clock)
+        assert throttler.update(10, 1000) is True
+
+    def test_updates_within_interval_are_suppressed(self):
+        clock = FakeClock()
+        throttler = ProgressThrottler("t", 100_000, min_interval_s=0.1, min_percent_step=5.0, clock=clock)
+        throttler.update(100, 100_000)
+        emitted = 0
+        for i in range(2, 50):
+            clock.now += 0.001
+            emitted += throttler.update(i * 100, 100_000)
+        assert emitted == 0
+        assert throttler.stats.raw_updates == 49
+
+    def test_time_and_percent_triggers(self):
+        clock = FakeClock()
+        throttler = ProgressThrottler("t", 1000, min_interval_s=0.5, min_percent_step=10.0, clock=clock)
+        throttler.update(0, 1000)
+        clock.now += 0.01
+        assert throttler.update(150, 1000) is True  # 15% step
+        clock.now += 0.01
+        assert throttler.update(160, 1000) is False
+        clock.now += 0.6
+        assert throttler.update(170, 1000) is True  # interval elapsed
+
+    def test_completion_always_emitted(self):
+        clock = FakeClock()
+        throttler = ProgressThrottler("t", 1000, min_interval_s=10, min_percent_step=200, clock=clock)
+        throttler.update(1, 1000)
+        assert throttler.update(1000, 1000) is True
+
+    def test_smoothed_rate_and_eta(self):
+        clock = FakeClock()
+        throttler = ProgressThrottler("t", 10 * 1024 * 1024, clock=clock)
+        for i in range(1, 11):
+            clock.now += 0.5
+            throttler.update(i * 512 * 1024, None)
+        # 512 KiB every 0.5 s == 1 MiB/s
+        assert throttler.stats.current_mb_per_s == pytest.approx(1.0)
+        assert throttler.stats.eta_seconds == pytest.approx(5.0)
+        assert throttler.estimated_completion() is not None
+
+        stats = throttler.finish()
+        assert stats.average_mb_per_s == pytest.approx(1.0)
+        assert stats.to_dict()["bytes_transferred"] == 5 * 1024 * 1024
+
+    def test_unknown_total_has_no_eta(self):
+        throttler = ProgressThrottler("t", 0, clock=FakeClock())
+        throttler.update(100, 0)
+        assert throttler.stats.progress == 0.0
+        assert throttler.stats.eta_seconds is None
+
+
+class TestTransferStatsRegistry:
+    """Test active/recent transfer bookkeeping."""
+
+    def test_start_finish_and_summary(self):
+        registry = TransferStatsRegistry(max_recent=2)
+        for i in range(3):
+            stats = TransferStats(f"t{i}", 1024 * 1024, bytes_transferred=1024 * 1024, start_time=0.0)
+            stats.end_time = 1.0 + i
+            registry.start(stats)
+            assert registry.get(f"t{i}") is stats
+            registry.finish(f"t{i}")
+
+        assert registry.active() == []
+        assert [s.transfer_id for s in registry.recent()] == ["t1", "t2"]
+        assert registry.get("t0") is None
+
+        summary = registry.summary()
+        assert summary["transfers"] == 2
+        assert summary["average_mb_per_s"] == pytest.approx(2 / 5)
+        assert summary["fastest_mb_per_s"] == pytest.approx(0.5)
+        assert summary["slowest_mb_per_s"] == pytest.approx(1 / 3)
+
+
+class TestCoalescingDispatcher:
+    """Test latest-value delivery to the GUI thread."""
+
+    def test_bursts_are_coalesced_per_key(self):
+        scheduled = []
+        handler = Mock()
+        dispatcher = CoalescingDispatcher(scheduled.append, handler)
+
+        for value in range(100):
+            dispatcher.submit("a", value)
+        dispatcher.submit("b", "x")
+
+        assert len(scheduled) == 1
+        scheduled[0]()
+        assert [c.args[0] for c in handler.call_args_list] == [99, "x"]
+        assert dispatcher.submitted == 101
+        assert dispatcher.delivered == 2
+
+        dispatcher.submit("a", 100)
+        assert len(scheduled) == 2
+
+    def test_schedule_failure_drops_pending(self):
+        handler = Mock()
+        dispatcher = CoalescingDispatcher(Mock(side_effect=RuntimeError("gone")), handler)
+        dispatcher.submit("a", 1)
+        dispatcher.flush()
+        handler.assert_not_called()
+
+
+class TestAdapterThrottling:
+    """Test that the device adapter forwards throttled progress."""
+
+    @pytest.mark.asyncio
+    async def test_download_forwards_throttled_updates(self):
+        with patch("desktop_device_adapter.HiDockJensen") as mock_jensen_cls:
+            mock_jensen = mock_jensen_cls.return_value
+            mock_jensen.is_connected.return_value = True
+            adapter = DesktopDeviceAdapter()
+
+        file_length = 64 * 10_000
+
+        def fake_stream_file(filename, file_length, data_callback, progress_callback, timeout_s):
+            received = 0
+            while received < file_length:
+                data_callback(b"\0" * 64)
+                received += 64
+                progress_callback(received, file_length)
+            return "OK"
+
+        mock_jensen.stream_file.side_effect = fake_stream_file
+        progress_callback = Mock()
+
+        with patch("builtins.open", mock_open()):
+            await adapter.download_recording("big.hda", "/tmp/big.wav", progress_callback, file_size=file_length)
+
+        updates = [c.args[0] for c in progress_callback.call_args_list]
+        assert len(updates) <= 110  # ~1% steps plus time-based updates, not 10k packets
+        assert updates[-1].status == OperationStatus.COMPLETED
+        assert all(u.start_time == updates[0].start_time for u in updates)
+
+        stats = adapter.get_transfer_stats("big.hda")
+        assert stats.raw_updates == 10_000
+        assert stats.bytes_transferred == file_length
+        assert adapter.get_transfer_summary()["transfers"] == 1
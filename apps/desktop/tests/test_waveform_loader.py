@@ -0,0 +1,171 @@
+"""Tests for the debounced waveform loader and the file detail index it is looked up through."""
+
+import threading
+import time
+
+import pytest
+
+from gui_treeview import TreeViewMixin
+from waveform_loader import WaveformLoader
+
+
+class RecordingLoad:
+    """Load function that records calls and can be held until released."""
+
+    def __init__(self, fail_for=()):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        self.fail_for = fail_for
+
+    def __call__(self, filepath, max_points):
+        self.calls.append(filepath)
+        self.release.wait(2.0)
+        if filepath in self.fail_for:
+            raise ValueError("cannot decode")
+        return [0.1, -0.1, 0.5], 16000
+
+
+@pytest.fixture
+def recordings(tmp_path):
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"REC{i}.hda"
+        path.write_bytes(b"x" * (i + 1))
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def results():
+    return []
+
+
+def _loader(load, **kwargs):
+    # Dispatch straight on the worker thread; the GUI uses widget.after(0, ...)
+    return WaveformLoader(dispatch=lambda callback, *args: callback(*args), load_function=load, **kwargs)
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_rapid_requests_only_load_the_last_file(recordings, results):
+    load = RecordingLoad()
+    loader = _loader(load, debounce_s=0.1)
+
+    for path in recordings:
+        loader.request(path, on_ready=lambda data, rate, path=path: results.append((path, rate)))
+
+    assert _wait_for(lambda: results)
+    time.sleep(0.15)
+    assert load.calls == [recordings[-1]]
+    assert results == [(recordings[-1], 16000)]
+    assert loader.get_statistics()["cancelled"] == len(recordings) - 1
+    loader.shutdown()
+
+
+def test_superseded_load_is_cached_but_not_delivered(recordings, results):
+    load = RecordingLoad()
+    loader = _loader(load, debounce_s=0.0)
+    load.release.clear()
+
+    loader.request(recordings[0], on_ready=lambda data, rate: results.append("first"))
+    assert _wait_for(lambda: load.calls)
+    loader.request(recordings[1], on_ready=lambda data, rate: results.append("second"))
+    load.release.set()
+
+    assert _wait_for(lambda: results == ["second"])
+    time.sleep(0.05)
+    assert results == ["second"]
+    assert loader.get_cached(recordings[0]) is not None
+    loader.shutdown()
+
+
+def test_cached_waveforms_are_returned_immediately_until_the_file_changes(recordings, results):
+    load = RecordingLoad()
+    loader = _loader(load, debounce_s=0.0)
+    loader.request(recordings[0], on_ready=lambda data, rate: results.append(data))
+    assert _wait_for(lambda: results)
+
+    loader.request(recordings[0], on_ready=lambda data, rate: results.append(data))
+    assert len(results) == 2 and len(load.calls) == 1
+
+    with open(recordings[0], "ab") as f:
+        f.write(b"more audio")
+    loader.request(recordings[0], on_ready=lambda data, rate: results.append(data))
+    assert _wait_for(lambda: len(results) == 3)
+    assert len(load.calls) == 2
+    loader.shutdown()
+
+
+def test_cache_is_bounded(recordings, results):
+    loader = _loader(RecordingLoad(), debounce_s=0.0, cache_size=2)
+
+    for path in recordings[:3]:
+        loader.request(path, on_ready=lambda data, rate: results.append(rate))
+        assert _wait_for(lambda: loader.get_cached(path) is not None)
+
+    assert loader.get_cached(recordings[0]) is None
+    assert loader.get_statistics()["cached"] == 2
+    loader.shutdown()
+
+
+def test_errors_are_reported_for_the_current_request_only(recordings):
+    errors = []
+    loader = _loader(RecordingLoad(fail_for=(recordings[0],)), debounce_s=0.0)
+
+    loader.request(recordings[0], on_ready=lambda *a: None, on_error=errors.append)
+
+    assert _wait_for(lambda: errors)
+    assert errors == ["cannot decode"]
+    assert loader.get_cached(recordings[0]) is None
+    loader.shutdown()
+
+
+class TestFileDetailIndex:
+    """The name -> detail lookup that replaced linear scans of displayed_files_details."""
+
+    def setup_method(self):
+        self.view = TreeViewMixin()
+        self.view.displayed_files_details = [{"name": f"REC{i}.hda", "size": i} for i in range(5)]
+
+    def test_lookup_by_name(self):
+        assert self.view._get_file_detail("REC3.hda")["size"] == 3
+        assert self.view._get_file_detail("missing.hda") is None
+
+    def test_index_follows_list_changes(self):
+        assert self.view._get_file_detail("REC1.hda")["size"] == 1
+
+        self.view.displayed_files_details.sort(key=lambda f: -f["size"])  # in place, same length
+        assert self.view._get_file_detail("REC1.hda")["size"] == 1
+
+        self.view.displayed_files_details = [f for f in self.view.displayed_files_details if f["size"] != 1]
+        assert self.view._get_file_detail("REC1.hda") is None
+
+        self.view.displayed_files_details.append({"name": "REC9.hda", "size": 9})
+        assert self.view._get_file_detail("REC9.hda")["size"] == 9
+
+        self.view.displayed_files_details.clear()
+        assert self.view._get_file_detail("REC9.hda") is None
+
+
+def test_shutdown_cancels_queued_loads(recordings, results):
+    load = RecordingLoad()
+    load.release.clear()
+    loader = _loader(load, max_workers=1, debounce_s=0.0)
+
+    loader.request(recordings[0], lambda *args: results.append(args))
+    assert _wait_for(lambda: load.calls == [recordings[0]])
+    loader.request(recordings[1], lambda *args: results.append(args))
+    queued = list(loader._futures)
+
+    loader.shutdown()
+    load.release.set()
+
+    assert any(future.cancelled() for future in queued)
+    assert _wait_for(lambda: not loader._futures)
+    assert load.calls == [recordings[0]]
@@ -10,12 +10,13 @@ import hashlib
 import json
 import os
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 
 def parse_acttest_header(binary_data):
     """Parse ACTTEST0 firmware header structure"""
-    if not binary_data.startswith(b"ACTTEST0"):
+    if binary_data[:8] != b"ACTTEST0":
         raise ValueError("Not a valid ACTTEST0 firmware")
 
     # Header is 512 bytes, followed by XML metadata
@@ -54,47 +55,65 @@ def parse_partitions(xml_content):
     return partitions
 
 
-def extract_partitions(binary_data, partitions, xml_end, output_dir):
-    """Extract individual partition binaries"""
-    print(f"[*] Extracting {len(partitions)} partitions...")
-
+def partition_offsets(partitions, xml_end):
+    """Byte offset of each partition in the image; partitions follow the XML back to back"""
     # Partitions start after XML content (aligned to next boundary)
     data_start = xml_end
     # Align to 16-byte boundary (common in firmware)
     if data_start % 16:
         data_start = (data_start + 15) // 16 * 16
 
+    offsets = []
     current_offset = data_start
-    extracted_partitions = []
+    for part in partitions:
+        offsets.append(current_offset)
+        current_offset += part["size"]
+    return offsets
 
-    for i, part in enumerate(partitions):
-        print(f"[*] Extracting {part['filename']} (ID: {part['id']}, Size: {part['size']} bytes)")
 
-        partition_data = binary_data[current_offset : current_offset + part["size"]]
-        if len(partition_data) != part["size"]:
-            print(f"[!] Warning: Expected {part['size']} bytes, got {len(partition_data)}")
+def _write_partition(binary_data, part, offset, output_dir):
+    """Write one partition and return its extraction record"""
+    partition_data = memoryview(binary_data)[offset : offset + part["size"]]
+    if len(partition_data) != part["size"]:
+        print(f"[!] Warning: Expected {part['size']} bytes, got {len(partition_data)}")
 
-        # Calculate CRC32 checksum for verification
-        calculated_crc = hex(binascii.crc32(partition_data) & 0xFFFFFFFF)
+    # Calculate CRC32 checksum for verification
+    calculated_crc = hex(binascii.crc32(partition_data) & 0xFFFFFFFF)
 
-        partition_path = f"{output_dir}/partitions/{part['filename']}"
-        os.makedirs(os.path.dirname(partition_path), exist_ok=True)
+    partition_path = f"{output_dir}/partitions/{part['filename']}"
+    with open(partition_path, "wb") as f:
+        f.write(partition_data)
 
-        with open(partition_path, "wb") as f:
-            f.write(partition_data)
+    return {
+        "info": part,
+        "path": partition_path,
+        "offset": offset,
+        "extracted_size": len(partition_data),
+        "calculated_checksum": calculated_crc,
+    }
 
-        extracted_partitions.append(
-            {
-                "info": part,
-                "path": partition_path,
-                "extracted_size": len(partition_data),
-                "calculated_checksum": calculated_crc,
-            }
-        )
 
-        current_offset += part["size"]
+def extract_partitions(binary_data, partitions, xml_end, output_dir, workers=None):
+    """
+    Extract individual partition binaries.
+
+    Partitions are sliced without copying from `binary_data` (bytes or an mmap)
+    and checksummed and written by a thread pool; crc32 and file writes release
+    the GIL, so large partitions are written concurrently.
+    """
+    print(f"[*] Extracting {len(partitions)} partitions...")
+    os.makedirs(f"{output_dir}/partitions", exist_ok=True)
+
+    offsets = partition_offsets(partitions, xml_end)
+    for part in partitions:
+        print(f"[*] Extracting {part['filename']} (ID: {part['id']}, Size: {part['size']} bytes)")
 
-    return extracted_partitions
+    with ThreadPoolExecutor(max_workers=workers or min(len(partitions), os.cpu_count() or 1) or 1) as executor:
+        return list(
+            executor.map(
+                lambda item: _write_partition(binary_data, item[0], item[1], output_dir), zip(partitions, offsets)
+            )
+        )
 
 
 def generate_metadata(firmware_entry, binary_data, xml_content, partitions, extracted_partitions, validation_results):
@@ -144,6 +163,7 @@ def generate_metadata(firmware_entry, binary_data, xml_content, partitions, extr
                 "name": part_info["info"]["name"],
                 "filename": part_info["info"]["filename"],
                 "size": part_info["info"]["size"],
+                "offset": part_info["offset"],
                 "extracted_size": part_info["extracted_size"],
                 "checksum": part_info["info"]["checksum"],
                 "calculated_checksum": part_info["calculated_checksum"],
@@ -249,11 +269,21 @@ def main():
             f.write(xml_content)
         print(f"[+] Firmware XML metadata saved to: {xml_path}")
 
+        # Index the partitions for firmware_analysis.py / disasm_analysis.py
+        from firmware_index import FirmwareIndex
+
+        index = FirmwareIndex.for_directory(output_dir)
+        for part_info in extracted_partitions:
+            index.data["partitions"][part_info["info"]["filename"]]["offset"] = part_info["offset"]
+        index.save()
+        print(f"[+] Partition index saved to: {index.path}")
+
         print("\n[+] Extraction complete!")
         print(f"    Main binary: {binary_path}")
         print(f"    Partitions: {output_dir}/partitions/")
         print(f"    Metadata: {metadata_path}")
         print(f"    XML config: {xml_path}")
+        print(f"    Index: {index.path}")
 
     except Exception as e:
         print(f"[-] Error processing firmware: {e}")
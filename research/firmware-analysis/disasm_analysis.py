@@ -5,28 +5,85 @@ ARM Disassembly Analysis for Commands 10, 14, 15
 This script attempts to disassemble ARM Thumb code around command references
 to understand what the handlers actually do.
 
+The image is memory-mapped and exposed as NumPy little endian halfword views
+(one per byte alignment), so push-pattern searches and instruction
+classification run over the whole image at once instead of one
+`struct.unpack` per halfword. With a firmware index (see firmware_index.py)
+push instructions and command ID occurrences are looked up instead of scanned.
+
 Author: HiDock Hardware Analysis Project
-Version: 1.0.0
+Version: 1.1.0
 Date: 2025-08-31
 """
 
+import mmap
+import re
 import struct
 from pathlib import Path
 
+import numpy as np
+
+# ARM Thumb functions typically start with push instructions
+PUSH_PATTERNS = np.array([0xB500, 0xB510, 0xB530, 0xB570, 0xB5F0], dtype=np.uint16)
+
+# Instruction classes produced by classify_thumb_halfwords, in decoder priority order
+THUMB_CLASSES = (
+    "unknown",
+    "push",
+    "pop",
+    "mov",
+    "movs",
+    "ldr_pc",
+    "str_ldr",
+    "cond_branch",
+    "branch",
+)
+
+PRINTABLE_PREFIX_RE = re.compile(rb"[\x20-\x7e]{0,50}")
+
+
+def classify_thumb_halfwords(halfwords):
+    """
+    Classify every halfword the way `decode_thumb_instruction` does.
+
+    Returns an array of indices into THUMB_CLASSES, one per halfword.
+    """
+    h = halfwords.astype(np.uint16, copy=False)
+    conditions = [
+        (h == 0xB500) | (h == 0xB510) | (h == 0xB530),
+        (h == 0xBD00) | (h == 0xBD10),
+        (h & 0xFF00) == 0x4600,
+        (h & 0xF000) == 0x2000,
+        (h & 0xF800) == 0x4800,
+        (h & 0xF800) == 0x6000,
+        (h & 0xF000) == 0xD000,
+        (h & 0xF800) == 0xE000,
+    ]
+    return np.select(conditions, np.arange(1, len(THUMB_CLASSES), dtype=np.uint8), default=0).astype(np.uint8)
+
 
 class ARMDisasmAnalyzer:
-    def __init__(self, zephyr_path):
+    def __init__(self, zephyr_path, index=None):
         self.zephyr_path = Path(zephyr_path)
         with open(self.zephyr_path, "rb") as f:
-            self.binary_data = f.read()
+            self.binary_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # Firmware index entry for this partition; ignored if the file changed since it was built
+        self.index = index if index is not None and index.is_current(self.zephyr_path) else None
+
+        # Halfword views at even and odd byte offsets; index i of view p is offset p + 2 * i
+        image = np.frombuffer(self.binary_data, dtype=np.uint8)
+        self.halfword_views = tuple(image[p : p + (len(image) - p) // 2 * 2].view("<u2") for p in (0, 1))
 
     def decode_thumb_instruction(self, instruction_bytes):
         """Basic ARM Thumb instruction decoder for common patterns"""
         if len(instruction_bytes) < 2:
             return "INCOMPLETE"
 
-        instr = struct.unpack("<H", instruction_bytes[:2])[0]
+        return self.decode_halfword(struct.unpack("<H", instruction_bytes[:2])[0])
 
+    def decode_halfword(self, instr):
+        """Decode one Thumb halfword value"""
         # Common Thumb instructions
         if instr == 0xB500:
             return "push {lr}"
@@ -58,55 +115,62 @@ class ARMDisasmAnalyzer:
         else:
             return f"unknown (0x{instr:04x})"
 
+    def _halfwords(self, start, end):
+        """Halfwords at offsets start, start + 2, ... below `end`"""
+        parity = start % 2
+        view = self.halfword_views[parity]
+        return view[(start - parity) // 2 : (end - parity + 1) // 2]
+
     def find_function_starts(self, start_offset, search_range=200):
         """Find potential ARM Thumb function starts near offset"""
-        candidates = []
-
-        # ARM Thumb functions typically start with push instructions
-        push_patterns = [0xB500, 0xB510, 0xB530, 0xB570, 0xB5F0]
-
         search_start = max(0, start_offset - search_range)
         search_end = min(len(self.binary_data) - 2, start_offset + search_range)
+        if search_end <= search_start:
+            return []
 
-        for offset in range(search_start, search_end, 2):  # Thumb is 2-byte aligned
-            if offset + 2 <= len(self.binary_data):
-                instr = struct.unpack("<H", self.binary_data[offset : offset + 2])[0]
-                if instr in push_patterns:
-                    candidates.append((offset, instr))
+        if self.index is not None:
+            offsets = self.index.push_offsets_between(search_start, search_end, parity=search_start % 2)
+            return [(int(offset), struct.unpack_from("<H", self.binary_data, offset)[0]) for offset in offsets]
 
-        return candidates
-
-    def disassemble_region(self, start_offset, num_instructions=10):
-        """Disassemble a region starting at given offset"""
-        instructions = []
-        offset = start_offset
+        halfwords = self._halfwords(search_start, search_end)
+        hits = np.flatnonzero(np.isin(halfwords, PUSH_PATTERNS))
+        return [(search_start + 2 * int(i), int(halfwords[i])) for i in hits]
 
-        for i in range(num_instructions):
-            if offset + 2 > len(self.binary_data):
-                break
+    def find_push_instructions(self):
+        """Offsets (Thumb-aligned) of every push instruction in the image"""
+        if self.index is not None:
+            return self.index.push_offsets[self.index.push_offsets % 2 == 0]
+        return np.flatnonzero(np.isin(self.halfword_views[0], PUSH_PATTERNS)) * 2
 
-            instr_bytes = self.binary_data[offset : offset + 2]
-            decoded = self.decode_thumb_instruction(instr_bytes)
-            instructions.append((offset, struct.unpack("<H", instr_bytes)[0], decoded))
-            offset += 2
+    def instruction_histogram(self):
+        """Count of each instruction class over the whole (Thumb-aligned) image"""
+        counts = np.bincount(classify_thumb_halfwords(self.halfword_views[0]), minlength=len(THUMB_CLASSES))
+        return dict(zip(THUMB_CLASSES, counts.tolist()))
 
-        return instructions
+    def disassemble_region(self, start_offset, num_instructions=10):
+        """Disassemble a region starting at given offset"""
+        count = max(0, min(num_instructions, (len(self.binary_data) - start_offset) // 2))
+        values = struct.unpack_from(f"<{count}H", self.binary_data, start_offset)
+        return [(start_offset + 2 * i, value, self.decode_halfword(value)) for i, value in enumerate(values)]
 
     def analyze_command_handler_candidates(self, cmd_id):
         """Try to locate and analyze potential command handlers"""
         print(f"\n=== HANDLER ANALYSIS: Command {cmd_id} ===")
 
-        # Find command occurrences
-        cmd_bytes = struct.pack("<H", cmd_id)
-        positions = []
-        pos = 0
+        # Find command occurrences (the index holds every occurrence of IDs 1-20)
+        if self.index is not None and 1 <= cmd_id <= 20:
+            positions = self.index.command_positions.get(cmd_id, [])[:5]
+        else:
+            cmd_bytes = struct.pack("<H", cmd_id)
+            positions = []
+            pos = 0
 
-        while pos < len(self.binary_data) and len(positions) < 5:
-            pos = self.binary_data.find(cmd_bytes, pos)
-            if pos == -1:
-                break
-            positions.append(pos)
-            pos += 1
+            while pos < len(self.binary_data) and len(positions) < 5:
+                pos = self.binary_data.find(cmd_bytes, pos)
+                if pos == -1:
+                    break
+                positions.append(pos)
+                pos += 1
 
         for i, cmd_pos in enumerate(positions):
             print(f"\n--- Occurrence {i+1} at 0x{cmd_pos:x} ---")
@@ -116,7 +180,7 @@ class ARMDisasmAnalyzer:
                 # Check different potential table structures
 
                 # Structure 1: cmd_id (2 bytes) + handler (4 bytes)
-                handler_addr = struct.unpack("<I", self.binary_data[cmd_pos + 2 : cmd_pos + 6])[0]
+                handler_addr = struct.unpack_from("<I", self.binary_data, cmd_pos + 2)[0]
                 print(f"Potential handler address: 0x{handler_addr:08x}")
 
                 # Check if this could be a valid Thumb function address
@@ -162,9 +226,8 @@ class ARMDisasmAnalyzer:
 
         # Look for sequences of consecutive commands that might indicate a table
         for base_cmd in range(1, 18):  # Start from different base commands
-            pattern = b""
-            for i in range(base_cmd, min(base_cmd + 8, 21)):
-                pattern += struct.pack("<H", i)
+            commands = range(base_cmd, min(base_cmd + 8, 21))
+            pattern = struct.pack(f"<{len(commands)}H", *commands)
 
             pos = self.binary_data.find(pattern)
             if pos != -1:
@@ -176,8 +239,7 @@ class ARMDisasmAnalyzer:
                     cmd_offset = table_offset + (cmd - base_cmd) * 2
 
                     if cmd_offset + 6 <= len(self.binary_data):
-                        cmd_val = struct.unpack("<H", self.binary_data[cmd_offset : cmd_offset + 2])[0]
-                        handler = struct.unpack("<I", self.binary_data[cmd_offset + 2 : cmd_offset + 6])[0]
+                        cmd_val, handler = struct.unpack_from("<HI", self.binary_data, cmd_offset)
 
                         print(f"  Command {cmd_val}: Handler 0x{handler:08x}")
 
@@ -211,13 +273,7 @@ class ARMDisasmAnalyzer:
         """Try to find string references in a handler function"""
         print(f"  Looking for string references in handler at 0x{handler_addr:x}:")
 
-        offset = handler_addr
-        for i in range(max_instructions):
-            if offset + 2 > len(self.binary_data):
-                break
-
-            instr = struct.unpack("<H", self.binary_data[offset : offset + 2])[0]
-
+        for offset, instr, _ in self.disassemble_region(handler_addr, max_instructions):
             # Look for LDR PC-relative (loads constants/string addresses)
             if (instr & 0xF800) == 0x4800:  # LDR Rd, [PC, #imm]
                 reg = (instr >> 8) & 0x07
@@ -229,27 +285,16 @@ class ARMDisasmAnalyzer:
 
                 if target_addr + 4 <= len(self.binary_data):
                     # Read the 32-bit value at target address
-                    value = struct.unpack("<I", self.binary_data[target_addr : target_addr + 4])[0]
+                    value = struct.unpack_from("<I", self.binary_data, target_addr)[0]
 
                     # Check if this could be a string pointer
                     if value < len(self.binary_data):
-                        # Try to read string at this address
-                        string_data = ""
-                        str_offset = value
-                        for j in range(50):  # Max 50 chars
-                            if str_offset + j >= len(self.binary_data):
-                                break
-                            char = self.binary_data[str_offset + j]
-                            if 32 <= char <= 126:
-                                string_data += chr(char)
-                            else:
-                                break
+                        # Try to read string at this address (max 50 chars)
+                        string_data = PRINTABLE_PREFIX_RE.match(self.binary_data, value).group().decode("ascii")
 
                         if len(string_data) >= 3:
                             print(f"    0x{offset:08x}: ldr r{reg}, [pc, #{imm*4}] -> 0x{value:08x} -> '{string_data}'")
 
-            offset += 2
-
 
 def main():
     zephyr_path = r"E:\Code\hidock-next\firmware\hidock-h1e\6.2.5\partitions\zephyr.bin"
@@ -261,7 +306,15 @@ def main():
         print(f"Error: File not found: {zephyr_path}")
         return 1
 
-    analyzer = ARMDisasmAnalyzer(zephyr_path)
+    from firmware_index import FirmwareIndex
+
+    firmware_dir = Path(zephyr_path).parent.parent
+    index = FirmwareIndex.for_directory(firmware_dir).partitions.get(Path(zephyr_path).name)
+    analyzer = ARMDisasmAnalyzer(zephyr_path, index=index)
+
+    histogram = analyzer.instruction_histogram()
+    print(f"Thumb-aligned halfwords: {sum(histogram.values()):,}")
+    print(f"Push instructions (function start candidates): {len(analyzer.find_push_instructions()):,}")
 
     # Look for command dispatch tables first
     analyzer.search_command_jump_table()
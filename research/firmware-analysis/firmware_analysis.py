@@ -5,14 +5,66 @@ HiDock H1E Firmware Binary Analysis Tool
 This script analyzes firmware binary files to search for Jensen protocol command
 references, USB protocol patterns, and other relevant structures.
 
+Partitions are memory-mapped and scanned with compiled bytes regexes, and
+several partitions are analyzed in parallel worker processes. When the
+firmware directory has an index (see firmware_index.py), results are read
+from it and only new or changed partitions are scanned.
+
 Author: HiDock Hardware Analysis Project
-Version: 1.0.0
+Version: 1.1.0
 Date: 2025-08-31
 """
 
-import struct
+import argparse
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 
+JENSEN_MAGIC = b"\x12\x34"
+JENSEN_MAGIC_RE = re.compile(re.escape(JENSEN_MAGIC))
+
+# Little endian 16-bit command IDs 1-20. The high byte is always 0x00 and the low
+# byte is never 0x00, so matches cannot overlap and a single pass finds them all.
+COMMAND_ID_RE = re.compile(rb"[\x01-\x14]\x00")
+
+KEYWORDS = [
+    "command",
+    "cmd",
+    "jensen",
+    "usb",
+    "protocol",
+    "handler",
+    "device",
+    "hidock",
+    "endpoint",
+    "transfer",
+    "request",
+    "response",
+    "version",
+    "firmware",
+    "dios",
+    "rome",
+    "zephyr",
+]
+
+
+@lru_cache(maxsize=None)
+def _printable_run_re(min_length):
+    """Regex matching runs of at least `min_length` printable ASCII bytes."""
+    return re.compile(rb"[\x20-\x7e]{%d,}" % min_length)
+
+
+def open_binary(path):
+    """Memory-map a file read-only (empty files, which cannot be mapped, are read normally)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
 
 class FirmwareAnalyzer:
     def __init__(self, firmware_dir):
@@ -21,26 +73,12 @@ class FirmwareAnalyzer:
 
     def extract_strings(self, binary_data, min_length=4):
         """Extract printable strings from binary data"""
-        strings = []
-        current = ""
-
-        for byte in binary_data:
-            if 32 <= byte <= 126:  # Printable ASCII
-                current += chr(byte)
-            else:
-                if len(current) >= min_length:
-                    strings.append(current)
-                current = ""
-
-        if len(current) >= min_length:
-            strings.append(current)
-
-        return strings
+        return [match.group().decode("ascii") for match in _printable_run_re(min_length).finditer(binary_data)]
 
     def search_command_patterns(self, binary_data):
         """Search for Jensen protocol command patterns"""
         patterns = {
-            "jensen_magic": b"\x12\x34",  # Jensen protocol magic number
+            "jensen_magic": JENSEN_MAGIC,  # Jensen protocol magic number
             "command_handlers": [],
             "usb_descriptors": [],
             "version_strings": [],
@@ -48,92 +86,51 @@ class FirmwareAnalyzer:
         }
 
         # Search for Jensen magic number
-        magic_positions = []
-        pos = 0
-        while pos < len(binary_data):
-            pos = binary_data.find(b"\x12\x34", pos)
-            if pos == -1:
-                break
-            magic_positions.append(pos)
-            pos += 1
-
-        patterns["jensen_magic_positions"] = magic_positions[:20]  # Limit to first 20
-
-        # Search for command ID sequences (1-20)
-        command_sequences = []
-        for i in range(1, 21):
-            cmd_bytes = struct.pack("<H", i)  # Little endian 16-bit
-            positions = []
-            pos = 0
-            while pos < len(binary_data):
-                pos = binary_data.find(cmd_bytes, pos)
-                if pos == -1:
-                    break
-                positions.append(pos)
-                pos += 1
-                if len(positions) >= 5:  # Limit results
-                    break
-            if positions:
-                command_sequences.append((i, positions))
-
-        patterns["command_sequences"] = command_sequences
+        magic_matches = JENSEN_MAGIC_RE.finditer(binary_data)
+        patterns["jensen_magic_positions"] = [m.start() for m in islice(magic_matches, 20)]  # Limit to first 20
+
+        # Search for command ID sequences (1-20), first 5 occurrences of each
+        positions_by_cmd = {}
+        for match in COMMAND_ID_RE.finditer(binary_data):
+            positions = positions_by_cmd.setdefault(binary_data[match.start()], [])
+            if len(positions) < 5:  # Limit results
+                positions.append(match.start())
+        patterns["command_sequences"] = sorted(positions_by_cmd.items())
 
         return patterns
 
-    def search_strings(self, binary_data, keywords):
+    def search_strings(self, binary_data, keywords, strings=None):
         """Search for specific keyword strings in binary"""
-        strings = self.extract_strings(binary_data)
-        matches = []
-
-        for string in strings:
-            for keyword in keywords:
-                if keyword.lower() in string.lower():
-                    matches.append(string)
-                    break
-
-        return matches
+        if strings is None:
+            strings = self.extract_strings(binary_data)
+        keyword_re = re.compile("|".join(re.escape(keyword) for keyword in keywords), re.IGNORECASE)
+        return [string for string in strings if keyword_re.search(string)]
 
     def analyze_partition(self, partition_file):
         """Analyze a single partition file"""
         print(f"\nAnalyzing {partition_file.name}...")
 
         try:
-            with open(partition_file, "rb") as f:
-                binary_data = f.read()
-
-            # Search for command patterns
-            patterns = self.search_command_patterns(binary_data)
-
-            # Search for relevant strings
-            keywords = [
-                "command",
-                "cmd",
-                "jensen",
-                "usb",
-                "protocol",
-                "handler",
-                "device",
-                "hidock",
-                "endpoint",
-                "transfer",
-                "request",
-                "response",
-                "version",
-                "firmware",
-                "dios",
-                "rome",
-                "zephyr",
-            ]
-            relevant_strings = self.search_strings(binary_data, keywords)
-
-            results = {
-                "file_size": len(binary_data),
-                "jensen_magic_found": len(patterns["jensen_magic_positions"]),
-                "jensen_magic_positions": patterns["jensen_magic_positions"],
-                "command_sequences": patterns["command_sequences"],
-                "relevant_strings": relevant_strings[:50],  # Limit output
-                "total_strings": len(self.extract_strings(binary_data)),
-            }
+            binary_data = open_binary(partition_file)
+            try:
+                # Search for command patterns
+                patterns = self.search_command_patterns(binary_data)
+
+                # Search for relevant strings
+                strings = self.extract_strings(binary_data)
+                relevant_strings = self.search_strings(binary_data, KEYWORDS, strings)
+
+                results = {
+                    "file_size": len(binary_data),
+                    "jensen_magic_found": len(patterns["jensen_magic_positions"]),
+                    "jensen_magic_positions": patterns["jensen_magic_positions"],
+                    "command_sequences": patterns["command_sequences"],
+                    "relevant_strings": relevant_strings[:50],  # Limit output
+                    "total_strings": len(strings),
+                }
+            finally:
+                if isinstance(binary_data, mmap.mmap):
+                    binary_data.close()
 
             return results
 
@@ -141,15 +138,29 @@ class FirmwareAnalyzer:
             print(f"Error analyzing {partition_file.name}: {e}")
             return None
 
-    def analyze_all_partitions(self):
-        """Analyze all partition files"""
+    def results_from_index(self, partition):
+        """Build the `analyze_partition` results from a firmware index entry"""
+        strings = partition.string_texts()
+        return {
+            "file_size": partition.size,
+            "jensen_magic_found": len(partition.jensen_magic[:20]),
+            "jensen_magic_positions": partition.jensen_magic[:20],
+            "command_sequences": sorted(
+                (cmd_id, positions[:5]) for cmd_id, positions in partition.command_positions.items()
+            ),
+            "relevant_strings": self.search_strings(None, KEYWORDS, strings)[:50],
+            "total_strings": len(strings),
+        }
+
+    def analyze_all_partitions(self, workers=None, use_index=True):
+        """Analyze all partition files, `workers` partitions at a time (default: one per CPU)"""
         partitions_dir = self.firmware_dir / "partitions"
 
         if not partitions_dir.exists():
             print(f"Partitions directory not found: {partitions_dir}")
             return
 
-        partition_files = list(partitions_dir.glob("*.bin"))
+        partition_files = sorted(partitions_dir.glob("*.bin"))
 
         print(f"Found {len(partition_files)} partition files:")
         for pf in partition_files:
@@ -159,8 +170,19 @@ class FirmwareAnalyzer:
         print("FIRMWARE BINARY ANALYSIS")
         print("=" * 60)
 
-        for partition_file in partition_files:
-            result = self.analyze_partition(partition_file)
+        workers = workers or min(len(partition_files), os.cpu_count() or 1)
+        if use_index:
+            from firmware_index import FirmwareIndex
+
+            index = FirmwareIndex.for_directory(self.firmware_dir, workers=workers)
+            results = [self.results_from_index(index.get(pf)) for pf in partition_files]
+        elif workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self.analyze_partition, partition_files))
+        else:
+            results = [self.analyze_partition(pf) for pf in partition_files]
+
+        for partition_file, result in zip(partition_files, results):
             if result:
                 self.results[partition_file.name] = result
                 self.display_partition_results(partition_file.name, result)
@@ -226,14 +248,23 @@ class FirmwareAnalyzer:
 
 
 def main():
-    firmware_dir = r"E:\Code\hidock-next\firmware\hidock-h1e\6.2.5"
+    parser = argparse.ArgumentParser(description="HiDock H1E Firmware Binary Analysis")
+    parser.add_argument(
+        "firmware_dir",
+        nargs="?",
+        default=r"E:\Code\hidock-next\firmware\hidock-h1e\6.2.5",
+        help="Firmware directory containing a partitions/ folder",
+    )
+    parser.add_argument("--workers", type=int, help="Partitions analyzed in parallel (default: one per CPU)")
+    parser.add_argument("--no-index", action="store_true", help="Rescan the partitions instead of using the index")
+    args = parser.parse_args()
 
     print("HiDock H1E Firmware Binary Analysis")
     print("=" * 40)
-    print(f"Analyzing firmware in: {firmware_dir}")
+    print(f"Analyzing firmware in: {args.firmware_dir}")
 
-    analyzer = FirmwareAnalyzer(firmware_dir)
-    analyzer.analyze_all_partitions()
+    analyzer = FirmwareAnalyzer(args.firmware_dir)
+    analyzer.analyze_all_partitions(workers=args.workers, use_index=not args.no_index)
 
     return 0
 
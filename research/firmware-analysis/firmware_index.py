@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+HiDock Firmware Index Builder
+
+Memory-maps a firmware image once, extracts its partitions in parallel and
+writes a persistent index (`firmware-index.json`) next to them holding, per
+partition: its offset in the image, printable strings with their offsets,
+candidate function starts (Thumb push instructions), Jensen magic positions
+and command ID (1-20) positions.
+
+`firmware_analysis.py` and `disasm_analysis.py` answer their queries from the
+index when it is present. Each partition entry records the file's size and
+modification time, so edited or re-extracted partitions are re-indexed and
+unchanged ones are reused.
+
+Usage:
+    python firmware_index.py <firmware_dir>              # index <firmware_dir>/partitions/*.bin
+    python firmware_index.py <image.bin> <firmware_dir>  # extract partitions from an ACTTEST0 image, then index
+
+Author: HiDock Hardware Analysis Project
+Version: 1.0.0
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from decode_firmware import extract_firmware_xml, extract_partitions, parse_acttest_header, parse_partitions
+from disasm_analysis import PUSH_PATTERNS
+from firmware_analysis import JENSEN_MAGIC_RE, _printable_run_re, open_binary
+
+INDEX_FILENAME = "firmware-index.json"
+INDEX_VERSION = 1
+MIN_STRING_LENGTH = 4
+
+
+def index_partition_data(binary_data):
+    """Scan one partition image and return its index entry (without file metadata)"""
+    strings = [
+        [match.start(), match.group().decode("ascii")]
+        for match in _printable_run_re(MIN_STRING_LENGTH).finditer(binary_data)
+    ]
+
+    # Little endian halfword starting at every byte offset, so lookups for either alignment can use the index
+    image = np.frombuffer(binary_data, dtype=np.uint8) if len(binary_data) else np.zeros(0, dtype=np.uint8)
+    halfwords = image[:-1].astype(np.uint16) | (image[1:].astype(np.uint16) << 8)
+
+    push_offsets = np.flatnonzero(np.isin(halfwords, PUSH_PATTERNS))
+    command_offsets = np.flatnonzero((halfwords >= 1) & (halfwords <= 20))
+    command_ids = halfwords[command_offsets]
+
+    return {
+        "size": len(binary_data),
+        "strings": strings,
+        "push_offsets": push_offsets.tolist(),
+        "jensen_magic": [match.start() for match in JENSEN_MAGIC_RE.finditer(binary_data)],
+        "command_positions": {
+            str(cmd_id): command_offsets[command_ids == cmd_id].tolist() for cmd_id in np.unique(command_ids).tolist()
+        },
+    }
+
+
+def _index_partition_file(path):
+    """Worker: memory-map and index one partition file"""
+    binary_data = open_binary(path)
+    try:
+        entry = index_partition_data(binary_data)
+    finally:
+        if isinstance(binary_data, mmap.mmap):
+            binary_data.close()
+    entry["mtime_ns"] = os.stat(path).st_mtime_ns
+    return entry
+
+
+class PartitionIndex:
+    """Index entry of one partition"""
+
+    def __init__(self, name, entry):
+        self.name = name
+        self.entry = entry
+        self.size = entry["size"]
+        self.mtime_ns = entry.get("mtime_ns")
+        self.offset = entry.get("offset")
+        self.strings = entry["strings"]
+        self.jensen_magic = entry["jensen_magic"]
+        self.command_positions = {int(cmd_id): positions for cmd_id, positions in entry["command_positions"].items()}
+        self.push_offsets = np.asarray(entry["push_offsets"], dtype=np.int64)
+
+    def is_current(self, path):
+        """True if `path` is the file this entry was built from (same size and modification time)"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def string_texts(self):
+        return [text for _, text in self.strings]
+
+    def push_offsets_between(self, start, end, parity=None):
+        """Sorted push instruction offsets in [start, end), optionally only those with offset % 2 == parity"""
+        lo, hi = np.searchsorted(self.push_offsets, [start, end])
+        offsets = self.push_offsets[lo:hi]
+        if parity is not None:
+            offsets = offsets[offsets % 2 == parity]
+        return offsets
+
+
+class FirmwareIndex:
+    """Persistent per-partition index stored as JSON in a firmware directory"""
+
+    def __init__(self, firmware_dir, data=None):
+        self.firmware_dir = Path(firmware_dir)
+        self.path = self.firmware_dir / INDEX_FILENAME
+        self.data = data or {"version": INDEX_VERSION, "image": None, "partitions": {}}
+        self.partitions = {name: PartitionIndex(name, entry) for name, entry in self.data["partitions"].items()}
+
+    @classmethod
+    def load(cls, firmware_dir):
+        """Load the index of `firmware_dir`, or an empty index if there is none (or it has an old format)"""
+        path = Path(firmware_dir) / INDEX_FILENAME
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(firmware_dir)
+        if data.get("version") != INDEX_VERSION:
+            return cls(firmware_dir)
+        return cls(firmware_dir, data)
+
+    @classmethod
+    def for_directory(cls, firmware_dir, workers=None):
+        """Load the index of `firmware_dir` and bring it up to date with its partitions"""
+        index = cls.load(firmware_dir)
+        if index.update(workers=workers):
+            index.save()
+        return index
+
+    def save(self):
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+    def partition_files(self):
+        return sorted((self.firmware_dir / "partitions").glob("*.bin"))
+
+    def get(self, partition_path):
+        """Entry for a partition file, or None if it is not indexed or has changed since"""
+        partition_path = Path(partition_path)
+        partition = self.partitions.get(partition_path.name)
+        if partition is None or not partition.is_current(partition_path):
+            return None
+        return partition
+
+    def update(self, workers=None):
+        """(Re)index missing or changed partitions in parallel processes; returns the names that were indexed"""
+        files = self.partition_files()
+        stale = [path for path in files if self.get(path) is None]
+        names = {path.name for path in files}
+        removed = [name for name in self.data["partitions"] if name not in names]
+        for name in removed:
+            del self.data["partitions"][name]
+            del self.partitions[name]
+
+        if stale:
+            workers = workers or min(len(stale), os.cpu_count() or 1)
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    entries = list(executor.map(_index_partition_file, stale))
+            else:
+                entries = [_index_partition_file(path) for path in stale]
+
+            for path, entry in zip(stale, entries):
+                previous = self.data["partitions"].get(path.name)
+                if previous and "offset" in previous:
+                    entry["offset"] = previous["offset"]
+                self.data["partitions"][path.name] = entry
+                self.partitions[path.name] = PartitionIndex(path.name, entry)
+
+        return [path.name for path in stale] + removed
+
+
+def build_from_image(image_path, firmware_dir, workers=None):
+    """Extract the partitions of an ACTTEST0 image into `firmware_dir` and index them"""
+    firmware_dir = Path(firmware_dir)
+    firmware_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(image_path, "rb") as f:
+        binary_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        parse_acttest_header(binary_data)
+        xml_content, xml_start, xml_end = extract_firmware_xml(binary_data)
+        partitions = parse_partitions(xml_content)
+        extracted = extract_partitions(binary_data, partitions, xml_end, str(firmware_dir), workers=workers)
+    finally:
+        binary_data.close()
+
+    index = FirmwareIndex.load(firmware_dir)
+    index.update(workers=workers)
+    for part in extracted:
+        name = part["info"]["filename"]
+        index.data["partitions"][name]["offset"] = part["offset"]
+        index.partitions[name].offset = part["offset"]
+    image_stat = os.stat(image_path)
+    index.data["image"] = {"path": str(image_path), "size": image_stat.st_size, "mtime_ns": image_stat.st_mtime_ns}
+    index.save()
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a persistent index of firmware partitions")
+    parser.add_argument("source", help="Firmware directory (with partitions/) or an ACTTEST0 image")
+    parser.add_argument("firmware_dir", nargs="?", help="Output firmware directory when source is an image")
+    parser.add_argument("--workers", type=int, help="Parallel workers (default: one per CPU)")
+    args = parser.parse_args()
+
+    source = Path(args.source)
+    if source.is_file():
+        firmware_dir = Path(args.firmware_dir or source.parent)
+        print(f"[*] Extracting and indexing {source} into {firmware_dir}")
+        index = build_from_image(source, firmware_dir, workers=args.workers)
+    else:
+        print(f"[*] Indexing partitions in {source}")
+        index = FirmwareIndex.load(source)
+        updated = index.update(workers=args.workers)
+        index.save()
+        print(f"[*] Re-indexed: {', '.join(updated) if updated else 'nothing (index up to date)'}")
+
+    for name, partition in sorted(index.partitions.items()):
+        offset = f"0x{partition.offset:x}" if partition.offset is not None else "-"
+        print(
+            f"    {name:<16} offset {offset:>10}  {partition.size:>9,} bytes  {len(partition.strings):>6} strings  "
+            f"{len(partition.push_offsets):>6} push  {len(partition.jensen_magic):>5} magic"
+        )
+    print(f"[+] Index written to {index.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())